@@ -0,0 +1,93 @@
+import time
+import threading
+
+import settings
+
+
+class Button(object):
+    """
+    Push button read through GPIO edge interrupts, so presses register while the main thread
+    is busy (e.g. waiting for a refresh). An edge is acted on once the level has been stable
+    for the debounce time, and holding the button starts a timer of its own. Events are
+    passed to on_event from the GPIO and timer threads:
+    - 'press': released before hold_time
+    - 'hold': held down for hold_time
+    """
+
+    def __init__(self, gpio, pin, on_event, hold_time, debounce=None):
+        """
+        :param gpio: The RPi.GPIO module, with the pin set up as an input pulled up.
+        :param pin: Button pin, pulled low while pressed.
+        :param on_event: Called with 'press' or 'hold'.
+        :param hold_time: Seconds the button must be held for a 'hold'.
+        :param debounce: Seconds the level must be stable, settings.BUTTON_DEBOUNCE by default.
+        """
+        self.gpio = gpio
+        self.pin = pin
+        self.on_event = on_event
+        self.hold_time = hold_time
+        self.debounce = settings.BUTTON_DEBOUNCE if debounce is None else debounce
+        self.lock = threading.Lock()
+        self.pressed = gpio.input(pin) == gpio.LOW
+        self.held = False
+        # time of the first edge still settling, and the timers
+        self.edge_time = None
+        self.settle_timer = None
+        self.hold_timer = None
+
+    def _timer(self, delay, function):
+        timer = threading.Timer(delay, function)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def start(self):
+        self.gpio.add_event_detect(self.pin, self.gpio.BOTH, callback=self._edge)
+
+    def stop(self):
+        self.gpio.remove_event_detect(self.pin)
+        with self.lock:
+            for timer in (self.settle_timer, self.hold_timer):
+                if timer is not None:
+                    timer.cancel()
+
+    def _edge(self, channel):
+        # GPIO thread: every bounce restarts the settle timer
+        with self.lock:
+            if self.edge_time is None:
+                self.edge_time = time.time()
+            if self.settle_timer is not None:
+                self.settle_timer.cancel()
+            self.settle_timer = self._timer(self.debounce, self._settled)
+
+    def _settled(self):
+        with self.lock:
+            pressed = self.gpio.input(self.pin) == self.gpio.LOW
+            edge_time, self.edge_time, self.settle_timer = self.edge_time, None, None
+            if pressed == self.pressed:
+                # a glitch, or a press and release within the debounce time
+                return
+            self.pressed = pressed
+            if pressed:
+                # the hold is timed from the first edge, not from when it settled
+                self.held = False
+                self.hold_timer = self._timer(max(0, edge_time + self.hold_time - time.time()), self._hold)
+                return
+            if self.hold_timer is not None:
+                self.hold_timer.cancel()
+                self.hold_timer = None
+            if self.held:
+                return
+        self.on_event('press')
+
+    def _hold(self):
+        with self.lock:
+            self.hold_timer = None
+            if not self.pressed:
+                return
+            if self.gpio.input(self.pin) != self.gpio.LOW:
+                # the release edge was missed
+                self.pressed = False
+                return
+            self.held = True
+        self.on_event('hold')
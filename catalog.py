@@ -0,0 +1,147 @@
+import os
+import json
+import logging
+
+from framecache import current_file_path
+
+
+class Catalog(object):
+    """
+    Displayable images (BMPs) by folder, kept in memory. Each lookup costs one stat of the
+    folder: it is listed again only when its mtime changes (an entry was added, removed or
+    renamed), so choosing the next image needs no filesystem scan however large the library.
+    """
+
+    def __init__(self, path=None, on_new_files=None):
+        """
+        :param path: File to keep the catalog in between runs, relative to the script's directory, or None.
+        :param on_new_files: Called with the non-BMP files found when a folder is listed, e.g. to convert them.
+        """
+        self.path = os.path.join(current_file_path, path) if path else None
+        self.on_new_files = on_new_files
+        # folder -> [mtime_ns, sorted BMP paths, last created BMP or None if not worked out yet]
+        self.folders = {}
+        # parent folder -> [mtime_ns, last created subfolder]
+        self.parents = {}
+        self.dirty = False
+        if self.path:
+            self.load()
+
+    def _mtime(self, folder):
+        try:
+            return os.stat(folder).st_mtime_ns
+        except OSError:
+            return None
+
+    def _list(self, folder, mtime):
+        images, others = [], []
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.') or not entry.is_file():
+                        continue
+                    if entry.name.lower().endswith('.bmp'):
+                        images.append(entry.path)
+                    else:
+                        others.append(entry.path)
+        except OSError as e:
+            logging.info(f"Error listing {folder}: {e}")
+        images.sort()
+        entry = self.folders[folder] = [mtime, images, None]
+        self.dirty = True
+        if others and self.on_new_files:
+            self.on_new_files(others)
+        return entry
+
+    def _folder(self, folder):
+        folder = os.path.abspath(folder)
+        mtime = self._mtime(folder)
+        if mtime is None:
+            self.folders.pop(folder, None)
+            return None
+        entry = self.folders.get(folder)
+        if entry is None or entry[0] != mtime:
+            entry = self._list(folder, mtime)
+        return entry
+
+    def images(self, folder):
+        """
+        All BMPs in a folder.
+        :param folder: Path to the folder.
+        :return: Sorted list of BMP paths, empty if there are none or the folder is missing.
+        """
+        entry = self._folder(folder)
+        return entry[1] if entry else []
+
+    def latest_image(self, folder):
+        """
+        The last created BMP in a folder.
+        :param folder: Path to the folder.
+        :return: Its path, or None if the folder has no BMPs.
+        """
+        entry = self._folder(folder)
+        if not entry or not entry[1]:
+            return None
+        if entry[2] is None:
+            entry[2] = max(entry[1], key=os.path.getctime)
+        return entry[2]
+
+    def latest_folder(self, parent):
+        """
+        The last created subfolder, worked out again only when parent's entries change.
+        :param parent: Path to the folder containing the subfolders.
+        :return: Its path, or None if there are no subfolders.
+        """
+        parent = os.path.abspath(parent)
+        mtime = self._mtime(parent)
+        if mtime is None:
+            return None
+        entry = self.parents.get(parent)
+        if entry is None or entry[0] != mtime:
+            latest, latest_ctime = None, None
+            with os.scandir(parent) as entries:
+                for dir_entry in entries:
+                    if dir_entry.is_dir() and not dir_entry.name.startswith('.'):
+                        ctime = dir_entry.stat().st_ctime
+                        if latest_ctime is None or ctime > latest_ctime:
+                            latest, latest_ctime = dir_entry.path, ctime
+            entry = self.parents[parent] = [mtime, latest]
+            self.dirty = True
+        return entry[1]
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as catalog_file:
+                data = json.load(catalog_file)
+        except (IOError, ValueError):
+            return
+        for key, (mtime, names) in data.get('folders', {}).items():
+            folder = os.path.join(current_file_path, key)
+            self.folders[folder] = [mtime, [os.path.join(folder, name) for name in names], None]
+        for key, (mtime, latest) in data.get('parents', {}).items():
+            self.parents[os.path.join(current_file_path, key)] = [
+                mtime, latest and os.path.join(current_file_path, latest)]
+
+    def save(self):
+        """
+        Write the catalog, if it has a path and changed.
+        :return:
+        """
+        if not self.path or not self.dirty:
+            return
+        relative = lambda path: os.path.relpath(path, current_file_path)
+        data = {
+            'folders': {relative(folder): [entry[0], [os.path.basename(path) for path in entry[1]]]
+                        for folder, entry in self.folders.items()},
+            'parents': {relative(parent): [entry[0], entry[1] and relative(entry[1])]
+                        for parent, entry in self.parents.items()},
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as catalog_file:
+                json.dump(data, catalog_file)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            logging.info(f"Error saving image catalog: {e}")
@@ -0,0 +1,361 @@
+import io
+import os
+import queue
+import hashlib
+import logging
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageChops
+
+import settings
+
+# driver instances used for packing, one per model and worker process
+_drivers = {}
+
+
+def convert_image(image_path, bmp_image_path, model=None, remove_source=False, digest=None, master_path=None):
+    """
+    Load an image, scale it to maximize the crop area, crop it to 300x400 pixels (crop and fill),
+    convert it to black and white, and save it as a BMP file for an e-ink display.
+    Runs in a worker process.
+
+    :param image_path: The path to the image file.
+    :param bmp_image_path: Where to save the BMP.
+    :param model: Driver module (e.g. 'epd4in2_V2') to also pack the frame buffer for, or None.
+    :param remove_source: Delete image_path once the BMP is saved.
+    :param digest: SHA-1 of the image file, computed here if not given.
+    :param master_path: Where to also save a grayscale master, see save_master, or None.
+    :return: (digest, frame buffer or None)
+    """
+    if digest is None:
+        sha1 = hashlib.sha1()
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                sha1.update(chunk)
+        digest = sha1.hexdigest()
+    # Load the image
+    with Image.open(image_path) as image:
+        if master_path:
+            # the BMP is fitted from the master: one decode for both
+            image = save_master(image, master_path)
+        frame = save_converted(image, bmp_image_path, model)
+    if remove_source:
+        os.remove(image_path)
+    return digest, frame
+
+
+def convert_data(data, bmp_image_path, model=None, max_pixels=None):
+    """
+    Convert an image held in memory, e.g. a download, without writing the original anywhere.
+    :param data: The encoded image.
+    :param bmp_image_path: Where to save the BMP.
+    :param model: Driver module to also pack the frame buffer for, or None.
+    :param max_pixels: Largest width x height decoded, settings.FETCH_MAX_PIXELS by default.
+    :return: The frame buffer, or None without model.
+    :raises ValueError: If the image has more pixels than max_pixels.
+    """
+    max_pixels = max_pixels or settings.FETCH_MAX_PIXELS
+    # opening reads only the header: refuse before decoding anything
+    image = Image.open(io.BytesIO(data))
+    if image.size[0] * image.size[1] > max_pixels:
+        raise ValueError(f"{image.size[0]}x{image.size[1]} is over the {max_pixels} pixel limit")
+    return save_converted(image, bmp_image_path, model)
+
+
+def _driver(model):
+    if model not in _drivers:
+        _drivers[model] = importlib.import_module('waveshare_epd.' + model).EPD()
+    return _drivers[model]
+
+
+def save_converted(image, bmp_image_path, model=None):
+    """
+    Fit an opened image to the panel, save it as a BMP and pack it, see convert_image.
+    :return: The frame buffer, or None without model.
+    """
+    # Convert the image to black and white
+    bw_image = fit_image(image).convert('1')
+    # Save the image as a BMP file
+    bw_image.save(bmp_image_path, 'BMP')
+    # Pack the frame for the panel now, so showing it needs no decoding
+    frame = None
+    if model:
+        frame = bytes(_driver(model).getbuffer(bw_image))
+    return frame
+
+
+def save_master(image, master_path, size=None):
+    """
+    Save an opened image scaled down to size on its longest side, in grayscale, as a PNG master
+    other panel sizes are fitted from (the hub). The 1 bit BMP would only resample to blocks.
+    :param image: Opened PIL image, JPEGs are decoded at a reduced scale where that still covers the size.
+    :param master_path: Where to save the master.
+    :param size: Longest side, settings.HUB_MASTER_SIZE by default.
+    :return: The master image.
+    """
+    size = size or settings.HUB_MASTER_SIZE
+    # thumbnail drafts JPEGs and keeps the aspect ratio, every panel crops its own
+    image.thumbnail((size, size), Image.LANCZOS)
+    master = image.convert('L')
+    os.makedirs(os.path.dirname(master_path), exist_ok=True)
+    master.save(master_path, 'PNG')
+    return master
+
+
+def white_bit(model):
+    """
+    How a driver packs 1 bit per pixel frames, worked out from the frame of a blank image.
+    :param model: Driver module, e.g. 'epd4in2_V2'.
+    :return: 1 if a set bit is white (mode '1' raw data, most panels), 0 if it is black (e.g. epd7in5_V2),
+             None if the driver's frames aren't 1 bit per pixel.
+    """
+    driver = _driver(model)
+    size = (driver.width, driver.height)
+    blank = bytes(driver.getbuffer(Image.new('1', size, 255)))
+    if len(blank) != (driver.width + 7) // 8 * driver.height:
+        return None
+    # the row padding bits differ between drivers: compare the pixels only
+    extrema = Image.frombytes('1', size, blank).getextrema()
+    return {(255, 255): 1, (0, 0): 0}.get(extrema)
+
+
+def save_frame(buf, bmp_image_path, model):
+    """
+    Save a packed 1 bit per pixel frame buffer (e.g. from a hub) as a BMP. Nothing is decoded
+    or resampled: mode '1' raw data is the panel layout, inverted for panels where a set bit is black.
+    :param buf: Frame buffer packed for model.
+    :param bmp_image_path: Where to save the BMP.
+    :param model: Driver module the buffer was packed for.
+    :return:
+    :raises ValueError: If buf isn't a 1 bit per pixel frame of the panel's size.
+    """
+    driver = _driver(model)
+    bit = white_bit(model)
+    if bit is None:
+        raise ValueError(f"{model} frames aren't 1 bit per pixel")
+    if len(buf) != (driver.width + 7) // 8 * driver.height:
+        raise ValueError(f"{len(buf)} bytes is not a {driver.width}x{driver.height} frame")
+    image = Image.frombytes('1', (driver.width, driver.height), bytes(buf))
+    if not bit:
+        image = ImageChops.invert(image)
+    image.save(bmp_image_path, 'BMP')
+
+
+def fit_image(image, width=300, height=400):
+    """
+    Scale an image to maximize the crop area and crop it to width x height pixels (crop and fill).
+    :param image: Opened PIL image, JPEGs are decoded at a reduced scale where that still covers the size.
+    :return: The cropped image.
+    """
+    # Get the original image size
+    original_width, original_height = image.size
+    # Calculate the scaling factor to maximize the crop area
+    if original_width < original_height:
+        scale_factor = width / original_width
+    else:
+        scale_factor = height / original_height
+    # Scale the image
+    scaled_width = int(original_width * scale_factor)
+    scaled_height = int(original_height * scale_factor)
+    # JPEG: decode straight to grayscale at the smallest 1/2, 1/4 or 1/8 DCT scale that still
+    # covers the target, instead of the full resolution; no-op for other formats
+    image.draft('L', (scaled_width, scaled_height))
+    # reducing_gap shrinks by whole factors first (cheap box reduce), then resamples the rest
+    scaled_image = image.resize((scaled_width, scaled_height), Image.LANCZOS, reducing_gap=3.0)
+    # Calculate the crop box to center the image
+    left = (scaled_width - width) / 2
+    top = (scaled_height - height) / 2
+    right = (scaled_width + width) / 2
+    bottom = (scaled_height + height) / 2
+    # Crop the image to width x height pixels
+    return scaled_image.crop((left, top, right, bottom))
+
+
+def _fork_context():
+    # fork, where available: spawned or forkserver workers would re-run the importing script's
+    # top level, frame_eink.py has no __main__ guard. ConversionPool.start() forks before any thread runs
+    try:
+        return multiprocessing.get_context('fork')
+    except ValueError:
+        return None
+
+
+def _lower_priority(nice):
+    try:
+        os.nice(nice)
+    except OSError:
+        pass
+
+
+class ConversionPool(object):
+    """
+    Converts images on a pool of worker processes so ingest never blocks the caller.
+    Results come back through collect(), which runs the completion callbacks in the
+    calling thread, e.g. once per main loop tick.
+    """
+
+    def __init__(self, workers=None, nice=None, model=None, notify=None):
+        """
+        :param workers: Worker processes, settings.CONVERT_WORKERS by default (0: one less than the CPU count).
+        :param nice: Niceness added to the workers, settings.CONVERT_NICE by default.
+        :param model: Driver module to pack frame buffers for, see convert_image.
+        :param notify: Called from the executor's thread when a callback is ready for collect(), e.g. to wake an event loop.
+        """
+        workers = settings.CONVERT_WORKERS if workers is None else workers
+        if workers <= 0:
+            workers = max(1, (os.cpu_count() or 1) - 1)
+        self.workers = workers
+        self.nice = settings.CONVERT_NICE if nice is None else nice
+        self.model = model
+        self.notify = notify
+        self.executor = None
+        # a worker died, e.g. killed for memory on a huge image: the executor takes no more work
+        self.broken = False
+        self.lock = threading.Lock()
+        self.results = queue.Queue()
+        self.pending = set()
+        self.failed = {}
+        self.done = 0
+        self.total = 0
+
+    def start(self):
+        """
+        Fork all the worker processes now. Call it before the program starts any thread: a fork
+        copies only the calling thread, so a lock another thread holds at that moment (logging,
+        the import lock, ...) stays locked in the worker forever. The pool forks again only to
+        replace workers that died.
+        :return:
+        """
+        with self.lock:
+            self._start()
+
+    def _start(self):
+        # called with self.lock held
+        if self.executor is not None and not self.broken:
+            return
+        if self.executor is not None:
+            # other threads run by now: the driver is made here so the new workers needn't import
+            logging.info("A conversion worker died, starting new workers")
+            self.executor.shutdown(wait=False)
+            if self.model:
+                _driver(self.model)
+        self.broken = False
+        self.executor = ProcessPoolExecutor(self.workers, mp_context=_fork_context(),
+                                            initializer=_lower_priority, initargs=(self.nice,))
+        # the executor forks its processes on the first submits: make them all now
+        for future in [self.executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def is_pending(self, path):
+        """
+        :param path: Source image or BMP path.
+        :return: True if a queued or running conversion reads or writes it.
+        """
+        with self.lock:
+            return path in self.pending
+
+    def submit(self, image_path, bmp_image_path=None, on_done=None, remove_source=False, digest=None,
+               master_path=None):
+        """
+        Queue an image for conversion.
+        :param image_path: The path to the image file.
+        :param bmp_image_path: Where to save the BMP, next to the image by default.
+        :param on_done: Called from collect() as on_done(image_path, bmp_image_path, digest, frame, error).
+        :param remove_source: Delete the image once converted.
+        :param digest: SHA-1 of the image file, if the caller already has it.
+        :param master_path: Where to also save a grayscale master, see save_master.
+        :return: True if queued, False if it is queued already, failed before unchanged or couldn't be queued.
+        """
+        if bmp_image_path is None:
+            bmp_image_path = os.path.splitext(image_path)[0] + '.bmp'
+        try:
+            mtime = os.path.getmtime(image_path)
+        except OSError:
+            return False
+        with self.lock:
+            if image_path in self.pending or self.failed.get(image_path) == mtime:
+                return False
+            self.pending.update((image_path, bmp_image_path))
+            if self.done == self.total:
+                # idle before: progress counts from this batch
+                self.done = self.total = 0
+            self.total += 1
+        args = (image_path, bmp_image_path, self.model, remove_source, digest, master_path)
+        try:
+            executor, future = self._submit(args)
+        except Exception as e:
+            with self.lock:
+                self.pending.discard(image_path)
+                self.pending.discard(bmp_image_path)
+                self.total -= 1
+            logging.info(f"Error queueing {image_path}: {e}")
+            return False
+        future.add_done_callback(lambda f: self._finished(f, executor, image_path, bmp_image_path, mtime, on_done))
+        return True
+
+    def _submit(self, args):
+        # the executor may have broken since the last result came back: once more on new workers
+        for retry in (True, False):
+            with self.lock:
+                self._start()
+                executor = self.executor
+            try:
+                return executor, executor.submit(convert_image, *args)
+            except BrokenProcessPool:
+                if not retry:
+                    raise
+                with self.lock:
+                    self.broken = self.broken or self.executor is executor
+
+    def _finished(self, future, executor, image_path, bmp_image_path, mtime, on_done):
+        # runs on the executor's thread: bookkeeping only, callbacks wait for collect()
+        digest, frame, error = None, None, future.exception()
+        if error is None:
+            digest, frame = future.result()
+        with self.lock:
+            if isinstance(error, BrokenProcessPool) and self.executor is executor:
+                self.broken = True
+            self.pending.discard(image_path)
+            self.pending.discard(bmp_image_path)
+            self.done += 1
+            if error is not None:
+                self.failed[image_path] = mtime
+            done, total = self.done, self.total
+        if error is None:
+            logging.info(f"Converted {image_path} ({done}/{total})")
+        else:
+            logging.info(f"Error processing and saving image {image_path}: {error} ({done}/{total})")
+        if on_done is not None:
+            self.results.put((on_done, (image_path, bmp_image_path, digest, frame, error)))
+            if self.notify is not None:
+                self.notify()
+
+    def collect(self):
+        """
+        Run the callbacks of finished conversions, never waiting for running ones.
+        :return: Number of callbacks run.
+        """
+        count = 0
+        while True:
+            try:
+                on_done, args = self.results.get_nowait()
+            except queue.Empty:
+                return count
+            on_done(*args)
+            count += 1
+
+    def progress(self):
+        """
+        :return: (done, total) of the current batch, (n, n) when idle.
+        """
+        with self.lock:
+            return self.done, self.total
+
+    def shutdown(self, wait=True):
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+            self.executor = None
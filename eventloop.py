@@ -0,0 +1,143 @@
+import time
+import heapq
+import queue
+import logging
+import itertools
+
+
+class EventLoop(object):
+    """
+    Runs named timers and events posted from other threads on the calling thread. It sleeps
+    until the next timer is due or an event arrives, instead of waking up at a fixed rate.
+    """
+
+    def __init__(self, retry_min=1, retry_max=300):
+        """
+        :param retry_min: Seconds a timer that raised waits at least before it runs again, doubling
+                          with each failure in a row up to retry_max.
+        :param retry_max: Longest wait in seconds after a failure.
+        """
+        # (kind, payload) tuples, put from any thread
+        self.events = queue.Queue()
+        self.handlers = {}
+        # heap of (due, seq, name); entries whose seq isn't the name's current one are stale
+        self.timers = []
+        # name -> (due, seq, callback)
+        self.due = {}
+        self.counter = itertools.count()
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        # name -> (failures in a row, time.time() before which the timer doesn't run again)
+        self.backoff = {}
+        self.running = False
+
+    def on(self, kind, handler):
+        """
+        :param kind: Event kind, e.g. 'config'.
+        :param handler: Called with the list of payloads of the events of that kind posted since the last wakeup.
+        :return:
+        """
+        self.handlers[kind] = handler
+
+    def post(self, kind, payload=None):
+        """
+        Queue an event and wake the loop. Safe to call from any thread.
+        :return:
+        """
+        self.events.put((kind, payload))
+
+    def call_at(self, when, name, callback):
+        """
+        Schedule the timer called name, replacing its earlier due time if it has one.
+        :param when: time.time() to run it at, a time in the past runs it at the next wakeup;
+                     not before its back-off is over if it raised the last time it ran.
+        :param name: Timer name.
+        :param callback: Called without arguments.
+        :return:
+        """
+        backoff = self.backoff.get(name)
+        if backoff and when < backoff[1]:
+            when = backoff[1]
+        entry = self.due.get(name)
+        if entry and entry[0] == when and entry[2] == callback:
+            return
+        seq = next(self.counter)
+        self.due[name] = (when, seq, callback)
+        heapq.heappush(self.timers, (when, seq, name))
+
+    def call_later(self, delay, name, callback):
+        self.call_at(time.time() + delay, name, callback)
+
+    def cancel(self, name):
+        self.due.pop(name, None)
+
+    def next_due(self):
+        """
+        :return: Due time of the next timer, or None if there is none.
+        """
+        while self.timers:
+            when, seq, name = self.timers[0]
+            entry = self.due.get(name)
+            if entry and entry[1] == seq:
+                return when
+            heapq.heappop(self.timers)
+        return None
+
+    def run_once(self):
+        """
+        Sleep until the next timer is due or an event arrives, then run the event handlers
+        and the timers that are due. Their exceptions are logged, not raised.
+        :return:
+        """
+        when = self.next_due()
+        timeout = None if when is None else max(0, when - time.time())
+        batches = {}
+        try:
+            event = self.events.get(timeout=timeout) if timeout != 0 else self.events.get_nowait()
+            while True:
+                batches.setdefault(event[0], []).append(event[1])
+                event = self.events.get_nowait()
+        except queue.Empty:
+            pass
+        for kind, payloads in batches.items():
+            handler = self.handlers.get(kind)
+            if handler is not None:
+                # a failing handler is logged, the other handlers and the loop keep running
+                try:
+                    handler(payloads)
+                except Exception:
+                    logging.exception(f"Error handling {kind} events")
+        now = time.time()
+        while True:
+            when = self.next_due()
+            if when is None or when > now:
+                break
+            name = heapq.heappop(self.timers)[2]
+            try:
+                self.due.pop(name)[2]()
+                self.backoff.pop(name, None)
+            except Exception:
+                # re-armed from state the failure didn't advance it would run again right away
+                failures = self.backoff.get(name, (0, 0))[0] + 1
+                delay = min(self.retry_max, self.retry_min * 2 ** (failures - 1))
+                self.backoff[name] = (failures, time.time() + delay)
+                entry = self.due.get(name)
+                if entry:
+                    # it re-armed itself before it raised
+                    self.call_at(entry[0], name, entry[2])
+                logging.exception(f"Error running timer {name}, retrying in {delay} s at the earliest")
+
+    def run(self, before=None):
+        """
+        Run until stop() is called.
+        :param before: Called before each sleep, e.g. to arm timers from the state the last wakeup left.
+        :return:
+        """
+        self.running = True
+        while self.running:
+            if before is not None:
+                before()
+            self.run_once()
+
+    def stop(self):
+        self.running = False
@@ -0,0 +1,194 @@
+import os
+import json
+import hashlib
+import logging
+from urllib.parse import urljoin
+from xml.etree import ElementTree
+from concurrent.futures import ThreadPoolExecutor
+
+import settings
+import converter
+from fetchcache import read_body
+from framecache import current_file_path
+
+MEDIA_NS = '{http://search.yahoo.com/mrss/}'
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+# checksum algorithm by length of the hex digest
+HASHES = {32: 'md5', 40: 'sha1', 64: 'sha256'}
+
+
+def parse_checksum(value):
+    """
+    :param value: Hex digest, optionally prefixed with its algorithm, e.g. 'sha256:...'.
+    :return: (algorithm, lower case hex digest), or None if value is empty or not a digest.
+    """
+    if not value:
+        return None
+    value = str(value).strip().lower()
+    if ':' in value:
+        value = value.split(':', 1)[1]
+    algorithm = HASHES.get(len(value))
+    try:
+        int(value, 16)
+    except ValueError:
+        return None
+    return (algorithm, value) if algorithm else None
+
+
+def parse_feed(data, base_url=''):
+    """
+    Image URLs listed in a manifest, either JSON: a list of URLs or of {"url", "sha256"/"sha1"/"md5"/"checksum"}
+    objects, alone or under "images" or "items"; or RSS/Atom: item enclosures, media:content or links, with an
+    optional media:hash.
+    :param data: The manifest, bytes or str.
+    :param base_url: URL of the manifest, relative image URLs are resolved against it.
+    :return: List of (url, checksum) in manifest order, checksum as parse_checksum.
+    """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    data = data.strip()
+    items = []
+    if data[:1] in ('[', '{'):
+        manifest = json.loads(data)
+        if isinstance(manifest, dict):
+            manifest = manifest.get('images') or manifest.get('items') or []
+        for item in manifest:
+            if isinstance(item, str):
+                items.append((item, None))
+            elif isinstance(item, dict) and item.get('url'):
+                checksum = next((item[key] for key in ('sha256', 'sha1', 'md5', 'checksum') if item.get(key)), None)
+                items.append((item['url'], parse_checksum(checksum)))
+    else:
+        root = ElementTree.fromstring(data)
+        for item in list(root.iter('item')) + list(root.iter(ATOM_NS + 'entry')):
+            url = None
+            for element in item.iter():
+                if element.tag == 'enclosure' and element.get('type', 'image/').startswith('image/'):
+                    url = element.get('url')
+                elif element.tag == MEDIA_NS + 'content' and element.get('medium', 'image') == 'image':
+                    url = element.get('url')
+                if url:
+                    break
+            if not url:
+                link = item.find('link')
+                if link is None:
+                    link = item.find(ATOM_NS + 'link')
+                if link is not None:
+                    url = link.get('href') or (link.text or '').strip()
+            if url:
+                media_hash = item.find('.//' + MEDIA_NS + 'hash')
+                items.append((url, parse_checksum(media_hash.text) if media_hash is not None else None))
+    return [(urljoin(base_url, url), checksum) for url, checksum in items]
+
+
+class Feed(object):
+    """
+    Network playlist following a remote manifest of image URLs. Each sync downloads only the
+    images that aren't in the playlist folder yet, several at a time, checks them against their
+    checksum and converts them; images no longer listed are removed. Files are named after the
+    checksum, so a changed image is a new file. Images without one are named after the URL and
+    asked for again on each sync with a conditional request, a changed one replaces its file.
+    """
+
+    def __init__(self, cache, on_frame, folder=None, model=None, workers=None):
+        """
+        :param cache: FetchCache to fetch the manifest with; its session downloads the images.
+        :param on_frame: Called from the download threads as on_frame(bmp_image_path, digest, frame) for each new image.
+        :param folder: Playlist folder, relative to the script's directory, settings.FEED_FOLDER by default.
+        :param model: Driver module to pack frame buffers for, see converter.convert_image.
+        :param workers: Concurrent downloads, settings.FEED_DOWNLOADS by default.
+        """
+        self.cache = cache
+        self.on_frame = on_frame
+        self.folder = os.path.join(current_file_path, folder or settings.FEED_FOLDER)
+        # URL and items of the last manifest fetched, checked again when the server says unchanged
+        self.manifest_url = None
+        self.items = None
+        self.model = model
+        self.workers = workers or settings.FEED_DOWNLOADS
+
+    def name(self, url, checksum):
+        return (checksum[1] if checksum else hashlib.sha1(url.encode('utf-8')).hexdigest()) + '.bmp'
+
+    def sync(self, manifest_url):
+        """
+        Bring the playlist in line with the manifest.
+        :param manifest_url: URL of the JSON or RSS manifest.
+        :return: Dictionary with the number of 'added', 'updated', 'removed' and 'failed' images.
+        :raises Exception: If the manifest can't be fetched or parsed.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        if manifest_url != self.manifest_url:
+            # nothing parsed from it yet in this run: fetch it whole
+            self.cache.forget(manifest_url)
+        try:
+            data = self.cache.fetch_content(manifest_url)
+        finally:
+            self.cache.save()
+        if data is not None:
+            try:
+                self.items = parse_feed(data, manifest_url)
+            except Exception:
+                # the cache has its digest already: get it whole next time
+                self.cache.forget(manifest_url)
+                self.manifest_url = None
+                raise
+            self.manifest_url = manifest_url
+        # a 304 still checks for images that failed last time
+        items = self.items
+        wanted = {self.name(url, checksum): (url, checksum) for url, checksum in items}
+        present = {name for name in os.listdir(self.folder) if name.lower().endswith('.bmp')}
+        # no checksum: the file being there doesn't mean it is current
+        missing = [(name, url, checksum) for name, (url, checksum) in wanted.items()
+                   if name not in present or not checksum]
+        report = {'added': 0, 'updated': 0, 'removed': 0, 'failed': 0}
+        if missing:
+            try:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    for name, ok in zip([item[0] for item in missing],
+                                        pool.map(lambda item: self._download(*item), missing)):
+                        if ok is not None:
+                            report[('updated' if name in present else 'added') if ok else 'failed'] += 1
+            finally:
+                self.cache.save()
+        for name in present - set(wanted):
+            try:
+                os.remove(os.path.join(self.folder, name))
+                report['removed'] += 1
+            except OSError:
+                pass
+        logging.info("feed: {} images, {added} added, {updated} updated, {removed} removed, {failed} failed".format(
+            len(wanted), **report))
+        return report
+
+    def _download(self, name, url, checksum):
+        # download thread: read into memory, check it, convert it into the playlist;
+        # True if saved, False if it failed, None if the server said unchanged
+        bmp_image_path = os.path.join(self.folder, name)
+        # a hidden name keeps the catalog and the watcher away from the partial file
+        tmp_path = os.path.join(self.folder, '.' + name + '.part')
+        try:
+            if checksum:
+                with self.cache.session.get(url, stream=True, timeout=self.cache.timeout) as response:
+                    response.raise_for_status()
+                    data = read_body(response)
+                if hashlib.new(checksum[0], data).hexdigest() != checksum[1]:
+                    raise ValueError("checksum mismatch")
+            else:
+                if not os.path.exists(bmp_image_path):
+                    self.cache.forget(url)
+                data = self.cache.fetch_content(url)
+                if data is None:
+                    return None
+            frame = converter.convert_data(data, tmp_path, self.model)
+            os.replace(tmp_path, bmp_image_path)
+        except Exception as e:
+            logging.info(f"Error fetching feed image {url}: {e}")
+            if not checksum:
+                # the cache has the new validators already: get it whole next time
+                self.cache.forget(url)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        self.on_frame(bmp_image_path, hashlib.sha1(data).hexdigest(), frame)
+        return True
@@ -0,0 +1,152 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import settings
+from framecache import current_file_path
+
+
+def new_session():
+    """
+    HTTP session whose connections are kept and reused between fetches.
+    :return: The requests.Session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings.FETCH_POOL_SIZE)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def read_body(response, max_bytes=None):
+    """
+    Read a streamed response into memory, refusing bodies larger than max_bytes.
+    :param response: requests response opened with stream=True.
+    :param max_bytes: Largest body accepted, settings.FETCH_MAX_BYTES by default.
+    :return: The body.
+    :raises ValueError: If the body is larger than max_bytes.
+    """
+    max_bytes = max_bytes or settings.FETCH_MAX_BYTES
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit() and int(length) > max_bytes:
+        raise ValueError(f"{length} bytes is over the {max_bytes} byte limit")
+    body = bytearray()
+    for chunk in response.iter_content(1 << 16):
+        body += chunk
+        if len(body) > max_bytes:
+            raise ValueError(f"more than the {max_bytes} byte limit")
+    return bytes(body)
+
+
+class FetchCache(object):
+    """
+    Validators (ETag, Last-Modified) and content digests of downloaded URLs. A fetch sends a
+    conditional request and returns the content only if the server sent content that changed,
+    so an unchanged remote image costs a 304 (or one download) and nothing downstream.
+    Safe to use from several threads.
+    """
+
+    def __init__(self, path=None, session=None, timeout=None):
+        """
+        :param path: File to keep the cache in, relative to the script's directory, settings.FETCH_CACHE_PATH by default.
+        :param session: requests.Session to fetch with, a new pooled one by default.
+        :param timeout: (connect, read) timeout in seconds, settings.FETCH_TIMEOUT by default.
+        """
+        self.path = os.path.join(current_file_path, path or settings.FETCH_CACHE_PATH)
+        self.session = session or new_session()
+        self.timeout = timeout or settings.FETCH_TIMEOUT
+        # url -> {'etag', 'last_modified', 'digest'}
+        self.entries = {}
+        # the fetch thread and the feed's download threads share the entries
+        self.lock = threading.Lock()
+        self.dirty = False
+        try:
+            with open(self.path, 'r') as cache_file:
+                self.entries = json.load(cache_file)
+        except (IOError, ValueError):
+            pass
+
+    def forget(self, url):
+        """
+        Drop what is known about a URL, e.g. when the file it was saved to is gone, so it is downloaded again.
+        :return:
+        """
+        with self.lock:
+            if self.entries.pop(url, None) is not None:
+                self.dirty = True
+
+    def digest(self, url):
+        """
+        :return: Digest of the content last fetched from url, or None.
+        """
+        with self.lock:
+            return self.entries.get(url, {}).get('digest')
+
+    def _get(self, url, verify):
+        # conditional GET, streamed
+        with self.lock:
+            entry = self.entries.get(url, {})
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return self.session.get(url, headers=headers, stream=True, timeout=self.timeout, verify=verify)
+
+    def _record(self, url, response, digest):
+        # :return: True if digest differs from the one recorded before
+        with self.lock:
+            changed = digest != self.entries.get(url, {}).get('digest')
+            self.entries[url] = {'etag': response.headers.get('ETag'),
+                                 'last_modified': response.headers.get('Last-Modified'),
+                                 'digest': digest}
+            self.dirty = True
+        return changed
+
+    def fetch_content(self, url, verify=True, max_bytes=None):
+        """
+        Download a URL into memory unless the content is unchanged since the last fetch.
+        :param url: The URL.
+        :param verify: Verify the server's TLS certificate.
+        :param max_bytes: Largest body accepted, see read_body.
+        :return: The body, or None if the server or the digest said unchanged.
+        :raises requests.RequestException: On connection errors, timeouts and error statuses.
+        :raises ValueError: If the body is too large.
+        """
+        with self._get(url, verify) as response:
+            if response.status_code == 304:
+                logging.info(f"{url} not modified")
+                return None
+            response.raise_for_status()
+            body = read_body(response, max_bytes)
+            changed = self._record(url, response, hashlib.sha1(body).hexdigest())
+        if not changed:
+            logging.info(f"{url} unchanged")
+            return None
+        return body
+
+    def save(self):
+        """
+        Write the cache if it changed.
+        :return:
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            entries = json.dumps(self.entries)
+            self.dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as cache_file:
+                cache_file.write(entries)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            with self.lock:
+                self.dirty = True
+            logging.info(f"Error saving fetch cache: {e}")
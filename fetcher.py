@@ -0,0 +1,155 @@
+import os
+import random
+import socket
+import logging
+import threading
+from urllib.parse import urljoin
+
+import requests
+
+import settings
+import converter
+from framecache import current_file_path
+
+
+class Fetcher(object):
+    """
+    Downloads the network image (and syncs the feed) on a thread and schedule of its own,
+    converts it there and hands the finished frame to on_frame, so network latency never
+    holds up the display. Failed fetches are retried with exponential backoff and jitter.
+    """
+
+    def __init__(self, cache, get_url, on_frame, interval=None, model=None, folder='netimage',
+                 feed=None, get_feed_url=None, get_hub_url=None):
+        """
+        :param cache: FetchCache, shared with the feed's download threads.
+        :param get_url: Called before each fetch for the URL, may return None to skip it.
+        :param on_frame: Called from the fetch thread as on_frame(bmp_image_path, digest, frame) for each new image.
+        :param interval: Seconds between fetches, settings.FETCH_EVERY by default.
+        :param model: Driver module to pack frame buffers for, see converter.convert_image.
+        :param folder: Folder for the converted images, relative to the script's directory.
+        :param feed: Feed to sync along with the image, or None.
+        :param get_feed_url: Called before each sync for the feed's manifest URL, may return None to skip it.
+        :param get_hub_url: Called before each fetch for the base URL of a hub (server.py) to fetch the
+                            current image from, packed for this panel, may return None to skip it.
+        """
+        self.cache = cache
+        self.get_url = get_url
+        self.on_frame = on_frame
+        self.interval = settings.FETCH_EVERY if interval is None else interval
+        self.model = model
+        self.folder = os.path.join(current_file_path, folder)
+        self.feed = feed
+        self.get_feed_url = get_feed_url
+        self.get_hub_url = get_hub_url
+        # (hub URL, frame buffer URL) once registered
+        self.hub = None
+        self.failures = 0
+        self.wakeup = threading.Event()
+        self.stopping = False
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='fetcher', daemon=True)
+        self.thread.start()
+
+    def wake(self):
+        """
+        Fetch now instead of at the next scheduled time, e.g. after the URL changed.
+        :return:
+        """
+        self.wakeup.set()
+
+    def stop(self):
+        self.stopping = True
+        self.wakeup.set()
+
+    def retry_delay(self):
+        """
+        :return: Seconds to wait after the current run of failures: doubling from
+                 settings.FETCH_RETRY_MIN up to the fetch interval, with up to half of it taken off at random.
+        """
+        delay = min(self.interval, settings.FETCH_RETRY_MIN * 2 ** (self.failures - 1))
+        return random.uniform(delay / 2, delay)
+
+    def fetch_once(self, url):
+        """
+        Download the image if it changed and convert it from memory: only the BMP and the
+        packed frame are written, never the original.
+        :param url: The image URL.
+        :return: True if a new image was handed to on_frame.
+        :raises Exception: On network and conversion errors, and images over the size limits.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        bmp_image_path = os.path.join(self.folder, os.path.splitext(os.path.basename(url))[0] + '.bmp')
+        if not os.path.exists(bmp_image_path):
+            # the converted image is gone, download it again even if unchanged
+            self.cache.forget(url)
+        try:
+            data = self.cache.fetch_content(url, verify=False)
+        finally:
+            self.cache.save()
+        if data is None:
+            return False
+        frame = converter.convert_data(data, bmp_image_path, self.model)
+        self.on_frame(bmp_image_path, self.cache.digest(url), frame)
+        return True
+
+    def fetch_hub(self, url):
+        """
+        Fetch the hub's current image as a frame buffer packed for this panel, if it changed:
+        nothing is decoded, resampled or packed here.
+        :param url: Base URL of the hub.
+        :return: True if a new image was handed to on_frame.
+        :raises Exception: On network errors and buffers that don't fit the panel.
+        """
+        if self.hub is None or self.hub[0] != url:
+            response = self.cache.session.post(urljoin(url.rstrip('/') + '/', 'hub/register'),
+                                               json={'id': socket.gethostname(), 'model': self.model},
+                                               timeout=self.cache.timeout)
+            response.raise_for_status()
+            self.hub = (url, urljoin(url, response.json()['frame']))
+        frame_url = self.hub[1]
+        os.makedirs(self.folder, exist_ok=True)
+        bmp_image_path = os.path.join(self.folder, 'hub.bmp')
+        if not os.path.exists(bmp_image_path):
+            self.cache.forget(frame_url)
+        try:
+            buf = self.cache.fetch_content(frame_url)
+        except requests.HTTPError:
+            # e.g. the hub lost its registry: register again next time
+            self.hub = None
+            raise
+        finally:
+            self.cache.save()
+        if buf is None:
+            return False
+        converter.save_frame(buf, bmp_image_path, self.model)
+        self.on_frame(bmp_image_path, self.cache.digest(frame_url), buf)
+        return True
+
+    def _run(self):
+        while not self.stopping:
+            jobs = [(self.get_url(), self.fetch_once)]
+            if self.get_hub_url is not None:
+                jobs.append((self.get_hub_url(), self.fetch_hub))
+            if self.feed is not None and self.get_feed_url is not None:
+                jobs.append((self.get_feed_url(), self.feed.sync))
+            failed = False
+            for url, job in jobs:
+                if not url:
+                    continue
+                try:
+                    job(url)
+                except Exception as e:
+                    failed = True
+                    logging.info(f"Error fetching {url}: {e}")
+            if failed:
+                self.failures += 1
+                delay = self.retry_delay()
+                logging.info(f"Retrying in {delay:.0f} s")
+            else:
+                self.failures = 0
+                delay = self.interval
+            self.wakeup.wait(delay)
+            self.wakeup.clear()
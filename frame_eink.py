@@ -13,10 +13,10 @@ import struct
 
 from datetime import datetime
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import subprocess
 
-import requests
 import json
 import random
 
@@ -29,10 +29,62 @@ if os.path.exists(libdir):
     sys.path.append(libdir)
 
 import logging
-from waveshare_epd import epd4in2_V2
-import RPi.GPIO as GPIO
-
 import settings
+import framecache
+import manifest
+import converter
+import catalog
+import fetchcache
+import fetcher
+import feed
+import watcher
+import eventloop
+import button
+
+# an EPD_BACKEND set in the environment wins over settings
+if settings.EPD_BACKEND:
+    os.environ.setdefault('EPD_BACKEND', settings.EPD_BACKEND)
+
+from waveshare_epd import epd4in2_V2, epdrefresh, epdasync
+
+try:
+    import RPi.GPIO as GPIO
+except ImportError:
+    if not isinstance(epd4in2_V2.epdconfig.implementation, epd4in2_V2.epdconfig.Simulated):
+        raise
+
+    class GPIO(object):
+        # no RPi.GPIO off the Pi: the button always reads released
+        BOARD = IN = PUD_UP = BOTH = None
+        LOW, HIGH = 0, 1
+
+        @staticmethod
+        def setwarnings(flag):
+            pass
+
+        @staticmethod
+        def setmode(mode):
+            pass
+
+        @staticmethod
+        def setup(pin, direction, pull_up_down=None):
+            pass
+
+        @staticmethod
+        def input(pin):
+            return GPIO.HIGH
+
+        @staticmethod
+        def add_event_detect(pin, edge, callback=None, bouncetime=None):
+            pass
+
+        @staticmethod
+        def remove_event_detect(pin):
+            pass
+
+        @staticmethod
+        def cleanup():
+            pass
 
 GPIO.setwarnings(settings.GPIO_WARNINGS)
 GPIO.setmode(GPIO.BOARD)
@@ -44,16 +96,54 @@ config = None
 last_modified_time = 0
 last_update_image = 0
 last_network = 0
+last_shown = 0
 
 mode = 0
-previous_button_state = GPIO.input(settings.BUTTON_PIN)
-button_pressed_time = 0
+rnd = False
+cur_image = 0
 
 update_config_every = settings.UPDATE_CONFIG_EVERY
 hold_to_shutdown = settings.HOLD_TO_SHUTDOWN
 max_modes = settings.MAX_MODES
 
 epd = epd4in2_V2.EPD()
+refresh = epdrefresh.RefreshScheduler(epd, settings.PARTIAL_REFRESH_AREA, settings.FAST_REFRESH_AREA,
+                                      settings.FULL_REFRESH_EVERY)
+# refreshes run on the panel's own thread, a frame queued behind a newer one is dropped
+panel = epdasync.AsyncDisplay(refresh)
+# renders the frame of the image due next while the panel refreshes
+prefetcher = ThreadPoolExecutor(max_workers=1)
+# lists and hashes the files of a USB device for import_usb_images
+usb_hasher = ThreadPoolExecutor(max_workers=1)
+usb_scan = None
+prefetched = None
+# timers and the events of the watcher, the conversions and the button, run by the main thread
+loop = eventloop.EventLoop()
+frames = framecache.FrameCache(epd)
+imports = manifest.ImportManifest(settings.IMPORT_MANIFEST)
+imports.seed(frames)
+frames.prune()
+conversions = converter.ConversionPool(model=framecache.model_name(epd), notify=lambda: loop.post('converted'))
+# fork the workers while this is the only thread: the panel, prefetch and watcher threads start later
+conversions.start()
+library = catalog.Catalog(settings.CATALOG_PATH, on_new_files=lambda paths: convert_new_files(paths))
+# downloads and converts config['url_image'] and the images of config['url_feed'], and fetches the
+# frames packed by the hub at config['url_hub'], on its own thread; new frames come back as 'fetched'
+# and 'feed' events
+fetches = fetchcache.FetchCache()
+net = fetcher.Fetcher(fetches, lambda: config and config.get('url_image'),
+                      lambda *fetched: loop.post('fetched', fetched), model=framecache.model_name(epd),
+                      feed=feed.Feed(fetches, lambda *fetched: loop.post('feed', fetched),
+                                     model=framecache.model_name(epd)),
+                      get_feed_url=lambda: config and config.get('url_feed'),
+                      get_hub_url=lambda: config and config.get('url_hub'))
+# edits to config.txt and new images, reported as they happen
+changes = watcher.Watcher(loop.events)
+changes.add('config', 'config.txt')
+changes.add('images', 'images', recursive=True, suffix='.bmp')
+changes.add('netimage', 'netimage', suffix='.bmp')
+# short press: next mode, hold: shut down
+mode_button = button.Button(GPIO, settings.BUTTON_PIN, lambda event: loop.post('button', event), hold_to_shutdown)
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -63,6 +153,12 @@ def shutdown_m():
     Shutdown the Raspberry Pi.
     :return:
     """
+    mode_button.stop()
+    net.stop()
+    conversions.shutdown(wait=False)
+    prefetcher.shutdown(wait=False)
+    usb_hasher.shutdown(wait=False)
+    panel.shutdown()
     epd4in2_V2.epdconfig.module_exit(cleanup=True)
     GPIO.cleanup()
     subprocess.run(['sudo', 'shutdown', '-h', 'now'])
@@ -85,6 +181,130 @@ def is_usb_device_mounted():
     return False
 
 
+def unique_destination(folder, name, digest):
+    """
+    Path in folder for an imported file that clashes with no existing file or its BMP.
+    :param folder: Destination folder.
+    :param name: File name on the USB device.
+    :param digest: Content digest, used to tell same-named files apart.
+    :return: The destination path.
+    """
+    destination = os.path.join(folder, name)
+    stem, ext = os.path.splitext(destination)
+    if os.path.exists(destination) or os.path.exists(stem + '.bmp') or conversions.is_pending(stem + '.bmp'):
+        destination = "{}-{}{}".format(stem, digest[:8], ext)
+    return destination
+
+
+def import_usb_images(device_name, usb_images_folder):
+    """
+    Start importing the images on a USB device that are not in the library yet. The files are
+    listed and hashed on the hasher thread, so a stick full of photos doesn't hold up the
+    button or the images; usb_hashed() then queues the new ones on the main thread.
+
+    :param device_name: Name of the USB device under the mount point.
+    :param usb_images_folder: The 'images' folder on the device.
+    :return: False if the device is still being hashed from an earlier check, True otherwise.
+    """
+    global usb_scan
+    if usb_scan is not None and not usb_scan.done():
+        return False
+    usb_scan = usb_hasher.submit(hash_usb_images, device_name, usb_images_folder)
+    usb_scan.add_done_callback(lambda f: loop.post('usb', f))
+    return True
+
+
+def hash_usb_images(device_name, usb_images_folder):
+    """
+    List and hash the files on a USB device, on the hasher thread. Only reads the manifest:
+    files whose size and mtime it knows aren't read again.
+
+    :param device_name: Name of the USB device under the mount point.
+    :param usb_images_folder: The 'images' folder on the device.
+    :return: (device_name, usb_images_folder, [(relative path, path, manifest key, stat, digest or error)])
+    """
+    files = []
+    for root, dirs, names in os.walk(usb_images_folder):
+        dirs.sort()
+        for name in sorted(names):
+            # hidden files: .DS_Store, ._* resource forks and the like
+            if name.startswith('.'):
+                continue
+            src_item = os.path.join(root, name)
+            rel_item = os.path.relpath(src_item, usb_images_folder)
+            key = "{}/{}".format(device_name, rel_item)
+            try:
+                stat = os.stat(src_item)
+                digest = imports.cached(key, stat) or framecache.file_digest(src_item)
+            except OSError as e:
+                stat, digest = None, e
+            files.append((rel_item, src_item, key, stat, digest))
+    return device_name, usb_images_folder, files
+
+
+def usb_hashed(futures):
+    """
+    Queue the hashed files of a USB device for conversion, straight from the device. Files are
+    recognized by content, so images already imported to any dated folder are skipped.
+    :param futures: Finished hash_usb_images futures.
+    :return:
+    """
+    for future in futures:
+        try:
+            device_name, usb_images_folder, files = future.result()
+        except Exception as e:
+            logging.info(f"Error reading the USB device: {e}")
+            continue
+        report = {'queued': [], 'skipped': [], 'failed': []}
+        queued_digests = set()
+
+        # Get the current date in the format YYYY-MM-DD
+        current_date = datetime.now().strftime('%Y-%m-%d')
+        current_file_path = os.path.dirname(os.path.abspath(__file__))
+        destination_folder = os.path.join(current_file_path, 'images', current_date)
+
+        for rel_item, src_item, key, stat, digest in files:
+            if isinstance(digest, OSError):
+                logging.info(f"Error reading {rel_item}: {digest}")
+                report['failed'].append(rel_item)
+                continue
+            imports.remember(key, stat, digest)
+            if imports.imported(digest) or digest in queued_digests:
+                report['skipped'].append(rel_item)
+                continue
+
+            os.makedirs(destination_folder, exist_ok=True)
+            name = os.path.basename(src_item)
+            bmp_item = os.path.splitext(unique_destination(destination_folder, name, digest))[0] + '.bmp'
+            if conversions.submit(src_item, bmp_item, on_done=imported, digest=digest):
+                queued_digests.add(digest)
+                report['queued'].append(rel_item)
+            else:
+                # still converting from an earlier check
+                report['skipped'].append(rel_item)
+
+        imports.save()
+        logging.info("{} images queued for import to {}, {} already imported, {} failed".format(
+            len(report['queued']), destination_folder, len(report['skipped']), len(report['failed'])))
+        if report['skipped']:
+            logging.debug("skipped: {}".format(', '.join(report['skipped'])))
+        if report['failed']:
+            logging.info("failed: {}".format(', '.join(report['failed'])))
+
+
+def imported(image_path, bmp_image_path, digest, frame, error):
+    """
+    Record a finished USB import in the manifest.
+    :return:
+    """
+    if error is None:
+        frames.put(bmp_image_path, digest, frame)
+        imports.record(digest, bmp_image_path)
+    elif os.path.exists(image_path):
+        # not an image we can show, don't try it again; a pulled stick is retried next time
+        imports.record(digest, None)
+
+
 def check_usb_content():
     """
     Check if the 'images' folder and 'config.txt' and 'wifi.txt' files exist on the USB device mounted in /media/vasily.
@@ -107,32 +327,7 @@ def check_usb_content():
 
             # Check if the 'images' folder exists on the USB device
             if os.path.exists(usb_images_folder) and os.path.isdir(usb_images_folder):
-                # Get the current date in the format YYYY-MM-DD
-                current_date = datetime.now().strftime('%Y-%m-%d')
-
-                # Get the path of the current Python file
-                current_file_path = os.path.dirname(os.path.abspath(__file__))
-                destination_folder = os.path.join(current_file_path, 'images', current_date)
-
-                # Create the destination folder if it doesn't exist
-                os.makedirs(destination_folder, exist_ok=True)
-
-                # Copy the contents of the 'images' folder to the destination folder
-                try:
-                    i = 0
-                    for item in os.listdir(usb_images_folder):
-                        src_item = os.path.join(usb_images_folder, item)
-                        dst_item = os.path.join(destination_folder, item)
-                        if os.path.isdir(src_item):
-                            shutil.copytree(src_item, dst_item)
-                        else:
-                            shutil.copy2(src_item, dst_item)
-                        i = i + 1
-                    logging.info("{} images coppied to {}".format(i, destination_folder))
-
-                    process_all_images_in_folder('images/{}'.format(current_date))
-                except Exception as e:
-                    logging.info(f"Error copying files: {e}")
+                import_usb_images(device_name, usb_images_folder)
             else:
                 logging.info("There no new images")
 
@@ -205,110 +400,46 @@ def load_config_file():
         return None
 
 
-def copy_image_from_url():
+def converted(image_path, bmp_image_path, digest, frame, error):
     """
-    Copy an image from a URL specified in the 'config.txt' file to the 'netimage' folder within the script's root directory.
-    :return: True if the image is copied successfully, False otherwise.
+    Store the packed frame of a finished conversion.
+    :return:
     """
-    try:
-        # Check if 'url_image' exists in the config and is not empty
-        if 'url_image' in config and config['url_image']:
-            url_image = config['url_image']
-
-            # Get the path of the current Python file
-            current_file_path = os.path.dirname(os.path.abspath(__file__))
-            netimage_folder_path = os.path.join(current_file_path, 'netimage')
-
-            # Create the 'netimage' folder if it doesn't exist
-            if not os.path.exists(netimage_folder_path):
-                os.makedirs(netimage_folder_path)
-
-            # Download the image from the URL
-            response = requests.get(url_image, stream=True, verify=False)
-            response.raise_for_status()
-
-            print(response)
+    if error is None:
+        frames.put(bmp_image_path, digest, frame)
 
-            # Save the image to the 'netimage' folder
-            image_filename = os.path.basename(url_image)
-            image_path = os.path.join(netimage_folder_path, image_filename)
 
-            with open(image_path, 'wb') as image_file:
-                response.raw.decode_content = True
-                shutil.copyfileobj(response.raw, image_file)
-
-            return True
-        else:
-            logging.info("'url_image' not found or is empty in the config file.")
-            return False
-    except Exception as e:
-        logging.info(f"Error copying image from URL: {e}")
-        return False
-
-
-def process_and_save_image(image_path):
+def convert_new_files(paths):
     """
-    Load an image, scale it to maximize the crop area, crop it to 300x400 pixels (crop and fill),
-    convert it to black and white, and save it as a 16-bit BMP file for an e-ink display.
-
-    :param image_path: The path to the image file.
-    :return: True if the image is processed and saved successfully, False otherwise.
+    Queue the non-BMP files the catalog found for conversion, only those in the dated
+    images/<date> folders: 'us' and the feed folder are managed by the user and the feed,
+    their files are never converted or removed.
+    :param paths: Paths of the non-BMP files of a listed folder.
+    :return:
     """
-    try:
-        # Load the image
-        image = Image.open(image_path)
-        # Get the original image size
-        original_width, original_height = image.size
-        # Calculate the scaling factor to maximize the crop area
-        if original_width < original_height:
-            scale_factor = 300 / original_width
-        else:
-            scale_factor = 400 / original_height
-        # Scale the image
-        scaled_width = int(original_width * scale_factor)
-        scaled_height = int(original_height * scale_factor)
-        scaled_image = image.resize((scaled_width, scaled_height), Image.ANTIALIAS)
-        # Calculate the crop box to center the image
-        left = (scaled_width - 300) / 2
-        top = (scaled_height - 400) / 2
-        right = (scaled_width + 300) / 2
-        bottom = (scaled_height + 400) / 2
-        # Crop the image to 300x400 pixels
-        cropped_image = scaled_image.crop((left, top, right, bottom))
-        # Convert the image to black and white
-        bw_image = cropped_image.convert('1')
-        # Save the image as a 16-bit BMP file
-        bmp_image_path = os.path.splitext(image_path)[0] + '.bmp'
-        bw_image.save(bmp_image_path, 'BMP')
-        # Delete the original file
-        os.remove(image_path)
-        logging.info('image converted')
-        return True
-    except Exception as e:
-        logging.info(f"Error processing and saving image: {e}")
-        return False
+    images_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images')
+    for image_path in paths:
+        if os.path.dirname(os.path.dirname(image_path)) == images_folder:
+            conversions.submit(image_path, on_done=converted, remove_source=True)
 
 
 def process_all_images_in_folder(folder_path):
     """
-    Load all non-BMP images in the specified folder, process them, and save them as 16-bit BMP files.
+    Queue all non-BMP images in the specified folder for conversion to BMP files.
 
     :param folder_path: The path to the folder containing the images.
-    :return: True if all images are processed and saved successfully, False otherwise.
+    :return: True if the folder was scanned successfully, False otherwise.
     """
     current_file_path = os.path.dirname(os.path.abspath(__file__))
     folder_path = os.path.join(current_file_path, folder_path)
     try:
         # Get a list of all non-BMP image files in the folder
         image_files = glob.glob(os.path.join(folder_path, '*'))
-        non_bmp_images = [f for f in image_files if not f.lower().endswith('.bmp')]
+        non_bmp_images = [f for f in image_files if not f.lower().endswith('.bmp') and os.path.isfile(f)]
 
-        # Process each non-BMP image
+        # Convert them in the background, converted() picks up the results
         for image_path in non_bmp_images:
-            if process_and_save_image(image_path):
-                logging.info(f"Processed and saved {image_path} successfully.")
-            else:
-                logging.info(f"Failed to process and save {image_path}.")
+            conversions.submit(image_path, on_done=converted, remove_source=True)
 
         return True
     except Exception as e:
@@ -322,13 +453,11 @@ def update_config():
     :return:
     """
     global config, last_modified_time, update_config_every
+    # due again whether or not this one gets through, see schedule()
+    last_modified_time = time.time() + update_config_every
     check_usb_content()
     config = load_config_file()
-    if config:
-        new_image = copy_image_from_url()
-        if new_image:
-            process_all_images_in_folder('netimage')
-    last_modified_time = time.time() + update_config_every
+    library.save()
 
 
 def get_last_created_image(folder_path):
@@ -337,13 +466,10 @@ def get_last_created_image(folder_path):
     :param folder_path: Path to the folder containing images.
     :return: The last created image file path, or None if no images are found.
     """
-    # Use glob to find all image files in the folder
-    image_files = glob.glob(os.path.join(folder_path, '*.bmp'))
-    if not image_files:
+    last_created_image = library.latest_image(folder_path)
+    if not last_created_image:
         logging.info("No image files found in the specified folder.")
         return False
-    # Get the creation time of each image file and find the most recent one
-    last_created_image = max(image_files, key=os.path.getctime)
     return last_created_image
 
 
@@ -353,9 +479,9 @@ def get_all_images(folder_path):
     :param folder_path: Path to the folder containing images.
     :return: A list of image file paths, or an empty list if no images are found.
     """
-    # Use glob to find all image files in the folder
-    image_files = glob.glob(os.path.join(folder_path, '*.bmp'))
-    return image_files
+    if not folder_path:
+        return []
+    return library.images(folder_path)
 
 
 def get_last_created_folder(directory_path):
@@ -364,16 +490,66 @@ def get_last_created_folder(directory_path):
     :param directory_path: Path to the directory containing folders.
     :return: The last created folder path, or None if no folders are found.
     """
-    # Get all directories in the specified path
-    directories = [d for d in os.listdir(directory_path) if os.path.isdir(os.path.join(directory_path, d))]
-    if not directories:
+    # New non-BMP files in it are queued for conversion by the catalog when it lists the folder
+    last_created_folder = library.latest_folder(directory_path)
+    if not last_created_folder:
         logging.info("No folders found in the specified directory.")
         return None
-    # Get the creation time of each directory and find the most recent one
-    last_created_folder = max(directories, key=lambda d: os.path.getctime(os.path.join(directory_path, d)))
-    process_all_images_in_folder(os.path.join(directory_path, last_created_folder))
+    return last_created_folder
+
+
+def render_frame(image_path):
+    """
+    Frame buffer of a converted image, from the cache or packed from the BMP. Only reads
+    shared state, so it can run on the prefetch thread.
+    :param image_path: Path to the BMP.
+    :return: (buf, digest): digest is None if buf came from the cache, else the BMP's digest to cache buf under.
+    """
+    buf = frames.get(image_path)
+    if buf is not None:
+        return buf, None
+    with Image.open(image_path) as image:
+        return epd.getbuffer(image), framecache.file_digest(image_path)
+
 
-    return os.path.join(directory_path, last_created_folder)
+def prefetch(image_path):
+    """
+    Render the frame of the image shown next in the background.
+    :param image_path: Path to the BMP.
+    :return:
+    """
+    global prefetched
+    try:
+        mtime = os.path.getmtime(image_path)
+    except OSError:
+        return
+    if prefetched and prefetched[:2] == (image_path, mtime):
+        return
+    prefetched = (image_path, mtime, prefetcher.submit(render_frame, image_path))
+
+
+def show_frame(image_path):
+    """
+    Display a converted image, straight from its packed frame when the cache has one.
+    :param image_path: Path to the BMP.
+    :return: Future of the refresh, or None if the image is gone or can't be rendered.
+    """
+    global last_shown, prefetched
+    ahead, prefetched = prefetched, None
+    try:
+        if ahead and ahead[:2] != (image_path, os.path.getmtime(image_path)):
+            ahead = None
+        buf, digest = ahead[2].result() if ahead else render_frame(image_path)
+    except Exception as e:
+        # removed since it was listed, or not a readable BMP: the caller moves on
+        logging.info(f"Error rendering {image_path}: {e}")
+        return None
+    if digest is not None:
+        # converted before the cache existed or changed since: cache it now
+        frames.put(image_path, digest, buf)
+        frames.save()
+    last_shown = time.time()
+    return panel.display(buf)
 
 
 def show_netimage():
@@ -387,8 +563,7 @@ def show_netimage():
     netimage_folder_path = os.path.join(current_file_path, 'netimage')
     image = get_last_created_image(netimage_folder_path)
     if image:
-        Himage = Image.open(image)
-        epd.display(epd.getbuffer(Himage))
+        show_frame(image)
     last_network = time.time() + config['refresh_rate'] * 10
     last_update_image = time.time() + config['refresh_rate'] * 2
 
@@ -403,15 +578,21 @@ def show_next_image(cur, folder_name, rand=False):
     """
     global last_update_image, config
     current_file_path = os.path.dirname(os.path.abspath(__file__))
-    if folder_name == 'us':
+    if folder_name in ('us', settings.FEED_FOLDER):
         folder = os.path.join(current_file_path, folder_name)
     else:
         image_folder_path = os.path.join(current_file_path, folder_name)
         folder = get_last_created_folder(image_folder_path)
     images = get_all_images(folder)
+    if cur >= len(images):
+        # the folder changed since the last image
+        cur = 0
     if images and images[cur]:
-        Himage = Image.open(images[cur])
-        epd.display(epd.getbuffer(Himage))
+        # skip the images that can't be shown, at most once round the folder
+        for _ in range(len(images)):
+            if show_frame(images[cur]) is not None:
+                break
+            cur = (cur + 1) % len(images)
         if rand:
             random.seed(time.time())
             cur = random.randint(0, len(images) - 1)
@@ -420,10 +601,148 @@ def show_next_image(cur, folder_name, rand=False):
             cur = cur + 1
             if cur >= len(images):
                 cur = 0
+        # the panel is busy for a while: get the next frame ready meanwhile
+        prefetch(images[cur])
     last_update_image = time.time() + config['refresh_rate']
     return cur
 
 
+def config_changed(paths):
+    """
+    Reload config.txt after it was edited, and show the next image with the new settings.
+    :param paths: The changed paths reported by the watcher.
+    :return:
+    """
+    global config, mode, rnd, last_update_image
+    new_config = load_config_file()
+    if new_config:
+        config = new_config
+        rnd = bool(config.get('random'))
+        if config.get('mode'):
+            mode = config['mode']
+        last_update_image = 0
+        # the URL may have changed
+        net.wake()
+
+
+def images_changed(paths):
+    """
+    Continue from the newest upload, once the current image had its minimum time.
+    :param paths: The changed paths in 'images' reported by the watcher.
+    :return:
+    """
+    global cur_image, last_update_image
+    if not config or mode not in (0, 1):
+        return
+    uploads = [path for path in paths if path.lower().endswith('.bmp') and os.path.isfile(path)]
+    if not uploads:
+        return
+    folder = get_last_created_folder(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images'))
+    images = get_all_images(folder)
+    for upload in reversed(uploads):
+        if upload in images:
+            cur_image = images.index(upload)
+            last_update_image = min(last_update_image, last_shown + settings.MIN_IMAGE_TIME)
+            break
+
+
+def netimage_changed(paths):
+    """
+    Show a new network image now.
+    :param paths: The changed paths in 'netimage' reported by the watcher.
+    :return:
+    """
+    global last_network, last_update_image
+    if config and mode in (1, 2):
+        last_network = 0
+        last_update_image = 0
+
+
+def fetched(payloads):
+    """
+    Cache the frames of new network images and show them.
+    :param payloads: (bmp_image_path, digest, frame) of each new image.
+    :return:
+    """
+    for bmp_image_path, digest, frame in payloads:
+        frames.put(bmp_image_path, digest, frame)
+    frames.save()
+    netimage_changed([bmp_image_path for bmp_image_path, digest, frame in payloads])
+
+
+def feed_fetched(payloads):
+    """
+    Cache the frames of new feed images, they join the feed playlist.
+    :param payloads: (bmp_image_path, digest, frame) of each new image.
+    :return:
+    """
+    for bmp_image_path, digest, frame in payloads:
+        frames.put(bmp_image_path, digest, frame)
+    frames.save()
+
+
+def conversions_finished(payloads):
+    """
+    Apply finished background conversions.
+    :return:
+    """
+    if conversions.collect():
+        frames.save()
+        imports.save()
+        library.save()
+
+
+def check_for_updates():
+    """
+    Scheduled update: USB content and config, and frame cache upkeep.
+    :return:
+    """
+    global rnd
+    update_config()
+    if config and config.get('random'):
+        rnd = True
+    # buffers of replaced network images, feed items that left the feed and deleted uploads
+    frames.prune()
+    frames.save()
+
+
+def show_due_image():
+    """
+    Show the next image of the current mode.
+    :return:
+    """
+    global cur_image, last_update_image
+    if mode == 3:
+        cur_image = show_next_image(cur_image, settings.FEED_FOLDER, rnd)
+    elif mode == 0:
+        cur_image = show_next_image(cur_image, 'images', rnd)
+    elif mode == 1:
+        if last_network < time.time():
+            show_netimage()
+        else:
+            cur_image = show_next_image(cur_image, 'images', rnd)
+    elif mode == 2:
+        if last_network < time.time():
+            show_netimage()
+        else:
+            cur_image = show_next_image(cur_image, 'us', rnd)
+    else:
+        # nothing to show in this mode, look again after a refresh period
+        last_update_image = time.time() + config['refresh_rate']
+
+
+def schedule():
+    """
+    Arm the timers from the due times the last wakeup left in the globals.
+    :return:
+    """
+    loop.call_at(last_modified_time, 'update', check_for_updates)
+    if config and 'refresh_rate' in config and config['refresh_rate']:
+        loop.call_at(last_update_image, 'image', show_due_image)
+    else:
+        loop.cancel('image')
+
+
 def get_ip_address(ifname='wlan0'):
     """
     Get the current IP address of the specified network interface.
@@ -444,7 +763,7 @@ def get_ip_address(ifname='wlan0'):
 def show_info():
     """
     Display the current IP address on the e-ink display.
-    :return:
+    :return: Future of the refresh.
     """
     global epd, config, last_update_image
 
@@ -457,6 +776,8 @@ def show_info():
         draw.text((10, 0), 'Uploaded images + online', font=font16, fill=0)
     elif mode == 2:
         draw.text((10, 0), 'US', font=font16, fill=0)
+    elif mode == 3:
+        draw.text((10, 0), 'Network feed', font=font16, fill=0)
     ip_address = get_ip_address('wlan0')
     draw.text((10, 30), "ip: {}".format(ip_address), font=font16, fill=0)
     # print all config values in format key: value
@@ -465,35 +786,41 @@ def show_info():
         for key, value in config.items():
             draw.text((10, y), f"{key}: {value}", font=font16, fill=0)
             y = y + 30
-    epd.display(epd.getbuffer(Limage))
-    last_update_image = 0
-    time.sleep(2)
+    # the next image follows 2 seconds after the info is up, see info_shown
+    last_update_image = time.time() + settings.UPDATE_CONFIG_EVERY
+    future = panel.show(Limage)
+    future.add_done_callback(lambda f: loop.post('info'))
+    return future
 
 
-def read_button():
+def info_shown(events):
     """
-    Read the state of the button and perform the appropriate action.
+    Show the next image 2 seconds after the info screen.
+    :return:
+    """
+    global last_update_image
+    last_update_image = time.time() + 2
+
+
+def button_pressed(events):
+    """
+    Perform the action of the button events queued since the last wakeup.
     - short press: switch to the next mode
     - long press: shutdown the Raspberry Pi
+    :param events: 'press' and 'hold' events from the button.
     :return:
     """
-    global previous_button_state, mode, button_pressed_time, hold_to_shutdown
-    button_state = GPIO.input(32)
-    if button_state == GPIO.LOW:
-        if button_pressed_time < time.time() and button_pressed_time != 0:
-            shutdown_m()
-    if button_state != previous_button_state:
-        previous_button_state = button_state
-        if button_state == GPIO.LOW:
-            print("button pressed")
-            button_pressed_time = time.time() + hold_to_shutdown
-        else:
-            print("button released")
-            button_pressed_time = 0
-            mode = mode + 1
-            if mode > max_modes:
-                mode = 0
-            show_info()
+    global mode
+    if 'hold' in events:
+        print("button held")
+        shutdown_m()
+        return
+    for event in events:
+        print("button pressed")
+        mode = mode + 1
+        if mode > max_modes:
+            mode = 0
+    show_info()
 
 
 if __name__ == '__main__':
@@ -502,45 +829,33 @@ if __name__ == '__main__':
         logging.info("Starting")
         random.seed(time.time())
         config = load_config_file()
-        update_config()
+        check_for_updates()
+        logging.info("watching for changes ({})".format(changes.start()))
+        net.start()
 
         logging.info("init and Clear")
-        epd.init()
-        epd.Clear()
-        epd.init_fast(epd.Seconds_1_5S)
-        show_info()
+        panel.clear()
+        show_info().result()
 
         time.sleep(5)
-        epd.Clear()
-
-        rnd = False
-        cur_image = 0
+        panel.clear()
 
         # setup mode on start, after switch with buttons
         if 'mode' in config and config['mode']:
             mode = config['mode']
 
-        while True:
-            if last_modified_time < time.time():
-                update_config()
-                if 'random' in config and config['random']:
-                    rnd = True
-            if 'refresh_rate' in config and config['refresh_rate']:
-                if last_update_image < time.time():
-                    if mode == 0:
-                        cur_image = show_next_image(cur_image, 'images', rnd)
-                    elif mode == 1:
-                        if last_network < time.time():
-                            show_netimage()
-                        else:
-                            cur_image = show_next_image(cur_image, 'images', rnd)
-                    elif mode == 2:
-                        if last_network < time.time():
-                            show_netimage()
-                        else:
-                            cur_image = show_next_image(cur_image, 'us', rnd)
-            read_button()
-            time.sleep(0.1)
+        loop.on('config', config_changed)
+        loop.on('images', images_changed)
+        loop.on('netimage', netimage_changed)
+        loop.on('converted', conversions_finished)
+        loop.on('fetched', fetched)
+        loop.on('feed', feed_fetched)
+        loop.on('button', button_pressed)
+        loop.on('info', info_shown)
+        loop.on('usb', usb_hashed)
+        mode_button.start()
+        # sleeps until the next timer or event
+        loop.run(before=schedule)
 
     except IOError as e:
         logging.info(e)
@@ -548,6 +863,13 @@ if __name__ == '__main__':
     except KeyboardInterrupt:
         # stop the program
         logging.info("ctrl + c:")
+        changes.stop()
+        mode_button.stop()
+        net.stop()
+        conversions.shutdown(wait=False)
+        prefetcher.shutdown(wait=False)
+        usb_hasher.shutdown(wait=False)
+        panel.shutdown()
         epd4in2_V2.epdconfig.module_exit(cleanup=True)
         GPIO.cleanup()
         exit()
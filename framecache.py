@@ -0,0 +1,160 @@
+import os
+import json
+import hashlib
+import logging
+
+import settings
+
+current_file_path = os.path.dirname(os.path.abspath(__file__))
+
+
+def file_digest(path):
+    """
+    SHA-1 of a file's contents.
+    :param path: Path to the file.
+    :return: The hex digest.
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_name(epd):
+    """
+    Driver model an EPD instance belongs to, e.g. 'epd4in2_V2'.
+    :param epd: EPD instance.
+    :return: The driver module name.
+    """
+    return type(epd).__module__.rsplit('.', 1)[-1]
+
+
+class FrameCache(object):
+    """
+    Panel-native frame buffers packed at ingest time, so displaying a converted image needs
+    no decode or packing: frames/<model>/<source digest>.raw holds the buffer and
+    frames/<model>/index.json maps each converted image to its digest. prune() drops the
+    buffers of images that are gone.
+    """
+
+    def __init__(self, epd, root=None):
+        """
+        :param epd: EPD instance the buffers are packed for.
+        :param root: Cache directory, settings.FRAME_CACHE_DIR under the script's directory by default.
+        """
+        self.epd = epd
+        self.model = model_name(epd)
+        root = root or os.path.join(current_file_path, settings.FRAME_CACHE_DIR)
+        self.folder = os.path.join(root, self.model)
+        self.index_path = os.path.join(self.folder, 'index.json')
+        self.index = {}
+        self.dirty = False
+        try:
+            with open(self.index_path, 'r') as index_file:
+                self.index = json.load(index_file)
+        except (IOError, ValueError):
+            pass
+
+    def key(self, image_path):
+        return os.path.relpath(os.path.abspath(image_path), current_file_path)
+
+    def frame_path(self, digest):
+        return os.path.join(self.folder, digest + '.raw')
+
+    def put(self, image_path, digest, buf):
+        """
+        Store the packed buffer of a converted image.
+        :param image_path: Path of the converted image (the BMP) the buffer shows.
+        :param digest: Content digest of the source the image was converted from.
+        :param buf: Frame buffer from epd.getbuffer.
+        :return: buf
+        """
+        frame_path = self.frame_path(digest)
+        if not os.path.exists(frame_path):
+            os.makedirs(self.folder, exist_ok=True)
+            tmp_path = frame_path + '.tmp'
+            with open(tmp_path, 'wb') as frame_file:
+                frame_file.write(buf)
+            os.replace(tmp_path, frame_path)
+        # the image's mtime and size tell a later overwrite of the same name apart
+        stat = os.stat(image_path)
+        self.index[self.key(image_path)] = [digest, stat.st_mtime, stat.st_size]
+        self.dirty = True
+        return buf
+
+    def pack(self, image_path, image, digest=None):
+        """
+        Pack an image for the panel and store it.
+        :param image_path: Path of the converted image.
+        :param image: The decoded image.
+        :param digest: Source digest, the converted image's own digest by default.
+        :return: The frame buffer.
+        """
+        return self.put(image_path, digest or file_digest(image_path), self.epd.getbuffer(image))
+
+    def get(self, image_path):
+        """
+        Read the packed buffer of a converted image.
+        :param image_path: Path of the converted image.
+        :return: The buffer as bytes, or None if it isn't cached or is stale.
+        """
+        entry = self.index.get(self.key(image_path))
+        if not entry:
+            return None
+        digest, mtime, size = entry
+        try:
+            stat = os.stat(image_path)
+            if stat.st_mtime != mtime or stat.st_size != size:
+                return None
+            # a frame is a few KB: one read, nothing left open while the panel holds the buffer
+            with open(self.frame_path(digest), 'rb') as frame_file:
+                return frame_file.read() or None
+        except OSError:
+            return None
+
+    def prune(self):
+        """
+        Drop the entries of converted images that are gone and delete the buffers no entry
+        uses any more, e.g. of replaced network images and feed items that left the feed.
+        :return: Number of buffers deleted.
+        """
+        for key in list(self.index):
+            if not os.path.exists(os.path.join(current_file_path, key)):
+                del self.index[key]
+                self.dirty = True
+        used = {entry[0] for entry in self.index.values()}
+        try:
+            names = os.listdir(self.folder)
+        except OSError:
+            return 0
+        removed = 0
+        for name in names:
+            digest, ext = os.path.splitext(name)
+            # .tmp: left behind by a write that was cut off
+            if ext == '.raw' and digest not in used or ext == '.tmp':
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                    removed += ext == '.raw'
+                except OSError:
+                    pass
+        if removed:
+            logging.info(f"Pruned {removed} cached frames of {self.model}")
+        return removed
+
+    def save(self):
+        """
+        Write the index if it changed.
+        :return:
+        """
+        if not self.dirty:
+            return
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w') as index_file:
+                json.dump(self.index, index_file)
+            os.replace(tmp_path, self.index_path)
+            self.dirty = False
+        except OSError as e:
+            logging.info(f"Error saving frame cache index: {e}")
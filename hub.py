@@ -0,0 +1,168 @@
+import os
+import re
+import json
+import time
+import inspect
+import logging
+import importlib
+import threading
+
+from PIL import Image
+
+import settings
+import converter
+from catalog import Catalog
+from framecache import FrameCache, current_file_path
+
+
+class Hub(object):
+    """
+    Renders the image library for the panel models of the frames registered with it. Each
+    image is fitted from its grayscale master and packed once per model, kept in a FrameCache
+    under settings.HUB_FRAMES_DIR, and served as the panel-native buffer, so frames download a
+    few KB and decode nothing.
+    """
+
+    def __init__(self, registry=None, root=None):
+        """
+        :param registry: File the registered frames are kept in, relative to the script's directory,
+                         settings.HUB_REGISTRY by default.
+        :param root: Frame cache directory, relative to the script's directory, settings.HUB_FRAMES_DIR by default.
+        """
+        self.registry_path = os.path.join(current_file_path, registry or settings.HUB_REGISTRY)
+        self.root = os.path.join(current_file_path, root or settings.HUB_FRAMES_DIR)
+        self.images = os.path.join(current_file_path, 'images')
+        self.masters = os.path.join(self.root, 'masters')
+        self.library = Catalog()
+        # model -> FrameCache
+        self.caches = {}
+        self.lock = threading.RLock()
+        # frame id -> {'model', 'seen'}
+        self.frames = {}
+        try:
+            with open(self.registry_path, 'r') as registry_file:
+                self.frames = json.load(registry_file)
+        except (IOError, ValueError):
+            pass
+
+    def _cache(self, model):
+        if model not in self.caches:
+            if not re.match(r'^epd\w+$', model or ''):
+                raise ValueError(f"unknown panel model {model}")
+            try:
+                epd = importlib.import_module('waveshare_epd.' + model).EPD()
+            except (ImportError, AttributeError):
+                raise ValueError(f"unknown panel model {model}")
+            self.caches[model] = FrameCache(epd, self.root)
+        return self.caches[model]
+
+    def register(self, frame_id, model):
+        """
+        Register a frame, its model's images are rendered from now on.
+        :param frame_id: Name of the frame, e.g. its hostname.
+        :param model: Driver module of its panel, e.g. 'epd4in2_V2'.
+        :return: Dictionary with the panel's 'model', 'width', 'height' and 'bpp' (bits per pixel of the buffer).
+        :raises ValueError: If there is no driver for model, or its frames aren't a single 1 bit per pixel buffer.
+        """
+        with self.lock:
+            epd = self._cache(model).epd
+        blank = epd.getbuffer(Image.new('1', (epd.width, epd.height), 255))
+        bpp = len(blank) * 8 // (epd.width * epd.height)
+        # frames keep what they fetch as a 1 bit BMP (converter.save_frame): 2 bit gray,
+        # 4 bit color and second color plane panels can't show a hub's frames
+        if converter.white_bit(model) is None or len(inspect.signature(epd.display).parameters) != 1:
+            raise ValueError(f"{model} frames aren't a single 1 bit per pixel buffer")
+        with self.lock:
+            self.frames[frame_id] = {'model': model, 'seen': time.time()}
+            self.save()
+        return {'model': model, 'width': epd.width, 'height': epd.height, 'bpp': bpp}
+
+    def models(self):
+        """
+        :return: Set of the registered panel models.
+        """
+        with self.lock:
+            return {frame['model'] for frame in self.frames.values()}
+
+    def current_image(self):
+        """
+        :return: The newest image of the newest upload folder, or None if there are none.
+        """
+        with self.lock:
+            folder = self.library.latest_folder(self.images)
+            return self.library.latest_image(folder) if folder else None
+
+    def master_path(self, image_path):
+        """
+        :param image_path: A converted image (BMP) of the library, or its source.
+        :return: Where its grayscale master is saved, see converter.save_master.
+        """
+        key = os.path.relpath(os.path.abspath(image_path), current_file_path)
+        return os.path.join(self.masters, os.path.splitext(key)[0] + '.png')
+
+    def render(self, model, image_path):
+        """
+        Frame buffer of an image for a panel model, packed on the first request only.
+        :param model: Driver module of the panel.
+        :param image_path: A converted image (BMP) of the library.
+        :return: (digest, buffer): digest identifies the image's content, e.g. as an ETag.
+        """
+        with self.lock:
+            cache = self._cache(model)
+            buf = cache.get(image_path)
+            if buf is None:
+                epd = cache.epd
+                master_path = self.master_path(image_path)
+                # images converted without one: the BMP, resampled in grayscale at least
+                with Image.open(master_path if os.path.exists(master_path) else image_path) as image:
+                    # portrait, like the frame shows it; the driver turns it to the panel's orientation
+                    image = converter.fit_image(image.convert('L'), min(epd.width, epd.height),
+                                                max(epd.width, epd.height))
+                buf = cache.pack(image_path, image)
+                cache.save()
+            return cache.index[cache.key(image_path)][0], buf
+
+    def prerender(self, image_path):
+        """
+        Render a new image for every registered model, so no frame waits for it.
+        :param image_path: The converted image.
+        :return:
+        """
+        for model in self.models():
+            try:
+                self.render(model, image_path)
+            except Exception as e:
+                logging.info(f"Error rendering {image_path} for {model}: {e}")
+
+    def prune(self):
+        """
+        Drop the masters and the rendered frames of images that are gone.
+        :return:
+        """
+        with self.lock:
+            for folder, _, names in os.walk(self.masters):
+                for name in names:
+                    master_path = os.path.join(folder, name)
+                    key = os.path.relpath(master_path, self.masters)
+                    if not os.path.exists(os.path.join(current_file_path, os.path.splitext(key)[0] + '.bmp')):
+                        try:
+                            os.remove(master_path)
+                        except OSError:
+                            pass
+            for model in self.models():
+                try:
+                    cache = self._cache(model)
+                except ValueError:
+                    continue
+                cache.prune()
+                cache.save()
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.registry_path), exist_ok=True)
+            tmp_path = self.registry_path + '.tmp'
+            with open(tmp_path, 'w') as registry_file:
+                json.dump(self.frames, registry_file)
+            os.replace(tmp_path, self.registry_path)
+        except OSError as e:
+            logging.info(f"Error saving hub registry: {e}")
@@ -0,0 +1,113 @@
+import os
+import json
+import logging
+
+from framecache import current_file_path, file_digest
+
+
+class ImportManifest(object):
+    """
+    What has been imported into the library, by content: 'sources' caches the digest of each
+    source file under its size and mtime so unchanged files aren't read again, 'digests' maps
+    each imported digest to the converted image (None if it could not be converted).
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Manifest file, relative to the script's directory.
+        """
+        self.path = os.path.join(current_file_path, path)
+        self.sources = {}
+        self.digests = {}
+        self.dirty = False
+        try:
+            with open(self.path, 'r') as manifest_file:
+                data = json.load(manifest_file)
+            self.sources = data.get('sources', {})
+            self.digests = data.get('digests', {})
+        except (IOError, ValueError):
+            pass
+
+    def seed(self, frames):
+        """
+        Count images converted before the manifest existed as imported.
+        :param frames: FrameCache whose index maps converted images to source digests.
+        :return:
+        """
+        for image_key, entry in frames.index.items():
+            if entry[0] not in self.digests:
+                self.digests[entry[0]] = image_key
+                self.dirty = True
+
+    def digest(self, path, key):
+        """
+        Content digest of a source file, hashed only if its size or mtime changed.
+        :param path: Path to the file.
+        :param key: Stable name of the source, e.g. '<device>/<path on the device>'.
+        :return: The hex digest.
+        """
+        stat = os.stat(path)
+        digest = self.cached(key, stat)
+        if digest is None:
+            digest = file_digest(path)
+            self.remember(key, stat, digest)
+        return digest
+
+    def cached(self, key, stat):
+        """
+        Digest recorded for a source, only reads the manifest so a hashing thread can call it.
+        :param key: Stable name of the source, see digest.
+        :param stat: os.stat() of the file now.
+        :return: The hex digest, or None if the file is new or its size or mtime changed.
+        """
+        entry = self.sources.get(key)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime:
+            return entry[2]
+        return None
+
+    def remember(self, key, stat, digest):
+        """
+        Record the digest of a source hashed elsewhere, see cached.
+        :return:
+        """
+        if self.cached(key, stat) != digest:
+            self.sources[key] = [stat.st_size, stat.st_mtime, digest]
+            self.dirty = True
+
+    def imported(self, digest):
+        """
+        :param digest: Content digest of a source file.
+        :return: True if it is in the library (or failed to convert before), False otherwise.
+        """
+        if digest not in self.digests:
+            return False
+        image_key = self.digests[digest]
+        return image_key is None or os.path.exists(os.path.join(current_file_path, image_key))
+
+    def record(self, digest, image_path):
+        """
+        :param digest: Content digest of the imported source.
+        :param image_path: The converted image, or None if conversion failed.
+        :return:
+        """
+        if image_path is not None:
+            image_path = os.path.relpath(os.path.abspath(image_path), current_file_path)
+        self.digests[digest] = image_path
+        self.dirty = True
+
+    def save(self):
+        """
+        Write the manifest if it changed.
+        :return:
+        """
+        if not self.dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as manifest_file:
+                json.dump({'sources': self.sources, 'digests': self.digests}, manifest_file)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            logging.info(f"Error saving import manifest: {e}")
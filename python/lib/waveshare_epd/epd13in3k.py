@@ -30,6 +30,7 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
 
 # Display resolution
 EPD_WIDTH       = 960
@@ -122,51 +123,47 @@ class EPD:
     def send_data2(self, data):
         epdconfig.digital_write(self.dc_pin, 1)
         epdconfig.digital_write(self.cs_pin, 0)
-        epdconfig.SPI.writebytes2(data)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
 
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        busy = epdconfig.digital_read(self.busy_pin)
-        while(busy == 1):
-            busy = epdconfig.digital_read(self.busy_pin)
-            epdconfig.delay_ms(20)
+        epdconfig.wait_busy(1, 20)
         epdconfig.delay_ms(20)
         logger.debug("e-Paper busy release")
 
     def TurnOnDisplay(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xF7)
+        self.send_command_with_data(0x22, [0xF7])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
 
     def TurnOnDisplay_Part(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xCF)
+        self.send_command_with_data(0x22, [0xCF])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
 
     def TurnOnDisplay_4GRAY(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xC7)
+        self.send_command_with_data(0x22, [0xC7])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
 
     def Lut(self, LUT):
-        self.send_command(0x32)
-        for i in range(105):
-            self.send_data(LUT[i])
+        self.send_command_with_data(0x32, LUT[:105])
 
-        self.send_command(0x03) 
-        self.send_data(LUT[105])
+        self.send_command_with_data(0x03, [LUT[105]])
 
-        self.send_command(0x04)  
-        self.send_data(LUT[106])
-        self.send_data(LUT[107]) 
-        self.send_data(LUT[108])
+        self.send_command_with_data(0x04, LUT[106:109])
 
-        self.send_command(0x2C)
-        self.send_data(LUT[109])
+        self.send_command_with_data(0x2C, [LUT[109]])
         
     def init(self):
         
@@ -177,46 +174,23 @@ class EPD:
         self.send_command(0x12) #SWRESET
         self.ReadBusy()
 
-        self.send_command(0x0C) 
-        self.send_data(0xAE)
-        self.send_data(0xC7)  
-        self.send_data(0xC3)
-        self.send_data(0xC0)
-        self.send_data(0x80)
-
-        self.send_command(0x01) 
-        self.send_data(0xA7)
-        self.send_data(0x02)  
-        self.send_data(0x00)
-
-        self.send_command(0x11)
-        self.send_data(0x03)
-
-        self.send_command(0x44) 
-        self.send_data(0x00)
-        self.send_data(0x00)  
-        self.send_data(0xBF)
-        self.send_data(0x03) 
+        self.send_command_with_data(0x0C, [0xAE, 0xC7, 0xC3, 0xC0, 0x80])
+
+        self.send_command_with_data(0x01, [0xA7, 0x02, 0x00])
+
+        self.send_command_with_data(0x11, [0x03])
+
+        self.send_command_with_data(0x44, [0x00, 0x00, 0xBF, 0x03])
         
-        self.send_command(0x45) 
-        self.send_data(0x00)
-        self.send_data(0x00)  
-        self.send_data(0xA7)
-        self.send_data(0x02)
+        self.send_command_with_data(0x45, [0x00, 0x00, 0xA7, 0x02])
 
-        self.send_command(0x3C) 
-        self.send_data(0x05)
+        self.send_command_with_data(0x3C, [0x05])
 
-        self.send_command(0x18) 
-        self.send_data(0x80)
+        self.send_command_with_data(0x18, [0x80])
 
-        self.send_command(0x4E) 
-        self.send_data(0x00)
-        self.send_data(0x00)
+        self.send_command_with_data(0x4E, [0x00, 0x00])
 
-        self.send_command(0x4F) 
-        self.send_data(0x00)
-        self.send_data(0x00) 
+        self.send_command_with_data(0x4F, [0x00, 0x00])
 
         # EPD hardware init end
         return 0
@@ -224,28 +198,15 @@ class EPD:
     def init_Part(self):
         self.reset()
 
-        self.send_command(0x3C)    
-        self.send_data(0x80)
+        self.send_command_with_data(0x3C, [0x80])
 
         self.Lut(self.Lut_Partial)
 
-        self.send_command(0x37) 
-        self.send_data(0x00)  
-        self.send_data(0x00)  
-        self.send_data(0x00)  
-        self.send_data(0x00)  
-        self.send_data(0x00) 
-        self.send_data(0x40)  
-        self.send_data(0x00)  
-        self.send_data(0x00)   
-        self.send_data(0x00)  
-        self.send_data(0x00)  
-
-        self.send_command(0x3C) 
-        self.send_data(0x80)   
-
-        self.send_command(0x22) 
-        self.send_data(0xC0)   
+        self.send_command_with_data(0x37, [0x00, 0x00, 0x00, 0x00, 0x00, 0x40, 0x00, 0x00, 0x00, 0x00])
+
+        self.send_command_with_data(0x3C, [0x80])
+
+        self.send_command_with_data(0x22, [0xC0])
         self.send_command(0x20) 
 
         self.ReadBusy()
@@ -256,46 +217,23 @@ class EPD:
         self.send_command(0x12)
         self.ReadBusy()   
 
-        self.send_command(0x0C)   
-        self.send_data(0xAE)
-        self.send_data(0xC7)
-        self.send_data(0xC3)
-        self.send_data(0xC0)
-        self.send_data(0x80)
-
-        self.send_command(0x01) 
-        self.send_data(0xA7)
-        self.send_data(0x02)  
-        self.send_data(0x00)
-
-        self.send_command(0x11)
-        self.send_data(0x03) 
-
-        self.send_command(0x44) 
-        self.send_data(0x00)
-        self.send_data(0x00)  
-        self.send_data(0xBF)
-        self.send_data(0x03) 
+        self.send_command_with_data(0x0C, [0xAE, 0xC7, 0xC3, 0xC0, 0x80])
+
+        self.send_command_with_data(0x01, [0xA7, 0x02, 0x00])
+
+        self.send_command_with_data(0x11, [0x03])
+
+        self.send_command_with_data(0x44, [0x00, 0x00, 0xBF, 0x03])
         
-        self.send_command(0x45) 
-        self.send_data(0x00)
-        self.send_data(0x00)  
-        self.send_data(0xA7)
-        self.send_data(0x02)
+        self.send_command_with_data(0x45, [0x00, 0x00, 0xA7, 0x02])
 
-        self.send_command(0x3C)
-        self.send_data(0x00)
+        self.send_command_with_data(0x3C, [0x00])
 
-        self.send_command(0x18) 
-        self.send_data(0x80)
+        self.send_command_with_data(0x18, [0x80])
         
-        self.send_command(0x4E) 
-        self.send_data(0x00)
-        self.send_data(0x00)
+        self.send_command_with_data(0x4E, [0x00, 0x00])
 
-        self.send_command(0x4F) 
-        self.send_data(0x00)
-        self.send_data(0x00) 
+        self.send_command_with_data(0x4F, [0x00, 0x00])
 
         self.Lut(self.LUT_DATA_4Gray)
         
@@ -327,40 +265,7 @@ class EPD:
         return buf
 
     def getbuffer_4Gray(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width / 4) * self.height)
-        image_monocolor = image.convert('L')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        i=0
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if(imwidth == self.width and imheight == self.height):
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if(pixels[x, y] == 0xC0):
-                        pixels[x, y] = 0x80
-                    elif (pixels[x, y] == 0x80):
-                        pixels[x, y] = 0x40
-                    i= i+1
-                    if(i%4 == 0):
-                        buf[int((x + (y * self.width))/4)] = ((pixels[x-3, y]&0xc0) | (pixels[x-2, y]&0xc0)>>2 | (pixels[x-1, y]&0xc0)>>4 | (pixels[x, y]&0xc0)>>6)
-                        
-        elif(imwidth == self.height and imheight == self.width):
-            logger.debug("Horizontal")
-            for x in range(imwidth):
-                for y in range(imheight):
-                    newx = y
-                    newy = self.height - x - 1
-                    if(pixels[x, y] == 0xC0):
-                        pixels[x, y] = 0x80
-                    elif (pixels[x, y] == 0x80):
-                        pixels[x, y] = 0x40
-                    i= i+1
-                    if(i%4 == 0):
-                        buf[int((newx + (newy * self.width))/4)] = ((pixels[x, y-3]&0xc0) | (pixels[x, y-2]&0xc0)>>2 | (pixels[x, y-1]&0xc0)>>4 | (pixels[x, y]&0xc0)>>6) 
-        return buf
+        return epdbuffer.pack_4gray(image, self.width, self.height)
 
     def Clear(self):
         buf = [0xFF] * (int(self.width/8) * self.height)
@@ -421,23 +326,12 @@ class EPD:
         Xend -= 1
         Yend -= 1
 	
-        self.send_command(0x44)   
-        self.send_data((Xstart*8) & 0xff)  
-        self.send_data((Xstart>>5) & 0x01)  
-        self.send_data((Xend*8) & 0xff)  
-        self.send_data((Xend>>5) & 0x01) 
-        self.send_command(0x45)     
-        self.send_data(Ystart & 0xff)  
-        self.send_data((Ystart>>8) & 0x01)  
-        self.send_data(Yend & 0xff)
-        self.send_data((Yend>>8) & 0x01)   
-
-        self.send_command(0x4E) 
-        self.send_data((Xstart*8) & 0xff) 
-        self.send_data((Xstart>>5) & 0x01) 
-        self.send_command(0x4F)   
-        self.send_data(Ystart & 0xff)
-        self.send_data((Ystart>>8) & 0x01)
+        self.send_command_with_data(0x44, [
+            (Xstart*8) & 0xff, (Xstart>>5) & 0x01, (Xend*8) & 0xff, (Xend>>5) & 0x01])
+        self.send_command_with_data(0x45, [Ystart & 0xff, (Ystart>>8) & 0x01, Yend & 0xff, (Yend>>8) & 0x01])
+
+        self.send_command_with_data(0x4E, [(Xstart*8) & 0xff, (Xstart>>5) & 0x01])
+        self.send_command_with_data(0x4F, [Ystart & 0xff, (Ystart>>8) & 0x01])
 
         self.send_command(0x24)  
         for j in range(Height):
@@ -447,76 +341,18 @@ class EPD:
         self.TurnOnDisplay_Part()
     
     def display_4Gray(self, image):
+        levels = epdbuffer.unpack_4gray(image, self.width, self.height)
+
         self.send_command(0x24)
-        for i in range(0, 81600): 
-            temp3=0
-            for j in range(0, 2):
-                temp1 = image[i*2+j]
-                for k in range(0, 2):
-                    temp2 = temp1&0xC0 
-                    if(temp2 == 0xC0):
-                        temp3 |= 0x00
-                    elif(temp2 == 0x00):
-                        temp3 |= 0x01  
-                    elif(temp2 == 0x80): 
-                        temp3 |= 0x01 
-                    else: #0x40
-                        temp3 |= 0x00 
-                    temp3 <<= 1	
-                    
-                    temp1 <<= 2
-                    temp2 = temp1&0xC0 
-                    if(temp2 == 0xC0): 
-                        temp3 |= 0x00
-                    elif(temp2 == 0x00): 
-                        temp3 |= 0x01
-                    elif(temp2 == 0x80):
-                        temp3 |= 0x01
-                    else :   #0x40
-                        temp3 |= 0x00	
-                    if(j!=1 or k!=1):				
-                        temp3 <<= 1
-                    temp1 <<= 2
-            self.send_data(temp3)
-            
-        self.send_command(0x26)	       
-        for i in range(0, 81600): 
-            temp3=0
-            for j in range(0, 2):
-                temp1 = image[i*2+j]
-                for k in range(0, 2):
-                    temp2 = temp1&0xC0 
-                    if(temp2 == 0xC0):
-                        temp3 |= 0x00
-                    elif(temp2 == 0x00):
-                        temp3 |= 0x01
-                    elif(temp2 == 0x80):
-                        temp3 |= 0x00
-                    else: #0x40
-                        temp3 |= 0x01 
-                    temp3 <<= 1	
-                    
-                    temp1 <<= 2
-                    temp2 = temp1&0xC0 
-                    if(temp2 == 0xC0): 
-                        temp3 |= 0x00
-                    elif(temp2 == 0x00): 
-                        temp3 |= 0x01
-                    elif(temp2 == 0x80):
-                        temp3 |= 0x00 
-                    else:    #0x40
-                            temp3 |= 0x01	
-                    if(j!=1 or k!=1):					
-                        temp3 <<= 1
-                    temp1 <<= 2
-            self.send_data(temp3)
-        
-        self.TurnOnDisplay_4GRAY()
+        self.send_data2(epdbuffer.gray4_plane(levels, (1, 0, 1, 0)))  # black, gray2, gray1, white
+
+        self.send_command(0x26)
+        self.send_data2(epdbuffer.gray4_plane(levels, (1, 1, 0, 0)))
 
+        self.TurnOnDisplay_4GRAY()
 
     def sleep(self):
-        self.send_command(0x10) # DEEP_SLEEP
-        self.send_data(0x03)
+        self.send_command_with_data(0x10, [0x03])  # DEEP_SLEEP
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
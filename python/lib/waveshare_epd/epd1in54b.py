@@ -74,40 +74,32 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte([data])
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):
-            epdconfig.delay_ms(100)    
+        epdconfig.wait_busy(0, 100)
         logger.debug("e-Paper busy release")
       
     def set_lut_bw(self):
-        self.send_command(0x20) # vcom
-        for count in range(0, 15):
-            self.send_data(self.lut_vcom0[count])
-        self.send_command(0x21) # ww --
-        for count in range(0, 15):
-            self.send_data(self.lut_w[count])
-        self.send_command(0x22) # bw r
-        for count in range(0, 15):
-            self.send_data(self.lut_b[count])
-        self.send_command(0x23) # wb w
-        for count in range(0, 15):
-            self.send_data(self.lut_g1[count])
-        self.send_command(0x24) # bb b
-        for count in range(0, 15):
-            self.send_data(self.lut_g2[count])
+        self.send_command_with_data(0x20, self.lut_vcom0[:15])  # vcom
+        self.send_command_with_data(0x21, self.lut_w[:15])  # ww --
+        self.send_command_with_data(0x22, self.lut_b[:15])  # bw r
+        self.send_command_with_data(0x23, self.lut_g1[:15])  # wb w
+        self.send_command_with_data(0x24, self.lut_g2[:15])  # bb b
 
     def set_lut_red(self):
-        self.send_command(0x25)
-        for count in range(0, 15):
-            self.send_data(self.lut_vcom1[count])
-        self.send_command(0x26)
-        for count in range(0, 15):
-            self.send_data(self.lut_red0[count])
-        self.send_command(0x27)
-        for count in range(0, 15):
-            self.send_data(self.lut_red1[count])
+        self.send_command_with_data(0x25, self.lut_vcom1[:15])
+        self.send_command_with_data(0x26, self.lut_red0[:15])
+        self.send_command_with_data(0x27, self.lut_red1[:15])
             
     def init(self):
         if (epdconfig.module_init() != 0):
@@ -115,31 +107,17 @@ class EPD:
         # EPD hardware init start
         self.reset()
         
-        self.send_command(0x01) # POWER_SETTING
-        self.send_data(0x07)
-        self.send_data(0x00)
-        self.send_data(0x08)
-        self.send_data(0x00)
-        self.send_command(0x06) # BOOSTER_SOFT_START
-        self.send_data(0x07)
-        self.send_data(0x07)
-        self.send_data(0x07)
+        self.send_command_with_data(0x01, [0x07, 0x00, 0x08, 0x00])  # POWER_SETTING
+        self.send_command_with_data(0x06, [0x07, 0x07, 0x07])  # BOOSTER_SOFT_START
         self.send_command(0x04) # POWER_ON
 
         self.ReadBusy()
 
-        self.send_command(0X00) # PANEL_SETTING
-        self.send_data(0xCF)
-        self.send_command(0X50) # VCOM_AND_DATA_INTERVAL_SETTING
-        self.send_data(0x17)
-        self.send_command(0x30) # PLL_CONTROL
-        self.send_data(0x39)
-        self.send_command(0x61) # TCON_RESOLUTION set x and y
-        self.send_data(0xC8)
-        self.send_data(0x00)
-        self.send_data(0xC8)
-        self.send_command(0x82) # VCM_DC_SETTING_REGISTER
-        self.send_data(0x0E)
+        self.send_command_with_data(0X00, [0xCF])  # PANEL_SETTING
+        self.send_command_with_data(0X50, [0x17])  # VCOM_AND_DATA_INTERVAL_SETTING
+        self.send_command_with_data(0x30, [0x39])  # PLL_CONTROL
+        self.send_command_with_data(0x61, [0xC8, 0x00, 0xC8])  # TCON_RESOLUTION set x and y
+        self.send_command_with_data(0x82, [0x0E])  # VCM_DC_SETTING_REGISTER
         
         self.set_lut_bw()
         self.set_lut_red()
@@ -181,9 +159,7 @@ class EPD:
                 
         # send red data        
         if (redimage != None):
-            self.send_command(0x13) # DATA_START_TRANSMISSION_2
-            for i in range(0, int(self.width * self.height / 8)):
-                self.send_data(redimage[i])  
+            self.send_command_with_data(0x13, redimage[:int(self.width * self.height / 8)])  # DATA_START_TRANSMISSION_2
 
         self.send_command(0x12) # DISPLAY_REFRESH
         self.ReadBusy()
@@ -202,15 +178,13 @@ class EPD:
         self.ReadBusy()
 
     def sleep(self):
-        self.send_command(0x50) # VCOM_AND_DATA_INTERVAL_SETTING
-        self.send_data(0x17)
-        self.send_command(0x82) # to solve Vcom drop 
-        self.send_data(0x00)        
-        self.send_command(0x01) # power setting      
-        self.send_data(0x02) # gate switch to external
-        self.send_data(0x00)
-        self.send_data(0x00) 
-        self.send_data(0x00) 
+        self.send_command_with_data(0x50, [0x17])  # VCOM_AND_DATA_INTERVAL_SETTING
+        self.send_command_with_data(0x82, [0x00])  # to solve Vcom drop
+        self.send_command_with_data(0x01, [  # power setting
+            0x02,  # gate switch to external
+            0x00,
+            0x00,
+            0x00])
         self.ReadBusy()
         
         self.send_command(0x02) # power off
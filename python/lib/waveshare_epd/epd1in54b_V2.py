@@ -73,11 +73,19 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):
-            epdconfig.delay_ms(100)    
+        epdconfig.wait_busy(1, 100)
         logger.debug("e-Paper busy release")
         
     def init(self):
@@ -90,35 +98,26 @@ class EPD:
         self.send_command(0x12)  #SWRESET
         self.ReadBusy()   
 
-        self.send_command(0x01) #Driver output control      
-        self.send_data(0xC7)
-        self.send_data(0x00)
-        self.send_data(0x01)
+        self.send_command_with_data(0x01, [0xC7, 0x00, 0x01])  #Driver output control
 
-        self.send_command(0x11) #data entry mode       
-        self.send_data(0x01)
+        self.send_command_with_data(0x11, [0x01])  #data entry mode
 
-        self.send_command(0x44) #set Ram-X address start/end position   
-        self.send_data(0x00)
-        self.send_data(0x18)    #0x18-->(24+1)*8=200
+        self.send_command_with_data(0x44, [  #set Ram-X address start/end position
+            0x00,
+            0x18])  #0x18-->(24+1)*8=200
 
-        self.send_command(0x45) #set Ram-Y address start/end position          
-        self.send_data(0xC7)    #0xC7-->(199+1)=200
-        self.send_data(0x00)
-        self.send_data(0x00)
-        self.send_data(0x00) 
+        self.send_command_with_data(0x45, [  #set Ram-Y address start/end position
+            0xC7,  #0xC7-->(199+1)=200
+            0x00,
+            0x00,
+            0x00])
 
-        self.send_command(0x3C) #BorderWavefrom
-        self.send_data(0x05)
+        self.send_command_with_data(0x3C, [0x05])  #BorderWavefrom
 
-        self.send_command(0x18) #Read built-in temperature sensor
-        self.send_data(0x80)
+        self.send_command_with_data(0x18, [0x80])  #Read built-in temperature sensor
 
-        self.send_command(0x4E)   # set RAM x address count to 0
-        self.send_data(0x00)
-        self.send_command(0x4F)   # set RAM y address count to 0X199    
-        self.send_data(0xC7)
-        self.send_data(0x00)
+        self.send_command_with_data(0x4E, [0x00])  # set RAM x address count to 0
+        self.send_command_with_data(0x4F, [0xC7, 0x00])  # set RAM y address count to 0X199
         self.ReadBusy()
         return 0
 
@@ -161,8 +160,7 @@ class EPD:
                 buf[i] = ~redimage[i]
             self.send_data2(buf)
 
-        self.send_command(0x22) # DISPLAY_REFRESH
-        self.send_data(0xF7)
+        self.send_command_with_data(0x22, [0xF7])  # DISPLAY_REFRESH
         self.send_command(0x20) # DISPLAY_REFRESH
         self.ReadBusy()
 
@@ -173,20 +171,18 @@ class EPD:
             linewidth = int(self.width/8) + 1
 
         self.send_command(0x24) # DATA_START_TRANSMISSION_1
-        self.send_data2([0xff] * int(self.height * linewidth))
+        self.send_data2(b'\xff' * int(self.height * linewidth))
             
         self.send_command(0x26) # DATA_START_TRANSMISSION_2
-        self.send_data2([0x00] * int(self.height * linewidth))
+        self.send_data2(b'\x00' * int(self.height * linewidth))
 
-        self.send_command(0x22) # DISPLAY_REFRESH
-        self.send_data(0xF7)
+        self.send_command_with_data(0x22, [0xF7])  # DISPLAY_REFRESH
         self.send_command(0x20) # DISPLAY_REFRESH
         self.ReadBusy()
 
 
     def sleep(self):
-        self.send_command(0x10) #enter deep sleep
-        self.send_data(0x01) 
+        self.send_command_with_data(0x10, [0x01])  #enter deep sleep
 
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -64,11 +64,19 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte([data])
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      #  0: idle, 1: busy
-            epdconfig.delay_ms(200)                
+        epdconfig.wait_busy(0, 200)  #  0: idle, 1: busy
         logger.debug("e-Paper busy release")
      
     def init(self):
@@ -77,25 +85,18 @@ class EPD:
         # EPD hardware init start
         self.reset()
         
-        self.send_command(0x06) # boost soft start
-        self.send_data(0x17)
-        self.send_data(0x17)
-        self.send_data(0x17)
+        self.send_command_with_data(0x06, [0x17, 0x17, 0x17])  # boost soft start
         self.send_command(0x04) # power on
         
         self.ReadBusy()
         
-        self.send_command(0x00) # panel setting
-        self.send_data(0x0f) # LUT from OTP,160x296
-        self.send_data(0x0d) # VCOM to 0V fast
+        self.send_command_with_data(0x00, [  # panel setting
+            0x0f,  # LUT from OTP,160x296
+            0x0d])  # VCOM to 0V fast
         
-        self.send_command(0x61) # resolution setting
-        self.send_data(0x98)
-        self.send_data(0x00)
-        self.send_data(0x98)
+        self.send_command_with_data(0x61, [0x98, 0x00, 0x98])  # resolution setting
         
-        self.send_command(0x50)
-        self.send_data(0x77)
+        self.send_command_with_data(0x50, [0x77])
 
     def getbuffer(self, image):
         buf = [0xFF] * (int(self.width/8) * self.height)
@@ -147,8 +148,7 @@ class EPD:
     def sleep(self):
         self.send_command(0X02)  #  power off
         self.ReadBusy() 
-        self.send_command(0X07)  #  deep sleep
-        self.send_data(0xA5)
+        self.send_command_with_data(0X07, [0xA5])  #  deep sleep
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -30,8 +30,7 @@
 
 import logging
 from . import epdconfig
-
-from PIL import Image
+from . import epdbuffer
 
 # Display resolution
 EPD_WIDTH       = 168
@@ -72,26 +71,31 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte([data])
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusyH(self):
         logger.debug("e-Paper busy H")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      # 0: idle, 1: busy
-            epdconfig.delay_ms(5)
+        epdconfig.wait_busy(0, 5)  # 0: idle, 1: busy
         logger.debug("e-Paper busy H release")
 
     def ReadBusyL(self):
         logger.debug("e-Paper busy L")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      # 0: busy, 1: idle
-            epdconfig.delay_ms(5)
+        epdconfig.wait_busy(1, 5)  # 0: busy, 1: idle
         logger.debug("e-Paper busy L release")
 
     def TurnOnDisplay(self):
-        self.send_command(0x12) # DISPLAY_REFRESH
-        self.send_data(0x01)
+        self.send_command_with_data(0x12, [0x01])  # DISPLAY_REFRESH
         self.ReadBusyH()
 
-        self.send_command(0x02) # POWER_OFF
-        self.send_data(0X00)
+        self.send_command_with_data(0x02, [0X00])  # POWER_OFF
         self.ReadBusyH()
         
     def init(self):
@@ -101,83 +105,35 @@ class EPD:
 
         self.reset()
 
-        self.send_command(0x66)
-        self.send_data(0x49)
-        self.send_data(0x55)
-        self.send_data(0x13)
-        self.send_data(0x5D)
+        self.send_command_with_data(0x66, [0x49, 0x55, 0x13, 0x5D])
 
-        self.send_command(0x66)
-        self.send_data(0x49)
-        self.send_data(0x55)
+        self.send_command_with_data(0x66, [0x49, 0x55])
 
-        self.send_command(0xB0)
-        self.send_data(0x03)
+        self.send_command_with_data(0xB0, [0x03])
 
-        self.send_command(0x00)
-        self.send_data(0x4F)
-        self.send_data(0x6B)
+        self.send_command_with_data(0x00, [0x4F, 0x6B])
 
-        self.send_command(0x03)
-        self.send_data(0x00)
+        self.send_command_with_data(0x03, [0x00])
 
-        self.send_command(0xF0)
-        self.send_data(0xF6)
-        self.send_data(0x0D)
-        self.send_data(0x00)
-        self.send_data(0x00)
-        self.send_data(0x00)
+        self.send_command_with_data(0xF0, [0xF6, 0x0D, 0x00, 0x00, 0x00])
 
-        self.send_command(0x06)
-        self.send_data(0xCF)
-        self.send_data(0xDF)
-        self.send_data(0x0F)
+        self.send_command_with_data(0x06, [0xCF, 0xDF, 0x0F])
 
-        self.send_command(0x41)
-        self.send_data(0x00)
+        self.send_command_with_data(0x41, [0x00])
 
-        self.send_command(0x50)
-        self.send_data(0x30)
+        self.send_command_with_data(0x50, [0x30])
 
-        self.send_command(0x60)
-        self.send_data(0x0C)
-        self.send_data(0x05)
+        self.send_command_with_data(0x60, [0x0C, 0x05])
 
-        self.send_command(0x61)
-        self.send_data(0xA8)
-        self.send_data(0x00)
-        self.send_data(0xA8)
+        self.send_command_with_data(0x61, [0xA8, 0x00, 0xA8])
 
-        self.send_command(0x84)
-        self.send_data(0x01)
+        self.send_command_with_data(0x84, [0x01])
         return 0
 
     def getbuffer(self, image):
-        # Create a pallette with the 4 colors supported by the panel
-        pal_image = Image.new("P", (1,1))
-        pal_image.putpalette( (0,0,0,  255,255,255,  255,255,0,   255,0,0) + (0,0,0)*252)
-
-        # Check if we need to rotate the image
-        imwidth, imheight = image.size
-        if(imwidth == self.width and imheight == self.height):
-            image_temp = image
-        elif(imwidth == self.height and imheight == self.width):
-            image_temp = image.rotate(90, expand=True)
-        else:
-            logger.warning("Invalid image dimensions: %d x %d, expected %d x %d" % (imwidth, imheight, self.width, self.height))
-
-        # Convert the soruce image to the 4 colors, dithering if needed
-        image_4color = image_temp.convert("RGB").quantize(palette=pal_image)
-        buf_4color = bytearray(image_4color.tobytes('raw'))
-
-        # into a single byte to transfer to the panel
-        buf = [0x00] * int(self.width * self.height / 4)
-        idx = 0
-        for i in range(0, len(buf_4color), 4):
-            buf[idx] = (buf_4color[i] << 6) + (buf_4color[i+1] << 4) + (buf_4color[i+2] << 2) + buf_4color[i+3]
-            idx += 1
-
-        return buf
+        # Quantize to the 4 colors supported by the panel and pack 2 bits per pixel
+        return epdbuffer.pack_indexed(image, self.width, self.height,
+                                      (0,0,0,  255,255,255,  255,255,0,   255,0,0), 2)
 
     def display(self, image):
         if self.width % 4 == 0 :
@@ -186,8 +142,7 @@ class EPD:
             Width = self.width // 4 + 1
         Height = self.height
 
-        self.send_command(0x68)
-        self.send_data(0x01)
+        self.send_command_with_data(0x68, [0x01])
 
         self.send_command(0x04)
         self.ReadBusyH()
@@ -197,8 +152,7 @@ class EPD:
             for i in range(0, Width):
                     self.send_data(image[i + j * Width])
 
-        self.send_command(0x68)
-        self.send_data(0x00)
+        self.send_command_with_data(0x68, [0x00])
 
         self.TurnOnDisplay()
         
@@ -209,8 +163,7 @@ class EPD:
             Width = self.width // 4 + 1
         Height = self.height
 
-        self.send_command(0x68)
-        self.send_data(0x01)
+        self.send_command_with_data(0x68, [0x01])
 
         self.send_command(0x04)
         self.ReadBusyH()
@@ -220,17 +173,14 @@ class EPD:
             for i in range(0, Width):
                 self.send_data(color)
 
-        self.send_command(0x68)
-        self.send_data(0x00)
+        self.send_command_with_data(0x68, [0x00])
 
         self.TurnOnDisplay()
 
     def sleep(self):
-        self.send_command(0x02) # POWER_OFF
-        self.send_data(0x00)
+        self.send_command_with_data(0x02, [0x00])  # POWER_OFF
 
-        self.send_command(0x07) # DEEP_SLEEP
-        self.send_data(0XA5)
+        self.send_command_with_data(0x07, [0XA5])  # DEEP_SLEEP
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -80,14 +80,21 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte([data])
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):        
-        while(epdconfig.digital_read(self.busy_pin) == 1):      # 0: idle, 1: busy
-            epdconfig.delay_ms(100)            
+        epdconfig.wait_busy(1, 100)  # 0: idle, 1: busy
 
     def TurnOnDisplay(self):
-        self.send_command(0x22) # DISPLAY_UPDATE_CONTROL_2
-        self.send_data(0xC4)
+        self.send_command_with_data(0x22, [0xC4])  # DISPLAY_UPDATE_CONTROL_2
         self.send_command(0x20) # MASTER_ACTIVATION
         self.send_command(0xFF) # TERMINATE_FRAME_READ_WRITE
         
@@ -100,35 +107,25 @@ class EPD:
             return -1
         # EPD hardware init start
         self.reset()
-        self.send_command(0x01) # DRIVER_OUTPUT_CONTROL
-        self.send_data((EPD_HEIGHT - 1) & 0xFF)
-        self.send_data(((EPD_HEIGHT - 1) >> 8) & 0xFF)
-        self.send_data(0x00) # GD = 0 SM = 0 TB = 0
+        self.send_command_with_data(0x01, [  # DRIVER_OUTPUT_CONTROL
+            (EPD_HEIGHT - 1) & 0xFF,
+            ((EPD_HEIGHT - 1) >> 8) & 0xFF,
+            0x00])  # GD = 0 SM = 0 TB = 0
         
-        self.send_command(0x0C) # BOOSTER_SOFT_START_CONTROL
-        self.send_data(0xD7)
-        self.send_data(0xD6)
-        self.send_data(0x9D)
+        self.send_command_with_data(0x0C, [0xD7, 0xD6, 0x9D])  # BOOSTER_SOFT_START_CONTROL
         
-        self.send_command(0x2C) # WRITE_VCOM_REGISTER
-        self.send_data(0xA8) # VCOM 7C
+        self.send_command_with_data(0x2C, [0xA8])  # WRITE_VCOM_REGISTER, VCOM 7C
         
-        self.send_command(0x3A) # SET_DUMMY_LINE_PERIOD
-        self.send_data(0x1A) # 4 dummy lines per gate
+        self.send_command_with_data(0x3A, [0x1A])  # SET_DUMMY_LINE_PERIOD, 4 dummy lines per gate
         
-        self.send_command(0x3B) # SET_GATE_TIME
-        self.send_data(0x08) # 2us per line
+        self.send_command_with_data(0x3B, [0x08])  # SET_GATE_TIME, 2us per line
         
-        self.send_command(0X3C) # BORDER_WAVEFORM_CONTROL
-        self.send_data(0x03)      
+        self.send_command_with_data(0X3C, [0x03])  # BORDER_WAVEFORM_CONTROL
         
-        self.send_command(0X11) # DATA_ENTRY_MODE_SETTING
-        self.send_data(0x03) # X increment; Y increment
+        self.send_command_with_data(0X11, [0x03])  # DATA_ENTRY_MODE_SETTING, X increment; Y increment
         
         # WRITE_LUT_REGISTER
-        self.send_command(0x32)
-        for count in range(30):
-            self.send_data(lut[count])
+        self.send_command_with_data(0x32, lut[:30])
 
         return 0
         
@@ -136,25 +133,18 @@ class EPD:
  #  @brief: specify the memory area for data R/W
  ##
     def SetWindows(self, x_start, y_start, x_end, y_end):
-        self.send_command(0x44) # SET_RAM_X_ADDRESS_START_END_POSITION
-        self.send_data((x_start >> 3) & 0xFF)
-        self.send_data((x_end >> 3) & 0xFF)
-        self.send_command(0x45) # SET_RAM_Y_ADDRESS_START_END_POSITION
-        self.send_data(y_start & 0xFF)
-        self.send_data((y_start >> 8) & 0xFF)
-        self.send_data(y_end & 0xFF)
-        self.send_data((y_end >> 8) & 0xFF)
+        self.send_command_with_data(0x44, [  # SET_RAM_X_ADDRESS_START_END_POSITION
+            (x_start >> 3) & 0xFF, (x_end >> 3) & 0xFF])
+        self.send_command_with_data(0x45, [  # SET_RAM_Y_ADDRESS_START_END_POSITION
+            y_start & 0xFF, (y_start >> 8) & 0xFF, y_end & 0xFF, (y_end >> 8) & 0xFF])
 
 ##
  #  @brief: specify the start point for data R/W
  ##
     def SetCursor(self, x, y):
-        self.send_command(0x4E) # SET_RAM_X_ADDRESS_COUNTER
         # x point must be the multiple of 8 or the last 3 bits will be ignored
-        self.send_data((x >> 3) & 0xFF)
-        self.send_command(0x4F) # SET_RAM_Y_ADDRESS_COUNTER
-        self.send_data(y & 0xFF)
-        self.send_data((y >> 8) & 0xFF)
+        self.send_command_with_data(0x4E, [(x >> 3) & 0xFF])  # SET_RAM_X_ADDRESS_COUNTER
+        self.send_command_with_data(0x4F, [y & 0xFF, (y >> 8) & 0xFF])  # SET_RAM_Y_ADDRESS_COUNTER
         self.ReadBusy()
         
     def getbuffer(self, image):
@@ -216,8 +206,7 @@ class EPD:
         self.TurnOnDisplay()
 
     def sleep(self):
-        self.send_command(0x10) #enter deep sleep
-        self.send_data(0x01)
+        self.send_command_with_data(0x10, [0x01])  #enter deep sleep
         epdconfig.delay_ms(100)
          
         epdconfig.delay_ms(2000)
@@ -111,20 +111,26 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
-        while(epdconfig.digital_read(self.busy_pin) == 1):      # 0: idle, 1: busy
-            epdconfig.delay_ms(100)    
+        epdconfig.wait_busy(1, 100)  # 0: idle, 1: busy
 
     def TurnOnDisplay(self):
-        self.send_command(0x22)
-        self.send_data(0xC7)
+        self.send_command_with_data(0x22, [0xC7])
         self.send_command(0x20)        
         self.ReadBusy()
         
     def TurnOnDisplayPart(self):
-        self.send_command(0x22)
-        self.send_data(0x0c)
+        self.send_command_with_data(0x22, [0x0c])
         self.send_command(0x20)        
         self.ReadBusy()
         
@@ -138,84 +144,54 @@ class EPD:
             self.send_command(0x12) # soft reset
             self.ReadBusy()
 
-            self.send_command(0x74) #set analog block control
-            self.send_data(0x54)
-            self.send_command(0x7E) #set digital block control
-            self.send_data(0x3B)
+            self.send_command_with_data(0x74, [0x54])  #set analog block control
+            self.send_command_with_data(0x7E, [0x3B])  #set digital block control
 
-            self.send_command(0x01) #Driver output control
-            self.send_data(0xF9)
-            self.send_data(0x00)
-            self.send_data(0x00)
+            self.send_command_with_data(0x01, [0xF9, 0x00, 0x00])  #Driver output control
 
-            self.send_command(0x11) #data entry mode
-            self.send_data(0x01)
+            self.send_command_with_data(0x11, [0x01])  #data entry mode
 
-            self.send_command(0x44) #set Ram-X address start/end position
-            self.send_data(0x00)
-            self.send_data(0x0F)    #0x0C-->(15+1)*8=128
+            self.send_command_with_data(0x44, [  #set Ram-X address start/end position
+                0x00,
+                0x0F])  #0x0C-->(15+1)*8=128
 
-            self.send_command(0x45) #set Ram-Y address start/end position
-            self.send_data(0xF9)   #0xF9-->(249+1)=250
-            self.send_data(0x00)
-            self.send_data(0x00)
-            self.send_data(0x00)
+            self.send_command_with_data(0x45, [  #set Ram-Y address start/end position
+                0xF9,  #0xF9-->(249+1)=250
+                0x00,
+                0x00,
+                0x00])
             
-            self.send_command(0x3C) #BorderWavefrom
-            self.send_data(0x03)
-
-            self.send_command(0x2C)     #VCOM Voltage
-            self.send_data(0x55)    #
-
-            self.send_command(0x03)
-            self.send_data(self.lut_full_update[70])
-
-            self.send_command(0x04) #
-            self.send_data(self.lut_full_update[71])
-            self.send_data(self.lut_full_update[72])
-            self.send_data(self.lut_full_update[73])
-
-            self.send_command(0x3A)     #Dummy Line
-            self.send_data(self.lut_full_update[74])
-            self.send_command(0x3B)     #Gate time
-            self.send_data(self.lut_full_update[75])
-
-            self.send_command(0x32)
-            for count in range(70):
-                self.send_data(self.lut_full_update[count])
-
-            self.send_command(0x4E)   # set RAM x address count to 0
-            self.send_data(0x00)
-            self.send_command(0x4F)   # set RAM y address count to 0X127
-            self.send_data(0xF9)
-            self.send_data(0x00)
+            self.send_command_with_data(0x3C, [0x03])  #BorderWavefrom
+
+            self.send_command_with_data(0x2C, [0x55])  #VCOM Voltage, 
+
+            self.send_command_with_data(0x03, [self.lut_full_update[70]])
+
+            self.send_command_with_data(0x04, [  #
+                self.lut_full_update[71], self.lut_full_update[72], self.lut_full_update[73]])
+
+            self.send_command_with_data(0x3A, [self.lut_full_update[74]])  #Dummy Line
+            self.send_command_with_data(0x3B, [self.lut_full_update[75]])  #Gate time
+
+            self.send_command_with_data(0x32, self.lut_full_update[:70])
+
+            self.send_command_with_data(0x4E, [0x00])  # set RAM x address count to 0
+            self.send_command_with_data(0x4F, [0xF9, 0x00])  # set RAM y address count to 0X127
             self.ReadBusy()
         else:
-            self.send_command(0x2C)     #VCOM Voltage
-            self.send_data(0x26)
+            self.send_command_with_data(0x2C, [0x26])  #VCOM Voltage
 
             self.ReadBusy()
 
-            self.send_command(0x32)
-            for count in range(70):
-                self.send_data(self.lut_partial_update[count])
-
-            self.send_command(0x37)
-            self.send_data(0x00)
-            self.send_data(0x00)
-            self.send_data(0x00)
-            self.send_data(0x00)
-            self.send_data(0x40)
-            self.send_data(0x00)
-            self.send_data(0x00)
-
-            self.send_command(0x22)
-            self.send_data(0xC0)
+            self.send_command_with_data(0x32, self.lut_partial_update[:70])
+
+            self.send_command_with_data(0x37, [0x00, 0x00, 0x00, 0x00, 0x40, 0x00, 0x00])
+
+            self.send_command_with_data(0x22, [0xC0])
             self.send_command(0x20)
             self.ReadBusy()
 
-            self.send_command(0x3C) #BorderWavefrom
-            self.send_data(0x01)
+            self.send_command_with_data(0x3C, [0x01])  #BorderWavefrom
         return 0
 
     def getbuffer(self, image):
@@ -307,8 +283,7 @@ class EPD:
         # self.send_data(0xC3)
         # self.send_command(0x20)
 
-        self.send_command(0x10) #enter deep sleep
-        self.send_data(0x03)
+        self.send_command_with_data(0x10, [0x03])  #enter deep sleep
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
 
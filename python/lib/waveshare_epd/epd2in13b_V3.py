@@ -65,7 +65,16 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte([data])
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
         self.send_command(0x71);
@@ -82,17 +91,17 @@ class EPD:
         self.send_command(0x04);  
         self.ReadBusy();#waiting for the electronic paper IC to release the idle signal
 
-        self.send_command(0x00);    #panel setting
-        self.send_data(0x0f);   #LUT from OTP,128x296
-        self.send_data(0x89);    #Temperature sensor, boost and other related timing settings
+        self.send_command_with_data(0x00, [  #panel setting
+            0x0f,  #LUT from OTP,128x296
+            0x89])  #Temperature sensor, boost and other related timing settings
 
         self.send_command(0x61);    #resolution setting
         self.send_data (0x68);  
         self.send_data (0x00);  
         self.send_data (0xD4);
 
-        self.send_command(0X50);    #VCOM AND DATA INTERVAL SETTING
-        self.send_data(0x77);   #WBmode:VBDF 17|D7 VBDW 97 VBDB 57
+        self.send_command_with_data(0X50, [  #VCOM AND DATA INTERVAL SETTING
+            0x77])  #WBmode:VBDF 17|D7 VBDW 97 VBDB 57
                             # WBRmode:VBDF F7 VBDW 77 VBDB 37  VBDR B7
         
         return 0
@@ -122,13 +131,9 @@ class EPD:
         return buf
 
     def display(self, imageblack, imagered):
-        self.send_command(0x10)
-        for i in range(0, int(self.width * self.height / 8)):
-            self.send_data(imageblack[i])
+        self.send_command_with_data(0x10, imageblack[:int(self.width * self.height / 8)])
         
-        self.send_command(0x13)
-        for i in range(0, int(self.width * self.height / 8)):
-            self.send_data(imagered[i])
+        self.send_command_with_data(0x13, imagered[:int(self.width * self.height / 8)])
         
         self.send_command(0x12) # REFRESH
         epdconfig.delay_ms(100)
@@ -148,12 +153,10 @@ class EPD:
         self.ReadBusy()
 
     def sleep(self):
-        self.send_command(0X50) 
-        self.send_data(0xf7)
+        self.send_command_with_data(0X50, [0xf7])
         self.send_command(0X02) 
         self.ReadBusy()
-        self.send_command(0x07) # DEEP_SLEEP
-        self.send_data(0xA5) # check code
+        self.send_command_with_data(0x07, [0xA5])  # DEEP_SLEEP, check code
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
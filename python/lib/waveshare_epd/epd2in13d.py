@@ -176,7 +176,16 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-    
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
         while(epdconfig.digital_read(self.busy_pin) == 0):      # 0: idle, 1: busy
@@ -195,42 +204,31 @@ class EPD:
         # EPD hardware init start
         self.reset()
         
-        self.send_command(0x01)	# POWER SETTING
-        self.send_data(0x03)
-        self.send_data(0x00)
-        self.send_data(0x2b)
-        self.send_data(0x2b)
-        self.send_data(0x03)
-
-        self.send_command(0x06)	# boost soft start
-        self.send_data(0x17) # A
-        self.send_data(0x17) # B
-        self.send_data(0x17) # C
+        self.send_command_with_data(0x01, [0x03, 0x00, 0x2b, 0x2b, 0x03])  # POWER SETTING
+
+        self.send_command_with_data(0x06, [  # boost soft start
+            0x17,  # A
+            0x17,  # B
+            0x17])  # C
 
         self.send_command(0x04)
         self.ReadBusy()
 
-        self.send_command(0x00)	# panel setting
-        self.send_data(0xbf) # LUT from OTP,128x296
-        self.send_data(0x0d) # VCOM to 0V fast
+        self.send_command_with_data(0x00, [  # panel setting
+            0xbf,  # LUT from OTP,128x296
+            0x0d])  # VCOM to 0V fast
 
-        self.send_command(0x30)	# PLL setting
-        self.send_data(0x3a) # 3a 100HZ   29 150Hz 39 200HZ	31 171HZ
+        self.send_command_with_data(0x30, [0x3a])  # PLL setting, 3a 100HZ   29 150Hz 39 200HZ	31 171HZ
 
-        self.send_command(0x61)	# resolution setting
-        self.send_data(self.width)
-        self.send_data((self.height >> 8) & 0xff)
-        self.send_data(self.height& 0xff)
+        self.send_command_with_data(0x61, [  # resolution setting
+            self.width, (self.height >> 8) & 0xff, self.height& 0xff])
 
-        self.send_command(0x82)	# vcom_DC setting
-        self.send_data(0x28)
+        self.send_command_with_data(0x82, [0x28])  # vcom_DC setting
         return 0
         
     def SetFullReg(self):
-        self.send_command(0x82)
-        self.send_data(0x00)
-        self.send_command(0X50)
-        self.send_data(0x97)
+        self.send_command_with_data(0x82, [0x00])
+        self.send_command_with_data(0X50, [0x97])
         
         self.send_command(0x20) # vcom
         self.send_data2(self.lut_vcomDC)
@@ -244,10 +242,8 @@ class EPD:
         self.send_data2(self.lut_bb)
     
     def SetPartReg(self):
-        self.send_command(0x82)
-        self.send_data(0x03)
-        self.send_command(0X50)
-        self.send_data(0x47)
+        self.send_command_with_data(0x82, [0x03])
+        self.send_command_with_data(0X50, [0x47])
         
         self.send_command(0x20) # vcom
         self.send_data2(self.lut_vcom1)
@@ -294,7 +290,7 @@ class EPD:
             linewidth = int(self.width/8) + 1
 
         self.send_command(0x10)
-        self.send_data2([0x00] * self.height * linewidth)
+        self.send_data2(b'\x00' * self.height * linewidth)
         epdconfig.delay_ms(10)
         
         self.send_command(0x13)
@@ -309,15 +305,8 @@ class EPD:
             return
             
         self.send_command(0x91)
-        self.send_command(0x90)
-        self.send_data(0)
-        self.send_data(self.width - 1)
-
-        self.send_data(0)
-        self.send_data(0)
-        self.send_data(int(self.height / 256))
-        self.send_data(self.height % 256 - 1)
-        self.send_data(0x28)
+        self.send_command_with_data(0x90, [
+            0, self.width - 1, 0, 0, int(self.height / 256), self.height % 256 - 1, 0x28])
         
         if self.width%8 == 0:
             linewidth = int(self.width/8)
@@ -347,22 +336,20 @@ class EPD:
             linewidth = int(self.width/8) + 1
 
         self.send_command(0x10)
-        self.send_data2([0x00] * self.height * linewidth)
+        self.send_data2(b'\x00' * self.height * linewidth)
         epdconfig.delay_ms(10)
         
         self.send_command(0x13)
-        self.send_data2([0xFF] * self.height * linewidth)
+        self.send_data2(b'\xff' * self.height * linewidth)
         epdconfig.delay_ms(10)
         
         self.SetFullReg()
         self.TurnOnDisplay()
 
     def sleep(self):
-        self.send_command(0X50)
-        self.send_data(0xf7)
+        self.send_command_with_data(0X50, [0xf7])
         self.send_command(0X02) # power off
-        self.send_command(0X07) # deep sleep  
-        self.send_data(0xA5)
+        self.send_command_with_data(0X07, [0xA5])  # deep sleep
 
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
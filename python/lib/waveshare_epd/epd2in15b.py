@@ -74,35 +74,36 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     # judge e-Paper whether is busy
     def busy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) != 0): 
-            epdconfig.delay_ms(10)
+        epdconfig.wait_busy(1, 10)
         epdconfig.delay_ms(10)
         logger.debug("e-Paper busy release")
 
     # set the display window
     def set_windows(self, xstart, ystart, xend, yend):
-        self.send_command(0x44) # SET_RAM_X_ADDRESS_START_END_POSITION
-        self.send_data((xstart>>3) & 0xff)
-        self.send_data((xend>>3) & 0xff)
+        self.send_command_with_data(0x44, [  # SET_RAM_X_ADDRESS_START_END_POSITION
+            (xstart>>3) & 0xff, (xend>>3) & 0xff])
         
-        self.send_command(0x45) # SET_RAM_Y_ADDRESS_START_END_POSITION
-        self.send_data(ystart & 0xff)
-        self.send_data((ystart >> 8) & 0xff)
-        self.send_data(yend & 0xff)
-        self.send_data((yend >> 8) & 0xff)
+        self.send_command_with_data(0x45, [  # SET_RAM_Y_ADDRESS_START_END_POSITION
+            ystart & 0xff, (ystart >> 8) & 0xff, yend & 0xff, (yend >> 8) & 0xff])
         
     # set the display cursor(origin)
     def set_cursor(self, xstart, ystart):
-        self.send_command(0x4E) # SET_RAM_X_ADDRESS_COUNTER
-        self.send_data(xstart & 0xff)
+        self.send_command_with_data(0x4E, [xstart & 0xff])  # SET_RAM_X_ADDRESS_COUNTER
 
-        self.send_command(0x4F) # SET_RAM_Y_ADDRESS_COUNTER
-        self.send_data(ystart & 0xff)
-        self.send_data((ystart >> 8) & 0xff)
+        self.send_command_with_data(0x4F, [ystart & 0xff, (ystart >> 8) & 0xff])  # SET_RAM_Y_ADDRESS_COUNTER
 
     # initialize 
     def init(self):
@@ -115,17 +116,14 @@ class EPD:
         self.send_command(0x12)  # SWRESET
         self.busy()   
 
-        self.send_command(0x11) # data entry mode       
-        self.send_data(0x03)
+        self.send_command_with_data(0x11, [0x03])  # data entry mode
 
         self.set_windows(0, 0, self.width - 1, self.height - 1)
         self.set_cursor(0, 0)
 
-        self.send_command(0x3C) # BorderWavefrom
-        self.send_data(0x05)	
+        self.send_command_with_data(0x3C, [0x05])  # BorderWavefrom
 
-        self.send_command(0x18) # Read built-in temperature sensor
-        self.send_data(0x80)	
+        self.send_command_with_data(0x18, [0x80])  # Read built-in temperature sensor
 
         self.busy()
         
@@ -195,8 +193,7 @@ class EPD:
 
     # sleep
     def sleep(self):
-        self.send_command(0x10) # DEEP_SLEEP
-        self.send_data(0x01) # check code
+        self.send_command_with_data(0x10, [0x01])  # DEEP_SLEEP, check code
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -95,11 +95,18 @@ class EPD:
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
 
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
 
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      #  0: idle, 1: busy
-            epdconfig.delay_ms(200) 
+        epdconfig.wait_busy(1, 200)  #  0: idle, 1: busy
         logger.debug("e-Paper busy release") 
 
 
@@ -113,40 +120,22 @@ class EPD:
         epdconfig.delay_ms(300)
         self.ReadBusy()
 
-        self.send_command(0x11) # setting gaet number
-        self.send_data(0x03)
-        self.send_command(0x44) # set gate voltage
-        self.send_data(0x01)
-        self.send_data(0x13)
-        self.send_command(0x45) # set source voltage
-        self.send_data(0x0)
-        self.send_data(0x0)
-        self.send_data(0x28)
-        self.send_data(0x01)
+        self.send_command_with_data(0x11, [0x03])  # setting gaet number
+        self.send_command_with_data(0x44, [0x01, 0x13])  # set gate voltage
+        self.send_command_with_data(0x45, [0x0, 0x0, 0x28, 0x01])  # set source voltage
     
         if(mode == 0):      #full
-            self.send_command(0x3C)
-            self.send_data(0x01)
+            self.send_command_with_data(0x3C, [0x01])
             
         elif(mode == 1):        #partial
             self.load_lut(self.WF_PARTIAL)
-            self.send_command(0x37) # set display option, these setting turn on previous function
-            self.send_data(0x00)
-            self.send_data(0x00)
-            self.send_data(0x00)
-            self.send_data(0x00)
-            self.send_data(0x00)  
-            self.send_data(0x40)
-            self.send_data(0x00)
-            self.send_data(0x00)
-            self.send_data(0x00)
-            self.send_data(0x00)  
-
-            self.send_command(0x3C)
-            self.send_data(0x80)
-
-            self.send_command(0x22)
-            self.send_data(0xcf)
+            self.send_command_with_data(0x37, [  # set display option, these setting turn on previous function
+                0x00, 0x00, 0x00, 0x00, 0x00, 0x40, 0x00, 0x00,
+                0x00, 0x00])
+
+            self.send_command_with_data(0x3C, [0x80])
+
+            self.send_command_with_data(0x22, [0xcf])
             
             self.send_command(0x20)
             self.ReadBusy()
@@ -196,11 +185,8 @@ class EPD:
         if (image == None):
             return            
 
-        self.send_command(0x4E)
-        self.send_data(0x01)
-        self.send_command(0x4F)
-        self.send_data(0x27)
-        self.send_data(0x01)
+        self.send_command_with_data(0x4E, [0x01])
+        self.send_command_with_data(0x4F, [0x27, 0x01])
 
         self.send_command(0x24)
         self.send_data2(image)
@@ -208,11 +194,8 @@ class EPD:
         
 
     def Clear(self):
-        self.send_command(0x4E)
-        self.send_data(0x01)
-        self.send_command(0x4F)
-        self.send_data(0x27)
-        self.send_data(0x01)
+        self.send_command_with_data(0x4E, [0x01])
+        self.send_command_with_data(0x4F, [0x27, 0x01])
 
         if self.width%8 == 0:
             linewidth = int(self.width/8)
@@ -231,8 +214,7 @@ class EPD:
 
 
     def sleep(self):
-        self.send_command(0X10) # DEEP_SLEEP_MODE
-        self.send_data(0x01)
+        self.send_command_with_data(0X10, [0x01])  # DEEP_SLEEP_MODE
 
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -75,11 +75,18 @@ class EPD:
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
 
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
 
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      #  0: idle, 1: busy
-            epdconfig.delay_ms(20) 
+        epdconfig.wait_busy(1, 20)  #  0: idle, 1: busy
         logger.debug("e-Paper busy release") 
 
 
@@ -93,14 +100,11 @@ class EPD:
         epdconfig.delay_ms(30)
         self.ReadBusy()
 
-        self.send_command(0x11) # setting gaet number
-        self.send_data(0x03)
+        self.send_command_with_data(0x11, [0x03])  # setting gaet number
         
         self.setWindows(0, 0, self.width-1, self.height-1)
         
-        self.send_command(0x21)
-        self.send_data(0x00)
-        self.send_data(0x80)
+        self.send_command_with_data(0x21, [0x00, 0x80])
         
         self.setCursor(0, 0)
         self.ReadBusy()
@@ -108,23 +112,16 @@ class EPD:
         return 0
 
     def setWindows(self, Xstart, Ystart, Xend, Yend):
-        self.send_command(0x44) # SET_RAM_X_ADDRESS_START_END_POSITION
-        self.send_data((Xstart>>3) & 0x1F)
-        self.send_data((Xend>>3) & 0x1F)
+        self.send_command_with_data(0x44, [  # SET_RAM_X_ADDRESS_START_END_POSITION
+            (Xstart>>3) & 0x1F, (Xend>>3) & 0x1F])
         
-        self.send_command(0x45) # SET_RAM_Y_ADDRESS_START_END_POSITION
-        self.send_data(Ystart & 0xFF)
-        self.send_data((Ystart >> 8) & 0x01)
-        self.send_data(Yend & 0xFF)
-        self.send_data((Yend >> 8) & 0x01)
+        self.send_command_with_data(0x45, [  # SET_RAM_Y_ADDRESS_START_END_POSITION
+            Ystart & 0xFF, (Ystart >> 8) & 0x01, Yend & 0xFF, (Yend >> 8) & 0x01])
 
     def setCursor(self, Xstart, Ystart):
-        self.send_command(0x4E) # SET_RAM_X_ADDRESS_COUNTER
-        self.send_data(Xstart & 0x1F)
+        self.send_command_with_data(0x4E, [Xstart & 0x1F])  # SET_RAM_X_ADDRESS_COUNTER
 
-        self.send_command(0x4F) # SET_RAM_Y_ADDRESS_COUNTER
-        self.send_data(Ystart & 0xFF)
-        self.send_data((Ystart >> 8) & 0x01)
+        self.send_command_with_data(0x4F, [Ystart & 0xFF, (Ystart >> 8) & 0x01])  # SET_RAM_Y_ADDRESS_COUNTER
         
     def turnon_display(self):
         self.send_command(0x20)
@@ -176,17 +173,16 @@ class EPD:
             linewidth = int(self.width/8) + 1
 
         self.send_command(0x24)
-        self.send_data2([0xff] * int(self.height * linewidth)) 
+        self.send_data2(b'\xff' * int(self.height * linewidth)) 
 
         self.send_command(0x26)
-        self.send_data2([0x00] * int(self.height * linewidth))
+        self.send_data2(b'\x00' * int(self.height * linewidth))
 
         self.turnon_display()
 
 
     def sleep(self):
-        self.send_command(0X10) # DEEP_SLEEP_MODE
-        self.send_data(0x01)
+        self.send_command_with_data(0X10, [0x01])  # DEEP_SLEEP_MODE
 
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
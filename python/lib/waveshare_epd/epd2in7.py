@@ -172,54 +172,40 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte([data])
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):        
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      #  0: idle, 1: busy
-            epdconfig.delay_ms(200)                
+        epdconfig.wait_busy(0, 200)  #  0: idle, 1: busy
         logger.debug("e-Paper busy release")
 
     def set_lut(self):
-        self.send_command(0x20) # vcom
-        for count in range(0, 44):
-            self.send_data(self.lut_vcom_dc[count])
-        self.send_command(0x21) # ww --
-        for count in range(0, 42):
-            self.send_data(self.lut_ww[count])
-        self.send_command(0x22) # bw r
-        for count in range(0, 42):
-            self.send_data(self.lut_bw[count])
-        self.send_command(0x23) # wb w
-        for count in range(0, 42):
-            self.send_data(self.lut_bb[count])
-        self.send_command(0x24) # bb b
-        for count in range(0, 42):
-            self.send_data(self.lut_wb[count])
+        self.send_command_with_data(0x20, self.lut_vcom_dc[:44])  # vcom
+        self.send_command_with_data(0x21, self.lut_ww[:42])  # ww --
+        self.send_command_with_data(0x22, self.lut_bw[:42])  # bw r
+        self.send_command_with_data(0x23, self.lut_bb[:42])  # wb w
+        self.send_command_with_data(0x24, self.lut_wb[:42])  # bb b
             
     def gray_SetLut(self):
-        self.send_command(0x20)
-        for count in range(0, 44):        #vcom
-            self.send_data(self.gray_lut_vcom[count])
+        self.send_command_with_data(0x20, self.gray_lut_vcom[:44])
             
-        self.send_command(0x21)							#red not use
-        for count in range(0, 42): 
-            self.send_data(self.gray_lut_ww[count])
+        self.send_command_with_data(0x21, self.gray_lut_ww[:42])  #red not use
 
-        self.send_command(0x22)							#bw r
-        for count in range(0, 42): 
-            self.send_data(self.gray_lut_bw[count])
+        self.send_command_with_data(0x22, self.gray_lut_bw[:42])  #bw r
 
-        self.send_command(0x23)							#wb w
-        for count in range(0, 42): 
-            self.send_data(self.gray_lut_wb[count])
+        self.send_command_with_data(0x23, self.gray_lut_wb[:42])  #wb w
 
-        self.send_command(0x24)							#bb b
-        for count in range(0, 42): 
-            self.send_data(self.gray_lut_bb[count])
+        self.send_command_with_data(0x24, self.gray_lut_bb[:42])  #bb b
 
-        self.send_command(0x25)							#vcom
-        for count in range(0, 42): 
-            self.send_data(self.gray_lut_ww[count])
+        self.send_command_with_data(0x25, self.gray_lut_ww[:42])  #vcom
     
     def init(self):
         if (epdconfig.module_init() != 0):
@@ -228,69 +214,47 @@ class EPD:
         # EPD hardware init start
         self.reset()
         
-        self.send_command(0x01) # POWER_SETTING
-        self.send_data(0x03) # VDS_EN, VDG_EN
-        self.send_data(0x00) # VCOM_HV, VGHL_LV[1], VGHL_LV[0]
-        self.send_data(0x2b) # VDH
-        self.send_data(0x2b) # VDL
-        self.send_data(0x09) # VDHR
+        self.send_command_with_data(0x01, [  # POWER_SETTING
+            0x03,  # VDS_EN, VDG_EN
+            0x00,  # VCOM_HV, VGHL_LV[1], VGHL_LV[0]
+            0x2b,  # VDH
+            0x2b,  # VDL
+            0x09])  # VDHR
         
-        self.send_command(0x06) # BOOSTER_SOFT_START
-        self.send_data(0x07)
-        self.send_data(0x07)
-        self.send_data(0x17)
+        self.send_command_with_data(0x06, [0x07, 0x07, 0x17])  # BOOSTER_SOFT_START
         
         # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x60)
-        self.send_data(0xA5)
+        self.send_command_with_data(0xF8, [0x60, 0xA5])
         
         # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x89)
-        self.send_data(0xA5)
+        self.send_command_with_data(0xF8, [0x89, 0xA5])
         
         # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x90)
-        self.send_data(0x00)
+        self.send_command_with_data(0xF8, [0x90, 0x00])
         
         # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x93)
-        self.send_data(0x2A)
+        self.send_command_with_data(0xF8, [0x93, 0x2A])
         
         # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0xA0)
-        self.send_data(0xA5)
+        self.send_command_with_data(0xF8, [0xA0, 0xA5])
         
         # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0xA1)
-        self.send_data(0x00)
+        self.send_command_with_data(0xF8, [0xA1, 0x00])
         
         # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x73)
-        self.send_data(0x41)
+        self.send_command_with_data(0xF8, [0x73, 0x41])
         
-        self.send_command(0x16) # PARTIAL_DISPLAY_REFRESH
-        self.send_data(0x00)
+        self.send_command_with_data(0x16, [0x00])  # PARTIAL_DISPLAY_REFRESH
         self.send_command(0x04) # POWER_ON
         self.ReadBusy()
 
-        self.send_command(0x00) # PANEL_SETTING
-        self.send_data(0xAF) # KW-BF   KWR-AF    BWROTP 0f
+        self.send_command_with_data(0x00, [0xAF])  # PANEL_SETTING, KW-BF   KWR-AF    BWROTP 0f
         
-        self.send_command(0x30) # PLL_CONTROL
-        self.send_data(0x3A) # 3A 100HZ   29 150Hz 39 200HZ    31 171HZ
+        self.send_command_with_data(0x30, [0x3A])  # PLL_CONTROL, 3A 100HZ   29 150Hz 39 200HZ    31 171HZ
     
-        self.send_command(0X50)			#VCOM AND DATA INTERVAL SETTING			
-        self.send_data(0x57)
+        self.send_command_with_data(0X50, [0x57])  #VCOM AND DATA INTERVAL SETTING
         
-        self.send_command(0x82) # VCM_DC_SETTING_REGISTER
-        self.send_data(0x12)
+        self.send_command_with_data(0x82, [0x12])  # VCM_DC_SETTING_REGISTER
         self.set_lut()
         return 0
 
@@ -339,14 +303,12 @@ class EPD:
         self.send_data (0x73)
         self.send_data (0x41)
 
-        self.send_command(0x16)
-        self.send_data(0x00)	
+        self.send_command_with_data(0x16, [0x00])
 
         self.send_command(0x04)
         self.ReadBusy()
 
-        self.send_command(0x00)			#panel setting
-        self.send_data(0xbf)		#KW-BF   KWR-AF	BWROTP 0f
+        self.send_command_with_data(0x00, [0xbf])  #panel setting, KW-BF   KWR-AF	BWROTP 0f
 
         self.send_command(0x30)			#PLL setting
         self.send_data (0x90)      	#100hz 
@@ -360,8 +322,7 @@ class EPD:
         self.send_command(0x82)			#vcom_DC setting
         self.send_data (0x12)
 
-        self.send_command(0X50)			#VCOM AND DATA INTERVAL SETTING			
-        self.send_data(0x57)
+        self.send_command_with_data(0X50, [0x57])  #VCOM AND DATA INTERVAL SETTING
 
     def getbuffer(self, image):
         # logger.debug("bufsiz = ",int(self.width/8) * self.height)
@@ -427,9 +388,7 @@ class EPD:
         self.send_command(0x10)
         for i in range(0, int(self.width * self.height / 8)):
             self.send_data(0xFF)
-        self.send_command(0x13)
-        for i in range(0, int(self.width * self.height / 8)):
-            self.send_data(image[i])
+        self.send_command_with_data(0x13, image[:int(self.width * self.height / 8)])
         self.send_command(0x12) 
         self.ReadBusy()
 
@@ -515,11 +474,9 @@ class EPD:
         self.ReadBusy()
 
     def sleep(self):
-        self.send_command(0X50)
-        self.send_data(0xf7)
+        self.send_command_with_data(0X50, [0xf7])
         self.send_command(0X02)
-        self.send_command(0X07)
-        self.send_data(0xA5)
+        self.send_command_with_data(0X07, [0xA5])
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -96,41 +96,43 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte([data])
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):        
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      #  1: idle, 0: busy
-            epdconfig.delay_ms(20)                
+        epdconfig.wait_busy(1, 20)  #  1: idle, 0: busy
         logger.debug("e-Paper busy release")
     
     def TurnOnDisplay(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xF7)
+        self.send_command_with_data(0x22, [0xF7])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
         
     def TurnOnDisplay_Fast(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xC7)
+        self.send_command_with_data(0x22, [0xC7])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
         
     def TurnOnDisplay_Partial(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xFF)
+        self.send_command_with_data(0x22, [0xFF])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
         
     def TurnOnDisplay_4GRAY(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xC7)
+        self.send_command_with_data(0x22, [0xC7])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
         
     def Lut(self):
-        self.send_command(0x32)
-        for i in range(159):
-            self.send_data(self.LUT_DATA_4Gray[i])
+        self.send_command_with_data(0x32, self.LUT_DATA_4Gray[:159])
     
     def init(self):
         if (epdconfig.module_init() != 0):
@@ -143,18 +145,15 @@ class EPD:
         self.send_command(0x12) #SWRESET
         self.ReadBusy()
 
-        self.send_command(0x45) #set Ram-Y address start/end position          
-        self.send_data(0x00)
-        self.send_data(0x00)
-        self.send_data(0x07) #0x0107-->(263+1)=264
-        self.send_data(0x01)
+        self.send_command_with_data(0x45, [  #set Ram-Y address start/end position
+            0x00,
+            0x00,
+            0x07,  #0x0107-->(263+1)=264
+            0x01])
 
-        self.send_command(0x4F)   # set RAM y address count to 0;    
-        self.send_data(0x00)
-        self.send_data(0x00)
+        self.send_command_with_data(0x4F, [0x00, 0x00])  # set RAM y address count to 0;
 
-        self.send_command(0x11)  # data entry mode
-        self.send_data(0x03)
+        self.send_command_with_data(0x11, [0x03])  # data entry mode
         return 0
         
     def init_Fast(self):
@@ -171,33 +170,25 @@ class EPD:
         self.send_command(0x12) #SWRESET
         self.ReadBusy()
 
-        self.send_command(0x18) #Read built-in temperature sensor
-        self.send_data(0x80)	
+        self.send_command_with_data(0x18, [0x80])  #Read built-in temperature sensor
 
-        self.send_command(0x22) # Load temperature value
-        self.send_data(0xB1)	
+        self.send_command_with_data(0x22, [0xB1])  # Load temperature value
         self.send_command(0x20)	
         self.ReadBusy()
 
-        self.send_command(0x1A) # Write to temperature register
-        self.send_data(0x64)	
-        self.send_data(0x00)	
+        self.send_command_with_data(0x1A, [0x64, 0x00])  # Write to temperature register
 
-        self.send_command(0x45) #set Ram-Y address start/end position          
-        self.send_data(0x00)   
-        self.send_data(0x00)
-        self.send_data(0x07) #0x0107-->(263+1)=264
-        self.send_data(0x01)
+        self.send_command_with_data(0x45, [  #set Ram-Y address start/end position
+            0x00,
+            0x00,
+            0x07,  #0x0107-->(263+1)=264
+            0x01])
 
-        self.send_command(0x4F)   # set RAM y address count to 0;    
-        self.send_data(0x00)
-        self.send_data(0x00)
+        self.send_command_with_data(0x4F, [0x00, 0x00])  # set RAM y address count to 0;
 
-        self.send_command(0x11)   # data entry mode      
-        self.send_data(0x03)
+        self.send_command_with_data(0x11, [0x03])  # data entry mode
 
-        self.send_command(0x22) # Load temperature value
-        self.send_data(0x91)	
+        self.send_command_with_data(0x22, [0x91])  # Load temperature value
         self.send_command(0x20)	
         self.ReadBusy()
         return 0
@@ -210,57 +201,44 @@ class EPD:
         self.send_command(0x12) # soft reset
         self.ReadBusy();
 
-        self.send_command(0x74) #set analog block control       
-        self.send_data(0x54)
-        self.send_command(0x7E) #set digital block control          
-        self.send_data(0x3B)
+        self.send_command_with_data(0x74, [0x54])  #set analog block control
+        self.send_command_with_data(0x7E, [0x3B])  #set digital block control
         
-        self.send_command(0x01) #Driver output control      
-        self.send_data(0x07)
-        self.send_data(0x01)
-        self.send_data(0x00) 
+        self.send_command_with_data(0x01, [0x07, 0x01, 0x00])  #Driver output control
         
-        self.send_command(0x11) #data entry mode       
-        self.send_data(0x03)
+        self.send_command_with_data(0x11, [0x03])  #data entry mode
 
-        self.send_command(0x44) #set Ram-X address start/end position   
-        self.send_data(0x00)
-        self.send_data(0x15)   #0x15-->(21+1)*8=176
+        self.send_command_with_data(0x44, [  #set Ram-X address start/end position
+            0x00,
+            0x15])  #0x15-->(21+1)*8=176
 
-        self.send_command(0x45) #set Ram-Y address start/end position          
-        self.send_data(0x00)
-        self.send_data(0x00)
-        self.send_data(0x07) #0x0107-->(263+1)=264
-        self.send_data(0x01)
+        self.send_command_with_data(0x45, [  #set Ram-Y address start/end position
+            0x00,
+            0x00,
+            0x07,  #0x0107-->(263+1)=264
+            0x01])
 
 
-        self.send_command(0x3C) #BorderWavefrom
-        self.send_data(0x00)	
+        self.send_command_with_data(0x3C, [0x00])  #BorderWavefrom
 
 
-        self.send_command(0x2C)     #VCOM Voltage
-        self.send_data(self.LUT_DATA_4Gray[158])    #0x1C
+        self.send_command_with_data(0x2C, [self.LUT_DATA_4Gray[158]])  #VCOM Voltage, 0x1C
 
 
-        self.send_command(0x3F) #EOPQ    
-        self.send_data(self.LUT_DATA_4Gray[153])
+        self.send_command_with_data(0x3F, [self.LUT_DATA_4Gray[153]])  #EOPQ
 
-        self.send_command(0x03) #VGH      
-        self.send_data(self.LUT_DATA_4Gray[154])
+        self.send_command_with_data(0x03, [self.LUT_DATA_4Gray[154]])  #VGH
 
-        self.send_command(0x04) #      
-        self.send_data(self.LUT_DATA_4Gray[155]) #VSH1   
-        self.send_data(self.LUT_DATA_4Gray[156]) #VSH2   
-        self.send_data(self.LUT_DATA_4Gray[157]) #VSL   
+        self.send_command_with_data(0x04, [  #
+            self.LUT_DATA_4Gray[155],  #VSH1
+            self.LUT_DATA_4Gray[156],  #VSH2
+            self.LUT_DATA_4Gray[157]])  #VSL
 
         self.Lut() #LUT
 
 
-        self.send_command(0x4E)   # set RAM x address count to 0;
-        self.send_data(0x00)
-        self.send_command(0x4F)  # set RAM y address count to 0X199;    
-        self.send_data(0x00)
-        self.send_data(0x00)
+        self.send_command_with_data(0x4E, [0x00])  # set RAM x address count to 0;
+        self.send_command_with_data(0x4F, [0x00, 0x00])  # set RAM y address count to 0X199;
         self.ReadBusy()
         return 0
 
@@ -417,23 +395,20 @@ class EPD:
         # Reset
         self.reset()
 
-        self.send_command(0x3C) #BorderWavefrom
-        self.send_data(0x80)
+        self.send_command_with_data(0x3C, [0x80])  #BorderWavefrom
 	
-        self.send_command(0x44)       # set RAM x address start/end, in page 35
-        self.send_data(Xstart & 0xff)    # RAM x address start at 00h;
-        self.send_data(Xend & 0xff)    # RAM x address end at 0fh(15+1)*8->128 
-        self.send_command(0x45)       # set RAM y address start/end, in page 35
-        self.send_data(Ystart & 0xff)    # RAM y address start at 0127h;
-        self.send_data((Ystart>>8) & 0x01)    # RAM y address start at 0127h;
-        self.send_data(Yend & 0xff)    # RAM y address end at 00h;
-        self.send_data((Yend>>8) & 0x01)   
-
-        self.send_command(0x4E)   # set RAM x address count to 0;
-        self.send_data(Xstart & 0xff)
-        self.send_command(0x4F)   # set RAM y address count to 0X127;    
-        self.send_data(Ystart & 0xff)
-        self.send_data((Ystart>>8) & 0x01)
+        self.send_command_with_data(0x44, [  # set RAM x address start/end, in page 35
+            Xstart & 0xff,  # RAM x address start at 00h;
+            Xend & 0xff])  # RAM x address end at 0fh(15+1)*8->128
+        self.send_command_with_data(0x45, [  # set RAM y address start/end, in page 35
+            Ystart & 0xff,  # RAM y address start at 0127h;
+            (Ystart>>8) & 0x01,  # RAM y address start at 0127h;
+            Yend & 0xff,  # RAM y address end at 00h;
+            (Yend>>8) & 0x01])
+
+        self.send_command_with_data(0x4E, [Xstart & 0xff])  # set RAM x address count to 0;
+        self.send_command_with_data(0x4F, [  # set RAM y address count to 0X127;
+            Ystart & 0xff, (Ystart>>8) & 0x01])
 
         self.send_command(0x24)   #Write Black and White image to RAM
         for j in range(Height):
@@ -510,8 +485,7 @@ class EPD:
         self.TurnOnDisplay_4GRAY()
 
     def sleep(self):
-        self.send_command(0X10)
-        self.send_data(0x01)
+        self.send_command_with_data(0X10, [0x01])
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
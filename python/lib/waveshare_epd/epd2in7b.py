@@ -119,29 +119,27 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte([data])
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      # 0: idle, 1: busy
-            epdconfig.delay_ms(100)
+        epdconfig.wait_busy(0, 100)  # 0: idle, 1: busy
         logger.debug("e-Paper busy release")
         
     def set_lut(self):
-        self.send_command(0x20)               # vcom
-        for count in range(0, 44):
-            self.send_data(self.lut_vcom_dc[count])
-        self.send_command(0x21)         # ww --
-        for count in range(0, 42):
-            self.send_data(self.lut_ww[count])
-        self.send_command(0x22)         # bw r
-        for count in range(0, 42):
-            self.send_data(self.lut_bw[count])
-        self.send_command(0x23)         # wb w
-        for count in range(0, 42):
-            self.send_data(self.lut_bb[count])
-        self.send_command(0x24)         # bb b
-        for count in range(0, 42):
-            self.send_data(self.lut_wb[count])
+        self.send_command_with_data(0x20, self.lut_vcom_dc[:44])  # vcom
+        self.send_command_with_data(0x21, self.lut_ww[:42])  # ww --
+        self.send_command_with_data(0x22, self.lut_bw[:42])  # bw r
+        self.send_command_with_data(0x23, self.lut_bb[:42])  # wb w
+        self.send_command_with_data(0x24, self.lut_wb[:42])  # bb b
             
     def init(self):
         if (epdconfig.module_init() != 0):
@@ -152,58 +150,40 @@ class EPD:
         self.send_command(0x04) # POWER_ON
         self.ReadBusy()
 
-        self.send_command(0x00) # PANEL_SETTING
-        self.send_data(0xaf) #KW-BF   KWR-AF    BWROTP 0f
+        self.send_command_with_data(0x00, [0xaf])  # PANEL_SETTING, KW-BF   KWR-AF    BWROTP 0f
         
-        self.send_command(0x30) # PLL_CONTROL
-        self.send_data(0x3a) #3A 100HZ   29 150Hz 39 200HZ    31 171HZ
+        self.send_command_with_data(0x30, [0x3a])  # PLL_CONTROL, 3A 100HZ   29 150Hz 39 200HZ    31 171HZ
 
-        self.send_command(0x01) # POWER_SETTING
-        self.send_data(0x03) # VDS_EN, VDG_EN
-        self.send_data(0x00) # VCOM_HV, VGHL_LV[1], VGHL_LV[0]
-        self.send_data(0x2b) # VDH
-        self.send_data(0x2b) # VDL
-        self.send_data(0x09) # VDHR
+        self.send_command_with_data(0x01, [  # POWER_SETTING
+            0x03,  # VDS_EN, VDG_EN
+            0x00,  # VCOM_HV, VGHL_LV[1], VGHL_LV[0]
+            0x2b,  # VDH
+            0x2b,  # VDL
+            0x09])  # VDHR
 
-        self.send_command(0x06) # BOOSTER_SOFT_START
-        self.send_data(0x07)
-        self.send_data(0x07)
-        self.send_data(0x17)
+        self.send_command_with_data(0x06, [0x07, 0x07, 0x17])  # BOOSTER_SOFT_START
 
         # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x60)
-        self.send_data(0xA5)
+        self.send_command_with_data(0xF8, [0x60, 0xA5])
 
         # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x89)
-        self.send_data(0xA5)
+        self.send_command_with_data(0xF8, [0x89, 0xA5])
 
         # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x90)
-        self.send_data(0x00)
+        self.send_command_with_data(0xF8, [0x90, 0x00])
         
         # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x93)
-        self.send_data(0x2A)
+        self.send_command_with_data(0xF8, [0x93, 0x2A])
 
         # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x73)
-        self.send_data(0x41)
+        self.send_command_with_data(0xF8, [0x73, 0x41])
 
-        self.send_command(0x82) # VCM_DC_SETTING_REGISTER
-        self.send_data(0x12)                   
-        self.send_command(0x50) # VCOM_AND_DATA_INTERVAL_SETTING
-        self.send_data(0x87) # define by OTP
+        self.send_command_with_data(0x82, [0x12])  # VCM_DC_SETTING_REGISTER
+        self.send_command_with_data(0x50, [0x87])  # VCOM_AND_DATA_INTERVAL_SETTING, define by OTP
 
         self.set_lut()
 
-        self.send_command(0x16) # PARTIAL_DISPLAY_REFRESH
-        self.send_data(0x00)
+        self.send_command_with_data(0x16, [0x00])  # PARTIAL_DISPLAY_REFRESH
         
         return 0
 
@@ -260,11 +240,9 @@ class EPD:
         self.ReadBusy()
 
     def sleep(self):
-        self.send_command(0X50)
-        self.send_data(0xf7)
+        self.send_command_with_data(0X50, [0xf7])
         self.send_command(0X02)
-        self.send_command(0X07)
-        self.send_data(0xA5)
+        self.send_command_with_data(0X07, [0xA5])
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -75,33 +75,33 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     # Read Busy
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      # 0: idle, 1: busy
-            epdconfig.delay_ms(10)
+        epdconfig.wait_busy(1, 10)  # 0: idle, 1: busy
         logger.debug("e-Paper busy release")
             
     # Setting the display window
     def SetWindows(self, Xstart, Ystart, Xend, Yend):
-        self.send_command(0x44)
-        self.send_data((Xstart >> 3) & 0xff)
-        self.send_data((Xend >> 3) & 0xff)
+        self.send_command_with_data(0x44, [(Xstart >> 3) & 0xff, (Xend >> 3) & 0xff])
         
-        self.send_command(0x45)
-        self.send_data(Ystart & 0xff)
-        self.send_data((Ystart >> 8) & 0xff)
-        self.send_data(Yend & 0xff)
-        self.send_data((Yend >> 8) & 0xff)
+        self.send_command_with_data(0x45, [
+            Ystart & 0xff, (Ystart >> 8) & 0xff, Yend & 0xff, (Yend >> 8) & 0xff])
     
     # Set Cursor
     def SetCursor(self, Xstart, Ystart):
-        self.send_command(0x4E)
-        self.send_data(Xstart & 0xff)
-        self.send_command(0x4F)
-        self.send_data(Ystart & 0xff)
-        self.send_data((Ystart >> 8) & 0xff)
+        self.send_command_with_data(0x4E, [Xstart & 0xff])
+        self.send_command_with_data(0x4F, [Ystart & 0xff, (Ystart >> 8) & 0xff])
         
     # Initialize the e-Paper register
     def init(self):
@@ -114,13 +114,9 @@ class EPD:
         self.send_command(0x12)      
         self.ReadBusy() 
         
-        self.send_command(0x00)     
-        self.send_data(0x27) 
-        self.send_data(0x01) 
-        self.send_data(0x00) 
+        self.send_command_with_data(0x00, [0x27, 0x01, 0x00])
         
-        self.send_command(0x11)     
-        self.send_data(0x03) 
+        self.send_command_with_data(0x11, [0x03])
         
         self.SetWindows(0, 0, self.width-1, self.height-1)
         self.SetCursor(0, 0)
@@ -170,10 +166,10 @@ class EPD:
     # Clear the screen
     def Clear(self):
         self.send_command(0x24)
-        self.send_data2([0xff] * int(self.width * self.height / 8))
+        self.send_data2(b'\xff' * int(self.width * self.height / 8))
 
         self.send_command(0x26)
-        self.send_data2([0x00] * int(self.width * self.height / 8))
+        self.send_data2(b'\x00' * int(self.width * self.height / 8))
             
         self.TurnOnDisplay()
         
@@ -184,8 +180,7 @@ class EPD:
 
     # Enter sleep mode
     def sleep(self):
-        self.send_command(0x10)
-        self.send_data(0x01)
+        self.send_command_with_data(0x10, [0x01])
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -167,63 +167,57 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      #  0: idle, 1: busy
-            epdconfig.delay_ms(10) 
+        epdconfig.wait_busy(1, 10)  #  0: idle, 1: busy
         logger.debug("e-Paper busy release")  
 
     def TurnOnDisplay(self):
-        self.send_command(0x22) # DISPLAY_UPDATE_CONTROL_2
-        self.send_data(0xc7)
+        self.send_command_with_data(0x22, [0xc7])  # DISPLAY_UPDATE_CONTROL_2
         self.send_command(0x20) # MASTER_ACTIVATION
         self.ReadBusy()
 
     def TurnOnDisplay_Partial(self):
-        self.send_command(0x22) # DISPLAY_UPDATE_CONTROL_2
-        self.send_data(0x0F)
+        self.send_command_with_data(0x22, [0x0F])  # DISPLAY_UPDATE_CONTROL_2
         self.send_command(0x20) # MASTER_ACTIVATION
         self.ReadBusy()
 
     def lut(self, lut):
-        self.send_command(0x32)
-        for i in range(0, 153):
-            self.send_data(lut[i])
+        self.send_command_with_data(0x32, lut[:153])
         self.ReadBusy()
 
     def SetLut(self, lut):
         self.lut(lut)
-        self.send_command(0x3f)
-        self.send_data(lut[153])
-        self.send_command(0x03);	# gate voltage
-        self.send_data(lut[154])
-        self.send_command(0x04);	# source voltage
-        self.send_data(lut[155])	# VSH
-        self.send_data(lut[156])	# VSH2
-        self.send_data(lut[157])	# VSL
-        self.send_command(0x2c);		# VCOM
-        self.send_data(lut[158])
+        self.send_command_with_data(0x3f, [lut[153]])
+        self.send_command_with_data(0x03, [lut[154]])  # gate voltage
+        self.send_command_with_data(0x04, [  # source voltage
+            lut[155],  # VSH
+            lut[156],  # VSH2
+            lut[157]])  # VSL
+        self.send_command_with_data(0x2c, [lut[158]])  # VCOM
 
     def SetWindow(self, x_start, y_start, x_end, y_end):
-        self.send_command(0x44) # SET_RAM_X_ADDRESS_START_END_POSITION
         # x point must be the multiple of 8 or the last 3 bits will be ignored
-        self.send_data((x_start>>3) & 0xFF)
-        self.send_data((x_end>>3) & 0xFF)
-        self.send_command(0x45) # SET_RAM_Y_ADDRESS_START_END_POSITION
-        self.send_data(y_start & 0xFF)
-        self.send_data((y_start >> 8) & 0xFF)
-        self.send_data(y_end & 0xFF)
-        self.send_data((y_end >> 8) & 0xFF)
+        self.send_command_with_data(0x44, [  # SET_RAM_X_ADDRESS_START_END_POSITION
+            (x_start>>3) & 0xFF, (x_end>>3) & 0xFF])
+        self.send_command_with_data(0x45, [  # SET_RAM_Y_ADDRESS_START_END_POSITION
+            y_start & 0xFF, (y_start >> 8) & 0xFF, y_end & 0xFF, (y_end >> 8) & 0xFF])
 
     def SetCursor(self, x, y):
-        self.send_command(0x4E) # SET_RAM_X_ADDRESS_COUNTER
         # x point must be the multiple of 8 or the last 3 bits will be ignored
-        self.send_data(x & 0xFF)
+        self.send_command_with_data(0x4E, [x & 0xFF])  # SET_RAM_X_ADDRESS_COUNTER
         
-        self.send_command(0x4F) # SET_RAM_Y_ADDRESS_COUNTER
-        self.send_data(y & 0xFF)
-        self.send_data((y >> 8) & 0xFF)
+        self.send_command_with_data(0x4F, [y & 0xFF, (y >> 8) & 0xFF])  # SET_RAM_Y_ADDRESS_COUNTER
         
     def init(self):
         if (epdconfig.module_init() != 0):
@@ -235,19 +229,13 @@ class EPD:
         self.send_command(0x12)  #SWRESET
         self.ReadBusy() 
 
-        self.send_command(0x01) #Driver output control      
-        self.send_data(0x27)
-        self.send_data(0x01)
-        self.send_data(0x00)
+        self.send_command_with_data(0x01, [0x27, 0x01, 0x00])  #Driver output control
     
-        self.send_command(0x11) #data entry mode       
-        self.send_data(0x03)
+        self.send_command_with_data(0x11, [0x03])  #data entry mode
 
         self.SetWindow(0, 0, self.width-1, self.height-1)
 
-        self.send_command(0x21) #  Display update control
-        self.send_data(0x00)
-        self.send_data(0x80)
+        self.send_command_with_data(0x21, [0x00, 0x80])  #  Display update control
     
         self.SetCursor(0, 0)
         self.ReadBusy()
@@ -266,22 +254,15 @@ class EPD:
         self.send_command(0x12)  #SWRESET
         self.ReadBusy() 
 
-        self.send_command(0x01) #Driver output control      
-        self.send_data(0x27)
-        self.send_data(0x01)
-        self.send_data(0x00)
+        self.send_command_with_data(0x01, [0x27, 0x01, 0x00])  #Driver output control
     
-        self.send_command(0x11) #data entry mode       
-        self.send_data(0x03)
+        self.send_command_with_data(0x11, [0x03])  #data entry mode
 
         self.SetWindow(0, 0, self.width-1, self.height-1)
 
-        self.send_command(0x3C)   
-        self.send_data(0x05)
+        self.send_command_with_data(0x3C, [0x05])
 
-        self.send_command(0x21) #  Display update control
-        self.send_data(0x00)
-        self.send_data(0x80)
+        self.send_command_with_data(0x21, [0x00, 0x80])  #  Display update control
     
         self.SetCursor(0, 0)
         self.ReadBusy()
@@ -300,18 +281,13 @@ class EPD:
         self.send_command(0x12)  #SWRESET
         self.ReadBusy() 
 
-        self.send_command(0x01) #Driver output control      
-        self.send_data(0x27)
-        self.send_data(0x01)
-        self.send_data(0x00)
+        self.send_command_with_data(0x01, [0x27, 0x01, 0x00])  #Driver output control
     
-        self.send_command(0x11) #data entry mode       
-        self.send_data(0x03)
+        self.send_command_with_data(0x11, [0x03])  #data entry mode
 
         self.SetWindow(8, 0, self.width, self.height-1)
 
-        self.send_command(0x3C)
-        self.send_data(0x04)
+        self.send_command_with_data(0x3C, [0x04])
     
         self.SetCursor(1, 0)
         self.ReadBusy()
@@ -476,23 +452,11 @@ class EPD:
         epdconfig.delay_ms(2)   
         
         self.SetLut(self.WF_PARTIAL_2IN9)
-        self.send_command(0x37)
-        self.send_data(0x00)
-        self.send_data(0x00)
-        self.send_data(0x00)
-        self.send_data(0x00)
-        self.send_data(0x00)
-        self.send_data(0x40)
-        self.send_data(0x00)
-        self.send_data(0x00)
-        self.send_data(0x00)  
-        self.send_data(0x00)
-
-        self.send_command(0x3C) #BorderWavefrom
-        self.send_data(0x80)
-
-        self.send_command(0x22) 
-        self.send_data(0xC0)
+        self.send_command_with_data(0x37, [0x00, 0x00, 0x00, 0x00, 0x00, 0x40, 0x00, 0x00, 0x00, 0x00])
+
+        self.send_command_with_data(0x3C, [0x80])  #BorderWavefrom
+
+        self.send_command_with_data(0x22, [0xC0])
         self.send_command(0x20)
         self.ReadBusy()
 
@@ -511,15 +475,14 @@ class EPD:
             linewidth = int(self.width/8) + 1
 
         self.send_command(0x24) # WRITE_RAM
-        self.send_data2([color] * int(self.height * linewidth)) 
+        self.send_data2(bytes([color]) * int(self.height * linewidth)) 
         self.TurnOnDisplay()
         self.send_command(0x26) # WRITE_RAM
-        self.send_data2([color] * int(self.height * linewidth)) 
+        self.send_data2(bytes([color]) * int(self.height * linewidth)) 
         self.TurnOnDisplay()
 
     def sleep(self):
-        self.send_command(0x10) # DEEP_SLEEP_MODE
-        self.send_data(0x01)
+        self.send_command_with_data(0x10, [0x01])  # DEEP_SLEEP_MODE
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -73,7 +73,16 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
         self.send_command(0X71)
@@ -91,17 +100,17 @@ class EPD:
         self.send_command(0x04)  
         self.ReadBusy()#waiting for the electronic paper IC to release the idle signal
 
-        self.send_command(0x00)    #panel setting
-        self.send_data(0x0f)   #LUT from OTP,128x296
-        self.send_data(0x89)    #Temperature sensor, boost and other related timing settings
+        self.send_command_with_data(0x00, [  #panel setting
+            0x0f,  #LUT from OTP,128x296
+            0x89])  #Temperature sensor, boost and other related timing settings
 
         self.send_command(0x61)    #resolution setting
         self.send_data (0x80)  
         self.send_data (0x01)  
         self.send_data (0x28)
 
-        self.send_command(0X50)    #VCOM AND DATA INTERVAL SETTING
-        self.send_data(0x77)   #WBmode:VBDF 17|D7 VBDW 97 VBDB 57
+        self.send_command_with_data(0X50, [  #VCOM AND DATA INTERVAL SETTING
+            0x77])  #WBmode:VBDF 17|D7 VBDW 97 VBDB 57
                             # WBRmode:VBDF F7 VBDW 77 VBDB 37  VBDR B7
         
         return 0
@@ -144,9 +153,9 @@ class EPD:
         
     def Clear(self):
         self.send_command(0X10)
-        self.send_data2([0xff] * int(self.width * self.height / 8))
+        self.send_data2(b'\xff' * int(self.width * self.height / 8))
         self.send_command(0X13)
-        self.send_data2([0xff] * int(self.width * self.height / 8))
+        self.send_data2(b'\xff' * int(self.width * self.height / 8))
 
         self.send_command(0x12)
         epdconfig.delay_ms(200) 
@@ -155,8 +164,7 @@ class EPD:
     def sleep(self):
         self.send_command(0X02) # power off
         self.ReadBusy()
-        self.send_command(0X07) # deep sleep
-        self.send_data(0xA5)
+        self.send_command_with_data(0X07, [0xA5])  # deep sleep
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -73,36 +73,40 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
         self.send_command(0X71)
-        while(epdconfig.digital_read(self.busy_pin) == 1):      #  0: idle, 1: busy
-            epdconfig.delay_ms(200)                
+        epdconfig.wait_busy(1, 200)  #  0: idle, 1: busy
         logger.debug("e-Paper busy release")
         
 
     def TurnOnDisplay(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xF7)
+        self.send_command_with_data(0x22, [0xF7])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
 
     def TurnOnDisplay_Base(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xF4)
+        self.send_command_with_data(0x22, [0xF4])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
         
     def TurnOnDisplay_Fast(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xC7)
+        self.send_command_with_data(0x22, [0xC7])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
         
     def TurnOnDisplay_Partial(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0x1C)
+        self.send_command_with_data(0x22, [0x1C])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
 
@@ -118,39 +122,24 @@ class EPD:
         self.send_command(0x12)  #SWRESET
         self.ReadBusy()   
 
-        self.send_command(0x01) #Driver output control      
-        self.send_data((self.height-1)%256)    
-        self.send_data((self.height-1)//256)
-        self.send_data(0x00)
+        self.send_command_with_data(0x01, [  #Driver output control
+            (self.height-1)%256, (self.height-1)//256, 0x00])
 
-        self.send_command(0x11) #data entry mode       
-        self.send_data(0x03)
+        self.send_command_with_data(0x11, [0x03])  #data entry mode
 
-        self.send_command(0x44) #set Ram-X address start/end position   
-        self.send_data(0x00)
-        self.send_data(self.width//8-1)   
+        self.send_command_with_data(0x44, [0x00, self.width//8-1])  #set Ram-X address start/end position
 
-        self.send_command(0x45) #set Ram-Y address start/end position          
-        self.send_data(0x00)
-        self.send_data(0x00) 
-        self.send_data((self.height-1)%256)    
-        self.send_data((self.height-1)//256)
+        self.send_command_with_data(0x45, [  #set Ram-Y address start/end position
+            0x00, 0x00, (self.height-1)%256, (self.height-1)//256])
 
-        self.send_command(0x3C) #BorderWavefrom
-        self.send_data(0x05)	
+        self.send_command_with_data(0x3C, [0x05])  #BorderWavefrom
 
-        self.send_command(0x21) #  Display update control
-        self.send_data(0x00)		
-        self.send_data(0x80)	
+        self.send_command_with_data(0x21, [0x00, 0x80])  #  Display update control
 
-        self.send_command(0x18) #Read built-in temperature sensor
-        self.send_data(0x80)	
+        self.send_command_with_data(0x18, [0x80])  #Read built-in temperature sensor
 
-        self.send_command(0x4E)   # set RAM x address count to 0
-        self.send_data(0x00)
-        self.send_command(0x4F)   # set RAM y address count to 0X199    
-        self.send_data(0x00)    
-        self.send_data(0x00)
+        self.send_command_with_data(0x4E, [0x00])  # set RAM x address count to 0
+        self.send_command_with_data(0x4F, [0x00, 0x00])  # set RAM y address count to 0X199
         self.ReadBusy()
         
         return 0
@@ -166,46 +155,32 @@ class EPD:
         self.send_command(0x12)  #SWRESET
         self.ReadBusy()   	
 
-        self.send_command(0x18) #Read built-in temperature sensor
-        self.send_data(0x80)
+        self.send_command_with_data(0x18, [0x80])  #Read built-in temperature sensor
 
-        self.send_command(0x22) # Load temperature value
-        self.send_data(0xB1)		
+        self.send_command_with_data(0x22, [0xB1])  # Load temperature value
         self.send_command(0x20)	
         self.ReadBusy()   
 
-        self.send_command(0x1A) # Write to temperature register
-        self.send_data(0x5a)		# 90		
-        self.send_data(0x00)	
+        self.send_command_with_data(0x1A, [  # Write to temperature register
+            0x5a,  # 90
+            0x00])
                     
-        self.send_command(0x22) # Load temperature value
-        self.send_data(0x91)		
+        self.send_command_with_data(0x22, [0x91])  # Load temperature value
         self.send_command(0x20)	
         self.ReadBusy()  
 
-        self.send_command(0x01) #Driver output control      
-        self.send_data((self.height-1)%256)    
-        self.send_data((self.height-1)//256)
-        self.send_data(0x00)
-
-        self.send_command(0x11) #data entry mode       
-        self.send_data(0x03)
-
-        self.send_command(0x44) #set Ram-X address start/end position   
-        self.send_data(0x00)
-        self.send_data(self.width//8-1)   
-
-        self.send_command(0x45) #set Ram-Y address start/end position          
-        self.send_data(0x00)
-        self.send_data(0x00) 
-        self.send_data((self.height-1)%256)    
-        self.send_data((self.height-1)//256)	
-
-        self.send_command(0x4E)   # set RAM x address count to 0
-        self.send_data(0x00)
-        self.send_command(0x4F)   # set RAM y address count to 0X199    
-        self.send_data(0x00)    
-        self.send_data(0x00)
+        self.send_command_with_data(0x01, [  #Driver output control
+            (self.height-1)%256, (self.height-1)//256, 0x00])
+
+        self.send_command_with_data(0x11, [0x03])  #data entry mode
+
+        self.send_command_with_data(0x44, [0x00, self.width//8-1])  #set Ram-X address start/end position
+
+        self.send_command_with_data(0x45, [  #set Ram-Y address start/end position
+            0x00, 0x00, (self.height-1)%256, (self.height-1)//256])
+
+        self.send_command_with_data(0x4E, [0x00])  # set RAM x address count to 0
+        self.send_command_with_data(0x4F, [0x00, 0x00])  # set RAM y address count to 0X199
         self.ReadBusy()	
         
         return 0
@@ -272,17 +247,17 @@ class EPD:
         
     def Clear(self):
         self.send_command(0x24)
-        self.send_data2([0xff] * int(self.width * self.height // 8))
+        self.send_data2(b'\xff' * int(self.width * self.height // 8))
         self.send_command(0x26)
-        self.send_data2([0x00] * int(self.width * self.height // 8))
+        self.send_data2(b'\x00' * int(self.width * self.height // 8))
 
         self.TurnOnDisplay()
 
     def Clear_Fast(self):
         self.send_command(0x24)
-        self.send_data2([0xff] * int(self.width * self.height // 8))
+        self.send_data2(b'\xff' * int(self.width * self.height // 8))
         self.send_command(0x26)
-        self.send_data2([0x00] * int(self.width * self.height // 8))
+        self.send_data2(b'\x00' * int(self.width * self.height // 8))
 
         self.TurnOnDisplay_Fast()
 
@@ -356,20 +331,18 @@ class EPD:
         Xend -= 1
         Yend -= 1
 	
-        self.send_command(0x44)       # set RAM x address start/end, in page 35
-        self.send_data(Xstart & 0xff)    # RAM x address start at 00h
-        self.send_data(Xend & 0xff)    # RAM x address end at 0fh(15+1)*8->128 
-        self.send_command(0x45)       # set RAM y address start/end, in page 35
-        self.send_data(Ystart & 0xff)    # RAM y address start at 0127h
-        self.send_data((Ystart>>8) & 0x01)    # RAM y address start at 0127h
-        self.send_data(Yend & 0xff)    # RAM y address end at 00h
-        self.send_data((Yend>>8) & 0x01)   
-
-        self.send_command(0x4E)   # set RAM x address count to 0
-        self.send_data(Xstart & 0xff)
-        self.send_command(0x4F)   # set RAM y address count to 0X127    
-        self.send_data(Ystart & 0xff)
-        self.send_data((Ystart>>8) & 0x01)
+        self.send_command_with_data(0x44, [  # set RAM x address start/end, in page 35
+            Xstart & 0xff,  # RAM x address start at 00h
+            Xend & 0xff])  # RAM x address end at 0fh(15+1)*8->128
+        self.send_command_with_data(0x45, [  # set RAM y address start/end, in page 35
+            Ystart & 0xff,  # RAM y address start at 0127h
+            (Ystart>>8) & 0x01,  # RAM y address start at 0127h
+            Yend & 0xff,  # RAM y address end at 00h
+            (Yend>>8) & 0x01])
+
+        self.send_command_with_data(0x4E, [Xstart & 0xff])  # set RAM x address count to 0
+        self.send_command_with_data(0x4F, [  # set RAM y address count to 0X127
+            Ystart & 0xff, (Ystart>>8) & 0x01])
 
         self.send_command(0x24)   #Write Black and White image to RAM
         for j in range(Height):
@@ -379,8 +352,7 @@ class EPD:
         self.TurnOnDisplay_Partial()
         
     def sleep(self):
-        self.send_command(0x10) # deep sleep
-        self.send_data(0x01)
+        self.send_command_with_data(0x10, [0x01])  # deep sleep
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
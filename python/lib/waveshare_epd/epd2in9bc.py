@@ -66,11 +66,19 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte([data])
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      #  0: idle, 1: busy
-            epdconfig.delay_ms(200)                
+        epdconfig.wait_busy(0, 200)  #  0: idle, 1: busy
         logger.debug("e-Paper busy release")
         
     def init(self):
@@ -85,10 +93,8 @@ class EPD:
         self.send_data (0x17)
         self.send_command(0x04) # POWER_ON
         self.ReadBusy()
-        self.send_command(0X00) # PANEL_SETTING
-        self.send_data(0x8F)
-        self.send_command(0X50) # VCOM_AND_DATA_INTERVAL_SETTING
-        self.send_data(0x77)
+        self.send_command_with_data(0X00, [0x8F])  # PANEL_SETTING
+        self.send_command_with_data(0X50, [0x77])  # VCOM_AND_DATA_INTERVAL_SETTING
         self.send_command(0x61) # TCON_RESOLUTION
         self.send_data (0x80)
         self.send_data (0x01)
@@ -124,13 +130,9 @@ class EPD:
 
     def display(self, blackimage, ryimage): # ryimage: red or yellow image
         if (blackimage != None):
-            self.send_command(0X10)
-            for i in range(0, int(self.width * self.height / 8)):
-                self.send_data(blackimage[i])        
+            self.send_command_with_data(0X10, blackimage[:int(self.width * self.height / 8)])
         if (ryimage != None):
-            self.send_command(0X13)
-            for i in range(0, int(self.width * self.height / 8)):
-                self.send_data(ryimage[i])
+            self.send_command_with_data(0X13, ryimage[:int(self.width * self.height / 8)])
 
         self.send_command(0x12)
         self.ReadBusy()
@@ -149,8 +151,7 @@ class EPD:
     def sleep(self):
         self.send_command(0X02) # power off
         self.ReadBusy()
-        self.send_command(0X07) # deep sleep
-        self.send_data(0xA5)
+        self.send_command_with_data(0X07, [0xA5])  # deep sleep
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -134,7 +134,16 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
         while(epdconfig.digital_read(self.busy_pin) == 0):      # 0: idle, 1: busy
@@ -156,52 +165,41 @@ class EPD:
         self.send_command(0x04)
         self.ReadBusy() #waiting for the electronic paper IC to release the idle signal
 
-        self.send_command(0x00)     #panel setting
-        self.send_data(0x1f)        # LUT from OTP，KW-BF   KWR-AF    BWROTP 0f   BWOTP 1f
+        self.send_command_with_data(0x00, [  #panel setting
+            0x1f])  # LUT from OTP，KW-BF   KWR-AF    BWROTP 0f   BWOTP 1f
 
         self.send_command(0x61)     #resolution setting
         self.send_data (0x80)       
         self.send_data (0x01)   
         self.send_data (0x28)   
 
-        self.send_command(0X50) #VCOM AND DATA INTERVAL SETTING     
-        self.send_data(0x97)        #WBmode:VBDF 17|D7 VBDW 97 VBDB 57  WBRmode:VBDF F7 VBDW 77 VBDB 37  VBDR B7
+        self.send_command_with_data(0X50, [  #VCOM AND DATA INTERVAL SETTING
+            0x97])  #WBmode:VBDF 17|D7 VBDW 97 VBDB 57  WBRmode:VBDF F7 VBDW 77 VBDB 37  VBDR B7
 
         return 0
     
     def SetPartReg(self):
 
-        self.send_command(0x01) #POWER SETTING
-        self.send_data(0x03)
-        self.send_data(0x00)
-        self.send_data(0x2b)
-        self.send_data(0x2b)
-        self.send_data(0x03)
+        self.send_command_with_data(0x01, [0x03, 0x00, 0x2b, 0x2b, 0x03])  #POWER SETTING
 
-        self.send_command(0x06) #boost soft start
-        self.send_data(0x17)     #A
-        self.send_data(0x17)     #B
-        self.send_data(0x17)     #C
+        self.send_command_with_data(0x06, [  #boost soft start
+            0x17,  #A
+            0x17,  #B
+            0x17])  #C
 
         self.send_command(0x04)
         self.ReadBusy()
 
-        self.send_command(0x00) #panel setting
-        self.send_data(0xbf)     #LUT from OTP，128x296
+        self.send_command_with_data(0x00, [0xbf])  #panel setting, LUT from OTP，128x296
 
-        self.send_command(0x30) #PLL setting
-        self.send_data(0x3a)     # 3a 100HZ   29 150Hz 39 200HZ 31 171HZ
+        self.send_command_with_data(0x30, [0x3a])  #PLL setting, 3a 100HZ   29 150Hz 39 200HZ 31 171HZ
 
-        self.send_command(0x61) #resolution setting
-        self.send_data(self.width)
-        self.send_data((self.height >> 8) & 0xff)
-        self.send_data(self.height & 0xff)
+        self.send_command_with_data(0x61, [  #resolution setting
+            self.width, (self.height >> 8) & 0xff, self.height & 0xff])
 
-        self.send_command(0x82) #vcom_DC setting
-        self.send_data(0x12)
+        self.send_command_with_data(0x82, [0x12])  #vcom_DC setting
 
-        self.send_command(0X50)
-        self.send_data(0x97)
+        self.send_command_with_data(0X50, [0x97])
         
         self.send_command(0x20)         # vcom
         self.send_data2(self.lut_vcom1)
@@ -240,7 +238,7 @@ class EPD:
 
     def display(self, image):
         self.send_command(0x10)
-        self.send_data2([0x00] * int(self.width * self.height / 8))
+        self.send_data2(b'\x00' * int(self.width * self.height / 8))
         epdconfig.delay_ms(10)
         
         self.send_command(0x13)
@@ -252,15 +250,8 @@ class EPD:
     def DisplayPartial(self, image):
         self.SetPartReg()
         self.send_command(0x91)
-        self.send_command(0x90)
-        self.send_data(0)
-        self.send_data(self.width - 1)
-
-        self.send_data(0)
-        self.send_data(0)
-        self.send_data(int(self.height / 256))
-        self.send_data(self.height % 256 - 1)
-        self.send_data(0x28)
+        self.send_command_with_data(0x90, [
+            0, self.width - 1, 0, 0, int(self.height / 256), self.height % 256 - 1, 0x28])
         
 
         buf = [0x00] * int(self.width * self.height / 8)
@@ -278,21 +269,19 @@ class EPD:
         
     def Clear(self):
         self.send_command(0x10)
-        self.send_data2([0x00] * int(self.width * self.height / 8))
+        self.send_data2(b'\x00' * int(self.width * self.height / 8))
         epdconfig.delay_ms(10)
         
         self.send_command(0x13)
-        self.send_data2([0xFF] * int(self.width * self.height / 8))
+        self.send_data2(b'\xff' * int(self.width * self.height / 8))
         epdconfig.delay_ms(10)
         
         self.TurnOnDisplay()
 
     def sleep(self):
-        self.send_command(0X50)
-        self.send_data(0xf7)
+        self.send_command_with_data(0X50, [0xf7])
         self.send_command(0X02)         #power off
-        self.send_command(0X07)         #deep sleep  
-        self.send_data(0xA5)
+        self.send_command_with_data(0X07, [0xA5])  #deep sleep
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -220,11 +220,19 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      #  0: busy, 1: idle
-            epdconfig.delay_ms(5) 
+        epdconfig.wait_busy(0, 5)  #  0: busy, 1: idle
         logger.debug("e-Paper busy release")
 
     def lut(self) :
@@ -244,8 +252,7 @@ class EPD:
         self.send_data2(self.lut_wb[:42])
 
     def refresh(self):
-        self.send_command(0x17)
-        self.send_data(0xA5)
+        self.send_command_with_data(0x17, [0xA5])
         self.ReadBusy()
         epdconfig.delay_ms(200)
 
@@ -313,41 +320,38 @@ class EPD:
         self.Flag = 0
         self.reset()
 
-        self.send_command(0x00)     # panel setting   PSR
-        self.send_data(0xFF)        # RES1 RES0 REG KW/R     UD    SHL   SHD_N  RST_N    
-        self.send_data(0x01)        # x x x VCMZ TS_AUTO TIGE NORG VC_LUTZ
+        self.send_command_with_data(0x00, [  # panel setting   PSR
+            0xFF,  # RES1 RES0 REG KW/R     UD    SHL   SHD_N  RST_N
+            0x01])  # x x x VCMZ TS_AUTO TIGE NORG VC_LUTZ
 
-        self.send_command(0x01)     # POWER SETTING   PWR
-        self.send_data(0x03)        #  x x x x x x VDS_EN VDG_EN    
-        self.send_data(0x10)        #  x x x VCOM_SLWE VGH[3:0]   VGH=20V, VGL=-20V    
-        self.send_data(0x3F)        #  x x VSH[5:0]    VSH = 15V
-        self.send_data(0x3F)        #  x x VSL[5:0]    VSL=-15V
-        self.send_data(0x03)        #  OPTEN VDHR[6:0]  VHDR=6.4V
+        self.send_command_with_data(0x01, [  # POWER SETTING   PWR
+            0x03,  #  x x x x x x VDS_EN VDG_EN
+            0x10,  #  x x x VCOM_SLWE VGH[3:0]   VGH=20V, VGL=-20V
+            0x3F,  #  x x VSH[5:0]    VSH = 15V
+            0x3F,  #  x x VSL[5:0]    VSL=-15V
+            0x03])  #  OPTEN VDHR[6:0]  VHDR=6.4V
                                     # T_VDS_OFF[1:0] 00=1 frame; 01=2 frame; 10=3 frame; 11=4 frame
-        self.send_command(0x06)     # booster soft start   BTST 
-        self.send_data(0x37)        #  BT_PHA[7:0]      
-        self.send_data(0x3D)        #  BT_PHB[7:0]    
-        self.send_data(0x3D)        #  x x BT_PHC[5:0]    
+        self.send_command_with_data(0x06, [  # booster soft start   BTST
+            0x37,  #  BT_PHA[7:0]
+            0x3D,  #  BT_PHB[7:0]
+            0x3D])  #  x x BT_PHC[5:0]
 
-        self.send_command(0x60)     # TCON setting            TCON 
-        self.send_data(0x22)        # S2G[3:0] G2S[3:0]   non-overlap = 12        
+        self.send_command_with_data(0x60, [  # TCON setting            TCON
+            0x22])  # S2G[3:0] G2S[3:0]   non-overlap = 12
 
-        self.send_command(0x82)     # VCOM_DC setting        VDCS 
-        self.send_data(0x07)        # x  VDCS[6:0]    VCOM_DC value= -1.9v    00~3f,0x12=-1.9v
+        self.send_command_with_data(0x82, [  # VCOM_DC setting        VDCS
+            0x07])  # x  VDCS[6:0]    VCOM_DC value= -1.9v    00~3f,0x12=-1.9v
 
-        self.send_command(0x30)             
-        self.send_data(0x09)        
+        self.send_command_with_data(0x30, [0x09])
 
-        self.send_command(0xe3)     # power saving            PWS 
-        self.send_data(0x88)        # VCOM_W[3:0] SD_W[3:0]
+        self.send_command_with_data(0xe3, [0x88])  # power saving            PWS, VCOM_W[3:0] SD_W[3:0]
 
-        self.send_command(0x61)     # resoultion setting 
-        self.send_data(0xf0)        #  HRES[7:3] 0 0 0    
-        self.send_data(0x01)        #  x x x x x x x VRES[8]    
-        self.send_data(0x68)        #  VRES[7:0]
+        self.send_command_with_data(0x61, [  # resoultion setting
+            0xf0,  #  HRES[7:3] 0 0 0
+            0x01,  #  x x x x x x x VRES[8]
+            0x68])  #  VRES[7:0]
 
-        self.send_command(0x50);            
-        self.send_data(0xB7);    
+        self.send_command_with_data(0x50, [0xB7])
         return 0
 
     def getbuffer(self, image):
@@ -444,13 +448,12 @@ class EPD:
         
     def Clear(self):
         self.send_command(0x13);		     # Transfer new data
-        self.send_data2([0xFF] * int(self.width * self.height / 8))
+        self.send_data2(b'\xff' * int(self.width * self.height / 8))
         self.lut_GC()
         self.refresh()
 
     def sleep(self):
-        self.send_command(0X07) # DEEP_SLEEP_MODE
-        self.send_data(0xA5)
+        self.send_command_with_data(0X07, [0xA5])  # DEEP_SLEEP_MODE
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -30,6 +30,7 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
 
 # Display resolution
 EPD_WIDTH  = 400
@@ -248,6 +249,15 @@ class EPD:
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
 
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         self.send_command(0x71)
         while epdconfig.digital_read(self.busy_pin) == 0:  # 0: idle, 1: busy
@@ -255,55 +265,26 @@ class EPD:
             epdconfig.delay_ms(100)
 
     def set_lut(self):
-        self.send_command(0x20)  # vcom
-        self.send_data2(self.lut_vcom0)
-
-        self.send_command(0x21)  # ww --
-        self.send_data2(self.lut_ww)
-
-        self.send_command(0x22)  # bw r
-        self.send_data2(self.lut_bw)
-
-        self.send_command(0x23)  # wb w
-        self.send_data2(self.lut_bb)
-
-        self.send_command(0x24)  # bb b
-        self.send_data2(self.lut_wb)
+        self.send_command_with_data(0x20, self.lut_vcom0)  # vcom
+        self.send_command_with_data(0x21, self.lut_ww)  # ww --
+        self.send_command_with_data(0x22, self.lut_bw)  # bw r
+        self.send_command_with_data(0x23, self.lut_bb)  # wb w
+        self.send_command_with_data(0x24, self.lut_wb)  # bb b
 
     def Partial_SetLut(self):
-        self.send_command(0x20)
-        self.send_data2(self.EPD_4IN2_Partial_lut_vcom1)
-
-        self.send_command(0x21)
-        self.send_data2(self.EPD_4IN2_Partial_lut_ww1)
-
-        self.send_command(0x22)
-        self.send_data2(self.EPD_4IN2_Partial_lut_bw1)
-
-        self.send_command(0x23)
-        self.send_data2(self.EPD_4IN2_Partial_lut_wb1)
-
-        self.send_command(0x24)
-        self.send_data2(self.EPD_4IN2_Partial_lut_bb1)
+        self.send_command_with_data(0x20, self.EPD_4IN2_Partial_lut_vcom1)
+        self.send_command_with_data(0x21, self.EPD_4IN2_Partial_lut_ww1)
+        self.send_command_with_data(0x22, self.EPD_4IN2_Partial_lut_bw1)
+        self.send_command_with_data(0x23, self.EPD_4IN2_Partial_lut_wb1)
+        self.send_command_with_data(0x24, self.EPD_4IN2_Partial_lut_bb1)
 
     def Gray_SetLut(self):
-        self.send_command(0x20)  # vcom
-        self.send_data2(self.EPD_4IN2_4Gray_lut_vcom)
-
-        self.send_command(0x21)  # red not use
-        self.send_data2(self.EPD_4IN2_4Gray_lut_ww)
-
-        self.send_command(0x22)  # bw r
-        self.send_data2(self.EPD_4IN2_4Gray_lut_bw)
-
-        self.send_command(0x23)  # wb w
-        self.send_data2(self.EPD_4IN2_4Gray_lut_wb)
-
-        self.send_command(0x24)  # bb b
-        self.send_data2(self.EPD_4IN2_4Gray_lut_bb)
-
-        self.send_command(0x25)  # vcom
-        self.send_data2(self.EPD_4IN2_4Gray_lut_ww)
+        self.send_command_with_data(0x20, self.EPD_4IN2_4Gray_lut_vcom)  # vcom
+        self.send_command_with_data(0x21, self.EPD_4IN2_4Gray_lut_ww)  # red not use
+        self.send_command_with_data(0x22, self.EPD_4IN2_4Gray_lut_bw)  # bw r
+        self.send_command_with_data(0x23, self.EPD_4IN2_4Gray_lut_wb)  # wb w
+        self.send_command_with_data(0x24, self.EPD_4IN2_4Gray_lut_bb)  # bb b
+        self.send_command_with_data(0x25, self.EPD_4IN2_4Gray_lut_ww)  # vcom
 
     def init(self):
         if epdconfig.module_init() != 0:
@@ -311,38 +292,31 @@ class EPD:
         # EPD hardware init start
         self.reset()
 
-        self.send_command(0x01)  # POWER SETTING
-        self.send_data(0x03)  # VDS_EN, VDG_EN
-        self.send_data(0x00)  # VCOM_HV, VGHL_LV[1], VGHL_LV[0]
-        self.send_data(0x2b)  # VDH
-        self.send_data(0x2b)  # VDL
+        self.send_command_with_data(0x01, [  # POWER SETTING
+            0x03,  # VDS_EN, VDG_EN
+            0x00,  # VCOM_HV, VGHL_LV[1], VGHL_LV[0]
+            0x2b,  # VDH
+            0x2b])  # VDL
 
-        self.send_command(0x06)  # boost soft start
-        self.send_data(0x17)
-        self.send_data(0x17)
-        self.send_data(0x17)
+        self.send_command_with_data(0x06, [0x17, 0x17, 0x17])  # boost soft start
 
         self.send_command(0x04)  # POWER_ON
         self.ReadBusy()
 
-        self.send_command(0x00)  # panel setting
-        self.send_data(0xbf)  # KW-BF   KWR-AF  BWROTP 0f
+        self.send_command_with_data(0x00, [0xbf])  # panel setting, KW-BF   KWR-AF  BWROTP 0f
 
-        self.send_command(0x30)  # PLL setting
-        self.send_data(0x3c)  # 3A 100HZ   29 150Hz 39 200HZ  31 171HZ
+        self.send_command_with_data(0x30, [0x3c])  # PLL setting, 3A 100HZ   29 150Hz 39 200HZ  31 171HZ
 
-        self.send_command(0x61)  # resolution setting
-        self.send_data(0x01)
-        self.send_data(0x90)  # 128
-        self.send_data(0x01)
-        self.send_data(0x2c)
+        self.send_command_with_data(0x61, [  # resolution setting
+            0x01,
+            0x90,  # 128
+            0x01,
+            0x2c])
 
-        self.send_command(0x82)  # vcom_DC setting
-        self.send_data(0x12)
+        self.send_command_with_data(0x82, [0x12])  # vcom_DC setting
 
-        self.send_command(0X50)  # VCOM AND DATA INTERVAL SETTING
-        self.send_data(
-            0x97)  # 97white border 77black border  VBDF 17|D7 VBDW 97 VBDB 57  VBDF F7 VBDW 77 VBDB 37  VBDR B7
+        self.send_command_with_data(0X50, [  # VCOM AND DATA INTERVAL SETTING
+            0x97])  # 97white border 77black border  VBDF 17|D7 VBDW 97 VBDB 57  VBDF F7 VBDW 77 VBDB 37  VBDR B7
 
         self.set_lut()
         # EPD hardware init end
@@ -354,38 +328,31 @@ class EPD:
         # EPD hardware init start
         self.reset()
 
-        self.send_command(0x01)  # POWER SETTING
-        self.send_data(0x03)  # VDS_EN, VDG_EN
-        self.send_data(0x00)  # VCOM_HV, VGHL_LV[1], VGHL_LV[0]
-        self.send_data(0x2b)  # VDH
-        self.send_data(0x2b)  # VDL
+        self.send_command_with_data(0x01, [  # POWER SETTING
+            0x03,  # VDS_EN, VDG_EN
+            0x00,  # VCOM_HV, VGHL_LV[1], VGHL_LV[0]
+            0x2b,  # VDH
+            0x2b])  # VDL
 
-        self.send_command(0x06)  # boost soft start
-        self.send_data(0x17)
-        self.send_data(0x17)
-        self.send_data(0x17)
+        self.send_command_with_data(0x06, [0x17, 0x17, 0x17])  # boost soft start
 
         self.send_command(0x04)  # POWER_ON
         self.ReadBusy()
 
-        self.send_command(0x00)  # panel setting
-        self.send_data(0xbf)  # KW-BF   KWR-AF  BWROTP 0f
+        self.send_command_with_data(0x00, [0xbf])  # panel setting, KW-BF   KWR-AF  BWROTP 0f
 
-        self.send_command(0x30)  # PLL setting
-        self.send_data(0x3c)  # 3A 100HZ   29 150Hz 39 200HZ  31 171HZ
+        self.send_command_with_data(0x30, [0x3c])  # PLL setting, 3A 100HZ   29 150Hz 39 200HZ  31 171HZ
 
-        self.send_command(0x61)  # resolution setting
-        self.send_data(0x01)
-        self.send_data(0x90)  # 128
-        self.send_data(0x01)
-        self.send_data(0x2c)
+        self.send_command_with_data(0x61, [  # resolution setting
+            0x01,
+            0x90,  # 128
+            0x01,
+            0x2c])
 
-        self.send_command(0x82)  # vcom_DC setting
-        self.send_data(0x12)
+        self.send_command_with_data(0x82, [0x12])  # vcom_DC setting
 
-        self.send_command(0X50)  # VCOM AND DATA INTERVAL SETTING
-        self.send_data(
-            0x07)  # 97white border 77black border  VBDF 17|D7 VBDW 97 VBDB 57  VBDF F7 VBDW 77 VBDB 37  VBDR B7
+        self.send_command_with_data(0X50, [  # VCOM AND DATA INTERVAL SETTING
+            0x07])  # 97white border 77black border  VBDF 17|D7 VBDW 97 VBDB 57  VBDF F7 VBDW 77 VBDB 37  VBDR B7
 
         self.Partial_SetLut()
         # EPD hardware init end
@@ -397,38 +364,34 @@ class EPD:
         # EPD hardware init start
         self.reset()
 
-        self.send_command(0x01)  # POWER SETTING
-        self.send_data(0x03)
-        self.send_data(0x00)  # VGH=20V,VGL=-20V
-        self.send_data(0x2b)  # VDH=15V
-        self.send_data(0x2b)  # VDL=-15V
-        self.send_data(0x13)
+        self.send_command_with_data(0x01, [  # POWER SETTING
+            0x03,
+            0x00,  # VGH=20V,VGL=-20V
+            0x2b,  # VDH=15V
+            0x2b,  # VDL=-15V
+            0x13])
 
-        self.send_command(0x06)  # booster soft start
-        self.send_data(0x17)  # A
-        self.send_data(0x17)  # B
-        self.send_data(0x17)  # C
+        self.send_command_with_data(0x06, [  # booster soft start
+            0x17,  # A
+            0x17,  # B
+            0x17])  # C
 
         self.send_command(0x04)
         self.ReadBusy()
 
-        self.send_command(0x00)  # panel setting
-        self.send_data(0x3f)  # KW-3f   KWR-2F BWROTP 0f BWOTP 1f
+        self.send_command_with_data(0x00, [0x3f])  # panel setting, KW-3f   KWR-2F BWROTP 0f BWOTP 1f
 
-        self.send_command(0x30)  # PLL setting
-        self.send_data(0x3c)  # 100hz
+        self.send_command_with_data(0x30, [0x3c])  # PLL setting, 100hz
 
-        self.send_command(0x61)  # resolution setting
-        self.send_data(0x01)  # 400
-        self.send_data(0x90)
-        self.send_data(0x01)  # 300
-        self.send_data(0x2c)
+        self.send_command_with_data(0x61, [  # resolution setting
+            0x01,  # 400
+            0x90,
+            0x01,  # 300
+            0x2c])
 
-        self.send_command(0x82)  # vcom_DC setting
-        self.send_data(0x12)
+        self.send_command_with_data(0x82, [0x12])  # vcom_DC setting
 
-        self.send_command(0X50)  # VCOM AND DATA INTERVAL SETTING
-        self.send_data(0x97)
+        self.send_command_with_data(0X50, [0x97])  # VCOM AND DATA INTERVAL SETTING
 
     def getbuffer(self, image):
         # logger.debug("bufsiz = ",int(self.width/8) * self.height)
@@ -455,45 +418,7 @@ class EPD:
         return buf
 
     def getbuffer_4Gray(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width / 4) * self.height)
-        image_monocolor = image.convert('L')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        i = 0
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if imwidth == self.width and imheight == self.height:
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0xC0:
-                        pixels[x, y] = 0x80
-                    elif pixels[x, y] == 0x80:
-                        pixels[x, y] = 0x40
-                    i = i + 1
-                    if i % 4 == 0:
-                        buf[int((x + (y * self.width)) / 4)] = (
-                                    (pixels[x - 3, y] & 0xc0) | (pixels[x - 2, y] & 0xc0) >> 2 | (
-                                        pixels[x - 1, y] & 0xc0) >> 4 | (pixels[x, y] & 0xc0) >> 6)
-
-        elif imwidth == self.height and imheight == self.width:
-            logger.debug("Horizontal")
-            for x in range(imwidth):
-                for y in range(imheight):
-                    newx = y
-                    newy = x
-                    if pixels[x, y] == 0xC0:
-                        pixels[x, y] = 0x80
-                    elif pixels[x, y] == 0x80:
-                        pixels[x, y] = 0x40
-                    i = i + 1
-                    if i % 4 == 0:
-                        buf[int((newx + (newy * self.width)) / 4)] = (
-                                    (pixels[x, y - 3] & 0xc0) | (pixels[x, y - 2] & 0xc0) >> 2 | (
-                                        pixels[x, y - 1] & 0xc0) >> 4 | (pixels[x, y] & 0xc0) >> 6)
-
-        return buf
+        return epdbuffer.pack_4gray(image, self.width, self.height, transpose=True)
 
     def display(self, image):
         if self.width % 8 == 0:
@@ -504,7 +429,7 @@ class EPD:
         self.send_command(0x92)
         self.set_lut()
         self.send_command(0x10)
-        self.send_data2([0xFF] * int(self.width * linewidth))
+        self.send_data2(b'\xff' * int(self.width * linewidth))
 
         self.send_command(0x13)
         self.send_data2(image)
@@ -534,19 +459,16 @@ class EPD:
         buf = [0x00] * (Y_end - Y_start) * (X_end - X_start)
 
         self.send_command(0x91)  # This command makes the display enter partial mode
-        self.send_command(0x90)  # resolution setting
-        self.send_data(int(X_start * 8 / 256))
-        self.send_data(int(X_start * 8 % 256))  # x-start
-
-        self.send_data(int(X_end * 8 / 256))
-        self.send_data(int(X_end * 8 % 256) - 1)  # x-end
-
-        self.send_data(int(Y_start / 256))
-        self.send_data(int(Y_start % 256))  # y-start
-
-        self.send_data(int(Y_end / 256))
-        self.send_data(int(Y_end % 256) - 1)  # y-end
-        self.send_data(0x28)
+        self.send_command_with_data(0x90, [  # resolution setting
+            int(X_start * 8 / 256),
+            int(X_start * 8 % 256),  # x-start
+            int(X_end * 8 / 256),
+            int(X_end * 8 % 256) - 1,  # x-end
+            int(Y_start / 256),
+            int(Y_start % 256),  # y-start
+            int(Y_end / 256),
+            int(Y_end % 256) - 1,  # y-end
+            0x28])
 
         self.send_command(0x10)  # writes Old data to SRAM for programming
         for j in range(0, Y_end - Y_start):
@@ -568,86 +490,18 @@ class EPD:
     def display_4Gray(self, image):
         self.send_command(0x92)
         self.set_lut()
-        self.send_command(0x10)
-
-        if self.width % 8 == 0:
-            linewidth = int(self.width / 8)
-        else:
-            linewidth = int(self.width / 8) + 1
+        levels = epdbuffer.unpack_4gray(image, self.width, self.height)
 
-        buf = [0x00] * self.height * linewidth
-
-        for i in range(0, int(EPD_WIDTH * EPD_HEIGHT / 8)):  # EPD_WIDTH * EPD_HEIGHT / 4
-            temp3 = 0
-            for j in range(0, 2):
-                temp1 = image[i * 2 + j]
-                for k in range(0, 2):
-                    temp2 = temp1 & 0xC0
-                    if temp2 == 0xC0:
-                        temp3 |= 0x01  # white
-                    elif temp2 == 0x00:
-                        temp3 |= 0x00  # black
-                    elif temp2 == 0x80:
-                        temp3 |= 0x01  # gray1
-                    else:  # 0x40
-                        temp3 |= 0x00  # gray2
-                    temp3 <<= 1
-
-                    temp1 <<= 2
-                    temp2 = temp1 & 0xC0
-                    if temp2 == 0xC0:  # white
-                        temp3 |= 0x01
-                    elif temp2 == 0x00:  # black
-                        temp3 |= 0x00
-                    elif temp2 == 0x80:
-                        temp3 |= 0x01  # gray1
-                    else:  # 0x40
-                        temp3 |= 0x00  # gray2
-                    if j != 1 or k != 1:
-                        temp3 <<= 1
-                    temp1 <<= 2
-            buf[i] = temp3
-        self.send_data2(buf)
+        self.send_command(0x10)
+        self.send_data2(epdbuffer.gray4_plane(levels, (0, 0, 1, 1)))  # black, gray2, gray1, white
 
         self.send_command(0x13)
-
-        for i in range(0, int(EPD_WIDTH * EPD_HEIGHT / 8)):  # 5808*4  46464
-            temp3 = 0
-            for j in range(0, 2):
-                temp1 = image[i * 2 + j]
-                for k in range(0, 2):
-                    temp2 = temp1 & 0xC0
-                    if temp2 == 0xC0:
-                        temp3 |= 0x01  # white
-                    elif temp2 == 0x00:
-                        temp3 |= 0x00  # black
-                    elif temp2 == 0x80:
-                        temp3 |= 0x00  # gray1
-                    else:  # 0x40
-                        temp3 |= 0x01  # gray2
-                    temp3 <<= 1
-
-                    temp1 <<= 2
-                    temp2 = temp1 & 0xC0
-                    if temp2 == 0xC0:  # white
-                        temp3 |= 0x01
-                    elif temp2 == 0x00:  # black
-                        temp3 |= 0x00
-                    elif temp2 == 0x80:
-                        temp3 |= 0x00  # gray1
-                    else:  # 0x40
-                        temp3 |= 0x01  # gray2
-                    if j != 1 or k != 1:
-                        temp3 <<= 1
-                    temp1 <<= 2
-            buf[i] = temp3
-        self.send_data2(buf)
+        self.send_data2(epdbuffer.gray4_plane(levels, (0, 1, 0, 1)))
 
         self.Gray_SetLut()
         self.send_command(0x12)
         epdconfig.delay_ms(200)
         self.ReadBusy()
-        # pass
 
     def Clear(self):
         if self.width % 8 == 0:
@@ -656,10 +510,10 @@ class EPD:
             linewidth = int(self.width / 8) + 1
 
         self.send_command(0x10)
-        self.send_data2([0xff] * int(self.height * linewidth))
+        self.send_data2(b'\xff' * int(self.height * linewidth))
 
         self.send_command(0x13)
-        self.send_data2([0xff] * int(self.height * linewidth))
+        self.send_data2(b'\xff' * int(self.height * linewidth))
 
         self.send_command(0x12)
         self.ReadBusy()
@@ -667,8 +521,7 @@ class EPD:
     def sleep(self):
         self.send_command(0x02)  # POWER_OFF
         self.ReadBusy()
-        self.send_command(0x07)  # DEEP_SLEEP
-        self.send_data(0XA5)
+        self.send_command_with_data(0x07, [0XA5])  # DEEP_SLEEP
 
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -30,6 +30,7 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
 
 # Display resolution
 EPD_WIDTH       = 800
@@ -99,39 +100,41 @@ class EPD:
     def send_data2(self, data):
         epdconfig.digital_write(self.dc_pin, 1)
         epdconfig.digital_write(self.cs_pin, 0)
-        epdconfig.SPI.writebytes2(data)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
 
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        busy = epdconfig.digital_read(self.busy_pin)
-        while(busy == 1):
-            busy = epdconfig.digital_read(self.busy_pin)
-            epdconfig.delay_ms(20)
+        epdconfig.wait_busy(1, 20)
         epdconfig.delay_ms(20)
         logger.debug("e-Paper busy release")
 
     def TurnOnDisplay(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xF7)
+        self.send_command_with_data(0x22, [0xF7])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
 
     def TurnOnDisplay_Fast(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xC7)
+        self.send_command_with_data(0x22, [0xC7])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
 
     def TurnOnDisplay_Part(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xFF)
+        self.send_command_with_data(0x22, [0xFF])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
 
     def TurnOnDisplay_4GRAY(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xC7)
+        self.send_command_with_data(0x22, [0xC7])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
 
@@ -144,17 +147,9 @@ class EPD:
         yend : End position of Y-axis
     '''
     def SetWindow(self, x_start, y_start, x_end, y_end):
-        self.send_command(0x44) # SET_RAM_X_ADDRESS_START_END_POSITION
-        self.send_data(x_start & 0xFF)
-        self.send_data((x_start>>8) & 0x03)
-        self.send_data(x_end & 0xFF)
-        self.send_data((x_end>>8) & 0x03)
+        self.send_command_with_data(0x44, [x_start & 0xFF, (x_start>>8) & 0x03, x_end & 0xFF, (x_end>>8) & 0x03])  # SET_RAM_X_ADDRESS_START_END_POSITION
         
-        self.send_command(0x45) # SET_RAM_Y_ADDRESS_START_END_POSITION
-        self.send_data(y_start & 0xFF)
-        self.send_data((y_start >> 8) & 0xFF)
-        self.send_data(y_end & 0xFF)
-        self.send_data((y_end >> 8) & 0xFF)
+        self.send_command_with_data(0x45, [y_start & 0xFF, (y_start >> 8) & 0xFF, y_end & 0xFF, (y_end >> 8) & 0xFF])  # SET_RAM_Y_ADDRESS_START_END_POSITION
 
     '''
     function : Set Cursor
@@ -163,14 +158,10 @@ class EPD:
         y : Y-axis starting position
     '''
     def SetCursor(self, x, y):
-        self.send_command(0x4E) # SET_RAM_X_ADDRESS_COUNTER
         # x point must be the multiple of 8 or the last 3 bits will be ignored
-        self.send_data(x & 0xFF)
-        self.send_data((x>>8) & 0x03)
+        self.send_command_with_data(0x4E, [x & 0xFF, (x>>8) & 0x03])  # SET_RAM_X_ADDRESS_COUNTER
         
-        self.send_command(0x4F) # SET_RAM_Y_ADDRESS_COUNTER
-        self.send_data(y & 0xFF)
-        self.send_data((y >> 8) & 0xFF)
+        self.send_command_with_data(0x4F, [y & 0xFF, (y >> 8) & 0xFF])  # SET_RAM_Y_ADDRESS_COUNTER
         
     def init(self):
         if (epdconfig.module_init() != 0):
@@ -182,26 +173,18 @@ class EPD:
         self.send_command(0x12) #SWRESET
         self.ReadBusy()
 
-        self.send_command(0x18) # use the internal temperature sensor
-        self.send_data(0x80)
+        self.send_command_with_data(0x18, [0x80])  # use the internal temperature sensor
 
-        self.send_command(0x0C) #set soft start     
-        self.send_data(0xAE)
-        self.send_data(0xC7)
-        self.send_data(0xC3)
-        self.send_data(0xC0)
-        self.send_data(0x80)
+        self.send_command_with_data(0x0C, [0xAE, 0xC7, 0xC3, 0xC0, 0x80])  #set soft start
 
-        self.send_command(0x01)   #      drive output control    
-        self.send_data((self.height-1)%256) #  Y  
-        self.send_data((self.height-1)//256) #  Y 
-        self.send_data(0x02)
+        self.send_command_with_data(0x01, [  #      drive output control
+            (self.height-1)%256,  #  Y
+            (self.height-1)//256,  #  Y
+            0x02])
 
-        self.send_command(0x3C)        # Border       Border setting 
-        self.send_data(0x01)
+        self.send_command_with_data(0x3C, [0x01])  # Border       Border setting
 
-        self.send_command(0x11)        #    data  entry  mode
-        self.send_data(0x01)           #       X-mode  x+ y-    
+        self.send_command_with_data(0x11, [0x01])  #    data  entry  mode, X-mode  x+ y-
 
         self.SetWindow(0, self.height-1, self.width-1, 0)
 
@@ -221,26 +204,18 @@ class EPD:
         self.send_command(0x12) #SWRESET
         self.ReadBusy()
         
-        self.send_command(0x18) # use the internal temperature sensor
-        self.send_data(0x80)
+        self.send_command_with_data(0x18, [0x80])  # use the internal temperature sensor
 
-        self.send_command(0x0C) #set soft start     
-        self.send_data(0xAE)
-        self.send_data(0xC7)
-        self.send_data(0xC3)
-        self.send_data(0xC0)
-        self.send_data(0x80)
+        self.send_command_with_data(0x0C, [0xAE, 0xC7, 0xC3, 0xC0, 0x80])  #set soft start
 
-        self.send_command(0x01)   #      drive output control    
-        self.send_data((self.height-1)%256) #  Y  
-        self.send_data((self.height-1)//256) #  Y 
-        self.send_data(0x02)
+        self.send_command_with_data(0x01, [  #      drive output control
+            (self.height-1)%256,  #  Y
+            (self.height-1)//256,  #  Y
+            0x02])
 
-        self.send_command(0x3C)        # Border       Border setting 
-        self.send_data(0x01)
+        self.send_command_with_data(0x3C, [0x01])  # Border       Border setting
 
-        self.send_command(0x11)        #    data  entry  mode
-        self.send_data(0x01)           #       X-mode  x+ y-    
+        self.send_command_with_data(0x11, [0x01])  #    data  entry  mode, X-mode  x+ y-
 
         self.SetWindow(0, self.height-1, self.width-1, 0)
 
@@ -248,11 +223,9 @@ class EPD:
         self.ReadBusy()
 
         #TEMP (1.5s)
-        self.send_command(0x1A)  
-        self.send_data(0x5A) 
+        self.send_command_with_data(0x1A, [0x5A])
 
-        self.send_command(0x22)  
-        self.send_data(0x91) 
+        self.send_command_with_data(0x22, [0x91])
         self.send_command(0x20) 
         
         self.ReadBusy()
@@ -261,20 +234,16 @@ class EPD:
         return 0
 
     def Lut(self):
-        self.send_command(0x32)
-        for count in range(0, 105):
-            self.send_data(self.LUT_DATA_4Gray[count])
+        self.send_command_with_data(0x32, self.LUT_DATA_4Gray[:105])
 
-        self.send_command(0x03) #VGH      
-        self.send_data(self.LUT_DATA_4Gray[105])
+        self.send_command_with_data(0x03, [self.LUT_DATA_4Gray[105]])  #VGH
 
-        self.send_command(0x04) #      
-        self.send_data(self.LUT_DATA_4Gray[106]) #VSH1   
-        self.send_data(self.LUT_DATA_4Gray[107]) #VSH2   
-        self.send_data(self.LUT_DATA_4Gray[108]) #VSL   
+        self.send_command_with_data(0x04, [  #
+            self.LUT_DATA_4Gray[106],  #VSH1
+            self.LUT_DATA_4Gray[107],  #VSH2
+            self.LUT_DATA_4Gray[108]])  #VSL
 
-        self.send_command(0x2C)     #VCOM Voltage
-        self.send_data(self.LUT_DATA_4Gray[109])    #0x1C
+        self.send_command_with_data(0x2C, [self.LUT_DATA_4Gray[109]])  #VCOM Voltage, 0x1C
 
     def init_4GRAY(self):
         if (epdconfig.module_init() != 0):
@@ -286,26 +255,18 @@ class EPD:
         self.send_command(0x12) #SWRESET
         self.ReadBusy()
         
-        self.send_command(0x18) # use the internal temperature sensor
-        self.send_data(0x80)
+        self.send_command_with_data(0x18, [0x80])  # use the internal temperature sensor
 
-        self.send_command(0x0C) #set soft start     
-        self.send_data(0xAE)
-        self.send_data(0xC7)
-        self.send_data(0xC3)
-        self.send_data(0xC0)
-        self.send_data(0x80)
+        self.send_command_with_data(0x0C, [0xAE, 0xC7, 0xC3, 0xC0, 0x80])  #set soft start
 
-        self.send_command(0x01)   #      drive output control    
-        self.send_data((self.height-1)%256) #  Y  
-        self.send_data((self.height-1)//256) #  Y 
-        self.send_data(0x02)
+        self.send_command_with_data(0x01, [  #      drive output control
+            (self.height-1)%256,  #  Y
+            (self.height-1)//256,  #  Y
+            0x02])
 
-        self.send_command(0x3C)        # Border       Border setting 
-        self.send_data(0x01)
+        self.send_command_with_data(0x3C, [0x01])  # Border       Border setting
 
-        self.send_command(0x11)        #    data  entry  mode
-        self.send_data(0x01)           #       X-mode  x+ y-    
+        self.send_command_with_data(0x11, [0x01])  #    data  entry  mode, X-mode  x+ y-
 
         self.SetWindow(0, self.height-1, self.width-1, 0)
 
@@ -342,40 +303,7 @@ class EPD:
         return buf
     
     def getbuffer_4Gray(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width / 4) * self.height)
-        image_monocolor = image.convert('L')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        i=0
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if(imwidth == self.width and imheight == self.height):
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if(pixels[x, y] == 0xC0):
-                        pixels[x, y] = 0x80
-                    elif (pixels[x, y] == 0x80):
-                        pixels[x, y] = 0x40
-                    i= i+1
-                    if(i%4 == 0):
-                        buf[int((x + (y * self.width))/4)] = ((pixels[x-3, y]&0xc0) | (pixels[x-2, y]&0xc0)>>2 | (pixels[x-1, y]&0xc0)>>4 | (pixels[x, y]&0xc0)>>6)
-                        
-        elif(imwidth == self.height and imheight == self.width):
-            logger.debug("Horizontal")
-            for x in range(imwidth):
-                for y in range(imheight):
-                    newx = y
-                    newy = self.height - x - 1
-                    if(pixels[x, y] == 0xC0):
-                        pixels[x, y] = 0x80
-                    elif (pixels[x, y] == 0x80):
-                        pixels[x, y] = 0x40
-                    i= i+1
-                    if(i%4 == 0):
-                        buf[int((newx + (newy * self.width))/4)] = ((pixels[x, y-3]&0xc0) | (pixels[x, y-2]&0xc0)>>2 | (pixels[x, y-1]&0xc0)>>4 | (pixels[x, y]&0xc0)>>6) 
-        return buf
+        return epdbuffer.pack_4gray(image, self.width, self.height)
 
     def display(self, image):
         self.send_command(0x24)
@@ -403,18 +331,15 @@ class EPD:
         # Reset
         self.reset()
 
-        self.send_command(0x18) #BorderWavefrom
-        self.send_data(0x80)
+        self.send_command_with_data(0x18, [0x80])  #BorderWavefrom
 
-        self.send_command(0x3C) #BorderWavefrom
-        self.send_data(0x80)
+        self.send_command_with_data(0x3C, [0x80])  #BorderWavefrom
 
-        self.send_command(0x01)   #      drive output control    
-        self.send_data((self.height-1)%256) #  Y  
-        self.send_data((self.height-1)//256) #  Y 
+        self.send_command_with_data(0x01, [  #      drive output control
+            (self.height-1)%256,  #  Y
+            (self.height-1)//256])  #  Y
 
-        self.send_command(0x11)        #    data  entry  mode
-        self.send_data(0x01)           #       X-mode  x+ y-    
+        self.send_command_with_data(0x11, [0x01])  #    data  entry  mode, X-mode  x+ y-
 
         self.SetWindow(0, self.height-1, self.width-1, 0)
 
@@ -426,84 +351,27 @@ class EPD:
         self.TurnOnDisplay_Part()
 
     def display_4Gray(self, image):
+        levels = epdbuffer.unpack_4gray(image, self.width, self.height)
+
         self.send_command(0x24)
-        for i in range(0, 48000):                     #5808*4  46464
-            temp3=0
-            for j in range(0, 2):
-                temp1 = image[i*2+j]
-                for k in range(0, 2):
-                    temp2 = temp1&0xC0 
-                    if(temp2 == 0xC0):
-                        temp3 |= 0x00
-                    elif(temp2 == 0x00):
-                        temp3 |= 0x01  
-                    elif(temp2 == 0x80): 
-                        temp3 |= 0x01 
-                    else: #0x40
-                        temp3 |= 0x00 
-                    temp3 <<= 1	
-                    
-                    temp1 <<= 2
-                    temp2 = temp1&0xC0 
-                    if(temp2 == 0xC0): 
-                        temp3 |= 0x00
-                    elif(temp2 == 0x00): 
-                        temp3 |= 0x01
-                    elif(temp2 == 0x80):
-                        temp3 |= 0x01
-                    else :   #0x40
-                        temp3 |= 0x00	
-                    if(j!=1 or k!=1):				
-                        temp3 <<= 1
-                    temp1 <<= 2
-            self.send_data(temp3)
-            
-        self.send_command(0x26)	       
-        for i in range(0, 48000):                #5808*4  46464
-            temp3=0
-            for j in range(0, 2):
-                temp1 = image[i*2+j]
-                for k in range(0, 2):
-                    temp2 = temp1&0xC0 
-                    if(temp2 == 0xC0):
-                        temp3 |= 0x00
-                    elif(temp2 == 0x00):
-                        temp3 |= 0x01
-                    elif(temp2 == 0x80):
-                        temp3 |= 0x00
-                    else: #0x40
-                        temp3 |= 0x01 
-                    temp3 <<= 1	
-                    
-                    temp1 <<= 2
-                    temp2 = temp1&0xC0 
-                    if(temp2 == 0xC0): 
-                        temp3 |= 0x00
-                    elif(temp2 == 0x00): 
-                        temp3 |= 0x01
-                    elif(temp2 == 0x80):
-                        temp3 |= 0x00 
-                    else:    #0x40
-                            temp3 |= 0x01	
-                    if(j!=1 or k!=1):					
-                        temp3 <<= 1
-                    temp1 <<= 2
-            self.send_data(temp3)
-        
+        self.send_data2(epdbuffer.gray4_plane(levels, (1, 0, 1, 0)))  # black, gray2, gray1, white
+
+        self.send_command(0x26)
+        self.send_data2(epdbuffer.gray4_plane(levels, (1, 1, 0, 0)))
+
         self.TurnOnDisplay_4GRAY()
 
     def Clear(self):
         self.send_command(0x24)
-        self.send_data2([0xFF] * (int(self.width/8) * self.height))
+        self.send_data2(b'\xff' * (int(self.width/8) * self.height))
 
         self.send_command(0x26)
-        self.send_data2([0xFF] * (int(self.width/8) * self.height))
+        self.send_data2(b'\xff' * (int(self.width/8) * self.height))
 
         self.TurnOnDisplay()
 
     def sleep(self):
-        self.send_command(0x10) # DEEP_SLEEP
-        self.send_data(0x01)
+        self.send_command_with_data(0x10, [0x01])  # DEEP_SLEEP
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -30,6 +30,7 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
 
 # Display resolution
 EPD_WIDTH  = 400
@@ -121,33 +122,37 @@ class EPD:
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
 
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):        
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      #  0: idle, 1: busy
-            epdconfig.delay_ms(20)                
+        epdconfig.wait_busy(1, 20)  #  0: idle, 1: busy
         logger.debug("e-Paper busy release")
     
     def TurnOnDisplay(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xF7)
+        self.send_command_with_data(0x22, [0xF7])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
         
     def TurnOnDisplay_Fast(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xC7)
+        self.send_command_with_data(0x22, [0xC7])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
         
     def TurnOnDisplay_Partial(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xFF)
+        self.send_command_with_data(0x22, [0xFF])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
         
     def TurnOnDisplay_4GRAY(self):
-        self.send_command(0x22) #Display Update Control
-        self.send_data(0xCF)
+        self.send_command_with_data(0x22, [0xCF])  #Display Update Control
         self.send_command(0x20) #Activate Display Update Sequence
         self.ReadBusy()
 
@@ -161,32 +166,19 @@ class EPD:
         self.send_command(0x12) #SWRESET
         self.ReadBusy()
 
-        self.send_command(0x21)  # Display update control
-        self.send_data(0x40)
-        self.send_data(0x00)
+        self.send_command_with_data(0x21, [0x40, 0x00])  # Display update control
 
-        self.send_command(0x3C)  # BorderWavefrom
-        self.send_data(0x05)
+        self.send_command_with_data(0x3C, [0x05])  # BorderWavefrom
 
-        self.send_command(0x11)  # data  entry  mode
-        self.send_data(0x03)  # X-mode
+        self.send_command_with_data(0x11, [0x03])  # data  entry  mode, X-mode
 
-        self.send_command(0x44) 
-        self.send_data(0x00)
-        self.send_data(0x31)  
+        self.send_command_with_data(0x44, [0x00, 0x31])
         
-        self.send_command(0x45) 
-        self.send_data(0x00)
-        self.send_data(0x00)  
-        self.send_data(0x2B)
-        self.send_data(0x01)
-
-        self.send_command(0x4E) 
-        self.send_data(0x00)
-
-        self.send_command(0x4F) 
-        self.send_data(0x00)
-        self.send_data(0x00)  
+        self.send_command_with_data(0x45, [0x00, 0x00, 0x2B, 0x01])
+
+        self.send_command_with_data(0x4E, [0x00])
+
+        self.send_command_with_data(0x4F, [0x00, 0x00])
         self.ReadBusy()
 
         return 0
@@ -201,66 +193,42 @@ class EPD:
         self.send_command(0x12) #SWRESET
         self.ReadBusy()
 
-        self.send_command(0x21)  # Display update control
-        self.send_data(0x40)
-        self.send_data(0x00)
+        self.send_command_with_data(0x21, [0x40, 0x00])  # Display update control
 
-        self.send_command(0x3C)  # BorderWavefrom
-        self.send_data(0x05)
+        self.send_command_with_data(0x3C, [0x05])  # BorderWavefrom
 
         if mode == self.Seconds_1_5S:
-            self.send_command(0x1A)
-            self.send_data(0x6E)  
+            self.send_command_with_data(0x1A, [0x6E])
         else :
-            self.send_command(0x1A)
-            self.send_data(0x5A)  
+            self.send_command_with_data(0x1A, [0x5A])
 
-        self.send_command(0x22)  # Load temperature value
-        self.send_data(0x91)  
+        self.send_command_with_data(0x22, [0x91])  # Load temperature value
         self.send_command(0x20)  
         self.ReadBusy()
 
-        self.send_command(0x11)  # data  entry  mode
-        self.send_data(0x03)  # X-mode
+        self.send_command_with_data(0x11, [0x03])  # data  entry  mode, X-mode
 
-        self.send_command(0x44) 
-        self.send_data(0x00)
-        self.send_data(0x31)  
+        self.send_command_with_data(0x44, [0x00, 0x31])
         
-        self.send_command(0x45) 
-        self.send_data(0x00)
-        self.send_data(0x00)  
-        self.send_data(0x2B)
-        self.send_data(0x01)
-
-        self.send_command(0x4E) 
-        self.send_data(0x00)
-
-        self.send_command(0x4F) 
-        self.send_data(0x00)
-        self.send_data(0x00)  
+        self.send_command_with_data(0x45, [0x00, 0x00, 0x2B, 0x01])
+
+        self.send_command_with_data(0x4E, [0x00])
+
+        self.send_command_with_data(0x4F, [0x00, 0x00])
         self.ReadBusy()
 
         return 0
 
     def Lut(self):
-        self.send_command(0x32)
-        for i in range(227):
-            self.send_data(self.LUT_ALL[i])
+        self.send_command_with_data(0x32, self.LUT_ALL[:227])
 
-        self.send_command(0x3F)
-        self.send_data(self.LUT_ALL[227])
+        self.send_command_with_data(0x3F, [self.LUT_ALL[227]])
 
-        self.send_command(0x03)
-        self.send_data(self.LUT_ALL[228])
+        self.send_command_with_data(0x03, [self.LUT_ALL[228]])
 
-        self.send_command(0x04)
-        self.send_data(self.LUT_ALL[229])
-        self.send_data(self.LUT_ALL[230])
-        self.send_data(self.LUT_ALL[231])
+        self.send_command_with_data(0x04, self.LUT_ALL[229:232])
 
-        self.send_command(0x2c)
-        self.send_data(self.LUT_ALL[232])
+        self.send_command_with_data(0x2c, [self.LUT_ALL[232]])
 
     
 
@@ -274,109 +242,37 @@ class EPD:
         self.send_command(0x12) #SWRESET
         self.ReadBusy()
 
-        self.send_command(0x21)  # Display update control
-        self.send_data(0x00)
-        self.send_data(0x00)
+        self.send_command_with_data(0x21, [0x00, 0x00])  # Display update control
 
-        self.send_command(0x3C)  # BorderWavefrom
-        self.send_data(0x03)
+        self.send_command_with_data(0x3C, [0x03])  # BorderWavefrom
 
-        self.send_command(0x0C)  # BTST
-        self.send_data(0x8B) # 8B
-        self.send_data(0x9C) # 9C 
-        self.send_data(0xA4) # 96 A4
-        self.send_data(0x0F) # 0F
+        self.send_command_with_data(0x0C, [  # BTST
+            0x8B,  # 8B
+            0x9C,  # 9C
+            0xA4,  # 96 A4
+            0x0F])  # 0F
 
         self.Lut()
 
-        self.send_command(0x11)  # data  entry  mode
-        self.send_data(0x03)  # X-mode
+        self.send_command_with_data(0x11, [0x03])  # data  entry  mode, X-mode
 
-        self.send_command(0x44) 
-        self.send_data(0x00)
-        self.send_data(0x31)  
+        self.send_command_with_data(0x44, [0x00, 0x31])
         
-        self.send_command(0x45) 
-        self.send_data(0x00)
-        self.send_data(0x00)  
-        self.send_data(0x2B)
-        self.send_data(0x01)
-
-        self.send_command(0x4E) 
-        self.send_data(0x00)
-
-        self.send_command(0x4F) 
-        self.send_data(0x00)
-        self.send_data(0x00)  
+        self.send_command_with_data(0x45, [0x00, 0x00, 0x2B, 0x01])
+
+        self.send_command_with_data(0x4E, [0x00])
+
+        self.send_command_with_data(0x4F, [0x00, 0x00])
         self.ReadBusy()
 
         return 0
 
     def getbuffer(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width / 8) * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if imwidth == self.width and imheight == self.height:
-            logger.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
-        elif imwidth == self.height and imheight == self.width:
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[int((newx + newy * self.width) / 8)] &= ~(0x80 >> (y % 8))
-        return buf
+        return epdbuffer.pack_mono(image, self.width, self.height)
 
     def getbuffer_4Gray(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width / 4) * self.height)
-        image_monocolor = image.convert('L')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        i = 0
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if imwidth == self.width and imheight == self.height:
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0xC0:
-                        pixels[x, y] = 0x80
-                    elif pixels[x, y] == 0x80:
-                        pixels[x, y] = 0x40
-                    i = i + 1
-                    if i % 4 == 0:
-                        buf[int((x + (y * self.width)) / 4)] = (
-                                    (pixels[x - 3, y] & 0xc0) | (pixels[x - 2, y] & 0xc0) >> 2 | (
-                                        pixels[x - 1, y] & 0xc0) >> 4 | (pixels[x, y] & 0xc0) >> 6)
-
-        elif imwidth == self.height and imheight == self.width:
-            logger.debug("Horizontal")
-            for x in range(imwidth):
-                for y in range(imheight):
-                    newx = y
-                    newy = x
-                    if pixels[x, y] == 0xC0:
-                        pixels[x, y] = 0x80
-                    elif pixels[x, y] == 0x80:
-                        pixels[x, y] = 0x40
-                    i = i + 1
-                    if i % 4 == 0:
-                        buf[int((newx + (newy * self.width)) / 4)] = (
-                                    (pixels[x, y - 3] & 0xc0) | (pixels[x, y - 2] & 0xc0) >> 2 | (
-                                        pixels[x, y - 1] & 0xc0) >> 4 | (pixels[x, y] & 0xc0) >> 6)
-
-        return buf
-    
+        return epdbuffer.pack_4gray(image, self.width, self.height, transpose=True)
+
     def Clear(self):
         if self.width % 8 == 0:
             linewidth = int(self.width / 8)
@@ -384,10 +280,10 @@ class EPD:
             linewidth = int(self.width / 8) + 1
 
         self.send_command(0x24)
-        self.send_data2([0xff] * int(self.height * linewidth))
+        self.send_data2(b'\xff' * int(self.height * linewidth))
 
         self.send_command(0x26)
-        self.send_data2([0xff] * int(self.height * linewidth))
+        self.send_data2(b'\xff' * int(self.height * linewidth))
 
         self.TurnOnDisplay()
 
@@ -409,118 +305,62 @@ class EPD:
 
         self.TurnOnDisplay_Fast()
 
-    def display_Partial(self, Image):
-        self.send_command(0x3C)  # BorderWavefrom
-        self.send_data(0x80)
+    # Xstart/Xend: pixel columns, rounded out to multiples of 8
+    def SetWindow(self, Xstart, Ystart, Xend, Yend):
+        self.send_command_with_data(0x44, [(Xstart >> 3) & 0xFF, (Xend >> 3) & 0xFF])
+        self.send_command_with_data(0x45, [Ystart & 0xFF, (Ystart >> 8) & 0xFF, Yend & 0xFF, (Yend >> 8) & 0xFF])
 
-        self.send_command(0x21)  # Display update control
-        self.send_data(0x00)
-        self.send_data(0x00)
+    def SetCursor(self, x, y):
+        self.send_command_with_data(0x4E, [(x >> 3) & 0xFF])
+        self.send_command_with_data(0x4F, [y & 0xFF, (y >> 8) & 0xFF])
 
-        self.send_command(0x3C)  # BorderWavefrom
-        self.send_data(0x80)
+    # Image is a full frame buffer from getbuffer; only the window from (Xstart, Ystart)
+    # up to but excluding (Xend, Yend) is written and refreshed, the whole panel by default
+    def display_Partial(self, Image, Xstart=0, Ystart=0, Xend=None, Yend=None):
+        linewidth = (self.width + 7) // 8
+        if Xend is None:
+            Xend = self.width
+        if Yend is None:
+            Yend = self.height
+        Xstart = Xstart // 8
+        Xend = (Xend + 7) // 8
+        full = (Xstart, Ystart, Xend, Yend) == (0, 0, linewidth, self.height)
 
-        self.send_command(0x44) 
-        self.send_data(0x00)
-        self.send_data(0x31)  
-        
-        self.send_command(0x45) 
-        self.send_data(0x00)
-        self.send_data(0x00)  
-        self.send_data(0x2B)
-        self.send_data(0x01)
+        self.send_command_with_data(0x3C, [0x80])  # BorderWavefrom
+
+        self.send_command_with_data(0x21, [0x00, 0x00])  # Display update control
 
-        self.send_command(0x4E) 
-        self.send_data(0x00)
+        self.send_command_with_data(0x3C, [0x80])  # BorderWavefrom
 
-        self.send_command(0x4F) 
-        self.send_data(0x00)
-        self.send_data(0x00) 
+        self.SetWindow(Xstart * 8, Ystart, Xend * 8 - 1, Yend - 1)
+        self.SetCursor(Xstart * 8, Ystart)
 
         self.send_command(0x24) # WRITE_RAM
-        self.send_data2(Image)  
+        if full:
+            self.send_data2(Image)
+        else:
+            self.send_data2(b''.join(bytes(Image[y * linewidth + Xstart:y * linewidth + Xend])
+                                     for y in range(Ystart, Yend)))
         self.TurnOnDisplay_Partial()
 
-    def display_4Gray(self, image):
-        if self.width % 8 == 0:
-            linewidth = int(self.width / 8)
-        else:
-            linewidth = int(self.width / 8) + 1
+        if not full:
+            # back to the whole panel for the next full frame write
+            self.SetWindow(0, 0, self.width - 1, self.height - 1)
+            self.SetCursor(0, 0)
 
-        buf = [0x00] * self.height * linewidth
+    def display_4Gray(self, image):
+        levels = epdbuffer.unpack_4gray(image, self.width, self.height)
 
         self.send_command(0x24)
-        for i in range(0, int(EPD_WIDTH * EPD_HEIGHT / 8)):  # EPD_WIDTH * EPD_HEIGHT / 4
-            temp3 = 0
-            for j in range(0, 2):
-                temp1 = image[i * 2 + j]
-                for k in range(0, 2):
-                    temp2 = temp1 & 0xC0
-                    if temp2 == 0xC0:
-                        temp3 |= 0x01  # white
-                    elif temp2 == 0x00:
-                        temp3 |= 0x00  # black
-                    elif temp2 == 0x80:
-                        temp3 |= 0x00  # gray1
-                    else:  # 0x40
-                        temp3 |= 0x01  # gray2
-                    temp3 <<= 1
-
-                    temp1 <<= 2
-                    temp2 = temp1 & 0xC0
-                    if temp2 == 0xC0:  # white
-                        temp3 |= 0x01
-                    elif temp2 == 0x00:  # black
-                        temp3 |= 0x00
-                    elif temp2 == 0x80:
-                        temp3 |= 0x00  # gray1
-                    else:  # 0x40
-                        temp3 |= 0x01  # gray2
-                    if j != 1 or k != 1:
-                        temp3 <<= 1
-                    temp1 <<= 2
-            buf[i] = temp3
-        self.send_data2(buf)
+        self.send_data2(epdbuffer.gray4_plane(levels, (0, 1, 0, 1)))  # black, gray2, gray1, white
 
         self.send_command(0x26)
-        for i in range(0, int(EPD_WIDTH * EPD_HEIGHT / 8)):
-            temp3 = 0
-            for j in range(0, 2):
-                temp1 = image[i * 2 + j]
-                for k in range(0, 2):
-                    temp2 = temp1 & 0xC0
-                    if temp2 == 0xC0:
-                        temp3 |= 0x01  # white
-                    elif temp2 == 0x00:
-                        temp3 |= 0x00  # black
-                    elif temp2 == 0x80:
-                        temp3 |= 0x01  # gray1
-                    else:  # 0x40
-                        temp3 |= 0x00  # gray2
-                    temp3 <<= 1
-
-                    temp1 <<= 2
-                    temp2 = temp1 & 0xC0
-                    if temp2 == 0xC0:  # white
-                        temp3 |= 0x01
-                    elif temp2 == 0x00:  # black
-                        temp3 |= 0x00
-                    elif temp2 == 0x80:
-                        temp3 |= 0x01  # gray1
-                    else:  # 0x40
-                        temp3 |= 0x00  # gray2
-                    if j != 1 or k != 1:
-                        temp3 <<= 1
-                    temp1 <<= 2
-            buf[i] = temp3
-        self.send_data2(buf)
+        self.send_data2(epdbuffer.gray4_plane(levels, (0, 0, 1, 1)))
 
         self.TurnOnDisplay_4GRAY()
-        # pass
 
     def sleep(self):
-        self.send_command(0x10)  # DEEP_SLEEP
-        self.send_data(0x01)
+        self.send_command_with_data(0x10, [0x01])  # DEEP_SLEEP
 
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -29,6 +29,7 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
 
 # Display resolution
 EPD_WIDTH       = 400
@@ -77,22 +78,29 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one CS transaction for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.DEV_SPI_write(command)
+        epdconfig.digital_write(self.dc_pin, 1)
+        for byte in data:
+            epdconfig.DEV_SPI_write(byte)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
         if(self.flag == 1):
-            while(epdconfig.digital_read(self.busy_pin) == 1): 
-                epdconfig.delay_ms(100) 
+            epdconfig.wait_busy(1, 100)
         
         else:
-            while(epdconfig.digital_read(self.busy_pin) == 0): 
-                epdconfig.delay_ms(100) 
+            epdconfig.wait_busy(0, 100)
         logger.debug("e-Paper busy release")
 
     def TurnOnDisplay(self):
         if(self.flag == 1):
-            self.send_command(0x22)
-            self.send_data(0xF7)	
+            self.send_command_with_data(0x22, [0xF7])
             self.send_command(0x20)
             self.ReadBusy()
         
@@ -118,30 +126,18 @@ class EPD:
             self.send_command(0x12)
             self.ReadBusy()
 
-            self.send_command(0x3C)
-            self.send_data(0x05)	
+            self.send_command_with_data(0x3C, [0x05])
 
-            self.send_command(0x18)
-            self.send_data(0x80)	
+            self.send_command_with_data(0x18, [0x80])
 
-            self.send_command(0x11)      
-            self.send_data(0x03)
+            self.send_command_with_data(0x11, [0x03])
 
-            self.send_command(0x44) 
-            self.send_data(0x00)
-            self.send_data(self.width//8-1)
+            self.send_command_with_data(0x44, [0x00, self.width//8-1])
 
-            self.send_command(0x45)        
-            self.send_data(0x00)
-            self.send_data(0x00) 
-            self.send_data((self.height-1)%256)    
-            self.send_data((self.height-1)//256)
+            self.send_command_with_data(0x45, [0x00, 0x00, (self.height-1)%256, (self.height-1)//256])
 
-            self.send_command(0x4E)
-            self.send_data(0x00)
-            self.send_command(0x4F)  
-            self.send_data(0x00)    
-            self.send_data(0x00)
+            self.send_command_with_data(0x4E, [0x00])
+            self.send_command_with_data(0x4F, [0x00, 0x00])
             self.ReadBusy()
 
         else:
@@ -149,34 +145,17 @@ class EPD:
             self.send_command(0x04)  # POWER_ON
             self.ReadBusy()
 
-            self.send_command(0x00)  # panel setting
-            self.send_data(0x0f)
+            self.send_command_with_data(0x00, [0x0f])  # panel setting
         
         return 0
 
     def getbuffer(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width/8) * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if(imwidth == self.width and imheight == self.height):
-            logger.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
-        elif(imwidth == self.height and imheight == self.width):
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[int((newx + newy*self.width) / 8)] &= ~(0x80 >> (y % 8))
-        return buf
+        return epdbuffer.pack_mono(image, self.width, self.height)
+
+    def getbuffer_color(self, image, color=(255, 0, 0), tolerance=96):
+        # Split a color image into the black and red/yellow buffers in one pass,
+        # same as getbuffer() on separate black and red/yellow images
+        return epdbuffer.pack_tricolor(image, self.width, self.height, color, tolerance, dither_first=True)
 
     def display(self, imageblack, imagered):
         high = self.height
@@ -242,16 +221,13 @@ class EPD:
 
     def sleep(self):
         if(self.flag == 1):
-            self.send_command(0X10) 
-            self.send_data(0x03)
+            self.send_command_with_data(0X10, [0x03])
         
         else:
-            self.send_command(0X50) 
-            self.send_data(0xf7)             
+            self.send_command_with_data(0X50, [0xf7])
             self.send_command(0X02)
             self.ReadBusy() 
-            self.send_command(0X07) 
-            self.send_data(0xA5)
+            self.send_command_with_data(0X07, [0xA5])
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
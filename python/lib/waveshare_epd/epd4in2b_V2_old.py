@@ -77,22 +77,29 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one CS transaction for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.DEV_SPI_write(command)
+        epdconfig.digital_write(self.dc_pin, 1)
+        for byte in data:
+            epdconfig.DEV_SPI_write(byte)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
         if(self.flag == 1):
-            while(epdconfig.digital_read(self.busy_pin) == 1): 
-                epdconfig.delay_ms(100) 
+            epdconfig.wait_busy(1, 100)
         
         else:
-            while(epdconfig.digital_read(self.busy_pin) == 0): 
-                epdconfig.delay_ms(100) 
+            epdconfig.wait_busy(0, 100)
         logger.debug("e-Paper busy release")
 
     def TurnOnDisplay(self):
         if(self.flag == 1):
-            self.send_command(0x22)
-            self.send_data(0xF7)	
+            self.send_command_with_data(0x22, [0xF7])
             self.send_command(0x20)
             self.ReadBusy()
         
@@ -118,30 +125,18 @@ class EPD:
             self.send_command(0x12)
             self.ReadBusy()
 
-            self.send_command(0x3C)
-            self.send_data(0x05)	
+            self.send_command_with_data(0x3C, [0x05])
 
-            self.send_command(0x18)
-            self.send_data(0x80)	
+            self.send_command_with_data(0x18, [0x80])
 
-            self.send_command(0x11)      
-            self.send_data(0x03)
+            self.send_command_with_data(0x11, [0x03])
 
-            self.send_command(0x44) 
-            self.send_data(0x00)
-            self.send_data(self.width//8-1)
+            self.send_command_with_data(0x44, [0x00, self.width//8-1])
 
-            self.send_command(0x45)        
-            self.send_data(0x00)
-            self.send_data(0x00) 
-            self.send_data((self.height-1)%256)    
-            self.send_data((self.height-1)//256)
+            self.send_command_with_data(0x45, [0x00, 0x00, (self.height-1)%256, (self.height-1)//256])
 
-            self.send_command(0x4E)
-            self.send_data(0x00)
-            self.send_command(0x4F)  
-            self.send_data(0x00)    
-            self.send_data(0x00)
+            self.send_command_with_data(0x4E, [0x00])
+            self.send_command_with_data(0x4F, [0x00, 0x00])
             self.ReadBusy()
 
         else:
@@ -149,8 +144,7 @@ class EPD:
             self.send_command(0x04)  # POWER_ON
             self.ReadBusy()
 
-            self.send_command(0x00)  # panel setting
-            self.send_data(0x0f)
+            self.send_command_with_data(0x00, [0x0f])  # panel setting
         
         return 0
 
@@ -242,16 +236,13 @@ class EPD:
 
     def sleep(self):
         if(self.flag == 1):
-            self.send_command(0X10) 
-            self.send_data(0x03)
+            self.send_command_with_data(0X10, [0x03])
         
         else:
-            self.send_command(0X50) 
-            self.send_data(0xf7)             
+            self.send_command_with_data(0X50, [0xf7])
             self.send_command(0X02)
             self.ReadBusy() 
-            self.send_command(0X07) 
-            self.send_data(0xA5)
+            self.send_command_with_data(0X07, [0xA5])
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
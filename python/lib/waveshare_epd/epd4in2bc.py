@@ -65,11 +65,19 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte([data])
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0): # 0: idle, 1: busy
-            epdconfig.delay_ms(100)
+        epdconfig.wait_busy(0, 100)  # 0: idle, 1: busy
         logger.debug("e-Paper busy release")
             
     def init(self):
@@ -86,8 +94,7 @@ class EPD:
         self.send_command(0x04) # POWER_ON
         self.ReadBusy()
         
-        self.send_command(0x00) # PANEL_SETTING
-        self.send_data(0x0F) # LUT from OTP
+        self.send_command_with_data(0x00, [0x0F])  # PANEL_SETTING, LUT from OTP
         
         return 0
 
@@ -116,13 +123,9 @@ class EPD:
         return buf
 
     def display(self, imageblack, imagered):
-        self.send_command(0x10)
-        for i in range(0, int(self.width * self.height / 8)):
-            self.send_data(imageblack[i])
+        self.send_command_with_data(0x10, imageblack[:int(self.width * self.height / 8)])
         
-        self.send_command(0x13)
-        for i in range(0, int(self.width * self.height / 8)):
-            self.send_data(imagered[i])
+        self.send_command_with_data(0x13, imagered[:int(self.width * self.height / 8)])
         
         self.send_command(0x12) 
         self.ReadBusy()
@@ -142,8 +145,7 @@ class EPD:
     def sleep(self):
         self.send_command(0x02) # POWER_OFF
         self.ReadBusy()
-        self.send_command(0x07) # DEEP_SLEEP
-        self.send_data(0xA5) # check code
+        self.send_command_with_data(0x07, [0xA5])  # DEEP_SLEEP, check code
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -31,8 +31,7 @@
 
 import logging
 from . import epdconfig
-
-from PIL import Image
+from . import epdbuffer
 
 # Display resolution
 EPD_WIDTH       = 600
@@ -85,16 +84,23 @@ class EPD:
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
 
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusyHigh(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      # 0: idle, 1: busy
-            epdconfig.delay_ms(100)
+        epdconfig.wait_busy(0, 100)  # 0: idle, 1: busy
         logger.debug("e-Paper busy release")
 
     def ReadBusyLow(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      # 0: idle, 1: busy
-            epdconfig.delay_ms(100)
+        epdconfig.wait_busy(1, 100)  # 0: idle, 1: busy
         logger.debug("e-Paper busy release")
 
     def init(self):
@@ -104,76 +110,29 @@ class EPD:
         self.reset()
 
         self.ReadBusyHigh()
-        self.send_command(0x00)
-        self.send_data(0xEF)
-        self.send_data(0x08)
-        self.send_command(0x01)
-        self.send_data(0x37)
-        self.send_data(0x00)
-        self.send_data(0x23)
-        self.send_data(0x23)
-        self.send_command(0x03)
-        self.send_data(0x00)
-        self.send_command(0x06)
-        self.send_data(0xC7)
-        self.send_data(0xC7)
-        self.send_data(0x1D)
-        self.send_command(0x30)
-        self.send_data(0x3c)
-        self.send_command(0x41)
-        self.send_data(0x00)
-        self.send_command(0x50)
-        self.send_data(0x37)
-        self.send_command(0x60)
-        self.send_data(0x22)
-        self.send_command(0x61)
-        self.send_data(0x02)
-        self.send_data(0x58)
-        self.send_data(0x01)
-        self.send_data(0xC0)
-        self.send_command(0xE3)
-        self.send_data(0xAA)
+        self.send_command_with_data(0x00, [0xEF, 0x08])
+        self.send_command_with_data(0x01, [0x37, 0x00, 0x23, 0x23])
+        self.send_command_with_data(0x03, [0x00])
+        self.send_command_with_data(0x06, [0xC7, 0xC7, 0x1D])
+        self.send_command_with_data(0x30, [0x3c])
+        self.send_command_with_data(0x41, [0x00])
+        self.send_command_with_data(0x50, [0x37])
+        self.send_command_with_data(0x60, [0x22])
+        self.send_command_with_data(0x61, [0x02, 0x58, 0x01, 0xC0])
+        self.send_command_with_data(0xE3, [0xAA])
 
         epdconfig.delay_ms(100)
-        self.send_command(0x50)
-        self.send_data(0x37)
+        self.send_command_with_data(0x50, [0x37])
         # EPD hardware init end
         return 0
 
     def getbuffer(self, image):
-        # Create a pallette with the 7 colors supported by the panel
-        pal_image = Image.new("P", (1,1))
-        pal_image.putpalette( (0,0,0,  255,255,255,  0,255,0,   0,0,255,  255,0,0,  255,255,0, 255,128,0) + (0,0,0)*249)
-
-        # Check if we need to rotate the image
-        imwidth, imheight = image.size
-        if(imwidth == self.width and imheight == self.height):
-            image_temp = image
-        elif(imwidth == self.height and imheight == self.width):
-            image_temp = image.rotate(90, expand=True)
-        else:
-            logger.warning("Invalid image dimensions: %d x %d, expected %d x %d" % (imwidth, imheight, self.width, self.height))
-
-        # Convert the soruce image to the 7 colors, dithering if needed
-        image_7color = image_temp.convert("RGB").quantize(palette=pal_image)
-        buf_7color = bytearray(image_7color.tobytes('raw'))
-
-        # PIL does not support 4 bit color, so pack the 4 bits of color
-        # into a single byte to transfer to the panel
-        buf = [0x00] * int(self.width * self.height / 2)
-        idx = 0
-        for i in range(0, len(buf_7color), 2):
-            buf[idx] = (buf_7color[i] << 4) + buf_7color[i+1]
-            idx += 1
-
-        return buf
+        # Quantize to the 7 colors supported by the panel and pack 4 bits per pixel
+        return epdbuffer.pack_indexed(image, self.width, self.height,
+                                      (0,0,0,  255,255,255,  0,255,0,   0,0,255,  255,0,0,  255,255,0, 255,128,0), 4)
 
     def display(self,image):
-        self.send_command(0x61) #Set Resolution setting
-        self.send_data(0x02)
-        self.send_data(0x58)
-        self.send_data(0x01)
-        self.send_data(0xC0)
+        self.send_command_with_data(0x61, [0x02, 0x58, 0x01, 0xC0])  #Set Resolution setting
         self.send_command(0x10)
 
         self.send_data2(image)
@@ -186,11 +145,7 @@ class EPD:
         epdconfig.delay_ms(500)
 
     def Clear(self):
-        self.send_command(0x61) #Set Resolution setting
-        self.send_data(0x02)
-        self.send_data(0x58)
-        self.send_data(0x01)
-        self.send_data(0xC0)
+        self.send_command_with_data(0x61, [0x02, 0x58, 0x01, 0xC0])  #Set Resolution setting
         self.send_command(0x10)
 
         # Set all pixels to white
@@ -207,8 +162,7 @@ class EPD:
 
     def sleep(self):
         epdconfig.delay_ms(500)
-        self.send_command(0x07) # DEEP_SLEEP
-        self.send_data(0XA5)
+        self.send_command_with_data(0x07, [0XA5])  # DEEP_SLEEP
         epdconfig.digital_write(self.reset_pin, 0)
 
         epdconfig.delay_ms(2000)
@@ -73,16 +73,24 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      #  0: idle, 1: busy
-            epdconfig.delay_ms(200)
+        epdconfig.wait_busy(1, 200)  #  0: idle, 1: busy
         logger.debug("e-Paper busy release")
 
     def TurnOnDisplay(self):
-        self.send_command(0x22)
-        self.send_data(0xF7)            #  24s  #  0xD7  16s  Probability refresh bad, probability damage ink screen
+        self.send_command_with_data(0x22, [
+            0xF7])  #  24s  #  0xD7  16s  Probability refresh bad, probability damage ink screen
         self.send_command(0x20)			# DISPLAY REFRESH 	
         epdconfig.delay_ms(100)	        # The delay here is necessary, 200uS at least!!!     
         self.ReadBusy()                 # waiting for the electronic paper IC to release the idle signal
@@ -97,41 +105,33 @@ class EPD:
         self.send_command(0x12)         # POWER ON
         self.ReadBusy()                 # waiting for the electronic paper IC to release the idle signal
 
-        self.send_command(0x11)
-        self.send_data(0x01)
-        self.send_command(0x44)	 		# Set Ram X- address Start / End position
-        self.send_data(0x00)     		# XStart, POR = 00h
-        self.send_data(0x31)            # 400/8-1
-        self.send_command(0x45)	 		# Set Ram Y- address  Start / End position 
-        self.send_data(0x0f)  
-        self.send_data(0x01)            # 300-1	
-        self.send_data(0x00)     		# YEnd L
-        self.send_data(0x00)			# YEnd H 
-
-        self.send_command(0x4e)	 						 
-        self.send_data(0x00)	
-        self.send_command(0x4f)	 
-        self.send_data(0x0f)  
-        self.send_data(0x01) 	
-
-
-        self.send_command(0x91)
-        self.send_data(0x00)
-
-        self.send_command(0xC4)		    # Set Ram X- address Start / End position
-        self.send_data(0x31)     		# XStart, POR = 00h
-        self.send_data(0x00)            # 400/8-1
-        self.send_command(0xC5)	 	    # Set Ram Y- address  Start / End position 
-        self.send_data(0x0f)  
-        self.send_data(0x01)            # 300-1	
-        self.send_data(0x00)     		# YEnd L
-        self.send_data(0x00)			# YEnd H 
-
-        self.send_command(0xCe)	 						 
-        self.send_data(0x31)	
-        self.send_command(0xCf)	 
-        self.send_data(0x0f)  
-        self.send_data(0x01)
+        self.send_command_with_data(0x11, [0x01])
+        self.send_command_with_data(0x44, [  # Set Ram X- address Start / End position
+            0x00,  # XStart, POR = 00h
+            0x31])  # 400/8-1
+        self.send_command_with_data(0x45, [  # Set Ram Y- address  Start / End position
+            0x0f,
+            0x01,  # 300-1
+            0x00,  # YEnd L
+            0x00])  # YEnd H
+
+        self.send_command_with_data(0x4e, [0x00])
+        self.send_command_with_data(0x4f, [0x0f, 0x01])
+
+
+        self.send_command_with_data(0x91, [0x00])
+
+        self.send_command_with_data(0xC4, [  # Set Ram X- address Start / End position
+            0x31,  # XStart, POR = 00h
+            0x00])  # 400/8-1
+        self.send_command_with_data(0xC5, [  # Set Ram Y- address  Start / End position
+            0x0f,
+            0x01,  # 300-1
+            0x00,  # YEnd L
+            0x00])  # YEnd H
+
+        self.send_command_with_data(0xCe, [0x31])
+        self.send_command_with_data(0xCf, [0x0f, 0x01])
         return 0
 
     def getbuffer(self, image):
@@ -185,20 +185,19 @@ class EPD:
 
     def Clear(self):
         self.send_command(0x24)
-        self.send_data2([0xFF] * 13600)
+        self.send_data2(b'\xff' * 13600)
         self.send_command(0X26)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(b'\x00' * 13600)
 
         self.send_command(0xA4)
-        self.send_data2([0xFF] * 13600)
+        self.send_data2(b'\xff' * 13600)
         self.send_command(0xA6)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(b'\x00' * 13600)
 
         self.TurnOnDisplay()
 
     def sleep(self):
-        self.send_command(0X10) # deep sleep
-        self.send_data(0x03)
+        self.send_command_with_data(0X10, [0x03])  # deep sleep
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
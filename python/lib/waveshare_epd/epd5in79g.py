@@ -30,8 +30,7 @@
 
 import logging
 from . import epdconfig
-
-from PIL import Image
+from . import epdbuffer
 
 # Display resolution
 EPD_WIDTH       = 792
@@ -79,26 +78,31 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusyH(self):
         logger.debug("e-Paper busy H")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      # 0: idle, 1: busy
-            epdconfig.delay_ms(5)
+        epdconfig.wait_busy(0, 5)  # 0: idle, 1: busy
         epdconfig.delay_ms(200)
         logger.debug("e-Paper busy H release")
 
     def ReadBusyL(self):
         logger.debug("e-Paper busy L")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      # 0: busy, 1: idle
-            epdconfig.delay_ms(5)
+        epdconfig.wait_busy(1, 5)  # 0: busy, 1: idle
         logger.debug("e-Paper busy L release")
 
     def TurnOnDisplay(self):
-        self.send_command(0xA2)
-        self.send_data(0x00)        
+        self.send_command_with_data(0xA2, [0x00])
 
-        self.send_command(0x12)	
-        self.send_data(0x00)
+        self.send_command_with_data(0x12, [0x00])
         epdconfig.delay_ms(100)	    
         self.ReadBusyH()
             
@@ -110,90 +114,49 @@ class EPD:
 
         self.ReadBusyH()      
 
-        self.send_command(0xA2)
-        self.send_data(0x01)
+        self.send_command_with_data(0xA2, [0x01])
 
-        self.send_command(0x00)
-        self.send_data(0x03)	
-        self.send_data(0x29)
+        self.send_command_with_data(0x00, [0x03, 0x29])
 
-        self.send_command(0xA2)
-        self.send_data(0x02)	
+        self.send_command_with_data(0xA2, [0x02])
 
-        self.send_command(0x00)
-        self.send_data(0x07)	
-        self.send_data(0x29)
+        self.send_command_with_data(0x00, [0x07, 0x29])
 
-        self.send_command(0xA2)
-        self.send_data(0x00)	
+        self.send_command_with_data(0xA2, [0x00])
 
-        self.send_command(0x50)
-        self.send_data(0x97)	
+        self.send_command_with_data(0x50, [0x97])
 
-        self.send_command(0x61)
-        self.send_data(0x01)	
-        self.send_data(0x8c)	
-        self.send_data(0x01)	
-        self.send_data(0x10) 	
+        self.send_command_with_data(0x61, [0x01, 0x8c, 0x01, 0x10])
 
-        self.send_command(0x06)
-        self.send_data(0x38)	
-        self.send_data(0x38)
-        self.send_data(0x38)
-        self.send_data(0x00)
+        self.send_command_with_data(0x06, [0x38, 0x38, 0x38, 0x00])
 
 
-        self.send_command(0xE9)
-        self.send_data(0x01)
+        self.send_command_with_data(0xE9, [0x01])
 
 
-        self.send_command(0xE0)
-        self.send_data(0x01)
+        self.send_command_with_data(0xE0, [0x01])
 
         self.send_command(0x04)
         self.ReadBusyH()	
         return 0
 
     def getbuffer(self, image):
-        # Create a pallette with the 4 colors supported by the panel
-        pal_image = Image.new("P", (1,1))
-        pal_image.putpalette( (0,0,0,  255,255,255,  255,255,0,   255,0,0) + (0,0,0)*252)
-
-        # Check if we need to rotate the image
-        imwidth, imheight = image.size
-        if(imwidth == self.width and imheight == self.height):
-            image_temp = image
-        elif(imwidth == self.height and imheight == self.width):
-            image_temp = image.rotate(90, expand=True)
-        else:
-            logger.warning("Invalid image dimensions: %d x %d, expected %d x %d" % (imwidth, imheight, self.width, self.height))
-
-        # Convert the soruce image to the 4 colors, dithering if needed
-        image_4color = image_temp.convert("RGB").quantize(palette=pal_image)
-        buf_4color = bytearray(image_4color.tobytes('raw'))
-
-        # into a single byte to transfer to the panel
-        buf = [0x00] * int(self.width * self.height / 4)
-        idx = 0
-        for i in range(0, len(buf_4color), 4):
-            buf[idx] = (buf_4color[i] << 6) + (buf_4color[i+1] << 4) + (buf_4color[i+2] << 2) + buf_4color[i+3]
-            idx += 1
-        return buf
+        # Quantize to the 4 colors supported by the panel and pack 2 bits per pixel
+        return epdbuffer.pack_indexed(image, self.width, self.height,
+                                      (0,0,0,  255,255,255,  255,255,0,   255,0,0), 2)
 
     def display(self, image):
         Width =int(self.width / 8)
         Width1 =int(self.width / 4)
         Height = self.height
 
-        self.send_command(0xA2)
-        self.send_data(0x02)
+        self.send_command_with_data(0xA2, [0x02])
         self.send_command(0x10)
         for i in range(Height//2):
             self.send_data2(image[i * Width1 : i * Width1+Width])
             self.send_data2(image[(Height-i-1) * Width1 : (Height-i-1) * Width1+Width])
 
-        self.send_command(0xA2)
-        self.send_data(0x01)
+        self.send_command_with_data(0xA2, [0x01])
         self.send_command(0x10)
         for i in range(Height//2):
             self.send_data2(image[i * Width1+Width : (i+1) * Width1])
@@ -202,21 +165,18 @@ class EPD:
         self.TurnOnDisplay()
 
     def Clear(self, color=0x55):
-        self.send_command(0xA2)
-        self.send_data(0x02)
+        self.send_command_with_data(0xA2, [0x02])
         self.send_command(0x10)
-        self.send_data2([color] * int(self.height) * int(self.width/8))
+        self.send_data2(bytes([color]) * int(self.height) * int(self.width/8))
 
-        self.send_command(0xA2)
-        self.send_data(0x01)
+        self.send_command_with_data(0xA2, [0x01])
         self.send_command(0x10)
-        self.send_data2([color] * int(self.height) * int(self.width/8))
+        self.send_data2(bytes([color]) * int(self.height) * int(self.width/8))
 
         self.TurnOnDisplay()
 
     def sleep(self):
-        self.send_command(0X10) # deep sleep
-        self.send_data(0x03)
+        self.send_command_with_data(0X10, [0x03])  # deep sleep
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -72,11 +72,19 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      
-            epdconfig.delay_ms(20)    
+        epdconfig.wait_busy(0, 20)
         logger.debug("e-Paper busy release")
         
     def TurnOnDisplay(self):
@@ -100,8 +108,7 @@ class EPD:
         epdconfig.delay_ms(100) 
         self.ReadBusy()   #waiting for the electronic paper IC to release the idle signal
 
-        self.send_command(0X00)    #PANNEL SETTING
-        self.send_data(0x1F)   #KW-3f   KWR-2F	BWROTP 0f	BWOTP 1f
+        self.send_command_with_data(0X00, [0x1F])  #PANNEL SETTING, KW-3f   KWR-2F	BWROTP 0f	BWOTP 1f
 
         self.send_command(0x61)    #tres
         self.send_data (0x02)		#source 648
@@ -109,15 +116,11 @@ class EPD:
         self.send_data (0x01)		#gate 480
         self.send_data (0xE0)
 
-        self.send_command(0X15)		
-        self.send_data(0x00)		
+        self.send_command_with_data(0X15, [0x00])
 
-        self.send_command(0X50)			#VCOM AND DATA INTERVAL SETTING
-        self.send_data(0x10)
-        self.send_data(0x07)
+        self.send_command_with_data(0X50, [0x10, 0x07])  #VCOM AND DATA INTERVAL SETTING
 
-        self.send_command(0X60)			#TCON SETTING
-        self.send_data(0x22)
+        self.send_command_with_data(0X60, [0x22])  #TCON SETTING
             
         # EPD hardware init end
         return 0
@@ -151,23 +154,22 @@ class EPD:
         for i in range(0, int(self.width * self.height / 8)):
             buf[i] = ~image[i]
         self.send_command(0x10)
-        self.send_data2([0x00] * int(self.width * self.height / 8))
+        self.send_data2(b'\x00' * int(self.width * self.height / 8))
         self.send_command(0x13)
         self.send_data2(buf)
         self.TurnOnDisplay()
         
     def Clear(self):
         self.send_command(0x10)
-        self.send_data2([0x00] * int(self.width * self.height / 8))
+        self.send_data2(b'\x00' * int(self.width * self.height / 8))
         self.send_command(0x13)
-        self.send_data2([0x00] * int(self.width * self.height / 8))
+        self.send_data2(b'\x00' * int(self.width * self.height / 8))
         self.TurnOnDisplay()
 
     def sleep(self):
         self.send_command(0x02) # POWER_OFF
         self.ReadBusy()
-        self.send_command(0x07) # DEEP_SLEEP
-        self.send_data(0XA5)
+        self.send_command_with_data(0x07, [0XA5])  # DEEP_SLEEP
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -73,7 +73,16 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
         self.send_command(0X71)
@@ -98,8 +107,7 @@ class EPD:
         epdconfig.delay_ms(100)  
         self.ReadBusy()   #waiting for the electronic paper IC to release the idle signal
 
-        self.send_command(0X00)     #PANNEL SETTING
-        self.send_data(0x0F)        #KW-3f   KWR-2F    BWROTP 0f   BWOTP 1f
+        self.send_command_with_data(0X00, [0x0F])  #PANNEL SETTING, KW-3f   KWR-2F    BWROTP 0f   BWOTP 1f
 
         self.send_command(0x61)     #tres
         self.send_data (0x02)       #source 648
@@ -107,15 +115,11 @@ class EPD:
         self.send_data (0x01)       #gate 480
         self.send_data (0xe0)
 
-        self.send_command(0X15)
-        self.send_data(0x00)
+        self.send_command_with_data(0X15, [0x00])
 
-        self.send_command(0X50)     #VCOM AND DATA INTERVAL SETTING
-        self.send_data(0x11)
-        self.send_data(0x07)
+        self.send_command_with_data(0X50, [0x11, 0x07])  #VCOM AND DATA INTERVAL SETTING
 
-        self.send_command(0X60)     #TCON SETTING
-        self.send_data(0x22)
+        self.send_command_with_data(0X60, [0x22])  #TCON SETTING
         
         return 0
 
@@ -161,9 +165,9 @@ class EPD:
 
     def Clear(self):
         self.send_command(0X10)
-        self.send_data2([0xFF] * int(self.width * self.height / 8))
+        self.send_data2(b'\xff' * int(self.width * self.height / 8))
         self.send_command(0X13)
-        self.send_data2([0x00] * int(self.width * self.height / 8))
+        self.send_data2(b'\x00' * int(self.width * self.height / 8))
 
         self.send_command(0x12)
         epdconfig.delay_ms(200) 
@@ -172,8 +176,7 @@ class EPD:
     def sleep(self):
         self.send_command(0X02) # power off
         self.ReadBusy()
-        self.send_command(0X07) # deep sleep
-        self.send_data(0xA5)
+        self.send_command_with_data(0X07, [0xA5])  # deep sleep
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -66,11 +66,19 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte([data])
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      # 0: idle, 1: busy
-            epdconfig.delay_ms(100)
+        epdconfig.wait_busy(0, 100)  # 0: idle, 1: busy
         logger.debug("e-Paper busy release")
             
     def init(self):
@@ -79,42 +87,28 @@ class EPD:
             
         self.reset()
 
-        self.send_command(0x01) # POWER_SETTING
-        self.send_data(0x37)
-        self.send_data(0x00)
+        self.send_command_with_data(0x01, [0x37, 0x00])  # POWER_SETTING
         
-        self.send_command(0x00) # PANEL_SETTING
-        self.send_data(0xCF)
-        self.send_data(0x08)
+        self.send_command_with_data(0x00, [0xCF, 0x08])  # PANEL_SETTING
         
-        self.send_command(0x30) # PLL_CONTROL
-        self.send_data(0x3A) # PLL:  0-15:0x3C, 15+:0x3A
-        self.send_command(0X82) # VCOM VOLTAGE SETTING
-        self.send_data(0x28) # all temperature  range
-
-        self.send_command(0x06) # boost
-        self.send_data(0xc7) 	   	
-        self.send_data(0xcc) 
-        self.send_data(0x15) 
-
-        self.send_command(0X50) # VCOM AND DATA INTERVAL SETTING
-        self.send_data(0x77) 
-
-        self.send_command(0X60) # TCON SETTING
-        self.send_data(0x22) 
-
-        self.send_command(0X65) # FLASH CONTROL
-        self.send_data(0x00)
-
-        self.send_command(0x61) # tres			
-        self.send_data(0x02) # source 600
-        self.send_data(0x58) 
-        self.send_data(0x01) # gate 448
-        self.send_data(0xc0)
-
-        self.send_command(0xe5) # FLASH MODE		   	
-        self.send_data(0x03) 
-        self.send_data(0x03)
+        self.send_command_with_data(0x30, [0x3A])  # PLL_CONTROL, PLL:  0-15:0x3C, 15+:0x3A
+        self.send_command_with_data(0X82, [0x28])  # VCOM VOLTAGE SETTING, all temperature  range
+
+        self.send_command_with_data(0x06, [0xc7, 0xcc, 0x15])  # boost
+
+        self.send_command_with_data(0X50, [0x77])  # VCOM AND DATA INTERVAL SETTING
+
+        self.send_command_with_data(0X60, [0x22])  # TCON SETTING
+
+        self.send_command_with_data(0X65, [0x00])  # FLASH CONTROL
+
+        self.send_command_with_data(0x61, [  # tres
+            0x02,  # source 600
+            0x58,
+            0x01,  # gate 448
+            0xc0])
+
+        self.send_command_with_data(0xe5, [0x03, 0x03])  # FLASH MODE
         
         return 0
 
@@ -194,8 +188,7 @@ class EPD:
     def sleep(self):
         self.send_command(0x02) # POWER_OFF
         self.ReadBusy()
-        self.send_command(0x07) # DEEP_SLEEP
-        self.send_data(0xA5) # check code
+        self.send_command_with_data(0x07, [0xA5])  # DEEP_SLEEP, check code
     
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
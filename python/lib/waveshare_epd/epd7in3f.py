@@ -30,8 +30,7 @@
 
 import logging
 from . import epdconfig
-
-from PIL import Image
+from . import epdbuffer
 
 # Display resolution
 EPD_WIDTH       = 800
@@ -82,23 +81,29 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusyH(self):
         logger.debug("e-Paper busy H")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      # 0: busy, 1: idle
-            epdconfig.delay_ms(5)
+        epdconfig.wait_busy(0, 5)  # 0: busy, 1: idle
         logger.debug("e-Paper busy H release")
 
     def TurnOnDisplay(self):
         self.send_command(0x04) # POWER_ON
         self.ReadBusyH()
 
-        self.send_command(0x12) # DISPLAY_REFRESH
-        self.send_data(0X00)
+        self.send_command_with_data(0x12, [0X00])  # DISPLAY_REFRESH
         self.ReadBusyH()
         
-        self.send_command(0x02) # POWER_OFF
-        self.send_data(0X00)
+        self.send_command_with_data(0x02, [0X00])  # POWER_OFF
         self.ReadBusyH()
         
     def init(self):
@@ -109,119 +114,49 @@ class EPD:
         self.ReadBusyH()
         epdconfig.delay_ms(30)
 
-        self.send_command(0xAA)    # CMDH
-        self.send_data(0x49)
-        self.send_data(0x55)
-        self.send_data(0x20)
-        self.send_data(0x08)
-        self.send_data(0x09)
-        self.send_data(0x18)
-
-        self.send_command(0x01)
-        self.send_data(0x3F)
-        self.send_data(0x00)
-        self.send_data(0x32)
-        self.send_data(0x2A)
-        self.send_data(0x0E)
-        self.send_data(0x2A)
-
-        self.send_command(0x00)
-        self.send_data(0x5F)
-        self.send_data(0x69)
-
-        self.send_command(0x03)
-        self.send_data(0x00)
-        self.send_data(0x54)
-        self.send_data(0x00)
-        self.send_data(0x44) 
-
-        self.send_command(0x05)
-        self.send_data(0x40)
-        self.send_data(0x1F)
-        self.send_data(0x1F)
-        self.send_data(0x2C)
-
-        self.send_command(0x06)
-        self.send_data(0x6F)
-        self.send_data(0x1F)
-        self.send_data(0x1F)
-        self.send_data(0x22)
-
-        self.send_command(0x08)
-        self.send_data(0x6F)
-        self.send_data(0x1F)
-        self.send_data(0x1F)
-        self.send_data(0x22)
-
-        self.send_command(0x13)    # IPC
-        self.send_data(0x00)
-        self.send_data(0x04)
-
-        self.send_command(0x30)
-        self.send_data(0x3C)
-
-        self.send_command(0x41)     # TSE
-        self.send_data(0x00)
-
-        self.send_command(0x50)
-        self.send_data(0x3F)
-
-        self.send_command(0x60)
-        self.send_data(0x02)
-        self.send_data(0x00)
-
-        self.send_command(0x61)
-        self.send_data(0x03)
-        self.send_data(0x20)
-        self.send_data(0x01) 
-        self.send_data(0xE0)
-
-        self.send_command(0x82)
-        self.send_data(0x1E) 
-
-        self.send_command(0x84)
-        self.send_data(0x00)
-
-        self.send_command(0x86)    # AGID
-        self.send_data(0x00)
-
-        self.send_command(0xE3)
-        self.send_data(0x2F)
-
-        self.send_command(0xE0)   # CCSET
-        self.send_data(0x00) 
-
-        self.send_command(0xE6)   # TSSET
-        self.send_data(0x00)
+        self.send_command_with_data(0xAA, [0x49, 0x55, 0x20, 0x08, 0x09, 0x18])  # CMDH
+
+        self.send_command_with_data(0x01, [0x3F, 0x00, 0x32, 0x2A, 0x0E, 0x2A])
+
+        self.send_command_with_data(0x00, [0x5F, 0x69])
+
+        self.send_command_with_data(0x03, [0x00, 0x54, 0x00, 0x44])
+
+        self.send_command_with_data(0x05, [0x40, 0x1F, 0x1F, 0x2C])
+
+        self.send_command_with_data(0x06, [0x6F, 0x1F, 0x1F, 0x22])
+
+        self.send_command_with_data(0x08, [0x6F, 0x1F, 0x1F, 0x22])
+
+        self.send_command_with_data(0x13, [0x00, 0x04])  # IPC
+
+        self.send_command_with_data(0x30, [0x3C])
+
+        self.send_command_with_data(0x41, [0x00])  # TSE
+
+        self.send_command_with_data(0x50, [0x3F])
+
+        self.send_command_with_data(0x60, [0x02, 0x00])
+
+        self.send_command_with_data(0x61, [0x03, 0x20, 0x01, 0xE0])
+
+        self.send_command_with_data(0x82, [0x1E])
+
+        self.send_command_with_data(0x84, [0x00])
+
+        self.send_command_with_data(0x86, [0x00])  # AGID
+
+        self.send_command_with_data(0xE3, [0x2F])
+
+        self.send_command_with_data(0xE0, [0x00])  # CCSET
+
+        self.send_command_with_data(0xE6, [0x00])  # TSSET
         return 0
 
     def getbuffer(self, image):
-        # Create a pallette with the 7 colors supported by the panel
-        pal_image = Image.new("P", (1,1))
-        pal_image.putpalette( (0,0,0,  255,255,255,  0,255,0,   0,0,255,  255,0,0,  255,255,0, 255,128,0) + (0,0,0)*249)
-
-        # Check if we need to rotate the image
-        imwidth, imheight = image.size
-        if(imwidth == self.width and imheight == self.height):
-            image_temp = image
-        elif(imwidth == self.height and imheight == self.width):
-            image_temp = image.rotate(90, expand=True)
-        else:
-            logger.warning("Invalid image dimensions: %d x %d, expected %d x %d" % (imwidth, imheight, self.width, self.height))
-
-        # Convert the soruce image to the 7 colors, dithering if needed
-        image_7color = image_temp.convert("RGB").quantize(palette=pal_image)
-        buf_7color = bytearray(image_7color.tobytes('raw'))
-
-        # PIL does not support 4 bit color, so pack the 4 bits of color
-        # into a single byte to transfer to the panel
-        buf = [0x00] * int(self.width * self.height / 2)
-        idx = 0
-        for i in range(0, len(buf_7color), 2):
-            buf[idx] = (buf_7color[i] << 4) + buf_7color[i+1]
-            idx += 1
-            
-        return buf
+        # Quantize to the 7 colors supported by the panel and pack 4 bits per pixel
+        return epdbuffer.pack_indexed(image, self.width, self.height,
+                                      (0,0,0,  255,255,255,  0,255,0,   0,0,255,  255,0,0,  255,255,0, 255,128,0), 4)
 
     def display(self, image):
         self.send_command(0x10)
@@ -231,13 +166,12 @@ class EPD:
         
     def Clear(self, color=0x11):
         self.send_command(0x10)
-        self.send_data2([color] * int(self.height) * int(self.width/2))
+        self.send_data2(bytes([color]) * int(self.height) * int(self.width/2))
 
         self.TurnOnDisplay()
 
     def sleep(self):
-        self.send_command(0x07) # DEEP_SLEEP
-        self.send_data(0XA5)
+        self.send_command_with_data(0x07, [0XA5])  # DEEP_SLEEP
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
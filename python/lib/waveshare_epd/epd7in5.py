@@ -72,11 +72,19 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      # 0: idle, 1: busy
-            epdconfig.delay_ms(100)    
+        epdconfig.wait_busy(0, 100)  # 0: idle, 1: busy
         logger.debug("e-Paper busy release")
         
     def init(self):
@@ -97,29 +105,23 @@ class EPD:
         self.send_command(0x04) # POWER_ON
         self.ReadBusy()
         
-        self.send_command(0x30) # PLL_CONTROL
-        self.send_data(0x3c)
+        self.send_command_with_data(0x30, [0x3c])  # PLL_CONTROL
         
-        self.send_command(0x41) # TEMPERATURE_CALIBRATION
-        self.send_data(0x00)
+        self.send_command_with_data(0x41, [0x00])  # TEMPERATURE_CALIBRATION
         
-        self.send_command(0x50) # VCOM_AND_DATA_INTERVAL_SETTING
-        self.send_data(0x77)
+        self.send_command_with_data(0x50, [0x77])  # VCOM_AND_DATA_INTERVAL_SETTING
         
-        self.send_command(0x60) # TCON_SETTING
-        self.send_data(0x22)
+        self.send_command_with_data(0x60, [0x22])  # TCON_SETTING
         
-        self.send_command(0x61) # TCON_RESOLUTION
-        self.send_data(EPD_WIDTH >> 8)     #source 640
-        self.send_data(EPD_WIDTH & 0xff)
-        self.send_data(EPD_HEIGHT >> 8)     #gate 384
-        self.send_data(EPD_HEIGHT & 0xff)
+        self.send_command_with_data(0x61, [  # TCON_RESOLUTION
+            EPD_WIDTH >> 8,  #source 640
+            EPD_WIDTH & 0xff,
+            EPD_HEIGHT >> 8,  #gate 384
+            EPD_HEIGHT & 0xff])
         
-        self.send_command(0x82) # VCM_DC_SETTING
-        self.send_data(0x1E) # decide by LUT file
+        self.send_command_with_data(0x82, [0x1E])  # VCM_DC_SETTING, decide by LUT file
         
-        self.send_command(0xe5) # FLASH MODE
-        self.send_data(0x03)
+        self.send_command_with_data(0xe5, [0x03])  # FLASH MODE
         
         # EPD hardware init end
         return 0
@@ -176,8 +178,7 @@ class EPD:
         self.send_command(0x02) # POWER_OFF
         self.ReadBusy()
         
-        self.send_command(0x07) # DEEP_SLEEP
-        self.send_data(0XA5)
+        self.send_command_with_data(0x07, [0XA5])  # DEEP_SLEEP
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
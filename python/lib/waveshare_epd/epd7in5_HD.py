@@ -72,12 +72,19 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        busy = epdconfig.digital_read(self.busy_pin)
-        while(busy == 1):
-            busy = epdconfig.digital_read(self.busy_pin)
+        epdconfig.wait_busy(1, 1)
         epdconfig.delay_ms(200)
         
     def init(self):
@@ -90,11 +97,9 @@ class EPD:
         self.send_command(0x12)  #SWRESET
         self.ReadBusy()
 
-        self.send_command(0x46)  # Auto Write Red RAM
-        self.send_data(0xf7)
+        self.send_command_with_data(0x46, [0xf7])  # Auto Write Red RAM
         self.ReadBusy()
-        self.send_command(0x47)  # Auto Write  B/W RAM
-        self.send_data(0xf7)
+        self.send_command_with_data(0x47, [0xf7])  # Auto Write  B/W RAM
         self.ReadBusy()
 
         self.send_command(0x0C)  # Soft start setting
@@ -103,23 +108,19 @@ class EPD:
         self.send_command(0x01)  # Set MUX as 527
         self.send_data2([0xAF, 0x02, 0x01])
 
-        self.send_command(0x11)  # Data entry mode      
-        self.send_data(0x01)
+        self.send_command_with_data(0x11, [0x01])  # Data entry mode
 
         self.send_command(0x44) 
         self.send_data2([0x00, 0x00, 0x6F, 0x03]) # RAM x address start at 0
         self.send_command(0x45) 
         self.send_data2([0xAF, 0x02, 0x00, 0x00])
 
-        self.send_command(0x3C) # VBD
-        self.send_data(0x05) # LUT1, for white
+        self.send_command_with_data(0x3C, [0x05])  # VBD, LUT1, for white
 
-        self.send_command(0x18)
-        self.send_data(0X80)
+        self.send_command_with_data(0x18, [0X80])
 
 
-        self.send_command(0x22)
-        self.send_data(0XB1) #Load Temperature and waveform setting.
+        self.send_command_with_data(0x22, [0XB1])  #Load Temperature and waveform setting.
         self.send_command(0x20)
         self.ReadBusy()
 
@@ -150,8 +151,7 @@ class EPD:
         self.send_data2([0x00, 0x00])
         self.send_command(0x24)
         self.send_data2(image)
-        self.send_command(0x22)
-        self.send_data(0xF7)#Load LUT from MCU(0x32)
+        self.send_command_with_data(0x22, [0xF7])  #Load LUT from MCU(0x32)
         self.send_command(0x20)
         epdconfig.delay_ms(10)
         self.ReadBusy()
@@ -166,15 +166,13 @@ class EPD:
         self.send_command(0x26)
         self.send_data2(buf)
                 
-        self.send_command(0x22)
-        self.send_data(0xF7)#Load LUT from MCU(0x32)
+        self.send_command_with_data(0x22, [0xF7])  #Load LUT from MCU(0x32)
         self.send_command(0x20)
         epdconfig.delay_ms(10)
         self.ReadBusy()
 
     def sleep(self):
-        self.send_command(0x10)
-        self.send_data(0x01)
+        self.send_command_with_data(0x10, [0x01])
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -70,7 +70,16 @@ class EPD:
     def send_data2(self, data):
         epdconfig.digital_write(self.dc_pin, 1)
         epdconfig.digital_write(self.cs_pin, 0)
-        epdconfig.SPI.writebytes2(data)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
 
     def ReadBusy(self):
@@ -89,40 +98,35 @@ class EPD:
         # EPD hardware init start
         self.reset()
         
-        self.send_command(0x06)     # btst
-        self.send_data(0x17)
-        self.send_data(0x17)
-        self.send_data(0x28)        # If an exception is displayed, try using 0x38
-        self.send_data(0x17)
+        self.send_command_with_data(0x06, [  # btst
+            0x17,
+            0x17,
+            0x28,  # If an exception is displayed, try using 0x38
+            0x17])
         
-        self.send_command(0x01)			#POWER SETTING
-        self.send_data(0x07)
-        self.send_data(0x07)    #VGH=20V,VGL=-20V
-        self.send_data(0x28)		#VDH=15V
-        self.send_data(0x17)		#VDL=-15V
+        self.send_command_with_data(0x01, [  #POWER SETTING
+            0x07,
+            0x07,  #VGH=20V,VGL=-20V
+            0x28,  #VDH=15V
+            0x17])  #VDL=-15V
 
         self.send_command(0x04) #POWER ON
         epdconfig.delay_ms(100)
         self.ReadBusy()
 
-        self.send_command(0X00)			#PANNEL SETTING
-        self.send_data(0x1F)   #KW-3f   KWR-2F	BWROTP 0f	BWOTP 1f
+        self.send_command_with_data(0X00, [0x1F])  #PANNEL SETTING, KW-3f   KWR-2F	BWROTP 0f	BWOTP 1f
 
-        self.send_command(0x61)        	#tres
-        self.send_data(0x03)		#source 800
-        self.send_data(0x20)
-        self.send_data(0x01)		#gate 480
-        self.send_data(0xE0)
+        self.send_command_with_data(0x61, [  #tres
+            0x03,  #source 800
+            0x20,
+            0x01,  #gate 480
+            0xE0])
 
-        self.send_command(0X15)
-        self.send_data(0x00)
+        self.send_command_with_data(0X15, [0x00])
 
-        self.send_command(0X50)			#VCOM AND DATA INTERVAL SETTING
-        self.send_data(0x10)
-        self.send_data(0x07)
+        self.send_command_with_data(0X50, [0x10, 0x07])  #VCOM AND DATA INTERVAL SETTING
 
-        self.send_command(0X60)			#TCON SETTING
-        self.send_data(0x22)
+        self.send_command_with_data(0X60, [0x22])  #TCON SETTING
 
         # EPD hardware init end
         return 0
@@ -133,12 +137,9 @@ class EPD:
         # EPD hardware init start
         self.reset()
         
-        self.send_command(0X00)			#PANNEL SETTING
-        self.send_data(0x1F)   #KW-3f   KWR-2F	BWROTP 0f	BWOTP 1f
+        self.send_command_with_data(0X00, [0x1F])  #PANNEL SETTING, KW-3f   KWR-2F	BWROTP 0f	BWOTP 1f
 
-        self.send_command(0X50)			#VCOM AND DATA INTERVAL SETTING
-        self.send_data(0x10)
-        self.send_data(0x07)
+        self.send_command_with_data(0X50, [0x10, 0x07])  #VCOM AND DATA INTERVAL SETTING
 
         self.send_command(0x04) #POWER ON
         epdconfig.delay_ms(100) 
@@ -151,10 +152,8 @@ class EPD:
         self.send_data (0x18)		
         self.send_data (0x17)		
 
-        self.send_command(0xE0)
-        self.send_data(0x02)
-        self.send_command(0xE5)
-        self.send_data(0x5A)
+        self.send_command_with_data(0xE0, [0x02])
+        self.send_command_with_data(0xE5, [0x5A])
 
         # EPD hardware init end
         return 0
@@ -165,17 +164,14 @@ class EPD:
         # EPD hardware init start
         self.reset()
 
-        self.send_command(0X00)			#PANNEL SETTING
-        self.send_data(0x1F)   #KW-3f   KWR-2F	BWROTP 0f	BWOTP 1f
+        self.send_command_with_data(0X00, [0x1F])  #PANNEL SETTING, KW-3f   KWR-2F	BWROTP 0f	BWOTP 1f
 
         self.send_command(0x04) #POWER ON
         epdconfig.delay_ms(100) 
         self.ReadBusy()        #waiting for the electronic paper IC to release the idle signal
 
-        self.send_command(0xE0)
-        self.send_data(0x02)
-        self.send_command(0xE5)
-        self.send_data(0x6E)
+        self.send_command_with_data(0xE0, [0x02])
+        self.send_command_with_data(0xE5, [0x6E])
 
         # EPD hardware init end
         return 0
@@ -222,9 +218,9 @@ class EPD:
 
     def Clear(self):
         self.send_command(0x10)
-        self.send_data2([0xFF] * int(self.width * self.height / 8))
+        self.send_data2(b'\xff' * int(self.width * self.height / 8))
         self.send_command(0x13)
-        self.send_data2([0x00] * int(self.width * self.height / 8))
+        self.send_data2(b'\x00' * int(self.width * self.height / 8))
 
         self.send_command(0x12)
         epdconfig.delay_ms(100)
@@ -244,9 +240,7 @@ class EPD:
         Width = (Xend - Xstart) // 8
         Height = Yend - Ystart
 	
-        self.send_command(0x50)
-        self.send_data(0xA9)
-        self.send_data(0x07)
+        self.send_command_with_data(0x50, [0xA9, 0x07])
 
         self.send_command(0x91)		#This command makes the display enter partial mode
         self.send_command(0x90)		#resolution setting
@@ -279,8 +273,7 @@ class EPD:
         self.send_command(0x02) # POWER_OFF
         self.ReadBusy()
         
-        self.send_command(0x07) # DEEP_SLEEP
-        self.send_data(0XA5)
+        self.send_command_with_data(0x07, [0XA5])  # DEEP_SLEEP
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
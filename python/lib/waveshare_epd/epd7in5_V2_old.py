@@ -227,6 +227,15 @@ class EPD:
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
 
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
         self.send_command(0x71)
@@ -238,25 +247,15 @@ class EPD:
         logger.debug("e-Paper busy release")
         
     def SetLut(self, lut_vcom, lut_ww, lut_bw, lut_wb, lut_bb):
-        self.send_command(0x20)
-        for count in range(0, 42):
-            self.send_data(lut_vcom[count])
+        self.send_command_with_data(0x20, lut_vcom[:42])
 
-        self.send_command(0x21)
-        for count in range(0, 42):
-            self.send_data(lut_ww[count])
+        self.send_command_with_data(0x21, lut_ww[:42])
 
-        self.send_command(0x22)
-        for count in range(0, 42):
-            self.send_data(lut_bw[count])
+        self.send_command_with_data(0x22, lut_bw[:42])
 
-        self.send_command(0x23)
-        for count in range(0, 42):
-            self.send_data(lut_wb[count])
+        self.send_command_with_data(0x23, lut_wb[:42])
 
-        self.send_command(0x24)
-        for count in range(0, 42):
-            self.send_data(lut_bb[count])
+        self.send_command_with_data(0x24, lut_bb[:42])
 
     def init(self):
         if (epdconfig.module_init() != 0):
@@ -276,53 +275,42 @@ class EPD:
         # self.send_data(0x3f)		#VDH=15V
         # self.send_data(0x3f)		#VDL=-15V
 
-        self.send_command(0x01)     # power setting
-        self.send_data(0x17)        # 1-0=11: internal power
-        self.send_data(self.Voltage_Frame_7IN5_V2[6])   # VGH&VGL
-        self.send_data(self.Voltage_Frame_7IN5_V2[1])   # VSH
-        self.send_data(self.Voltage_Frame_7IN5_V2[2])   # VSL
-        self.send_data(self.Voltage_Frame_7IN5_V2[3])   # VSHR
+        self.send_command_with_data(0x01, [  # power setting
+            0x17,  # 1-0=11: internal power
+            self.Voltage_Frame_7IN5_V2[6],  # VGH&VGL
+            self.Voltage_Frame_7IN5_V2[1],  # VSH
+            self.Voltage_Frame_7IN5_V2[2],  # VSL
+            self.Voltage_Frame_7IN5_V2[3]])  # VSHR
         
-        self.send_command(0x82)     # VCOM DC Setting
-        self.send_data(self.Voltage_Frame_7IN5_V2[4])   # VCOM
-
-        self.send_command(0x06)     # Booster Setting
-        self.send_data(0x27)
-        self.send_data(0x27)
-        self.send_data(0x2F)
-        self.send_data(0x17)
+        self.send_command_with_data(0x82, [self.Voltage_Frame_7IN5_V2[4]])  # VCOM DC Setting, VCOM
+
+        self.send_command_with_data(0x06, [0x27, 0x27, 0x2F, 0x17])  # Booster Setting
         
-        self.send_command(0x30)     # OSC Setting
-        self.send_data(self.Voltage_Frame_7IN5_V2[0])   # 3C=50Hz, 3A=100HZ
+        self.send_command_with_data(0x30, [self.Voltage_Frame_7IN5_V2[0]])  # OSC Setting, 3C=50Hz, 3A=100HZ
 
         self.send_command(0x04)     # POWER ON
         epdconfig.delay_ms(100)
         self.ReadBusy()
 
-        self.send_command(0X00)     # PANNEL SETTING
-        self.send_data(0x3F)        # KW-3f KWR-2F BWROTP-0f BWOTP-1f
+        self.send_command_with_data(0X00, [0x3F])  # PANNEL SETTING, KW-3f KWR-2F BWROTP-0f BWOTP-1f
 
-        self.send_command(0x61)     # tres
-        self.send_data(0x03)        # source 800
-        self.send_data(0x20)
-        self.send_data(0x01)        # gate 480
-        self.send_data(0xE0)
+        self.send_command_with_data(0x61, [  # tres
+            0x03,  # source 800
+            0x20,
+            0x01,  # gate 480
+            0xE0])
 
-        self.send_command(0X15)
-        self.send_data(0x00)
+        self.send_command_with_data(0X15, [0x00])
 
-        self.send_command(0X50)     # VCOM AND DATA INTERVAL SETTING
-        self.send_data(0x10)
-        self.send_data(0x07)
+        self.send_command_with_data(0X50, [0x10, 0x07])  # VCOM AND DATA INTERVAL SETTING
 
-        self.send_command(0X60)     # TCON SETTING
-        self.send_data(0x22)
+        self.send_command_with_data(0X60, [0x22])  # TCON SETTING
 
-        self.send_command(0x65)     # Resolution setting
-        self.send_data(0x00)
-        self.send_data(0x00)        # 800*480
-        self.send_data(0x00)
-        self.send_data(0x00)
+        self.send_command_with_data(0x65, [  # Resolution setting
+            0x00,
+            0x00,  # 800*480
+            0x00,
+            0x00])
 
         self.SetLut(self.LUT_VCOM_7IN5_V2, self.LUT_WW_7IN5_V2, self.LUT_BW_7IN5_V2, self.LUT_WB_7IN5_V2, self.LUT_BB_7IN5_V2)
         # EPD hardware init end
@@ -336,11 +324,9 @@ class EPD:
         PLL=(wavedata[0]&0xF0)>>4
         XON=wavedata[2]&0xC0
 
-        self.send_command(0x52)	      #EVS
-        self.send_data(EVS)
+        self.send_command_with_data(0x52, [EVS])  #EVS
 
-        self.send_command(0x30)			  #PLL setting 
-        self.send_data(PLL)
+        self.send_command_with_data(0x30, [PLL])  #PLL setting
 
         self.send_command(0x01)       #Set VGH VGL VSH VSL VSHR
         self.send_data (0x17)
@@ -349,9 +335,7 @@ class EPD:
         self.send_data (wavedata[2]&0x3F)  	#VSL for white
         self.send_data (wavedata[3]&0x3F)  	#VSHR for red
 
-        self.send_command(0x2A)	      #LUTOPT
-        self.send_data(XON)
-        self.send_data(wavedata[4])
+        self.send_command_with_data(0x2A, [XON, wavedata[4]])  #LUTOPT
 
         self.send_command(0x82)       #VCOM_DC setting
         self.send_data (wavedata[5])  #Vcom value
@@ -378,33 +362,21 @@ class EPD:
         # EPD hardware init start
         self.reset()
 
-        self.send_command(0x00)  # Panel setting   
-        self.send_data(0x3F)
+        self.send_command_with_data(0x00, [0x3F])  # Panel setting
 
-        self.send_command(0x06)  # Booster Setting
-        self.send_data(0x17)  
-        self.send_data(0x17)
-        self.send_data(0x28)
-        self.send_data(0x18)
+        self.send_command_with_data(0x06, [0x17, 0x17, 0x28, 0x18])  # Booster Setting
 
-        self.send_command(0x50)  # VCOM and DATA interval setting    
-        self.send_data(0x22)
-        self.send_data(0x07)
+        self.send_command_with_data(0x50, [0x22, 0x07])  # VCOM and DATA interval setting
 
-        self.send_command(0x60)  # TCON setting
-        self.send_data(0x22)  # S-G G-S
+        self.send_command_with_data(0x60, [0x22])  # TCON setting, S-G G-S
 
-        self.send_command(0x61)  # Resolution setting
-        self.send_data(0x03)#800*480
-        self.send_data(0x20)
-        self.send_data(0x01)
-        self.send_data(0xE0) 
+        self.send_command_with_data(0x61, [  # Resolution setting
+            0x03,  #800*480
+            0x20,
+            0x01,
+            0xE0])
 
-        self.send_command(0x65)  # Resolution setting
-        self.send_data(0x00)
-        self.send_data(0x00)
-        self.send_data(0x00)
-        self.send_data(0x00)
+        self.send_command_with_data(0x65, [0x00, 0x00, 0x00, 0x00])  # Resolution setting
 
         self.send_command(0x04) #POWER ON
         epdconfig.delay_ms(100)
@@ -466,9 +438,9 @@ class EPD:
 
     def Clear(self):
         self.send_command(0x10)
-        self.send_data2([0xFF] * int(self.width * self.height / 8))
+        self.send_data2(b'\xff' * int(self.width * self.height / 8))
         self.send_command(0x13)
-        self.send_data2([0x00] * int(self.width * self.height / 8))
+        self.send_data2(b'\x00' * int(self.width * self.height / 8))
         self.send_command(0x12)
         epdconfig.delay_ms(100)
         self.ReadBusy()
@@ -487,9 +459,7 @@ class EPD:
         Width = (Xend - Xstart) // 8
         Height = Yend - Ystart
 	
-        self.send_command(0x50)
-        self.send_data(0xA9)
-        self.send_data(0x07)
+        self.send_command_with_data(0x50, [0xA9, 0x07])
 
         self.send_command(0x91)		#This command makes the display enter partial mode
         self.send_command(0x90)		#resolution setting
@@ -522,8 +492,7 @@ class EPD:
         self.send_command(0x02) # POWER_OFF
         self.ReadBusy()
         
-        self.send_command(0x07) # DEEP_SLEEP
-        self.send_data(0XA5)
+        self.send_command_with_data(0x07, [0XA5])  # DEEP_SLEEP
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -66,12 +66,19 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte([data])
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        busy = epdconfig.digital_read(self.busy_pin)
-        while(busy == 1):
-            busy = epdconfig.digital_read(self.busy_pin)
+        epdconfig.wait_busy(1, 1)
         epdconfig.delay_ms(200)
             
     def init(self):
@@ -83,56 +90,38 @@ class EPD:
         self.send_command(0x12) 		  #SWRESET
         self.ReadBusy()        #waiting for the electronic paper IC to release the idle signal
 
-        self.send_command(0x46)  # Auto Write RAM
-        self.send_data(0xF7)
+        self.send_command_with_data(0x46, [0xF7])  # Auto Write RAM
         self.ReadBusy()        #waiting for the electronic paper IC to release the idle signal
 
-        self.send_command(0x47)  # Auto Write RAM
-        self.send_data(0xF7)
+        self.send_command_with_data(0x47, [0xF7])  # Auto Write RAM
         self.ReadBusy()        #waiting for the electronic paper IC to release the idle signal
 
-        self.send_command(0x0C)  # Soft start setting
-        self.send_data(0xAE)
-        self.send_data(0xC7)
-        self.send_data(0xC3)
-        self.send_data(0xC0)
-        self.send_data(0x40)   
-
-        self.send_command(0x01)  # Set MUX as 527
-        self.send_data(0xAF)
-        self.send_data(0x02)
-        self.send_data(0x01)
-
-        self.send_command(0x11)  # Data entry mode
-        self.send_data(0x01)
-
-        self.send_command(0x44)
-        self.send_data(0x00) # RAM x address start at 0
-        self.send_data(0x00)
-        self.send_data(0x6F) # RAM x address end at 36Fh -> 879
-        self.send_data(0x03)
-        self.send_command(0x45)
-        self.send_data(0xAF) # RAM y address start at 20Fh
-        self.send_data(0x02)
-        self.send_data(0x00) # RAM y address end at 00h
-        self.send_data(0x00)
-
-        self.send_command(0x3C) # VBD
-        self.send_data(0x01) # LUT1, for white
-
-        self.send_command(0x18)
-        self.send_data(0X80)
-        self.send_command(0x22)
-        self.send_data(0XB1)	#Load Temperature and waveform setting.
+        self.send_command_with_data(0x0C, [0xAE, 0xC7, 0xC3, 0xC0, 0x40])  # Soft start setting
+
+        self.send_command_with_data(0x01, [0xAF, 0x02, 0x01])  # Set MUX as 527
+
+        self.send_command_with_data(0x11, [0x01])  # Data entry mode
+
+        self.send_command_with_data(0x44, [
+            0x00,  # RAM x address start at 0
+            0x00,
+            0x6F,  # RAM x address end at 36Fh -> 879
+            0x03])
+        self.send_command_with_data(0x45, [
+            0xAF,  # RAM y address start at 20Fh
+            0x02,
+            0x00,  # RAM y address end at 00h
+            0x00])
+
+        self.send_command_with_data(0x3C, [0x01])  # VBD, LUT1, for white
+
+        self.send_command_with_data(0x18, [0X80])
+        self.send_command_with_data(0x22, [0XB1])  #Load Temperature and waveform setting.
         self.send_command(0x20)
         self.ReadBusy()        #waiting for the electronic paper IC to release the idle signal
 
-        self.send_command(0x4E) 
-        self.send_data(0x00)
-        self.send_data(0x00)
-        self.send_command(0x4F) 
-        self.send_data(0xAF)
-        self.send_data(0x02)
+        self.send_command_with_data(0x4E, [0x00, 0x00])
+        self.send_command_with_data(0x4F, [0xAF, 0x02])
         
         return 0
 
@@ -161,27 +150,22 @@ class EPD:
         return buf
 
     def display(self, imageblack, imagered):
-        self.send_command(0x4F) 
-        self.send_data(0xAf)
+        self.send_command_with_data(0x4F, [0xAf])
         
-        self.send_command(0x24)
-        for i in range(0, int(self.width * self.height / 8)):
-            self.send_data(imageblack[i])
+        self.send_command_with_data(0x24, imageblack[:int(self.width * self.height / 8)])
         
         
         self.send_command(0x26)
         for i in range(0, int(self.width * self.height / 8)):
             self.send_data(~imagered[i])
         
-        self.send_command(0x22)
-        self.send_data(0xC7)    #Load LUT from MCU(0x32)
+        self.send_command_with_data(0x22, [0xC7])  #Load LUT from MCU(0x32)
         self.send_command(0x20)
         epdconfig.delay_ms(200)      #!!!The delay here is necessary, 200uS at least!!!     
         self.ReadBusy()
         
     def Clear(self):
-        self.send_command(0x4F) 
-        self.send_data(0xAf)
+        self.send_command_with_data(0x4F, [0xAf])
         
         self.send_command(0x24)
         for i in range(0, int(self.width * self.height / 8)):
@@ -192,15 +176,13 @@ class EPD:
         for i in range(0, int(self.width * self.height / 8)):
             self.send_data(0x00)
         
-        self.send_command(0x22)
-        self.send_data(0xC7)    #Load LUT from MCU(0x32)
+        self.send_command_with_data(0x22, [0xC7])  #Load LUT from MCU(0x32)
         self.send_command(0x20)
         epdconfig.delay_ms(200)      #!!!The delay here is necessary, 200uS at least!!!     
         self.ReadBusy()
 
     def sleep(self):
-        self.send_command(0x10)  	#deep sleep
-        self.send_data(0x01)
+        self.send_command_with_data(0x10, [0x01])  #deep sleep
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -30,6 +30,7 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
 
 # Display resolution
 EPD_WIDTH       = 800
@@ -74,6 +75,15 @@ class EPD:
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
 
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
         self.send_command(0x71)
@@ -91,40 +101,23 @@ class EPD:
         # EPD hardware init start
         self.reset()
 
-        self.send_command(0x01)
-        self.send_data(0x07)
-        self.send_data(0x07)
-        self.send_data(0x3f)
-        self.send_data(0x3f)
+        self.send_command_with_data(0x01, [0x07, 0x07, 0x3f, 0x3f])
 
-        self.send_command(0x06)
-        self.send_data(0x17)
-        self.send_data(0x17) 
-        self.send_data(0x28)	
-        self.send_data(0x17)
+        self.send_command_with_data(0x06, [0x17, 0x17, 0x28, 0x17])
 
         self.send_command(0x04)
         epdconfig.delay_ms(100)
         self.ReadBusy()
 
-        self.send_command(0X00)
-        self.send_data(0x0F)
+        self.send_command_with_data(0X00, [0x0F])
 
-        self.send_command(0x61)		
-        self.send_data(0x03)
-        self.send_data(0x20)
-        self.send_data(0x01)
-        self.send_data(0xE0)
+        self.send_command_with_data(0x61, [0x03, 0x20, 0x01, 0xE0])
 
-        self.send_command(0X15)
-        self.send_data(0x00)
+        self.send_command_with_data(0X15, [0x00])
 
-        self.send_command(0X50)
-        self.send_data(0x11)
-        self.send_data(0x07)
+        self.send_command_with_data(0X50, [0x11, 0x07])
 
-        self.send_command(0X60)
-        self.send_data(0x22)
+        self.send_command_with_data(0X60, [0x22])
             
         return 0
     
@@ -135,27 +128,18 @@ class EPD:
         # EPD hardware init start
         self.reset()
 
-        self.send_command(0X00)
-        self.send_data(0x0F)
+        self.send_command_with_data(0X00, [0x0F])
 
         self.send_command(0x04)
         epdconfig.delay_ms(100)
         self.ReadBusy()
 
-        self.send_command(0x06)
-        self.send_data(0x27)
-        self.send_data(0x27) 
-        self.send_data(0x18)		
-        self.send_data(0x17)		
+        self.send_command_with_data(0x06, [0x27, 0x27, 0x18, 0x17])
 
-        self.send_command(0xE0)
-        self.send_data(0x02)
-        self.send_command(0xE5)
-        self.send_data(0x5A)
+        self.send_command_with_data(0xE0, [0x02])
+        self.send_command_with_data(0xE5, [0x5A])
 
-        self.send_command(0X50)
-        self.send_data(0x11)
-        self.send_data(0x07)
+        self.send_command_with_data(0X50, [0x11, 0x07])
         
         return 0
     
@@ -165,21 +149,16 @@ class EPD:
         # EPD hardware init start
         self.reset()
 
-        self.send_command(0X00)
-        self.send_data(0x1F)
+        self.send_command_with_data(0X00, [0x1F])
 
         self.send_command(0x04)
         epdconfig.delay_ms(100)
         self.ReadBusy()
 
-        self.send_command(0xE0)
-        self.send_data(0x02)
-        self.send_command(0xE5)
-        self.send_data(0x6E)
+        self.send_command_with_data(0xE0, [0x02])
+        self.send_command_with_data(0xE5, [0x6E])
 
-        self.send_command(0X50)
-        self.send_data(0xA9)
-        self.send_data(0x07)
+        self.send_command_with_data(0X50, [0xA9, 0x07])
 
         # EPD hardware init end
         return 0
@@ -197,12 +176,15 @@ class EPD:
             # return a blank buffer
             return [0x00] * (int(self.width/8) * self.height)
 
-        buf = bytearray(img.tobytes('raw'))
         # The bytes need to be inverted, because in the PIL world 0=black and 1=white, but
         # in the e-paper world 0=white and 1=black.
-        for i in range(len(buf)):
-            buf[i] ^= 0xFF
-        return buf
+        return epdbuffer.invert(img.tobytes('raw'))
+
+    def getbuffer_color(self, image, color=(255, 0, 0), tolerance=96):
+        # Split a color image into the black and red/yellow buffers in one pass,
+        # same as getbuffer() on separate black and red/yellow images
+        imageblack, imagered = epdbuffer.pack_tricolor(image, self.width, self.height, color, tolerance)
+        return epdbuffer.invert(imageblack), epdbuffer.invert(imagered)
 
     def display(self, imageblack, imagered):
         self.send_command(0x10)
@@ -302,8 +284,7 @@ class EPD:
         self.send_command(0x02) # POWER_OFF
         self.ReadBusy()
         
-        self.send_command(0x07) # DEEP_SLEEP
-        self.send_data(0XA5)
+        self.send_command_with_data(0x07, [0XA5])  # DEEP_SLEEP
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -73,6 +73,15 @@ class EPD:
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
 
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
         self.send_command(0x71)
@@ -95,40 +104,31 @@ class EPD:
         # self.send_data(0x38)      # If an exception is displayed, try using 0x38
         # self.send_data(0x17)
 
-        self.send_command(0x01)     # POWER SETTING
-        self.send_data(0x07)
-        self.send_data(0x07)        # VGH=20V,VGL=-20V
-        self.send_data(0x3f)        # VDH=15V
-        self.send_data(0x3f)        # VDL=-15V
+        self.send_command_with_data(0x01, [  # POWER SETTING
+            0x07,
+            0x07,  # VGH=20V,VGL=-20V
+            0x3f,  # VDH=15V
+            0x3f])  # VDL=-15V
 
         self.send_command(0x04)     # POWER ON
         epdconfig.delay_ms(100)
         self.ReadBusy()
 
-        self.send_command(0X00)     # PANNEL SETTING
-        self.send_data(0x0F)        # KW-3f KWR-2F BWROTP-0f BWOTP-1f
+        self.send_command_with_data(0X00, [0x0F])  # PANNEL SETTING, KW-3f KWR-2F BWROTP-0f BWOTP-1f
 
-        self.send_command(0x61)     # tres
-        self.send_data(0x03)        # source 800
-        self.send_data(0x20)
-        self.send_data(0x01)        # gate 480
-        self.send_data(0xE0)
+        self.send_command_with_data(0x61, [  # tres
+            0x03,  # source 800
+            0x20,
+            0x01,  # gate 480
+            0xE0])
 
-        self.send_command(0X15)
-        self.send_data(0x00)
+        self.send_command_with_data(0X15, [0x00])
 
-        self.send_command(0X50)     # VCOM AND DATA INTERVAL SETTING
-        self.send_data(0x11)
-        self.send_data(0x07)
+        self.send_command_with_data(0X50, [0x11, 0x07])  # VCOM AND DATA INTERVAL SETTING
 
-        self.send_command(0X60)     # TCON SETTING
-        self.send_data(0x22)
+        self.send_command_with_data(0X60, [0x22])  # TCON SETTING
 
-        self.send_command(0x65)
-        self.send_data(0x00)
-        self.send_data(0x00)
-        self.send_data(0x00)
-        self.send_data(0x00)
+        self.send_command_with_data(0x65, [0x00, 0x00, 0x00, 0x00])
     
         return 0
 
@@ -183,8 +183,7 @@ class EPD:
         self.send_command(0x02) # POWER_OFF
         self.ReadBusy()
         
-        self.send_command(0x07) # DEEP_SLEEP
-        self.send_data(0XA5)
+        self.send_command_with_data(0x07, [0XA5])  # DEEP_SLEEP
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
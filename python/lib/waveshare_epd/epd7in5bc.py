@@ -66,11 +66,19 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte([data])
         epdconfig.digital_write(self.cs_pin, 1)
-        
+
+    # send a command and its data in one go: a single DC switch and one SPI write for the payload
+    def send_command_with_data(self, command, data):
+        epdconfig.digital_write(self.dc_pin, 0)
+        epdconfig.digital_write(self.cs_pin, 0)
+        epdconfig.spi_writebyte([command])
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
+
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      # 0: idle, 1: busy
-            epdconfig.delay_ms(100)
+        epdconfig.wait_busy(0, 100)  # 0: idle, 1: busy
         logger.debug("e-Paper busy release")
             
     def init(self):
@@ -79,42 +87,29 @@ class EPD:
             
         self.reset()
 
-        self.send_command(0x01) # POWER_SETTING
-        self.send_data(0x37)
-        self.send_data(0x00)
+        self.send_command_with_data(0x01, [0x37, 0x00])  # POWER_SETTING
         
-        self.send_command(0x00) # PANEL_SETTING
-        self.send_data(0xCF)
-        self.send_data(0x08)
+        self.send_command_with_data(0x00, [0xCF, 0x08])  # PANEL_SETTING
         
-        self.send_command(0x30) # PLL_CONTROL
-        self.send_data(0x3A) # PLL:  0-15:0x3C, 15+:0x3A
+        self.send_command_with_data(0x30, [0x3A])  # PLL_CONTROL, PLL:  0-15:0x3C, 15+:0x3A
         
-        self.send_command(0x82) # VCM_DC_SETTING
-        self.send_data(0x28) #all temperature  range
+        self.send_command_with_data(0x82, [0x28])  # VCM_DC_SETTING, all temperature  range
 
-        self.send_command(0x06) # BOOSTER_SOFT_START
-        self.send_data(0xc7)
-        self.send_data(0xcc)
-        self.send_data(0x15)
+        self.send_command_with_data(0x06, [0xc7, 0xcc, 0x15])  # BOOSTER_SOFT_START
 
-        self.send_command(0x50) # VCOM AND DATA INTERVAL SETTING
-        self.send_data(0x77)
+        self.send_command_with_data(0x50, [0x77])  # VCOM AND DATA INTERVAL SETTING
 
-        self.send_command(0x60) # TCON_SETTING
-        self.send_data(0x22)
+        self.send_command_with_data(0x60, [0x22])  # TCON_SETTING
 
-        self.send_command(0x65) # FLASH CONTROL
-        self.send_data(0x00)
+        self.send_command_with_data(0x65, [0x00])  # FLASH CONTROL
 
-        self.send_command(0x61) # TCON_RESOLUTION
-        self.send_data(self.width >> 8) # source 640
-        self.send_data(self.width & 0xff)
-        self.send_data(self.height >> 8) # gate 384
-        self.send_data(self.height & 0xff)
+        self.send_command_with_data(0x61, [  # TCON_RESOLUTION
+            self.width >> 8,  # source 640
+            self.width & 0xff,
+            self.height >> 8,  # gate 384
+            self.height & 0xff])
 
-        self.send_command(0xe5) # FLASH MODE
-        self.send_data(0x03)
+        self.send_command_with_data(0xe5, [0x03])  # FLASH MODE
         
         return 0
 
@@ -195,8 +190,7 @@ class EPD:
         self.send_command(0x02) # POWER_OFF
         self.ReadBusy()
         
-        self.send_command(0x07) # DEEP_SLEEP
-        self.send_data(0XA5)
+        self.send_command_with_data(0x07, [0XA5])  # DEEP_SLEEP
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
@@ -0,0 +1,119 @@
+# *****************************************************************************
+# * | File        :   epdasync.py
+# * | Function    :   Non-blocking display calls on a worker thread
+# * | Info        :
+# *----------------
+# * | This version:   V1.0
+# * | Date        :   2024-06-01
+# # | Info        :   Wraps an EPD or a RefreshScheduler
+# -----------------------------------------------------------------------------
+
+import logging
+import threading
+import collections
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# requests for the next frame: a newer one replaces one that hasn't started
+FRAME = 'frame'
+
+
+class AsyncDisplay(object):
+    """
+    Runs display calls on a worker thread so the caller isn't blocked for the SPI transfer
+    and the busy wait of the refresh. Calls run one at a time in the order they were made
+    and each returns a concurrent.futures.Future. Frames still queued when a newer one comes
+    in are cancelled instead of drawn.
+    """
+
+    def __init__(self, target):
+        """
+        :param target: Object the calls go to, e.g. a RefreshScheduler (show, display, clear) or an EPD.
+        """
+        self.target = target
+        self.condition = threading.Condition()
+        # (future, function, args, coalesce key or None)
+        self.requests = collections.deque()
+        self.thread = None
+        self.closed = False
+
+    def submit(self, function, *args, key=None):
+        """
+        Queue a call to run on the worker.
+        :param function: Called with args on the worker thread.
+        :param key: Requests with the same key coalesce: queuing one cancels the unstarted one before it.
+        :return: Future of the call's result.
+        """
+        future = Future()
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("display is shut down")
+            if key is not None:
+                for request in list(self.requests):
+                    if request[3] == key:
+                        self.requests.remove(request)
+                        request[0].cancel()
+                        logger.debug("superseded a queued %s" % key)
+            self.requests.append((future, function, args, key))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='display', daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        return future
+
+    def display(self, buf):
+        """
+        Display a frame buffer, see target.display. The buffer must stay unchanged until the future is done.
+        :return: Future of the result.
+        """
+        return self.submit(self.target.display, buf, key=FRAME)
+
+    def show(self, image):
+        """
+        Display a PIL image, see target.show.
+        :return: Future of the result.
+        """
+        return self.submit(self.target.show, image, key=FRAME)
+
+    def clear(self):
+        """
+        Clear the panel, see target.Clear or target.clear. Never coalesced.
+        :return: Future of the result.
+        """
+        return self.submit(getattr(self.target, 'clear', None) or self.target.Clear)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.requests and not self.closed:
+                    self.condition.wait()
+                if not self.requests:
+                    return
+                future, function, args, key = self.requests.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = function(*args)
+            except BaseException as e:
+                logger.exception("display call failed")
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait=True, cancel=True):
+        """
+        Stop taking calls and stop the worker once the queue is done.
+        :param wait: Block until the running call (and the queued ones, if not cancelled) finished.
+        :param cancel: Cancel the calls that haven't started.
+        :return:
+        """
+        with self.condition:
+            self.closed = True
+            if cancel:
+                while self.requests:
+                    self.requests.popleft()[0].cancel()
+            self.condition.notify_all()
+            thread = self.thread
+        if wait and thread is not None:
+            thread.join()
@@ -0,0 +1,246 @@
+# *****************************************************************************
+# * | File        :   epdbuffer.py
+# * | Function    :   Frame buffer packing shared by the panel drivers
+# * | Info        :
+# *----------------
+# * | This version:   V1.0
+# * | Date        :   2024-06-01
+# # | Info        :   Packs PIL images into panel RAM layouts in C, not Python
+# -----------------------------------------------------------------------------
+
+import logging
+
+from PIL import Image, ImageChops
+
+logger = logging.getLogger(__name__)
+
+
+def orient(image, width, height):
+    """
+    Return the image in panel orientation (width x height), rotating portrait input by 90 degrees.
+    :param image: PIL image, either width x height or height x width.
+    :param width: Panel width in pixels.
+    :param height: Panel height in pixels.
+    :return: The oriented image, or None if the size matches neither orientation.
+    """
+    imwidth, imheight = image.size
+    if imwidth == width and imheight == height:
+        return image
+    if imwidth == height and imheight == width:
+        # rotate(90) maps (x, y) to (y, width - 1 - x), the same remap the drivers did per pixel
+        return image.rotate(90, expand=True)
+    logger.warning("Invalid image dimensions: %d x %d, expected %d x %d" % (imwidth, imheight, width, height))
+    return None
+
+
+def pack_mono(image, width, height):
+    """
+    Pack an image into a 1 bit per pixel frame buffer, MSB first, 1 = white, rows padded to a byte.
+    :param image: PIL image in any mode, landscape or portrait.
+    :param width: Panel width in pixels.
+    :param height: Panel height in pixels.
+    :return: bytearray of ceil(width / 8) * height bytes; all white if the size does not match.
+    """
+    linewidth = (width + 7) // 8
+    image_monocolor = orient(image.convert('1'), width, height)
+    if image_monocolor is None:
+        return bytearray(b'\xff') * (linewidth * height)
+    # mode '1' raw data is already the panel layout: set bit = white pixel
+    return bytearray(image_monocolor.tobytes('raw', '1'))
+
+
+# 'L' value -> 2 bit gray level (0 black, 1 = 0x40, 2 = 0x80, 3 white).
+# GRAY2 (0xC0) and GRAY3 (0x80) are shifted down one level, as getbuffer_4Gray always did.
+GRAY4_LEVELS = [2 if v == 0xC0 else 1 if v == 0x80 else v >> 6 for v in range(256)]
+
+
+def gray4_levels(image, width, height, transpose=False):
+    """
+    Map an image to 2 bit gray levels in panel orientation.
+    :param image: PIL image in any mode, landscape or portrait.
+    :param width: Panel width in pixels.
+    :param height: Panel height in pixels.
+    :param transpose: Transpose portrait input instead of rotating it (epd4in2 layout).
+    :return: 'P' image of levels 0..3, or None if the size does not match.
+    """
+    levels = image.convert('L').point(GRAY4_LEVELS)
+    if transpose and levels.size == (height, width):
+        levels = levels.transpose(Image.TRANSPOSE)
+    else:
+        levels = orient(levels, width, height)
+        if levels is None:
+            return None
+    return Image.frombytes('P', levels.size, levels.tobytes())
+
+
+def pack_4gray(image, width, height, transpose=False):
+    """
+    Pack an image into the 2 bit per pixel buffer returned by getbuffer_4Gray, MSB first.
+    :param image: PIL image in any mode, landscape or portrait.
+    :param width: Panel width in pixels.
+    :param height: Panel height in pixels.
+    :param transpose: Transpose portrait input instead of rotating it (epd4in2 layout).
+    :return: bytearray of width / 4 * height bytes; all white if the size does not match.
+    """
+    levels = gray4_levels(image, width, height, transpose)
+    if levels is None:
+        return bytearray(b'\xff') * ((width + 3) // 4 * height)
+    return bytearray(levels.tobytes('raw', 'P;2'))
+
+
+def unpack_4gray(buf, width, height):
+    """
+    Unpack a getbuffer_4Gray buffer back into a 'P' image of 2 bit levels.
+    :param buf: Buffer from pack_4gray (list, bytes or bytearray).
+    :param width: Panel width in pixels.
+    :param height: Panel height in pixels.
+    :return: 'P' image of levels 0..3.
+    """
+    return Image.frombytes('P', (width, height), bytes(buf), 'raw', 'P;2')
+
+
+def gray4_plane(levels, plane):
+    """
+    Extract one 1 bit RAM plane from an image of 2 bit levels.
+    :param levels: 'P' image from gray4_levels or unpack_4gray.
+    :param plane: Bit written for levels (black, 0x40, 0x80, white), e.g. (0, 1, 0, 1).
+    :return: bytearray of ceil(width / 8) * height bytes, MSB first.
+    """
+    lut = [255 if bit else 0 for bit in plane] + [0] * 252
+    return bytearray(levels.point(lut, '1').tobytes('raw', '1'))
+
+
+def pack_indexed(image, width, height, palette, bits):
+    """
+    Quantize an image to the panel palette, dithering if needed, and pack the palette indices MSB first.
+    :param image: PIL image in any mode, landscape or portrait.
+    :param width: Panel width in pixels.
+    :param height: Panel height in pixels.
+    :param palette: Flat (r, g, b, ...) tuple of the panel colors in index order.
+    :param bits: Bits per pixel, 4 for 7 color panels and 2 for 4 color panels.
+    :return: bytearray of ceil(width * bits / 8) * height bytes, rows padded with zero bits;
+             all white (index 1) if the size does not match.
+    """
+    pal_image = Image.new('P', (1, 1))
+    pal_image.putpalette(tuple(palette) + (0, 0, 0) * (256 - len(palette) // 3))
+    image_temp = orient(image, width, height)
+    if image_temp is None:
+        image_indexed = Image.new('P', (width, height), 1)
+    else:
+        image_indexed = image_temp.convert('RGB').quantize(palette=pal_image)
+    return bytearray(image_indexed.tobytes('raw', 'P;%d' % bits))
+
+
+def pack_indexed_exact(image, width, height, palette, bits):
+    """
+    Pack the palette index of each pixel without dithering; pixels not exactly in the palette get index 0.
+    Each channel may use at most three distinct values across the palette (e.g. 0, 128 and 255).
+    :param image: PIL image in any mode, landscape or portrait.
+    :param width: Panel width in pixels.
+    :param height: Panel height in pixels.
+    :param palette: Flat (r, g, b, ...) tuple of the panel colors in index order.
+    :param bits: Bits per pixel.
+    :return: bytearray of ceil(width * bits / 8) * height bytes; all index 0 if the size does not match.
+    """
+    image_temp = orient(image.convert('RGB'), width, height)
+    if image_temp is None:
+        return bytearray((width * bits + 7) // 8 * height)
+    colors = [tuple(palette[i:i + 3]) for i in range(0, len(palette), 3)]
+    levels = [sorted(set(color[channel] for color in colors)) for channel in range(3)]
+    if max(len(values) for values in levels) > 3:
+        raise ValueError("Palette uses more than three levels in one channel")
+
+    def code(color):
+        # 2 bits per channel: 1..3 = palette level, 0 = any other value
+        return sum((levels[channel].index(color[channel]) + 1) << (4 - 2 * channel) for channel in range(3))
+
+    bands = []
+    for channel, band in enumerate(image_temp.split()):
+        lut = [0] * 256
+        for n, v in enumerate(levels[channel]):
+            lut[v] = (n + 1) << (4 - 2 * channel)
+        bands.append(band.point(lut))
+    codes = ImageChops.add(ImageChops.add(bands[0], bands[1]), bands[2])
+    lut = [0] * 256
+    for index, color in reversed(list(enumerate(colors))):
+        lut[code(color)] = index
+    image_indexed = Image.frombytes('P', codes.size, codes.point(lut).tobytes())
+    return bytearray(image_indexed.tobytes('raw', 'P;%d' % bits))
+
+
+# Bytes translation table flipping every bit, for drivers whose RAM uses 1 = ink
+INVERT = bytes(range(255, -1, -1))
+
+
+def invert(buf):
+    """
+    Return a copy of a frame buffer with every bit flipped.
+    :param buf: Buffer (list, bytes or bytearray).
+    :return: bytearray of the same length.
+    """
+    return bytearray(bytes(buf).translate(INVERT))
+
+
+def pack_tricolor(image, width, height, color=(255, 0, 0), tolerance=96, dither_first=False):
+    """
+    Split a color image into the black and red/yellow planes of a tri-color panel in one pass.
+    A pixel is ink colored if every channel is within tolerance of color; everything else goes
+    to the black plane, dithered like pack_mono.
+    :param image: PIL image in any mode, landscape or portrait.
+    :param width: Panel width in pixels.
+    :param height: Panel height in pixels.
+    :param color: (r, g, b) of the panel's third color, e.g. (255, 255, 0) for yellow panels.
+    :param tolerance: Maximum per channel distance from color, 0..255.
+    :param dither_first: Dither portrait input before rotating it, as pack_mono does; drivers whose
+                         getbuffer rotates first leave it False.
+    :return: (black, color) bytearrays in the pack_mono layout (set bit = no ink); all white
+             if the size does not match.
+    """
+    linewidth = (width + 7) // 8
+    # check the size only: the planes are rotated once each below
+    if image.size not in ((width, height), (height, width)):
+        logger.warning("Invalid image dimensions: %d x %d, expected %d x %d" % (image.size + (width, height)))
+        blank = bytearray(b'\xff') * (linewidth * height)
+        return blank, bytearray(blank)
+    image_rgb = image.convert('RGB')
+    mask = None
+    for band, value in zip(image_rgb.split(), color):
+        band = band.point([255 if abs(v - value) <= tolerance else 0 for v in range(256)])
+        mask = band if mask is None else ImageChops.darker(mask, band)
+    # colored pixels are white in the black plane
+    image_black = ImageChops.lighter(image_rgb.convert('L'), mask)
+    if dither_first:
+        image_black = orient(image_black.convert('1'), width, height)
+    else:
+        image_black = orient(image_black, width, height).convert('1')
+    image_color = orient(mask, width, height).point([255] + [0] * 255, '1')
+    return bytearray(image_black.tobytes('raw', '1')), bytearray(image_color.tobytes('raw', '1'))
+
+
+def dirty_rect(old, new, width, height):
+    """
+    Bounding box of the bytes that differ between two pack_mono frame buffers.
+    :param old: Previous frame buffer.
+    :param new: Next frame buffer, same layout.
+    :param width: Panel width in pixels.
+    :param height: Panel height in pixels.
+    :return: (x0, y0, x1, y1) in pixels, end exclusive, x rounded out to whole bytes; None if equal.
+    """
+    linewidth = (width + 7) // 8
+    old, new = bytes(old), bytes(new)
+    if old == new:
+        return None
+    # XOR as big integers keeps the compare in C, zero bytes are unchanged pixels
+    diff = (int.from_bytes(old, 'big') ^ int.from_bytes(new, 'big')).to_bytes(len(new), 'big')
+    x0, x1, y0, y1 = linewidth, 0, None, 0
+    for y in range(height):
+        row = diff[y * linewidth:(y + 1) * linewidth]
+        tail = row.lstrip(b'\x00')
+        if not tail:
+            continue
+        if y0 is None:
+            y0 = y
+        y1 = y + 1
+        x0 = min(x0, linewidth - len(tail))
+        x1 = max(x1, len(row.rstrip(b'\x00')))
+    return (x0 * 8, y0, min(x1 * 8, width), y1)
@@ -31,14 +31,102 @@ import os
 import logging
 import sys
 import time
-import subprocess
+import struct
+import threading
+import collections
 
 from ctypes import *
 
 logger = logging.getLogger(__name__)
 
-
-class RaspberryPi:
+# Longest a busy phase may take before wait_busy gives up, in seconds
+BUSY_TIMEOUT = 60
+# Number of busy phase durations kept for busy_times()
+BUSY_LOG_SIZE = 32
+
+
+def spidev_bufsiz(default=4096):
+    # largest single spidev transfer, set by the spidev.bufsiz kernel module parameter
+    try:
+        with open('/sys/module/spidev/parameters/bufsiz') as f:
+            return int(f.read())
+    except (IOError, ValueError):
+        return default
+
+
+class Backend(object):
+    # shared by the platform classes: bulk transfer accounting and busy pin waiting
+    SPI_BUFSIZ = spidev_bufsiz()
+    _spi_bytes = 0
+    _spi_seconds = 0.0
+    _busy_log = None
+
+    def _spi_record(self, size, elapsed):
+        self._spi_bytes += size
+        self._spi_seconds += elapsed
+        if elapsed > 0 and size > self.SPI_BUFSIZ:
+            logger.debug("SPI: %d bytes in %.1f ms (%.0f bytes/s)" % (size, elapsed * 1000, size / elapsed))
+
+    def spi_throughput(self):
+        # average bytes/s of all bulk transfers so far, 0 before the first one
+        if self._spi_seconds == 0:
+            return 0
+        return self._spi_bytes / self._spi_seconds
+
+    def wait_busy(self, busy_value, poll_ms=10, timeout=BUSY_TIMEOUT):
+        # block while the busy pin reads busy_value, sleeping on the pin edge where the
+        # platform supports it and polling every poll_ms otherwise; False on timeout
+        start = time.monotonic()
+        released = self._wait_busy_edge(busy_value, timeout)
+        if released is None:
+            released = self._wait_busy_poll(busy_value, poll_ms, timeout)
+        elapsed = time.monotonic() - start
+        if self._busy_log is None:
+            self._busy_log = collections.deque(maxlen=BUSY_LOG_SIZE)
+        self._busy_log.append(elapsed)
+        if released:
+            logger.debug("e-Paper busy for %.0f ms" % (elapsed * 1000))
+        else:
+            logger.warning("e-Paper still busy after %.1f s, giving up" % elapsed)
+        return released
+
+    def busy_times(self):
+        # durations in seconds of the most recent busy phases, oldest first
+        return list(self._busy_log or [])
+
+    def _wait_busy_edge(self, busy_value, timeout):
+        # None: no edge support, fall back to polling
+        return None
+
+    def _wait_busy_poll(self, busy_value, poll_ms, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.digital_read(self.BUSY_PIN) == busy_value:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self.delay_ms(poll_ms)
+        return True
+
+    def _wait_busy_gpio(self, busy_value, timeout):
+        # RPi.GPIO style wait_for_edge; re-check the level after each slice so an edge
+        # landing between the read and the wait can't block until the timeout
+        edge = self.GPIO.FALLING if busy_value else self.GPIO.RISING
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while self.digital_read(self.BUSY_PIN) == busy_value:
+                wait_ms = 1000
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait_ms = max(1, min(wait_ms, int(remaining * 1000)))
+                self.GPIO.wait_for_edge(self.BUSY_PIN, edge, timeout=wait_ms)
+        except (AttributeError, RuntimeError, ValueError) as e:
+            logger.debug("Busy pin edge wait unavailable (%s), polling" % e)
+            return None
+        return True
+
+
+class RaspberryPi(Backend):
     # Pin definition
     RST_PIN  = 17
     DC_PIN   = 25
@@ -48,6 +136,8 @@ class RaspberryPi:
     MOSI_PIN = 10
     SCLK_PIN = 11
 
+    _dev_config_lib = None
+
     def __init__(self):
         import spidev
         import gpiozero
@@ -98,11 +188,29 @@ class RaspberryPi:
     def delay_ms(self, delaytime):
         time.sleep(delaytime / 1000.0)
 
+    def _wait_busy_edge(self, busy_value, timeout):
+        # gpiozero keeps the Button's events up to date from edge callbacks, so these
+        # sleep until the pin changes instead of polling it
+        if busy_value:
+            return self.GPIO_BUSY_PIN.wait_for_release(timeout)
+        return self.GPIO_BUSY_PIN.wait_for_press(timeout)
+
     def spi_writebyte(self, data):
         self.SPI.writebytes(data)
 
     def spi_writebyte2(self, data):
-        self.SPI.writebytes2(data)
+        start = time.monotonic()
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            # hand spidev slices of the caller's buffer, no per-element conversion or copy
+            data = memoryview(data).cast('B')
+            # spidev releases CE0 after each chunk: the panels latch data per byte while DC is high,
+            # the same CS toggling every driver's per-byte send_data does, and that path drives
+            # epd4in2_V2, epd2in13_V4, epd2in9_V2, epd7in5_V2 and epd13in3k among the others
+            for i in range(0, len(data), self.SPI_BUFSIZ):
+                self.SPI.writebytes2(data[i:i + self.SPI_BUFSIZ])
+        else:
+            self.SPI.writebytes2(data)
+        self._spi_record(len(data), time.monotonic() - start)
 
     def DEV_SPI_write(self, data):
         self.DEV_SPI.DEV_SPI_SendData(data)
@@ -113,29 +221,31 @@ class RaspberryPi:
     def DEV_SPI_read(self):
         return self.DEV_SPI.DEV_SPI_ReadData()
 
-    def module_init(self, cleanup=False):
-        self.GPIO_PWR_PIN.on()
-        
-        if cleanup:
+    def _dev_config(self):
+        # DEV_Config.so for this interpreter's word size, looked up and loaded once
+        if RaspberryPi._dev_config_lib is None:
+            bits = struct.calcsize('P') * 8
+            logging.debug("System is %d bit"%bits)
+            so_name = 'DEV_Config_64.so' if bits == 64 else 'DEV_Config_32.so'
             find_dirs = [
                 os.path.dirname(os.path.realpath(__file__)),
                 '/usr/local/lib',
                 '/usr/lib',
             ]
-            self.DEV_SPI = None
             for find_dir in find_dirs:
-                val = int(os.popen('getconf LONG_BIT').read())
-                logging.debug("System is %d bit"%val)
-                if val == 64:
-                    so_filename = os.path.join(find_dir, 'DEV_Config_64.so')
-                else:
-                    so_filename = os.path.join(find_dir, 'DEV_Config_32.so')
+                so_filename = os.path.join(find_dir, so_name)
                 if os.path.exists(so_filename):
-                    self.DEV_SPI = CDLL(so_filename)
+                    RaspberryPi._dev_config_lib = CDLL(so_filename)
                     break
-            if self.DEV_SPI is None:
-                RuntimeError('Cannot find DEV_Config.so')
+            else:
+                raise RuntimeError('Cannot find DEV_Config.so')
+        return RaspberryPi._dev_config_lib
 
+    def module_init(self, cleanup=False):
+        self.GPIO_PWR_PIN.on()
+        
+        if cleanup:
+            self.DEV_SPI = self._dev_config()
             self.DEV_SPI.DEV_Module_Init()
 
         else:
@@ -165,7 +275,7 @@ class RaspberryPi:
 
 
 
-class JetsonNano:
+class JetsonNano(Backend):
     # Pin definition
     RST_PIN  = 17
     DC_PIN   = 25
@@ -201,12 +311,17 @@ class JetsonNano:
     def delay_ms(self, delaytime):
         time.sleep(delaytime / 1000.0)
 
+    def _wait_busy_edge(self, busy_value, timeout):
+        return self._wait_busy_gpio(busy_value, timeout)
+
     def spi_writebyte(self, data):
         self.SPI.SYSFS_software_spi_transfer(data[0])
 
     def spi_writebyte2(self, data):
+        start = time.monotonic()
         for i in range(len(data)):
             self.SPI.SYSFS_software_spi_transfer(data[i])
+        self._spi_record(len(data), time.monotonic() - start)
 
     def module_init(self):
         self.GPIO.setmode(self.GPIO.BCM)
@@ -234,7 +349,7 @@ class JetsonNano:
         self.GPIO.cleanup([self.RST_PIN, self.DC_PIN, self.CS_PIN, self.BUSY_PIN, self.PWR_PIN])
 
 
-class SunriseX3:
+class SunriseX3(Backend):
     # Pin definition
     RST_PIN  = 17
     DC_PIN   = 25
@@ -259,13 +374,18 @@ class SunriseX3:
     def delay_ms(self, delaytime):
         time.sleep(delaytime / 1000.0)
 
+    def _wait_busy_edge(self, busy_value, timeout):
+        return self._wait_busy_gpio(busy_value, timeout)
+
     def spi_writebyte(self, data):
         self.SPI.writebytes(data)
 
     def spi_writebyte2(self, data):
         # for i in range(len(data)):
         #     self.SPI.writebytes([data[i]])
+        start = time.monotonic()
         self.SPI.xfer3(data)
+        self._spi_record(len(data), time.monotonic() - start)
 
     def module_init(self):
         if self.Flag == 0:
@@ -300,23 +420,338 @@ class SunriseX3:
 
         self.GPIO.cleanup([self.RST_PIN, self.DC_PIN, self.CS_PIN, self.BUSY_PIN], self.PWR_PIN)
 
+# Controller families the Simulated backend can stand in for:
+#   busy:  busy pin level while the controller works
+#   ram:   RAM write commands, the one the visible frame is rebuilt from first
+#   times: ms each command keeps the busy pin set; SSD16xx update sequences (0x20)
+#          are timed by the 0x22 option byte instead, see 'updates'
+#   ink:   RAM bit value that shows as black
+SIM_PANELS = {
+    'ssd': {'busy': 1, 'ram': (0x24, 0x26), 'ink': 0, 'times': {0x12: 10, 0x20: 2000},
+            'updates': {0x91: 100, 0xB1: 100, 0xC7: 1500, 0xCF: 2500, 0xF7: 3000, 0xFF: 450}},
+    'uc':   {'busy': 0, 'ram': (0x13, 0x10), 'ink': 1, 'times': {0x02: 50, 0x04: 100, 0x12: 4000}},
+    'acep': {'busy': 0, 'ram': (0x10,), 'ink': 0, 'times': {0x02: 50, 0x04: 100, 0x12: 15000}},
+}
+# 7 color panel indices: black, white, green, blue, red, yellow, orange
+SIM_ACEP_PALETTE = (0, 0, 0, 255, 255, 255, 0, 255, 0, 0, 0, 255, 255, 0, 0, 255, 255, 0, 255, 128, 0)
+# Number of commands kept for sim_stream()
+SIM_STREAM_SIZE = 4096
+
+
+class Simulated(Backend):
+    # Pin definition
+    RST_PIN  = 17
+    DC_PIN   = 25
+    CS_PIN   = 8
+    BUSY_PIN = 24
+    PWR_PIN  = 18
+    SPI_HZ   = 4000000
+
+    def __init__(self):
+        # EPD_SIM_PANEL: controller family from SIM_PANELS
+        # EPD_SIM_SPEED: real seconds slept per modelled second, 0 runs without waiting
+        # EPD_SIM_WIDTH / EPD_SIM_HEIGHT: panel size when the driver doesn't set a window
+        # EPD_SIM_DUMP: directory every refreshed frame is saved to as PNG
+        family = os.environ.get('EPD_SIM_PANEL', 'ssd')
+        if family not in SIM_PANELS:
+            raise ValueError('Unknown simulated panel %r, expected one of %s' % (family, ', '.join(sorted(SIM_PANELS))))
+        self._family = family
+        self._panel = SIM_PANELS[family]
+        self._speed = float(os.environ.get('EPD_SIM_SPEED', 1))
+        self._dump_dir = os.environ.get('EPD_SIM_DUMP')
+        self._width = int(os.environ.get('EPD_SIM_WIDTH', 0))
+        self._height = int(os.environ.get('EPD_SIM_HEIGHT', 0))
+        self._pins = {self.RST_PIN: 0, self.DC_PIN: 0, self.CS_PIN: 0, self.PWR_PIN: 0}
+        self._stream = collections.deque(maxlen=SIM_STREAM_SIZE)
+        self._ram = {}
+        self._visible = None
+        self._refreshes = 0
+        self._panel_seconds = 0.0
+        self._busy_until = 0
+        self._reset_controller()
+        logger.info("Simulated e-Paper backend, %s controller" % family)
+
+    def _reset_controller(self):
+        self._command = None
+        self._params = bytearray()
+        self._update = 0
+        self._window = None
+        self._cursor = (0, 0)
+
+    def _sleep(self, seconds):
+        self._panel_seconds += seconds
+        if self._speed > 0 and seconds > 0:
+            time.sleep(seconds * self._speed)
+
+    def digital_write(self, pin, value):
+        if pin == self.RST_PIN and value and not self._pins[pin]:
+            # rising edge on reset: the controller forgets its registers, RAM survives
+            self._end_command()
+            self._reset_controller()
+        self._pins[pin] = value
+
+    def digital_read(self, pin):
+        if pin == self.BUSY_PIN:
+            busy = time.monotonic() < self._busy_until
+            return self._panel['busy'] if busy else 1 - self._panel['busy']
+        return self._pins.get(pin, 0)
+
+    def delay_ms(self, delaytime):
+        self._sleep(delaytime / 1000.0)
+
+    def _wait_busy_edge(self, busy_value, timeout):
+        remaining = self._busy_until - time.monotonic()
+        if self.digital_read(self.BUSY_PIN) != busy_value or remaining <= 0:
+            return True
+        if timeout is not None and remaining > timeout:
+            time.sleep(timeout)
+            return False
+        time.sleep(remaining)
+        return True
+
+    def _bytes(self, data):
+        try:
+            return bytearray(data)
+        except ValueError:
+            # spidev keeps the low byte of out of range ints, e.g. ~0x0F from the drivers
+            return bytearray(b & 0xFF for b in data)
+
+    def spi_writebyte(self, data):
+        self._write(self._bytes(data))
+
+    def spi_writebyte2(self, data):
+        data = self._bytes(data)
+        elapsed = len(data) * 8.0 / self.SPI_HZ
+        self._write(data)
+        self._sleep(elapsed)
+        self._spi_record(len(data), elapsed)
 
-if sys.version_info[0] == 2:
-    process = subprocess.Popen("cat /proc/cpuinfo | grep Raspberry", shell=True, stdout=subprocess.PIPE)
-else:
-    process = subprocess.Popen("cat /proc/cpuinfo | grep Raspberry", shell=True, stdout=subprocess.PIPE, text=True)
-output, _ = process.communicate()
-if sys.version_info[0] == 2:
-    output = output.decode(sys.stdout.encoding)
+    def DEV_SPI_write(self, data):
+        self._write(self._bytes([data]))
+
+    def DEV_SPI_nwrite(self, data):
+        self._write(self._bytes(data))
 
-if "Raspberry" in output:
-    implementation = RaspberryPi()
-elif os.path.exists('/sys/bus/platform/drivers/gpio-x3'):
-    implementation = SunriseX3()
-else:
-    implementation = JetsonNano()
+    def DEV_SPI_read(self):
+        return 0 if self.digital_read(self.BUSY_PIN) == self._panel['busy'] else 1
+
+    def module_init(self, cleanup=False):
+        self._pins[self.PWR_PIN] = 1
+        return 0
 
-for func in [x for x in dir(implementation) if not x.startswith('_')]:
-    setattr(sys.modules[__name__], func, getattr(implementation, func))
+    def module_exit(self, cleanup=False):
+        self._end_command()
+        self._pins[self.RST_PIN] = 0
+        self._pins[self.DC_PIN] = 0
+        self._pins[self.PWR_PIN] = 0
+        logger.debug("simulated panel: %d refreshes, %.1f s of panel time" % (self._refreshes, self._panel_seconds))
+
+    def _write(self, data):
+        if not self._pins[self.DC_PIN]:
+            for command in data:
+                self._start_command(command)
+        elif self._command is not None:
+            self._stream[-1][1].extend(data)
+            if self._command in self._panel['ram']:
+                self._write_ram(self._command, data)
+            else:
+                self._params.extend(data)
+
+    def _start_command(self, command):
+        self._end_command()
+        self._command = command
+        self._stream.append((command, bytearray()))
+        duration = self._panel['times'].get(command)
+        if command == 0x20 and self._family == 'ssd':
+            duration = self._panel['updates'].get(self._update, duration)
+        if duration:
+            self._busy_until = time.monotonic() + duration / 1000.0 * self._speed
+            self._panel_seconds += duration / 1000.0
+        if (command == 0x20 and self._update & 0x04) or (command == 0x12 and self._family != 'ssd'):
+            self._show()
+
+    def _end_command(self):
+        # apply the parameters of the command that just finished
+        command, p = self._command, self._params
+        if command is None:
+            return
+        if self._family == 'ssd':
+            if command == 0x22 and p:
+                self._update = p[0]
+            elif command == 0x44 and len(p) >= 2:
+                x = (p[0], p[1]) if len(p) < 4 else ((p[0] | p[1] << 8) // 8, (p[2] | p[3] << 8) // 8)
+                self._window = (x, self._window[1] if self._window else (0, 0))
+            elif command == 0x45 and len(p) >= 2:
+                y = (p[0], p[1]) if len(p) < 4 else (p[0] | p[1] << 8, p[2] | p[3] << 8)
+                self._window = (self._window[0] if self._window else (0, 0), y)
+            elif command == 0x4E and p:
+                self._cursor = (p[0] if len(p) == 1 else (p[0] | p[1] << 8) // 8, self._cursor[1])
+            elif command == 0x4F and p:
+                self._cursor = (self._cursor[0], p[0] if len(p) == 1 else p[0] | p[1] << 8)
+        elif command == 0x61 and len(p) >= 4:
+            self._width, self._height = p[0] << 8 | p[1], p[2] << 8 | p[3]
+        self._command = None
+        self._params = bytearray()
+
+    def _plane(self, command):
+        if command not in self._ram:
+            if self._family == 'ssd' and self._window and not self._width:
+                (x0, x1), (y0, y1) = self._window
+                self._width, self._height = (x1 + 1) * 8, y1 + 1
+            # without a known size the plane just grows with the writes
+            bits = 4 if self._family == 'acep' else 1
+            self._ram[command] = bytearray((self._width * bits + 7) // 8 * self._height)
+        return self._ram[command]
+
+    def _write_ram(self, command, data):
+        ram = self._plane(command)
+        if self._family != 'ssd' or not self._window:
+            # UC81xx and 7 color controllers fill RAM front to back after the command
+            offset = len(self._stream[-1][1]) - len(data)
+            if self._width:
+                data = data[:max(0, len(ram) - offset)]
+            ram[offset:offset + len(data)] = data
+            return
+        # SSD16xx: X increments first inside the window, then Y (data entry mode 0x03)
+        (x0, x1), (y0, y1) = self._window
+        stride = (self._width + 7) // 8
+        x, y = self._cursor
+        i = 0
+        while i < len(data):
+            n = min(len(data) - i, x1 - x + 1)
+            offset = y * stride + x
+            if n <= 0 or offset + n > len(ram):
+                break
+            ram[offset:offset + n] = data[i:i + n]
+            i += n
+            x += n
+            if x > x1:
+                x, y = x0, y + 1 if y < y1 else y0
+        self._cursor = (x, y)
+
+    def _show(self):
+        ram = self._panel['ram']
+        planes = [bytes(self._ram[c]) if c in self._ram else None for c in ram]
+        if planes[0] is None:
+            return
+        gray = self._family == 'ssd' and self._update == 0xCF
+        self._visible = (self._width, self._height, planes if gray else planes[:1], gray)
+        self._refreshes += 1
+        if self._dump_dir:
+            frame = self.sim_frame()
+            if frame is not None:
+                frame.save(os.path.join(self._dump_dir, 'frame_%05d.png' % self._refreshes))
+
+    def sim_frame(self):
+        # the image on the glass after the last refresh as a PIL Image, None before the first one
+        if self._visible is None:
+            return None
+        from PIL import Image, ImageChops
+        width, height, planes, gray = self._visible
+        if not width or not height:
+            logger.warning("Simulated panel size unknown, set EPD_SIM_WIDTH and EPD_SIM_HEIGHT")
+            return None
+        if self._family == 'acep':
+            image = Image.frombytes('P', (width, height), planes[0], 'raw', 'P;4')
+            image.putpalette(SIM_ACEP_PALETTE)
+            return image.convert('RGB')
+        image = Image.frombytes('1', (width, height), planes[0])
+        if self._panel['ink']:
+            image = ImageChops.invert(image.convert('L')).convert('1')
+        if gray:
+            # 4 gray planes as epd4in2_V2 writes them: level = 0x26 bit * 2 + 0x24 bit
+            red = Image.frombytes('1', (width, height), planes[1])
+            image = ImageChops.add(image.convert('L').point([0] * 255 + [85]),
+                                   red.convert('L').point([0] * 255 + [170]))
+        return image
+
+    def sim_stream(self):
+        # (command, data bytes) pairs sent to the controller, oldest first
+        return [(command, bytes(data)) for command, data in self._stream]
+
+    def sim_panel_time(self):
+        # modelled seconds the panel spent on resets, delays, SPI transfers and refreshes
+        return self._panel_seconds
+
+    def sim_refreshes(self):
+        # number of refreshes that changed the image on the glass
+        return self._refreshes
+
+
+# Pin numbers shared by every backend, readable without building one
+RST_PIN  = 17
+DC_PIN   = 25
+CS_PIN   = 8
+BUSY_PIN = 24
+PWR_PIN  = 18
+
+# EPD_BACKEND names, also accepted to skip detection
+BACKENDS = {
+    'raspberrypi': RaspberryPi,
+    'jetson': JetsonNano,
+    'sunrise': SunriseX3,
+    'simulated': Simulated,
+    'sim': Simulated,
+}
+
+_platform = None
+_backend_lock = threading.Lock()
+
+
+def _read_text(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read().decode('ascii', 'ignore')
+    except (IOError, OSError):
+        return ''
+
+
+def detect_platform():
+    # BACKENDS name for this board, worked out on the first call and cached
+    global _platform
+    if _platform is None:
+        forced = os.environ.get('EPD_BACKEND', '').lower()
+        if forced in BACKENDS:
+            _platform = forced
+        else:
+            if forced:
+                logger.warning("Unknown EPD_BACKEND %r, detecting the board" % forced)
+            if 'Raspberry' in _read_text('/proc/device-tree/model') or 'Raspberry' in _read_text('/proc/cpuinfo'):
+                _platform = 'raspberrypi'
+            elif os.path.exists('/sys/bus/platform/drivers/gpio-x3'):
+                _platform = 'sunrise'
+            else:
+                _platform = 'jetson'
+    return _platform
+
+
+def backend():
+    # build the platform backend on first use and export its public attributes
+    # as module level functions, the way drivers call them (epdconfig.delay_ms, ...)
+    module = sys.modules[__name__]
+    with _backend_lock:
+        if 'implementation' not in module.__dict__:
+            implementation = BACKENDS[detect_platform()]()
+            for func in [x for x in dir(implementation) if not x.startswith('_')]:
+                setattr(module, func, getattr(implementation, func))
+            module.implementation = implementation
+    return module.implementation
+
+
+def __getattr__(name):
+    # PEP 562: names missing above live on the backend, which is built on demand so
+    # importing a driver (e.g. just for getbuffer) touches no hardware
+    if name.startswith('__'):
+        raise AttributeError(name)
+    backend()
+    try:
+        return globals()[name]
+    except KeyError:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+if sys.version_info < (3, 7):
+    # no module __getattr__, build the backend right away
+    backend()
 
 ### END OF FILE ###
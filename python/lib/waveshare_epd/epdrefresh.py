@@ -0,0 +1,114 @@
+# *****************************************************************************
+# * | File        :   epdrefresh.py
+# * | Function    :   Refresh scheduling for panels with full, fast and partial updates
+# * | Info        :
+# *----------------
+# * | This version:   V1.0
+# * | Date        :   2024-06-01
+# # | Info        :   Written for epd4in2_V2 (init/init_fast, display/display_Fast/display_Partial)
+# -----------------------------------------------------------------------------
+
+import logging
+
+from . import epdbuffer
+
+logger = logging.getLogger(__name__)
+
+FULL = 'full'
+FAST = 'fast'
+PARTIAL = 'partial'
+
+
+class RefreshScheduler(object):
+    """
+    Keeps the frame the panel shows and refreshes only what the next frame changes:
+    a windowed partial refresh for small changes, a fast refresh for medium ones and a
+    full refresh otherwise, or after full_every partial refreshes to clear ghosting.
+    """
+
+    def __init__(self, epd, partial_area=0.25, fast_area=0.6, full_every=8):
+        """
+        :param epd: Driver with init, init_fast, display, display_Fast and a windowed display_Partial.
+        :param partial_area: Largest changed fraction of the panel refreshed partially.
+        :param fast_area: Largest changed fraction refreshed with the fast waveform.
+        :param full_every: Partial refreshes allowed before the next one is made a full refresh.
+        """
+        self.epd = epd
+        self.partial_area = partial_area
+        self.fast_area = fast_area
+        self.full_every = full_every
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the panel state (e.g. after sleep or a direct driver call): the next frame is a full refresh.
+        """
+        self.frame = None
+        self.mode = None
+        self.partials = 0
+
+    def clear(self):
+        """
+        Full refresh to white.
+        """
+        self.epd.init()
+        self.epd.Clear()
+        self.frame = b'\xff' * ((self.epd.width + 7) // 8 * self.epd.height)
+        self.mode = FULL
+        self.partials = 0
+
+    def plan(self, buf):
+        """
+        Pick the refresh for a frame buffer without sending anything.
+        :param buf: Frame buffer from epd.getbuffer.
+        :return: (kind, rect): kind is FULL, FAST, PARTIAL or None when nothing changed, rect as epdbuffer.dirty_rect.
+        """
+        if self.frame is None:
+            return FULL, None
+        rect = epdbuffer.dirty_rect(self.frame, buf, self.epd.width, self.epd.height)
+        if rect is None:
+            return None, None
+        x0, y0, x1, y1 = rect
+        area = float((x1 - x0) * (y1 - y0)) / (self.epd.width * self.epd.height)
+        if area <= self.partial_area and self.partials < self.full_every:
+            return PARTIAL, rect
+        if area <= self.fast_area and self.partials < self.full_every:
+            return FAST, rect
+        return FULL, rect
+
+    def show(self, image):
+        """
+        Display a PIL image with the cheapest refresh that fits the change.
+        :param image: PIL image in panel or portrait orientation.
+        :return: The refresh used, None if the panel already showed the image.
+        """
+        return self.display(self.epd.getbuffer(image))
+
+    def display(self, buf):
+        """
+        Display a frame buffer with the cheapest refresh that fits the change.
+        :param buf: Frame buffer from epd.getbuffer.
+        :return: The refresh used, None if the panel already showed the frame.
+        """
+        kind, rect = self.plan(buf)
+        if kind == PARTIAL:
+            if self.mode != FULL and self.mode != PARTIAL:
+                # partial updates run on the full init's settings
+                self.epd.init()
+            self.epd.display_Partial(buf, *rect)
+            self.partials += 1
+        elif kind == FAST:
+            if self.mode != FAST:
+                self.epd.init_fast(self.epd.Seconds_1_5S)
+            self.epd.display_Fast(buf)
+        elif kind == FULL:
+            if self.mode != FULL:
+                # display_Partial and init_fast leave their own settings behind, init restores them
+                self.epd.init()
+            self.epd.display(buf)
+            self.partials = 0
+        if kind is not None:
+            logger.debug("%s refresh of %s" % (kind, rect or 'the whole panel'))
+            self.frame = bytes(buf)
+            self.mode = kind
+        return kind
@@ -1,18 +1,37 @@
+import sys
 import datetime
 import json
 import os
 import glob
+import threading
 
-from flask import Flask, request, render_template_string
-from PIL import Image
+from flask import Flask, request, render_template_string, jsonify, url_for, Response
+
+libdir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'python/lib')
+
+if os.path.exists(libdir):
+    sys.path.append(libdir)
+
+import converter
+import eventloop
+import hub
 
 app = Flask(__name__)
+# renders uploads for the panels of the frames registered in hub mode
+frame_hub = hub.Hub()
+frame_hub.prune()
+# finished conversions run their callbacks on the main thread, flask serves from its own threads
+loop = eventloop.EventLoop()
+conversions = converter.ConversionPool(notify=lambda: loop.post('converted'))
+loop.on('converted', lambda payloads: conversions.collect())
+# fork the workers before flask starts any thread
+conversions.start()
 
 fields = {
     'mode': {
         'title': 'Current mode',
         'type': 'select',
-        'options': [[0,'Folder'], [1,'Folder with online'], [2,'US']]
+        'options': [[0,'Folder'], [1,'Folder with online'], [2,'US'], [3,'Network feed']]
     },
     'refresh_rate': {
         'title': 'Update image interval',
@@ -24,74 +43,34 @@ fields = {
     }
 }
 
-def process_and_save_image(image_path):
-    """
-    Load an image, scale it to maximize the crop area, crop it to 300x400 pixels (crop and fill),
-    convert it to black and white, and save it as a 16-bit BMP file for an e-ink display.
-
-    :param image_path: The path to the image file.
-    :return: True if the image is processed and saved successfully, False otherwise.
-    """
-    try:
-        # Load the image
-        image = Image.open(image_path)
-        # Get the original image size
-        original_width, original_height = image.size
-        # Calculate the scaling factor to maximize the crop area
-        if original_width < original_height:
-            scale_factor = 300 / original_width
-        else:
-            scale_factor = 400 / original_height
-        # Scale the image
-        scaled_width = int(original_width * scale_factor)
-        scaled_height = int(original_height * scale_factor)
-        scaled_image = image.resize((scaled_width, scaled_height), Image.ANTIALIAS)
-        # Calculate the crop box to center the image
-        left = (scaled_width - 300) / 2
-        top = (scaled_height - 400) / 2
-        right = (scaled_width + 300) / 2
-        bottom = (scaled_height + 400) / 2
-        # Crop the image to 300x400 pixels
-        cropped_image = scaled_image.crop((left, top, right, bottom))
-        # Convert the image to black and white
-        bw_image = cropped_image.convert('1')
-        # Save the image as a 16-bit BMP file
-        bmp_image_path = os.path.splitext(image_path)[0] + '.bmp'
-        bw_image.save(bmp_image_path, 'BMP')
-        # Delete the original file
-        os.remove(image_path)
-        print('image converted')
-        return True
-    except Exception as e:
-        print(f"Error processing and saving image: {e}")
-        return False
-
-
 def process_all_images_in_folder(folder_path):
     """
-    Load all non-BMP images in the specified folder, process them, and save them as 16-bit BMP files.
+    Queue all non-BMP images in the specified folder for conversion to BMP files.
 
     :param folder_path: The path to the folder containing the images.
-    :return: True if all images are processed and saved successfully, False otherwise.
+    :return: Number of images queued.
     """
     current_file_path = os.path.dirname(os.path.abspath(__file__))
     folder_path = os.path.join(current_file_path, folder_path)
-    try:
-        # Get a list of all non-BMP image files in the folder
-        image_files = glob.glob(os.path.join(folder_path, '*'))
-        non_bmp_images = [f for f in image_files if not f.lower().endswith('.bmp')]
-
-        # Process each non-BMP image
-        for image_path in non_bmp_images:
-            if process_and_save_image(image_path):
-                print(f"Processed and saved {image_path} successfully.")
-            else:
-                print(f"Failed to process and save {image_path}.")
-
-        return True
-    except Exception as e:
-        print(f"Error processing images in folder: {e}")
-        return False
+    # Get a list of all non-BMP image files in the folder
+    image_files = glob.glob(os.path.join(folder_path, '*'))
+    non_bmp_images = [f for f in image_files if not f.lower().endswith('.bmp') and os.path.isfile(f)]
+    # The frame packs the panel buffer when it first shows an image, the hub for its frames' models
+    # from the master kept of each upload. No master without a registered frame: images converted
+    # before the first one registers are rendered from their BMP when a frame asks for them
+    keep_masters = bool(frame_hub.models())
+    return sum(conversions.submit(image_path, on_done=converted, remove_source=True,
+                                  master_path=frame_hub.master_path(image_path) if keep_masters else None)
+               for image_path in non_bmp_images)
+
+
+def converted(image_path, bmp_image_path, digest, frame, error):
+    """
+    Render a finished conversion for the hub's frames.
+    :return:
+    """
+    if error is None:
+        frame_hub.prerender(bmp_image_path)
 
 # Load the config file
 with open('config.txt', 'r') as f:
@@ -210,12 +189,48 @@ def upload():
     for file in uploaded_files:
         file.save(f"{path_to_save}{file.filename}")
 
-    # after images uploaded we need to process them
-    process_all_images_in_folder(path_to_save)
+    # after images uploaded we need to process them, in the background
+    queued = process_all_images_in_folder(path_to_save)
     return '''
-    Images uploaded successfully!<br>
+    Images uploaded successfully, {} converting!<br>
+    <a href="/progress">Conversion progress</a><br>
     <a href="/">Return to Main Page</a>
-    '''
+    '''.format(queued)
+
+@app.route('/progress')
+def progress():
+    done, total = conversions.progress()
+    return jsonify(done=done, total=total)
+
+@app.route('/hub/register', methods=['POST'])
+def hub_register():
+    """
+    Register a frame's panel model: {"id": name of the frame, "model": driver module, e.g. "epd4in2_V2"}.
+    Answers with the panel's size and bits per pixel, and the URL of its frame buffer.
+    """
+    data = request.get_json(silent=True) or request.form
+    try:
+        panel = frame_hub.register(data.get('id') or request.remote_addr, data.get('model'))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    panel['frame'] = url_for('hub_frame', model=panel['model'])
+    return jsonify(panel)
+
+@app.route('/hub/<model>/current')
+def hub_frame(model):
+    """
+    The newest uploaded image as a frame buffer packed for a registered model, with an ETag.
+    """
+    if model not in frame_hub.models():
+        return jsonify(error="model not registered"), 404
+    image_path = frame_hub.current_image()
+    if not image_path:
+        return jsonify(error="no images"), 404
+    digest, buf = frame_hub.render(model, image_path)
+    response = Response(bytes(buf), mimetype='application/octet-stream')
+    response.set_etag(digest)
+    return response.make_conditional(request)
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8080)
\ No newline at end of file
+    threading.Thread(target=app.run, kwargs={'host': '0.0.0.0', 'port': 8080}, name='http', daemon=True).start()
+    loop.run()
\ No newline at end of file
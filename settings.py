@@ -1,6 +1,8 @@
 # GPIO settings
 BUTTON_PIN = 32
 GPIO_WARNINGS = False
+# seconds the button level must be stable before a press or release counts
+BUTTON_DEBOUNCE = 0.05
 
 # Mount point
 # Change it based on your username
@@ -9,6 +11,35 @@ MOUNT_POINT = '/media/vasily'
 # EPD settings
 EPD_WIDTH = 400
 EPD_HEIGHT = 300
+# '' picks the board's GPIO/SPI backend, 'simulated' runs without a panel
+# (EPD_SIM_* environment variables tune it, see waveshare_epd/epdconfig.py)
+EPD_BACKEND = ''
+# Refresh scheduling: changes covering up to PARTIAL_REFRESH_AREA of the panel get a
+# partial refresh, up to FAST_REFRESH_AREA a fast one, anything larger a full refresh
+PARTIAL_REFRESH_AREA = 0.25
+FAST_REFRESH_AREA = 0.6
+# force a full refresh after this many partial refreshes to clear ghosting
+FULL_REFRESH_EVERY = 8
+# packed panel frames written at ingest, relative to the script
+FRAME_CACHE_DIR = 'frames'
+# content digests of everything imported from USB, relative to the script
+IMPORT_MANIFEST = 'images/.manifest.json'
+# catalog of displayable images kept between runs, relative to the script ('' keeps it in memory only)
+CATALOG_PATH = 'frames/catalog.json'
+# image conversion worker processes, 0 = one less than the number of CPUs
+CONVERT_WORKERS = 0
+# niceness of the conversion workers, so they don't slow the display loop
+CONVERT_NICE = 10
+# seconds between checks for changed files where inotify is unavailable
+WATCH_POLL_INTERVAL = 1
+# a new upload replaces the current image once that has been shown this many seconds
+MIN_IMAGE_TIME = 10
+
+# hub mode (server.py): registered frames, and the buffers rendered for their panels, relative to the script
+HUB_REGISTRY = 'frames/hub.json'
+HUB_FRAMES_DIR = 'frames/hub'
+# longest side of the grayscale masters each panel size is rendered from
+HUB_MASTER_SIZE = 1600
 
 # Config settings
 # check for updates every 1 hour
@@ -16,7 +47,24 @@ UPDATE_CONFIG_EVERY = 3600
 # hold button for 3 seconds to shut down
 HOLD_TO_SHUTDOWN = 3
 # max number of modes
-MAX_MODES = 2
+MAX_MODES = 3
 
 # Network settings
+# seconds between fetches of the network image
+FETCH_EVERY = 600
+# first retry after a failed fetch, doubling up to FETCH_EVERY
+FETCH_RETRY_MIN = 30
+# playlist of the images listed by config['url_feed'], relative to the script
+FEED_FOLDER = 'netfeed'
+# feed images downloaded at the same time
+FEED_DOWNLOADS = 4
+# validators and digests of fetched URLs, relative to the script
+FETCH_CACHE_PATH = 'frames/fetch.json'
+# seconds to wait for a connection, and between bytes of the response
+FETCH_TIMEOUT = (5, 30)
+# downloaded images are refused over this size, and over this many pixels before decoding
+FETCH_MAX_BYTES = 20 * 1024 * 1024
+FETCH_MAX_PIXELS = 40 * 1000 * 1000
+# connections kept open per host
+FETCH_POOL_SIZE = 4
 WIFI_CONFIG_PATH = '/etc/wpa_supplicant/wpa_supplicant.conf'
\ No newline at end of file
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# run the drivers on the simulated panel, without waiting out refresh times
+os.environ.setdefault('EPD_BACKEND', 'sim')
+os.environ.setdefault('EPD_SIM_SPEED', '0')
+
+rootdir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, os.path.join(rootdir, 'python/lib'))
+sys.path.insert(0, rootdir)
@@ -0,0 +1,63 @@
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from PIL import Image
+
+import converter
+
+convert_image = converter.convert_image
+
+
+def convert_or_die(image_path, *args):
+    # stands in for a worker killed for memory on a huge image
+    if 'huge' in image_path:
+        os._exit(1)
+    return convert_image(image_path, *args)
+
+
+def wait(pool):
+    for _ in range(200):
+        done, total = pool.progress()
+        if done == total:
+            return
+        time.sleep(0.05)
+    raise AssertionError("conversions didn't finish")
+
+
+@pytest.mark.parametrize('seen', [True, False])
+def test_pool_replaces_dead_workers(tmp_path, monkeypatch, seen):
+    # the workers fork after the patch, so they run it too
+    monkeypatch.setattr(converter, 'convert_image', convert_or_die)
+    for name in ('huge.png', 'photo.png'):
+        Image.new('L', (60, 80), 128).save(tmp_path / name)
+    results = []
+    pool = converter.ConversionPool(workers=1, nice=0)
+    pool.start()
+    try:
+        assert pool.submit(str(tmp_path / 'huge.png'), on_done=lambda *args: results.append(args))
+        wait(pool)
+        if not seen:
+            # the broken executor found by submit before the dead worker's result came back
+            pool.broken = False
+        assert pool.submit(str(tmp_path / 'photo.png'), on_done=lambda *args: results.append(args))
+        wait(pool)
+    finally:
+        pool.shutdown()
+    pool.collect()
+    (huge, _, _, _, error), (photo, bmp_image_path, _, _, photo_error) = results
+    assert isinstance(error, BrokenProcessPool) and photo_error is None
+    assert os.path.exists(bmp_image_path)
+    assert not pool.is_pending(huge) and not pool.is_pending(photo)
+    # the image that killed its worker isn't tried again until it changes
+    assert not pool.submit(huge)
+
+
+def test_submit_rolls_back_when_it_cannot_queue(tmp_path, monkeypatch):
+    Image.new('L', (60, 80), 128).save(tmp_path / 'photo.png')
+    pool = converter.ConversionPool(workers=1, nice=0)
+    monkeypatch.setattr(pool, '_submit', lambda args: 1 / 0)
+    assert not pool.submit(str(tmp_path / 'photo.png'))
+    assert not pool.is_pending(str(tmp_path / 'photo.png'))
+    assert pool.progress() == (0, 0)
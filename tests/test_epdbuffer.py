@@ -0,0 +1,293 @@
+# Packed buffers must stay byte-identical to the per-pixel loops the drivers used before
+# epdbuffer; the reference_* functions are copies of those loops.
+import random
+
+import pytest
+from PIL import Image
+
+from waveshare_epd import epd4in2_V2, epd4in2b_V2, epd13in3b, epd4in2, epd3in7, epd4in26, epd5in79, epd13in3k
+from waveshare_epd import epd1in64g, epd2in13g, epd2in15g, epd2in36g, epd2in66g, epd3in0g, epd4in37g, epd5in79g
+from waveshare_epd import epd7in3g, epd7in3e, epd7in3f, epd5in65f, epd4in01f, epd7in5b_V2, epd2in13b_V4
+
+COLORS4 = (0, 0, 0, 255, 255, 255, 255, 255, 0, 255, 0, 0)
+COLORS6 = (0, 0, 0, 255, 255, 255, 0, 255, 0, 0, 0, 255, 255, 0, 0, 255, 255, 0)
+COLORS7 = COLORS6 + (255, 128, 0)
+
+
+def random_image(mode, size, seed=1):
+    rnd = random.Random(seed)
+    bands = len(Image.new(mode, (1, 1)).getbands())
+    return Image.frombytes(mode, size, bytes(rnd.getrandbits(8) for _ in range(size[0] * size[1] * bands)))
+
+
+def reference_mono(image, width, height):
+    buf = [0xFF] * (int(width / 8) * height)
+    image_monocolor = image.convert('1')
+    imwidth, imheight = image_monocolor.size
+    pixels = image_monocolor.load()
+    if imwidth == width and imheight == height:
+        for y in range(imheight):
+            for x in range(imwidth):
+                if pixels[x, y] == 0:
+                    buf[int((x + y * width) / 8)] &= ~(0x80 >> (x % 8))
+    elif imwidth == height and imheight == width:
+        for y in range(imheight):
+            for x in range(imwidth):
+                newx = y
+                newy = height - x - 1
+                if pixels[x, y] == 0:
+                    buf[int((newx + newy * width) / 8)] &= ~(0x80 >> (y % 8))
+    return buf
+
+
+@pytest.mark.parametrize('module', [epd4in2_V2, epd4in2b_V2, epd13in3b])
+@pytest.mark.parametrize('mode', ['1', 'L', 'RGB'])
+@pytest.mark.parametrize('portrait', [False, True])
+def test_getbuffer_matches_loop(module, mode, portrait):
+    epd = module.EPD()
+    size = (epd.height, epd.width) if portrait else (epd.width, epd.height)
+    image = random_image(mode, size)
+    assert bytes(epd.getbuffer(image)) == bytes(reference_mono(image, epd.width, epd.height))
+
+
+def test_getbuffer_size_mismatch_is_white():
+    epd = epd4in2_V2.EPD()
+    assert bytes(epd.getbuffer(Image.new('L', (10, 10)))) == b'\xff' * (epd.width // 8 * epd.height)
+
+
+def reference_4gray(image, width, height, transpose):
+    buf = [0xFF] * (int(width / 4) * height)
+    image_monocolor = image.convert('L')
+    imwidth, imheight = image_monocolor.size
+    pixels = image_monocolor.load()
+    i = 0
+    if imwidth == width and imheight == height:
+        for y in range(imheight):
+            for x in range(imwidth):
+                if pixels[x, y] == 0xC0:
+                    pixels[x, y] = 0x80
+                elif pixels[x, y] == 0x80:
+                    pixels[x, y] = 0x40
+                i = i + 1
+                if i % 4 == 0:
+                    buf[int((x + (y * width)) / 4)] = (
+                            (pixels[x - 3, y] & 0xc0) | (pixels[x - 2, y] & 0xc0) >> 2 | (
+                                pixels[x - 1, y] & 0xc0) >> 4 | (pixels[x, y] & 0xc0) >> 6)
+    elif imwidth == height and imheight == width:
+        for x in range(imwidth):
+            for y in range(imheight):
+                newx = y
+                # epd4in2 and epd4in2_V2 transposed portrait input, the others rotated it
+                newy = x if transpose else height - x - 1
+                if pixels[x, y] == 0xC0:
+                    pixels[x, y] = 0x80
+                elif pixels[x, y] == 0x80:
+                    pixels[x, y] = 0x40
+                i = i + 1
+                if i % 4 == 0:
+                    buf[int((newx + (newy * width)) / 4)] = (
+                            (pixels[x, y - 3] & 0xc0) | (pixels[x, y - 2] & 0xc0) >> 2 | (
+                                pixels[x, y - 1] & 0xc0) >> 4 | (pixels[x, y] & 0xc0) >> 6)
+    return buf
+
+
+@pytest.mark.parametrize('module, transpose', [(epd4in2_V2, True), (epd4in2, True), (epd3in7, False),
+                                               (epd4in26, False), (epd5in79, False), (epd13in3k, False)])
+@pytest.mark.parametrize('portrait', [False, True])
+def test_getbuffer_4gray_matches_loop(module, transpose, portrait):
+    epd = module.EPD()
+    size = (epd.height, epd.width) if portrait else (epd.width, epd.height)
+    image = random_image('L', size)
+    # the gray levels the drivers remap exactly, not only thresholds
+    image.paste(0x80, (0, 0, 40, 40))
+    image.paste(0xC0, (40, 0, 80, 40))
+    assert bytes(epd.getbuffer_4Gray(image)) == bytes(reference_4gray(image, epd.width, epd.height, transpose))
+
+
+def test_getbuffer_4gray_rgb():
+    epd = epd4in2_V2.EPD()
+    image = random_image('RGB', (epd.width, epd.height))
+    assert bytes(epd.getbuffer_4Gray(image)) == bytes(reference_4gray(image, epd.width, epd.height, True))
+
+
+def reference_planes(buf, table, row_bytes, start, count, height):
+    # display_4Gray's per-byte loop: 8 pixels from 2 buffer bytes, each 2 bit level to a plane bit
+    out = []
+    for j in range(height):
+        for i in range(count):
+            temp3 = 0
+            for o in range(2):
+                temp1 = buf[(j * row_bytes + start + i) * 2 + o]
+                for k in range(4):
+                    temp3 = temp3 << 1 | table[temp1 & 0xC0]
+                    temp1 <<= 2
+            out.append(temp3)
+    return bytes(out)
+
+
+def sent_by_command(epd, monkeypatch):
+    # command -> bytes sent after its last occurrence; nothing reaches the simulated panel,
+    # which keeps the size of the first panel that set one
+    sent = {}
+    last = []
+
+    def command(value):
+        last[:] = [value]
+        sent[value] = bytearray()
+
+    def command_with_data(value, data):
+        command(value)
+        sent[value].extend(data)
+
+    monkeypatch.setattr(epd, 'send_command', command)
+    monkeypatch.setattr(epd, 'send_command_with_data', command_with_data)
+    monkeypatch.setattr(epd, 'send_data', lambda value: sent[last[0]].append(value))
+    monkeypatch.setattr(epd, 'send_data2', lambda values: sent[last[0]].extend(values))
+    monkeypatch.setattr(epd, 'ReadBusy', lambda: None)
+    return sent
+
+
+# bit sent for the levels black (0x00), gray2 (0x40), gray1 (0x80) and white (0xC0), per RAM command
+PLANES_A = {0x00: 0, 0x40: 1, 0x80: 0, 0xC0: 1}
+PLANES_B = {0x00: 0, 0x40: 0, 0x80: 1, 0xC0: 1}
+PLANES_INVERTED_A = {0x00: 1, 0x40: 0, 0x80: 1, 0xC0: 0}
+PLANES_INVERTED_B = {0x00: 1, 0x40: 1, 0x80: 0, 0xC0: 0}
+
+
+@pytest.mark.parametrize('module, planes', [
+    (epd4in2_V2, {0x24: PLANES_A, 0x26: PLANES_B}),
+    (epd4in2, {0x10: PLANES_B, 0x13: PLANES_A}),
+    (epd3in7, {0x24: PLANES_A, 0x26: PLANES_B}),
+    (epd4in26, {0x24: PLANES_INVERTED_A, 0x26: PLANES_INVERTED_B}),
+    (epd13in3k, {0x24: PLANES_INVERTED_A, 0x26: PLANES_INVERTED_B})])
+def test_display_4gray_planes_match_loop(module, planes, monkeypatch):
+    epd = module.EPD()
+    random.seed(2)
+    buf = [random.getrandbits(8) for _ in range(epd.width // 4 * epd.height)]
+    sent = sent_by_command(epd, monkeypatch)
+    epd.display_4Gray(buf)
+    for command, table in planes.items():
+        assert bytes(sent[command]) == reference_planes(buf, table, epd.width // 8, 0, epd.width // 8, epd.height)
+
+
+def test_display_4gray_planes_match_loop_dual_controller(monkeypatch):
+    # epd5in79: 400 columns per controller, the slave's from column 392
+    epd = epd5in79.EPD()
+    random.seed(2)
+    buf = [random.getrandbits(8) for _ in range(epd.width // 4 * epd.height)]
+    sent = sent_by_command(epd, monkeypatch)
+    epd.display_4Gray(buf)
+    for command, start, table in ((0x24, 0, PLANES_A), (0x26, 0, PLANES_B), (0xA4, 49, PLANES_A), (0xA6, 49, PLANES_B)):
+        assert bytes(sent[command]) == reference_planes(buf, table, epd.width // 8, start, 50, epd.height)
+
+
+def reference_indexed(image, width, height, palette, bits):
+    pal_image = Image.new("P", (1, 1))
+    pal_image.putpalette(palette + (0, 0, 0) * (256 - len(palette) // 3))
+    imwidth, imheight = image.size
+    if imwidth == width and imheight == height:
+        image_temp = image
+    else:
+        image_temp = image.rotate(90, expand=True)
+    indices = bytearray(image_temp.convert("RGB").quantize(palette=pal_image).tobytes('raw'))
+    if bits == 4:
+        # two pixels per byte, as epd7in3f did
+        buf = [0x00] * int(width * height / 2)
+        idx = 0
+        for i in range(0, len(indices), 2):
+            buf[idx] = (indices[i] << 4) + indices[i + 1]
+            idx += 1
+        return buf
+    # four pixels per byte, the last byte of a row holding the two left over, as epd2in13g did
+    Width = width // 4 if width % 4 == 0 else width // 4 + 1
+    buf = [0x00] * int(Width * height)
+    idx = 0
+    for j in range(0, height):
+        for i in range(0, Width):
+            if i == Width - 1 and width % 4:
+                buf[i + j * Width] = (indices[idx] << 6) + (indices[idx + 1] << 4)
+                idx = idx + 2
+            else:
+                buf[i + j * Width] = ((indices[idx] << 6) + (indices[idx + 1] << 4) + (indices[idx + 2] << 2)
+                                      + indices[idx + 3])
+                idx = idx + 4
+    return buf
+
+
+@pytest.mark.parametrize('module, palette, bits', [
+    (epd1in64g, COLORS4, 2), (epd2in13g, COLORS4, 2), (epd2in15g, COLORS4, 2), (epd2in36g, COLORS4, 2),
+    (epd2in66g, COLORS4, 2), (epd3in0g, COLORS4, 2), (epd4in37g, COLORS4, 2), (epd5in79g, COLORS4, 2),
+    (epd7in3g, COLORS4, 2), (epd7in3e, COLORS6, 4), (epd7in3f, COLORS7, 4), (epd5in65f, COLORS7, 4)])
+@pytest.mark.parametrize('portrait', [False, True])
+def test_getbuffer_indexed_matches_loop(module, palette, bits, portrait):
+    epd = module.EPD()
+    size = (epd.height, epd.width) if portrait else (epd.width, epd.height)
+    image = random_image('RGB', size)
+    assert bytes(epd.getbuffer(image)) == bytes(reference_indexed(image, epd.width, epd.height, palette, bits))
+
+
+def reference_exact(image, width, height, palette):
+    # epd4in01f: exact palette matches, anything else is black, no dithering
+    colors = [tuple(palette[i:i + 3]) for i in range(0, len(palette), 3)]
+    buf = [0x00] * int(width * height / 2)
+    pixels = image.convert('RGB').load()
+    imwidth, imheight = image.size
+    for y in range(imheight):
+        for x in range(imwidth):
+            if imwidth == width and imheight == height:
+                newx, newy = x, y
+            else:
+                newx, newy = y, height - x - 1
+            Add = int((newx + newy * width) / 2)
+            Color = colors.index(pixels[x, y]) if pixels[x, y] in colors else 0
+            data_t = buf[Add] & (~(0xF0 >> ((newx % 2) * 4)))
+            buf[Add] = data_t | ((Color << 4) >> ((newx % 2) * 4))
+    return buf
+
+
+@pytest.mark.parametrize('portrait', [False, True])
+def test_getbuffer_exact_matches_loop(portrait):
+    epd = epd4in01f.EPD()
+    size = (epd.height, epd.width) if portrait else (epd.width, epd.height)
+    rnd = random.Random(2)
+    colors = [bytes(COLORS7[i:i + 3]) for i in range(0, len(COLORS7), 3)] + [b'\x10\x80\xff']
+    image = Image.frombytes('RGB', size, b''.join(rnd.choice(colors) for _ in range(size[0] * size[1])))
+    assert bytes(epd.getbuffer(image)) == bytes(reference_exact(image, epd.width, epd.height, COLORS7))
+
+
+def reference_split(image, color, tolerance):
+    # pixels near the ink color go to the color image, everything else to the black one
+    image_rgb = image.convert('RGB')
+    image_gray = image_rgb.convert('L')
+    imageblack = Image.new('L', image.size, 255)
+    imagecolor = Image.new('L', image.size, 255)
+    rgb, gray, black, ink = image_rgb.load(), image_gray.load(), imageblack.load(), imagecolor.load()
+    for y in range(image.size[1]):
+        for x in range(image.size[0]):
+            if all(abs(c - v) <= tolerance for c, v in zip(rgb[x, y], color)):
+                ink[x, y] = 0
+            else:
+                black[x, y] = gray[x, y]
+    return imageblack, imagecolor
+
+
+@pytest.mark.parametrize('module', [epd4in2b_V2, epd13in3b, epd7in5b_V2, epd2in13b_V4])
+@pytest.mark.parametrize('color', [(255, 0, 0), (255, 255, 0)])
+@pytest.mark.parametrize('portrait', [False, True])
+def test_getbuffer_color_matches_split(module, color, portrait):
+    epd = module.EPD()
+    size = (epd.height, epd.width) if portrait else (epd.width, epd.height)
+    image = random_image('RGB', size)
+    # solid patches of the ink color and of black
+    image.paste(color, (0, 0, 60, 60))
+    image.paste((0, 0, 0), (60, 0, 120, 60))
+    imageblack, imagecolor = reference_split(image, color, 96)
+    black, ink = epd.getbuffer_color(image, color, 96)
+    assert bytes(black) == bytes(epd.getbuffer(imageblack))
+    assert bytes(ink) == bytes(epd.getbuffer(imagecolor))
+
+
+def test_getbuffer_color_size_mismatch_is_white():
+    epd = epd4in2b_V2.EPD()
+    black, ink = epd.getbuffer_color(Image.new('RGB', (10, 10)))
+    assert bytes(black) == bytes(ink) == b'\xff' * (epd.width // 8 * epd.height)
@@ -0,0 +1,67 @@
+# RefreshScheduler on the simulated panel (EPD_BACKEND=sim, see conftest.py)
+import pytest
+from PIL import Image, ImageChops
+
+from waveshare_epd import epd4in2_V2, epdconfig, epdrefresh
+from waveshare_epd.epdrefresh import FULL, FAST, PARTIAL
+
+
+@pytest.fixture
+def scheduler():
+    return epdrefresh.RefreshScheduler(epd4in2_V2.EPD(), partial_area=0.25, fast_area=0.6, full_every=3)
+
+
+def frame_with_box(box):
+    # white 400x300 frame with a black box, landscape like the panel
+    image = Image.new('1', (400, 300), 255)
+    image.paste(0, box)
+    return image
+
+
+def assert_on_glass(image):
+    shown = epdconfig.implementation.sim_frame().convert('1')
+    assert ImageChops.difference(shown.convert('L'), image.convert('L')).getbbox() is None
+
+
+def test_first_frame_is_full(scheduler):
+    assert scheduler.show(frame_with_box((0, 0, 8, 8))) == FULL
+    assert_on_glass(frame_with_box((0, 0, 8, 8)))
+
+
+def test_unchanged_frame_is_skipped(scheduler):
+    scheduler.show(frame_with_box((0, 0, 8, 8)))
+    refreshes = epdconfig.implementation.sim_refreshes()
+    assert scheduler.show(frame_with_box((0, 0, 8, 8))) is None
+    assert epdconfig.implementation.sim_refreshes() == refreshes
+
+
+def test_thresholds(scheduler):
+    scheduler.show(frame_with_box((0, 0, 8, 8)))
+    # 80x60 more pixels: 4% of the panel
+    small = frame_with_box((0, 0, 80, 60))
+    assert scheduler.plan(scheduler.epd.getbuffer(small))[0] == PARTIAL
+    assert scheduler.show(small) == PARTIAL
+    assert_on_glass(small)
+    # 240x200: 40%
+    medium = frame_with_box((0, 0, 240, 200))
+    assert scheduler.show(medium) == FAST
+    assert_on_glass(medium)
+    # the whole panel changes
+    large = ImageChops.invert(medium.convert('L')).convert('1')
+    assert scheduler.show(large) == FULL
+    assert_on_glass(large)
+
+
+def test_partial_window_is_the_dirty_rect(scheduler):
+    scheduler.show(frame_with_box((0, 0, 8, 8)))
+    # the old box goes away and a new one appears: x rounded out to whole bytes
+    kind, rect = scheduler.plan(scheduler.epd.getbuffer(frame_with_box((100, 50, 130, 70))))
+    assert (kind, rect) == (PARTIAL, (0, 0, 136, 70))
+
+
+def test_full_refresh_forced_every_full_every(scheduler):
+    scheduler.show(frame_with_box((0, 0, 8, 8)))
+    kinds = [scheduler.show(frame_with_box((0, 0, 16 + 8 * n, 16))) for n in range(5)]
+    # full_every=3 partial refreshes, then a full one clears the ghosting and the count restarts
+    assert kinds == [PARTIAL, PARTIAL, PARTIAL, FULL, PARTIAL]
+    assert_on_glass(frame_with_box((0, 0, 48, 16)))
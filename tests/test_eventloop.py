@@ -0,0 +1,43 @@
+import time
+
+import eventloop
+
+
+def test_failing_handler_does_not_stop_the_others():
+    loop = eventloop.EventLoop()
+    seen = []
+
+    def broken(payloads):
+        raise RuntimeError('broken')
+
+    loop.on('first', broken)
+    loop.on('second', seen.extend)
+    loop.call_later(0, 'broken timer', lambda: 1 / 0)
+    loop.call_later(0, 'timer', lambda: seen.append('timer'))
+    loop.post('first', 1)
+    loop.post('second', 2)
+    loop.run_once()
+    assert seen == [2, 'timer']
+
+
+def test_failing_timer_backs_off_when_re_armed():
+    loop = eventloop.EventLoop(retry_min=0.05, retry_max=0.1)
+    runs = []
+
+    def check_for_updates():
+        runs.append(time.time())
+        if len(runs) == 4:
+            loop.stop()
+            return
+        raise OSError("No space left on device")
+
+    def schedule():
+        # re-armed from state the failure never advanced, like frame_eink's schedule()
+        loop.call_at(0, 'update', check_for_updates)
+
+    loop.run(schedule)
+    gaps = [later - earlier for earlier, later in zip(runs, runs[1:])]
+    # 0.05 s after the first failure, then doubled up to retry_max
+    assert gaps[0] >= 0.05 and gaps[1] >= 0.1 and gaps[2] >= 0.1
+    # it went through: no back-off left
+    assert 'update' not in loop.backoff
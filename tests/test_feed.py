@@ -0,0 +1,132 @@
+# Feed.sync against an in-memory server
+import io
+import json
+import hashlib
+import os
+
+import pytest
+from PIL import Image
+
+import feed
+import fetchcache
+
+
+class Response(object):
+    def __init__(self, status_code, body=b'', headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise IOError(f"HTTP {self.status_code}")
+
+    def iter_content(self, size):
+        return [self.body]
+
+
+class Server(object):
+    """
+    Session stand-in: url -> body, with an ETag per body and 304 for a matching If-None-Match.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(url)
+        if url not in self.files:
+            return Response(404)
+        body = self.files[url]
+        etag = '"{}"'.format(hash(body))
+        if (headers or {}).get('If-None-Match') == etag:
+            return Response(304)
+        return Response(200, body, {'ETag': etag})
+
+
+def png(color):
+    data = io.BytesIO()
+    Image.new('L', (40, 30), color).save(data, 'PNG')
+    return data.getvalue()
+
+
+@pytest.fixture
+def server():
+    return Server()
+
+
+@pytest.fixture
+def playlist(tmp_path, server):
+    shown = []
+    cache = fetchcache.FetchCache(str(tmp_path / 'fetch.json'), session=server)
+    return feed.Feed(cache, lambda path, digest, frame: shown.append(path), folder=str(tmp_path / 'netfeed')), shown
+
+
+def pixel(path):
+    with Image.open(path) as image:
+        return image.convert('L').getpixel((150, 200))
+
+
+def test_image_without_checksum_is_fetched_again_when_it_changes(server, playlist):
+    sync_feed, shown = playlist
+    server.files['http://feed/list.json'] = json.dumps(['http://feed/a.png']).encode()
+    server.files['http://feed/a.png'] = png(0)
+    assert sync_feed.sync('http://feed/list.json')['added'] == 1
+    path, = shown
+    assert pixel(path) == 0
+    # unchanged: a 304, nothing converted
+    assert sync_feed.sync('http://feed/list.json') == {'added': 0, 'updated': 0, 'removed': 0, 'failed': 0}
+    assert len(shown) == 1
+    # same URL, new image
+    server.files['http://feed/a.png'] = png(255)
+    assert sync_feed.sync('http://feed/list.json')['updated'] == 1
+    assert shown == [path, path]
+    assert pixel(path) == 255
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
+
+
+def test_image_with_checksum_is_not_fetched_again(server, playlist):
+    sync_feed, shown = playlist
+    data = png(0)
+    server.files['http://feed/list.json'] = json.dumps(
+        [{'url': 'http://feed/a.png', 'sha256': hashlib.sha256(data).hexdigest()}]).encode()
+    server.files['http://feed/a.png'] = data
+    assert sync_feed.sync('http://feed/list.json')['added'] == 1
+    server.requests.clear()
+    sync_feed.sync('http://feed/list.json')
+    assert server.requests == ['http://feed/list.json']
+
+
+def test_manifest_is_kept_in_memory(tmp_path, server, playlist):
+    sync_feed, shown = playlist
+    server.files['http://feed/list.json'] = json.dumps(['http://feed/a.png']).encode()
+    server.files['http://feed/a.png'] = png(0)
+    sync_feed.sync('http://feed/list.json')
+    # a 304 for the manifest: its items come from the last sync
+    os.remove(shown[0])
+    assert sync_feed.sync('http://feed/list.json')['added'] == 1
+    assert sorted(os.listdir(tmp_path)) == ['fetch.json', 'netfeed']
+    # a new run has no items: the manifest is fetched whole despite the stored validators
+    restarted = feed.Feed(sync_feed.cache, lambda *args: None, folder=sync_feed.folder)
+    assert restarted.sync('http://feed/list.json')['failed'] == 0
+    assert restarted.items == [('http://feed/a.png', None)]
+
+
+def test_concurrent_downloads_share_the_cache(tmp_path, server, playlist):
+    sync_feed, shown = playlist
+    sync_feed.workers = 8
+    urls = ['http://feed/{}.png'.format(n) for n in range(40)]
+    server.files['http://feed/list.json'] = json.dumps(urls).encode()
+    for n, url in enumerate(urls):
+        server.files[url] = png(n)
+    assert sync_feed.sync('http://feed/list.json')['added'] == 40
+    saved = json.loads((tmp_path / 'fetch.json').read_text())
+    assert set(saved) == set(urls) | {'http://feed/list.json'}
+    assert all(sync_feed.cache.digest(url) == saved[url]['digest'] for url in urls)
@@ -0,0 +1,45 @@
+import os
+
+from PIL import Image
+
+import framecache
+from waveshare_epd import epd4in2_V2
+
+
+def write_bmp(path, fill):
+    Image.new('1', (300, 400), fill).save(path, 'BMP')
+    return str(path)
+
+
+def test_get_returns_bytes(tmp_path):
+    frames = framecache.FrameCache(epd4in2_V2.EPD(), root=str(tmp_path / 'frames'))
+    bmp = write_bmp(tmp_path / 'a.bmp', 255)
+    buf = frames.pack(bmp, Image.open(bmp))
+    assert frames.get(bmp) == bytes(buf)
+    assert isinstance(frames.get(bmp), bytes)
+    # overwritten since: stale
+    write_bmp(tmp_path / 'a.bmp', 0)
+    os.utime(bmp, (0, 0))
+    assert frames.get(bmp) is None
+
+
+def test_prune_drops_gone_images_and_unused_buffers(tmp_path):
+    frames = framecache.FrameCache(epd4in2_V2.EPD(), root=str(tmp_path / 'frames'))
+    kept = write_bmp(tmp_path / 'kept.bmp', 255)
+    gone = write_bmp(tmp_path / 'gone.bmp', 0)
+    replaced = write_bmp(tmp_path / 'replaced.bmp', 255)
+    frames.put(kept, 'k', b'\x01' * 15000)
+    frames.put(gone, 'g', b'\x02' * 15000)
+    frames.put(replaced, 'old', b'\x03' * 15000)
+    # a newer image under the same name leaves the old buffer unused
+    frames.put(replaced, 'new', b'\x04' * 15000)
+    open(os.path.join(frames.folder, 'x.raw.tmp'), 'wb').close()
+    os.remove(gone)
+
+    assert frames.prune() == 2
+    assert sorted(os.listdir(frames.folder)) == ['k.raw', 'new.raw']
+    assert frames.get(kept) == b'\x01' * 15000
+    assert frames.get(replaced) == b'\x04' * 15000
+    assert frames.key(gone) not in frames.index
+    frames.save()
+    assert framecache.FrameCache(frames.epd, root=str(tmp_path / 'frames')).index == frames.index
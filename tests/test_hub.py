@@ -0,0 +1,86 @@
+# Hub rendering, with the library under a temporary script directory
+import os
+
+import pytest
+from PIL import Image
+
+import converter
+import framecache
+import hub
+from waveshare_epd import epd7in5_V2
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    monkeypatch.setattr(framecache, 'current_file_path', str(tmp_path))
+    monkeypatch.setattr(hub, 'current_file_path', str(tmp_path))
+    os.makedirs(tmp_path / 'images' / '2024-01-01')
+    return tmp_path
+
+
+@pytest.fixture
+def upload(root):
+    # what server.py's conversion of an upload leaves: the BMP and its master
+    frame_hub = hub.Hub()
+    image_path = str(root / 'images' / '2024-01-01' / 'photo.bmp')
+    gradient = Image.linear_gradient('L').resize((1200, 900))
+    master = converter.save_master(gradient, frame_hub.master_path(image_path))
+    converter.save_converted(master, image_path)
+    return frame_hub, image_path
+
+
+def test_register_refuses_panels_frames_cannot_store(root):
+    frame_hub = hub.Hub()
+    assert frame_hub.register('frame', 'epd7in5_V2')['bpp'] == 1
+    # 4 bit color, 2 bit gray, and a second color plane
+    for model in ('epd7in3f', 'epd7in3g', 'epd4in2b_V2'):
+        with pytest.raises(ValueError):
+            frame_hub.register('frame', model)
+    assert frame_hub.models() == {'epd7in5_V2'}
+
+
+def test_render_fits_the_master(upload):
+    frame_hub, image_path = upload
+    frame_hub.register('frame', 'epd7in5_V2')
+    epd = epd7in5_V2.EPD()
+    with Image.open(frame_hub.master_path(image_path)) as master:
+        expected = epd.getbuffer(converter.fit_image(master, 480, 800))
+    assert bytes(frame_hub.render('epd7in5_V2', image_path)[1]) == bytes(expected)
+
+
+def test_prune_drops_masters_of_gone_images(upload):
+    frame_hub, image_path = upload
+    frame_hub.register('frame', 'epd7in5_V2')
+    frame_hub.render('epd7in5_V2', image_path)
+    frame_hub.prune()
+    assert os.path.exists(frame_hub.master_path(image_path))
+    os.remove(image_path)
+    frame_hub.prune()
+    assert not os.path.exists(frame_hub.master_path(image_path))
+    assert not [name for name in os.listdir(frame_hub._cache('epd7in5_V2').folder) if name.endswith('.raw')]
+
+
+def test_frame_of_an_inverted_panel_is_saved_positive(upload, tmp_path):
+    # epd7in5_V2 packs black as a set bit, unlike mode '1' raw data
+    frame_hub, image_path = upload
+    frame_hub.register('frame', 'epd7in5_V2')
+    bmp_image_path = str(tmp_path / 'frame.bmp')
+    converter.save_frame(frame_hub.render('epd7in5_V2', image_path)[1], bmp_image_path, 'epd7in5_V2')
+    with Image.open(frame_hub.master_path(image_path)) as master:
+        # in the panel's orientation, as getbuffer rotates it
+        expected = converter.fit_image(master, 480, 800).rotate(90, expand=True).convert('1')
+    with Image.open(bmp_image_path) as saved:
+        assert saved.convert('1').tobytes() == expected.tobytes()
+
+
+def test_render_without_a_master_fits_the_bmp(root):
+    # converted before any frame registered: server.py kept no master
+    frame_hub = hub.Hub()
+    image_path = str(root / 'images' / '2024-01-01' / 'photo.bmp')
+    converter.save_converted(Image.linear_gradient('L').resize((1200, 900)), image_path)
+    frame_hub.register('frame', 'epd7in5_V2')
+    epd = epd7in5_V2.EPD()
+    with Image.open(image_path) as bmp:
+        expected = epd.getbuffer(converter.fit_image(bmp.convert('L'), 480, 800))
+    assert bytes(frame_hub.render('epd7in5_V2', image_path)[1]) == bytes(expected)
+    assert not os.path.exists(frame_hub.master_path(image_path))
@@ -0,0 +1,23 @@
+import os
+
+import manifest
+from framecache import file_digest
+
+
+def test_digest_is_hashed_once_per_size_and_mtime(tmp_path):
+    imports = manifest.ImportManifest(str(tmp_path / 'manifest.json'))
+    path = tmp_path / 'photo.jpg'
+    path.write_bytes(b'one')
+    stat = os.stat(path)
+    assert imports.cached('usb/photo.jpg', stat) is None
+    assert imports.digest(str(path), 'usb/photo.jpg') == file_digest(str(path))
+    assert imports.cached('usb/photo.jpg', stat) == file_digest(str(path))
+    # hashed on another thread, recorded on the main one
+    path.write_bytes(b'two!')
+    os.utime(path, (stat.st_mtime + 10, stat.st_mtime + 10))
+    stat = os.stat(path)
+    assert imports.cached('usb/photo.jpg', stat) is None
+    imports.remember('usb/photo.jpg', stat, file_digest(str(path)))
+    assert imports.digest(str(path), 'usb/photo.jpg') == file_digest(str(path))
+    imports.save()
+    assert manifest.ImportManifest(str(tmp_path / 'manifest.json')).cached('usb/photo.jpg', stat) == file_digest(str(path))
@@ -0,0 +1,146 @@
+#!/usr/bin/python
+# -*- coding:utf-8 -*-
+# Times the frame pipeline against the per-pixel code it replaced, and measures the peak memory
+# of the image fitting (what runs out on a Pi Zero):
+#   python tools/benchmark.py
+import os
+import sys
+import time
+import random
+import tempfile
+import subprocess
+
+from PIL import Image, ImageChops, ImageStat
+
+rootdir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+libdir = os.path.join(rootdir, 'python/lib')
+
+if os.path.exists(libdir):
+    sys.path.append(libdir)
+sys.path.append(rootdir)
+
+import converter
+from waveshare_epd import epd4in2_V2
+
+
+def timeit(function, *args, repeat=5):
+    """
+    :return: Best time of repeat calls in seconds, and the last result.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def getbuffer_loop(image, width, height):
+    # epd4in2_V2.getbuffer before epdbuffer.pack_mono
+    buf = [0xFF] * (int(width / 8) * height)
+    image_monocolor = image.convert('1')
+    imwidth, imheight = image_monocolor.size
+    pixels = image_monocolor.load()
+    if imwidth == width and imheight == height:
+        for y in range(imheight):
+            for x in range(imwidth):
+                if pixels[x, y] == 0:
+                    buf[int((x + y * width) / 8)] &= ~(0x80 >> (x % 8))
+    elif imwidth == height and imheight == width:
+        for y in range(imheight):
+            for x in range(imwidth):
+                newx = y
+                newy = height - x - 1
+                if pixels[x, y] == 0:
+                    buf[int((newx + newy * width) / 8)] &= ~(0x80 >> (y % 8))
+    return buf
+
+
+def bench_getbuffer():
+    epd = epd4in2_V2.EPD()
+    random.seed(1)
+    image = Image.frombytes('L', (epd.height, epd.width),
+                            bytes(random.getrandbits(8) for _ in range(epd.width * epd.height)))
+    old, old_buf = timeit(getbuffer_loop, image, epd.width, epd.height)
+    new, new_buf = timeit(epd.getbuffer, image)
+    assert bytes(old_buf) == bytes(new_buf), "getbuffer output differs from the per-pixel loop"
+    print(f"getbuffer {epd.height}x{epd.width} L    loop {old * 1000:7.1f} ms   pack_mono {new * 1000:7.1f} ms")
+
+
+def fit_image_full(image_path):
+    # converter's crop and fill before JPEG draft decoding: full size decode, single LANCZOS resize
+    image = Image.open(image_path)
+    original_width, original_height = image.size
+    if original_width < original_height:
+        scale_factor = 300 / original_width
+    else:
+        scale_factor = 400 / original_height
+    scaled_width = int(original_width * scale_factor)
+    scaled_height = int(original_height * scale_factor)
+    scaled_image = image.resize((scaled_width, scaled_height), Image.LANCZOS)
+    left = (scaled_width - 300) / 2
+    top = (scaled_height - 400) / 2
+    return scaled_image.crop((left, top, left + 300, top + 400)).convert('L')
+
+
+def fit_image_draft(image_path):
+    return converter.fit_image(Image.open(image_path)).convert('L')
+
+
+def convert_data_file(image_path):
+    with open(image_path, 'rb') as f:
+        data = f.read()
+    with tempfile.TemporaryDirectory() as folder:
+        return converter.convert_data(data, os.path.join(folder, 'frame.bmp'), 'epd4in2_V2')
+
+
+PIPELINES = {'full': fit_image_full, 'draft': fit_image_draft, 'convert_data': convert_data_file}
+
+
+def vm_hwm():
+    # peak resident set size of this process in KB; Linux only, unlike ru_maxrss it starts over at exec
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+
+
+def peak_memory(pipeline, image_path):
+    """
+    Run a pipeline in a new interpreter: PIL allocates pixels outside Python's allocator, so
+    tracemalloc doesn't see them, and the peak RSS of this process holds every earlier run.
+    :return: Growth of the peak resident set size over the interpreter's own, in MB.
+    """
+    output = subprocess.run([sys.executable, __file__, '--peak', pipeline, image_path],
+                            check=True, capture_output=True, text=True).stdout
+    return int(output) / 1024
+
+
+def bench_fit_image(size=(4000, 3000)):
+    with tempfile.TemporaryDirectory() as folder:
+        image_path = os.path.join(folder, 'photo.jpg')
+        # noise over a gradient, so the JPEG isn't trivially compressible
+        gradient = Image.linear_gradient('L').resize(size)
+        noise = Image.effect_noise(size, 40)
+        Image.merge('RGB', (gradient, noise, Image.blend(gradient, noise, 0.5))).save(image_path, quality=90)
+        old, old_image = timeit(fit_image_full, image_path, repeat=3)
+        new, new_image = timeit(fit_image_draft, image_path, repeat=3)
+        convert, _ = timeit(convert_data_file, image_path, repeat=3)
+        old_peak, new_peak, convert_peak = (peak_memory(pipeline, image_path) for pipeline in PIPELINES)
+    difference = ImageStat.Stat(ImageChops.difference(old_image, new_image)).mean[0]
+    print(f"fit_image {size[0]}x{size[1]} JPEG  full {old * 1000:7.1f} ms, peak +{old_peak:.1f} MB"
+          f"   draft {new * 1000:7.1f} ms, peak +{new_peak:.1f} MB   mean difference {difference:.1f}/255")
+    print(f"convert_data {size[0]}x{size[1]} JPEG (draft, BMP and packing) {convert * 1000:7.1f} ms,"
+          f" peak +{convert_peak:.1f} MB")
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--peak']:
+        # child of peak_memory
+        before = vm_hwm()
+        PIPELINES[sys.argv[2]](sys.argv[3])
+        print(vm_hwm() - before)
+    else:
+        bench_getbuffer()
+        bench_fit_image()
@@ -0,0 +1,220 @@
+import os
+import queue
+import struct
+import select
+import ctypes
+import ctypes.util
+import logging
+import threading
+
+import settings
+from framecache import current_file_path
+
+# inotify(7) event bits
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class Target(object):
+    def __init__(self, kind, path, recursive, suffix):
+        self.kind = kind
+        self.path = path
+        self.recursive = recursive
+        self.suffix = suffix
+
+    def wants(self, name):
+        return not name.startswith('.') and (self.suffix is None or name.lower().endswith(self.suffix))
+
+
+class Watcher(object):
+    """
+    Reports changes to watched files and folders as (kind, path) tuples on a queue, from a
+    background thread: inotify where the kernel has it, stat polling every interval otherwise.
+    """
+
+    def __init__(self, events=None, interval=None):
+        """
+        :param events: Queue the changes are put on, a new one by default.
+        :param interval: Seconds between polls when inotify is unavailable, settings.WATCH_POLL_INTERVAL by default.
+        """
+        self.events = events if events is not None else queue.Queue()
+        self.interval = settings.WATCH_POLL_INTERVAL if interval is None else interval
+        self.targets = []
+        self.thread = None
+        self.stopping = threading.Event()
+        self.fd = None
+        self.wds = {}
+        self.libc = None
+        self.snapshots = []
+
+    def add(self, kind, path, recursive=False, suffix=None):
+        """
+        Watch a file, or a folder's entries (and its subfolders' if recursive).
+        Targets may not exist yet, their creation is reported too.
+        :param kind: Put on the queue with the changed path.
+        :param path: File or folder, relative to the script's directory.
+        :param recursive: Also watch subfolders, including ones created later.
+        :param suffix: Only report files ending in it (lower case), e.g. '.bmp'.
+        :return:
+        """
+        self.targets.append(Target(kind, os.path.join(current_file_path, path), recursive, suffix))
+
+    def start(self):
+        """
+        Start watching in a daemon thread.
+        :return: 'inotify' or 'polling'.
+        """
+        try:
+            self._inotify_init()
+            run, how = self._inotify_loop, 'inotify'
+        except (OSError, AttributeError) as e:
+            logging.info(f"inotify unavailable ({e}), polling for changes every {self.interval} s")
+            self.snapshots = [self._snapshot(target, {}) for target in self.targets]
+            run, how = self._poll_loop, 'polling'
+        self.thread = threading.Thread(target=run, name='watcher', daemon=True)
+        self.thread.start()
+        return how
+
+    def stop(self):
+        self.stopping.set()
+
+    def _emit(self, kind, path):
+        self.events.put((kind, path))
+
+    # inotify
+
+    def _inotify_init(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self.fd = fd
+        for target in self.targets:
+            self._watch_target(target)
+
+    def _add_watch(self, folder):
+        if folder in self.wds.values():
+            return True
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+        if wd < 0:
+            logging.info(f"Can't watch {folder}: {os.strerror(ctypes.get_errno())}")
+            return False
+        self.wds[wd] = folder
+        return True
+
+    def _watch_target(self, target):
+        # the parent reports the target being created (and file targets being written)
+        self._add_watch(os.path.dirname(target.path))
+        if os.path.isdir(target.path):
+            self._watch_tree(target)
+
+    def _watch_tree(self, target):
+        self._add_watch(target.path)
+        if target.recursive:
+            for root, dirs, files in os.walk(target.path):
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
+                for d in dirs:
+                    self._add_watch(os.path.join(root, d))
+
+    def _inotify_loop(self):
+        while not self.stopping.is_set():
+            ready, _, _ = select.select([self.fd], [], [], 1.0)
+            if not ready:
+                continue
+            data = os.read(self.fd, 64 * 1024)
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                self._inotify_event(wd, mask, name)
+        os.close(self.fd)
+
+    def _inotify_event(self, wd, mask, name):
+        if mask & IN_Q_OVERFLOW:
+            # events were dropped: report everything as changed
+            for target in self.targets:
+                self._emit(target.kind, target.path)
+            return
+        folder = self.wds.get(wd)
+        if mask & IN_IGNORED:
+            self.wds.pop(wd, None)
+            return
+        if folder is None:
+            return
+        path = os.path.join(folder, name)
+        for target in self.targets:
+            if path == target.path:
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._watch_tree(target)
+                        self._emit(target.kind, path)
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE | IN_MOVED_FROM):
+                    self._emit(target.kind, path)
+            elif folder == target.path or (target.recursive and folder.startswith(target.path + os.sep)):
+                if mask & IN_ISDIR:
+                    if target.recursive and not name.startswith('.'):
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            self._watch_tree(Target(target.kind, path, True, target.suffix))
+                        self._emit(target.kind, path)
+                elif target.wants(name) and mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE | IN_MOVED_FROM):
+                    self._emit(target.kind, path)
+
+    # polling fallback
+
+    def _snapshot(self, target, previous):
+        # path -> mtime_ns of the target and what it would report, folders keyed with a trailing separator
+        snapshot = {}
+        try:
+            stat = os.stat(target.path)
+        except OSError:
+            return snapshot
+        if not os.path.isdir(target.path):
+            snapshot[target.path] = stat.st_mtime_ns
+            return snapshot
+        snapshot[target.path + os.sep] = stat.st_mtime_ns
+        self._scan(target, target.path, previous, snapshot)
+        return snapshot
+
+    def _scan(self, target, folder, previous, snapshot):
+        # unchanged folder mtime: no entries added or removed, skip the stats of files in the recursive case
+        unchanged = target.recursive and previous.get(folder + os.sep) == snapshot[folder + os.sep]
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir():
+                        if target.recursive:
+                            snapshot[entry.path + os.sep] = entry.stat().st_mtime_ns
+                            self._scan(target, entry.path, previous, snapshot)
+                    elif target.wants(entry.name):
+                        if unchanged and entry.path in previous:
+                            snapshot[entry.path] = previous[entry.path]
+                        else:
+                            snapshot[entry.path] = entry.stat().st_mtime_ns
+        except OSError:
+            pass
+
+    def _poll_loop(self):
+        while not self.stopping.wait(self.interval):
+            for i, target in enumerate(self.targets):
+                previous, snapshot = self.snapshots[i], self._snapshot(target, self.snapshots[i])
+                for path in set(previous) | set(snapshot):
+                    if path.endswith(os.sep) and path in previous and path in snapshot:
+                        # a folder's own mtime: its entries tell what changed
+                        continue
+                    if previous.get(path) != snapshot.get(path):
+                        self._emit(target.kind, path.rstrip(os.sep))
+                self.snapshots[i] = snapshot